@@ -25,6 +25,7 @@ from pathlib import Path
 import logging
 from flask import Flask, request, render_template, jsonify
 from rag_system import RAGSystem, RAGInitializationError, RAGQueryError
+from metadata_filter import normalize_filters
 
 
 
@@ -161,8 +162,14 @@ def api_ask():
         if not question:
             return jsonify({"error": "Nincs kérdés megadva"}), 400
 
+        # Opcionális metaadat szűrő, pl. {"category": "Python", "title_prefix": "Python/"}
+        try:
+            filters = normalize_filters(data.get('filters'))
+        except ValueError as filter_error:
+            return jsonify({"error": str(filter_error)}), 400
+
         # Kérdés feldolgozása
-        answer = rag_system.process_question(question)
+        answer = rag_system.process_question(question, filters=filters)
 
         return jsonify({
             "question": question,
@@ -185,6 +192,30 @@ def api_ask():
         }), 500
 
 
+@app.route('/api/suggest')
+def api_suggest():
+    """Oldalcím javaslatok egy előtaghoz (automatikus kiegészítés)"""
+    try:
+        # Lazy initialization
+        if not rag_system.is_initialized:
+            initialize_app()
+
+        prefix = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+
+        return jsonify({
+            "query": prefix,
+            "suggestions": rag_system.suggest_titles(prefix, limit) if prefix else []
+        })
+
+    except Exception as error:
+        logger.error(f"❌ Javaslat hiba: {error}")
+        return jsonify({
+            "error": str(error),
+            "status": "error"
+        }), 500
+
+
 @app.route('/api/health')
 def health_check():
     """Egészségügyi ellenőrzés végpont"""
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:05:33 2026
+@author: zsolt
+
+Lexikális (BM25) keresés és rangfúzió a hibrid visszakereséshez.
+
+A sűrű (embedding alapú) keresés gyakran elvéti a pontos egyezéseket
+(tulajdonnevek, évszámok, kódok). A BM25Index egy invertált index ugyanazokon
+a dokumentumokon, amelyeket az Embedder indexel; a két találati listát a
+reciprocal_rank_fusion egyesíti.
+
+A konfiguráció a wiki_rag.ini [retrieval] szekciójából olvasható:
+
+    [retrieval]
+    mode = hybrid
+    rrf_k = 60
+    candidates = 50
+"""
+import re
+import json
+import math
+import unicodedata
+import configparser
+import logging
+from collections import Counter
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+RETRIEVAL_MODES = ('dense', 'hybrid')
+DEFAULT_RRF_K = 60
+DEFAULT_CANDIDATES = 50
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def load_retrieval_config(path=CONFIG_PATH):
+    """
+    Visszakeresési beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'mode' ('dense' vagy 'hybrid'), 'rrf_k' (a fúzió k állandója) és
+            'candidates' (a fúzióba listánként bevont találatok száma) kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    defaults = {'mode': 'dense', 'rrf_k': DEFAULT_RRF_K, 'candidates': DEFAULT_CANDIDATES}
+    settings = dict(defaults)
+
+    try:
+        config.read(path, encoding='utf-8')
+        mode = config.get('retrieval', 'mode', fallback='dense').strip().lower()
+        rrf_k = config.getint('retrieval', 'rrf_k', fallback=DEFAULT_RRF_K)
+        candidates = config.getint('retrieval', 'candidates', fallback=DEFAULT_CANDIDATES)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [retrieval] konfiguráció (%s), alapértelmezett beállítások", error)
+        return defaults
+
+    if mode not in RETRIEVAL_MODES:
+        logger.warning("Ismeretlen visszakeresési mód: %s, 'dense' használata", mode)
+        mode = 'dense'
+    settings['mode'] = mode
+    settings['rrf_k'] = rrf_k if rrf_k > 0 else DEFAULT_RRF_K
+    settings['candidates'] = candidates if candidates > 0 else DEFAULT_CANDIDATES
+    return settings
+
+
+def tokenize(text):
+    """
+    Szöveg tokenekre bontása a lexikális indexhez.
+
+    Unicode NFC normalizálás és kisbetűsítés után a betű- és számsorozatok
+    számítanak tokennek (az évszámok és kódok darabjai is).
+
+    Args:
+        text (str): A szöveg.
+
+    Returns:
+        list: A tokenek listája.
+    """
+    return WORD_PATTERN.findall(unicodedata.normalize('NFC', text).casefold())
+
+
+def reciprocal_rank_fusion(rankings, k=DEFAULT_RRF_K):
+    """
+    Találati listák egyesítése reciprok rangfúzióval (RRF).
+
+    Egy dokumentum pontszáma a listákban elfoglalt helyezéseiből számolt
+    1 / (k + helyezés) értékek összege (a helyezés 1-től indul).
+
+    Args:
+        rankings (list): Azonosítólisták, mindegyik relevancia szerint rendezve.
+        k (int, optional): A fúzió állandója. Alapértelmezett: 60
+
+    Returns:
+        list: (azonosító, pontszám) párok csökkenő pontszám szerint; azonos
+            pontszámnál az első listabeli előfordulás sorrendje marad.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking, start=1):
+            scores[id_] = scores.get(id_, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    Invertált index BM25 pontozással.
+
+    A dokumentumok belső sorszámot kapnak; a posting listák (sorszám,
+    gyakoriság) párokat tárolnak. Törléskor a dokumentum csak megjelölődik,
+    a statisztikák (dokumentumgyakoriság) a következő teljes építésig
+    tartalmazzák.
+
+    Attributes:
+        k1 (float): A gyakoriság-telítés paramétere.
+        b (float): A dokumentumhossz-normalizálás paramétere.
+    """
+
+    def __init__(self, k1=DEFAULT_K1, b=DEFAULT_B):
+        self.k1 = k1
+        self.b = b
+        self._ids = []
+        self._lengths = []
+        self._positions = {}
+        self._deleted = set()
+        self._postings = {}
+        self._term_arrays = {}
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, doc_id):
+        return int(doc_id) in self._positions
+
+    def add(self, docs):
+        """
+        Dokumentumok hozzáadása; létező azonosító esetén a régi változat törlődik.
+
+        Args:
+            docs (iterable): Dokumentumok 'id' és 'text' kulccsal.
+        """
+        for doc in docs:
+            doc_id = int(doc['id'])
+            if doc_id in self._positions:
+                self.remove([doc_id])
+
+            tokens = tokenize(doc.get('text', ''))
+            position = len(self._ids)
+            self._ids.append(doc_id)
+            self._lengths.append(len(tokens))
+            self._positions[doc_id] = position
+            for term, frequency in Counter(tokens).items():
+                self._postings.setdefault(term, ([], []))
+                self._postings[term][0].append(position)
+                self._postings[term][1].append(frequency)
+                self._term_arrays.pop(term, None)
+        self._arrays = None
+
+    def remove(self, ids):
+        """
+        Dokumentumok törlése azonosító szerint.
+
+        Args:
+            ids (iterable): A törlendő azonosítók.
+        """
+        for doc_id in ids:
+            position = self._positions.pop(int(doc_id), None)
+            if position is not None:
+                self._deleted.add(position)
+        self._arrays = None
+
+    def _statistics(self):
+        """Hossznormalizáló tényezők és élő-maszk (gyorsítótárazva)."""
+        if self._arrays is None:
+            lengths = np.array(self._lengths, dtype='float32')
+            alive = np.ones(len(lengths), dtype=bool)
+            alive[list(self._deleted)] = False
+            average = float(lengths[alive].mean()) if alive.any() else 0.0
+            norms = self.k1 * (1 - self.b + self.b * lengths / max(average, 1e-9))
+            self._arrays = (norms, alive)
+        return self._arrays
+
+    def _term_postings(self, term):
+        """Egy kifejezés posting listája numpy tömbökként (gyorsítótárazva), vagy None."""
+        arrays = self._term_arrays.get(term)
+        if arrays is None and term in self._postings:
+            positions, frequencies = self._postings[term]
+            arrays = (np.asarray(positions, dtype='int64'),
+                      np.asarray(frequencies, dtype='float32'))
+            self._term_arrays[term] = arrays
+        return arrays
+
+    def search(self, query, top_k=10):
+        """
+        Keresés BM25 pontozással.
+
+        Args:
+            query (str): A keresőkérdés.
+            top_k (int, optional): A visszaadandó találatok száma.
+
+        Returns:
+            list: (azonosító, pontszám) párok csökkenő pontszám szerint;
+                csak legalább egy kérdésszót tartalmazó dokumentumok.
+        """
+        if not self._positions:
+            return []
+
+        norms, alive = self._statistics()
+        scores = np.zeros(len(norms), dtype='float32')
+        total = len(self._positions)
+
+        for term in set(tokenize(query)):
+            postings = self._term_postings(term)
+            if postings is None:
+                continue
+            positions, frequencies = postings
+            frequency = min(len(positions), total)
+            idf = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            scores[positions] += idf * frequencies * (self.k1 + 1) / (frequencies + norms[positions])
+
+        scores[~alive] = 0
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind='stable')]
+        return [(self._ids[position], float(scores[position])) for position in matched]
+
+    def save(self, path):
+        """
+        Index mentése JSON fájlba (a törölt dokumentumok nélkül).
+
+        Args:
+            path (Path): A mentési útvonal.
+        """
+        remap = {}
+        for position, doc_id in enumerate(self._ids):
+            if position not in self._deleted:
+                remap[position] = len(remap)
+
+        postings = {}
+        for term, (positions, frequencies) in self._postings.items():
+            kept = [(remap[position], frequency)
+                    for position, frequency in zip(positions, frequencies)
+                    if position in remap]
+            if kept:
+                postings[term] = [list(column) for column in zip(*kept)]
+
+        data = {
+            'k1': self.k1,
+            'b': self.b,
+            'ids': [self._ids[position] for position in remap],
+            'lengths': [self._lengths[position] for position in remap],
+            'postings': postings,
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        logger.info("BM25 index mentve: %d dokumentum, %d kifejezés --> %s",
+                    len(data['ids']), len(postings), path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Mentett index betöltése.
+
+        Args:
+            path (Path): A JSON fájl útvonala.
+
+        Returns:
+            BM25Index: A betöltött index.
+
+        Raises:
+            FileNotFoundError: Ha a fájl nem létezik.
+        """
+        with Path(path).open('r', encoding='utf-8') as file:
+            data = json.load(file)
+
+        index = cls(k1=data['k1'], b=data['b'])
+        index._ids = data['ids']
+        index._lengths = data['lengths']
+        index._positions = {doc_id: position for position, doc_id in enumerate(data['ids'])}
+        index._postings = {term: (positions, frequencies)
+                           for term, (positions, frequencies) in data['postings'].items()}
+        logger.info("BM25 index betöltve: %d dokumentum", len(index))
+        return index
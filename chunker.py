@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:40 2026
+@author: zsolt
+
+Szakasz-alapú darabolás (chunking) MediaWiki oldalakhoz.
+
+A modul a betöltött wiki oldalakat (load_docs) az indexelés (build_index) előtt
+kisebb, önállóan beágyazható szövegrészekre (passage) bontja:
+- A wikiszöveg a `== Cím ==` szakaszcímek mentén kerül felosztásra.
+- A túl hosszú szakaszok szószám-keret szerint, átfedéssel darabolódnak tovább.
+- Minden passage visszamutat az oldalára ('title') és szakaszára ('section').
+
+A konfiguráció a wiki_rag.ini [chunking] szekciójából olvasható:
+
+    [chunking]
+    max_words = 100
+    overlap = 20
+"""
+import re
+import configparser
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+# A keret szavakban értendő, nem a kódoló tokenjeiben: a LaBSE 256
+# wordpiece tokent olvas, egy magyar szó (toldalékok, összetett szavak)
+# átlagosan 1,5-2 wordpiece, ezért 100 szó még biztonsággal belefér.
+DEFAULT_MAX_WORDS = 100
+DEFAULT_OVERLAP = 20
+
+# Szakaszcímek: == Cím ==, === Alcím ===, ... (2-6 egyenlőségjel)
+SECTION_PATTERN = re.compile(r'^(={2,6})[ \t]*(.+?)[ \t]*\1[ \t]*$', re.MULTILINE)
+WORD_PATTERN = re.compile(r'\S+')
+
+
+def load_chunking_config(path=CONFIG_PATH):
+    """
+    Darabolási beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'max_words' és 'overlap' kulcsokkal. Hibás vagy hiányzó
+            értékek esetén az alapértelmezettek kerülnek visszaadásra.
+    """
+    config = configparser.ConfigParser()
+    settings = {'max_words': DEFAULT_MAX_WORDS, 'overlap': DEFAULT_OVERLAP}
+
+    try:
+        config.read(path, encoding='utf-8')
+        max_words = config.getint('chunking', 'max_words',
+                                  fallback=DEFAULT_MAX_WORDS)
+        overlap = config.getint('chunking', 'overlap',
+                                fallback=DEFAULT_OVERLAP)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [chunking] konfiguráció (%s), alapértelmezett értékek", error)
+        return settings
+
+    if config.has_option('chunking', 'max_tokens'):
+        logger.warning("A [chunking] max_tokens elavult és figyelmen kívül marad "
+                       "(szószámot mért), helyette: max_words = %d", max_words)
+    if max_words <= 0:
+        logger.warning("Érvénytelen max_words: %d, alapértelmezett: %d",
+                       max_words, DEFAULT_MAX_WORDS)
+        max_words = DEFAULT_MAX_WORDS
+    if overlap < 0 or overlap >= max_words:
+        logger.warning("Érvénytelen overlap: %d, használt érték: %d",
+                       overlap, min(DEFAULT_OVERLAP, max_words // 2))
+        overlap = min(DEFAULT_OVERLAP, max_words // 2)
+
+    settings['max_words'] = max_words
+    settings['overlap'] = overlap
+    return settings
+
+
+def split_sections(text):
+    """
+    Wikiszöveg felosztása szakaszcímek mentén.
+
+    Args:
+        text (str): A nyers wikiszöveg.
+
+    Returns:
+        list: (szakaszcím, szakasztörzs) párok listája. Az első szakaszcím
+            előtti bevezető rész címe üres string.
+    """
+    sections = []
+    current_title = ''
+    position = 0
+
+    for match in SECTION_PATTERN.finditer(text):
+        sections.append((current_title, text[position:match.start()]))
+        current_title = match.group(2).strip()
+        position = match.end()
+
+    sections.append((current_title, text[position:]))
+    return [(title, body.strip()) for title, body in sections if body.strip()]
+
+
+def chunk_text(text, max_words=DEFAULT_MAX_WORDS, overlap=DEFAULT_OVERLAP):
+    """
+    Szöveg darabolása szószám-keret szerint, átfedéssel.
+
+    Szónak a whitespace-szel elválasztott részek számítanak (nem a kódoló
+    tokenjei, lásd DEFAULT_MAX_WORDS); a darabok az eredeti szöveg
+    szeleteiként állnak elő, így a sortörések megmaradnak.
+
+    Args:
+        text (str): A darabolandó szöveg.
+        max_words (int, optional): Szavak maximális száma darabonként.
+        overlap (int, optional): Egymást követő darabok közös szavainak száma.
+
+    Returns:
+        list: A szövegdarabok listája.
+
+    Raises:
+        ValueError: Ha max_words nem pozitív, vagy overlap nincs a [0, max_words) tartományban.
+    """
+    if max_words <= 0:
+        raise ValueError("A max_words értéke pozitív kell legyen")
+    if overlap < 0 or overlap >= max_words:
+        raise ValueError("Az overlap értéke 0 és max_words közé kell essen")
+
+    spans = [match.span() for match in WORD_PATTERN.finditer(text)]
+    if not spans:
+        return []
+    if len(spans) <= max_words:
+        return [text[spans[0][0]:spans[-1][1]]]
+
+    chunks = []
+    step = max_words - overlap
+    for start in range(0, len(spans), step):
+        end = min(start + max_words, len(spans))
+        chunks.append(text[spans[start][0]:spans[end - 1][1]])
+        if end == len(spans):
+            break
+    return chunks
+
+
+def iter_passages(docs, max_words=DEFAULT_MAX_WORDS, overlap=DEFAULT_OVERLAP):
+    """
+    Wiki oldalak passage-ekre bontása generátorként (streamelt indexeléshez).
+
+    Az oldal 'text' mezőn kívüli mezői (pl. 'title') minden passage-be
+    átmásolódnak, így a passage visszavezethető a forrásoldalára.
+
+    Args:
+        docs (iterable): Oldalak, dict-ek 'title' és 'text' kulcsokkal.
+        max_words (int, optional): Szavak maximális száma passage-enként.
+        overlap (int, optional): Átfedő szavak száma a szakaszon belüli darabok között.
+
+    Yields:
+        dict: Passage 'title', 'section', 'chunk' és 'text' kulcsokkal.
+            A 'chunk' a passage oldalon belüli sorszáma.
+    """
+    for doc in docs:
+        text = doc.get('text') or ''
+        base = {key: value for key, value in doc.items() if key != 'text'}
+        chunk_no = 0
+
+        for section, body in split_sections(text):
+            for piece in chunk_text(body, max_words, overlap):
+                passage = dict(base)
+                passage['section'] = section
+                passage['chunk'] = chunk_no
+                passage['text'] = piece
+                yield passage
+                chunk_no += 1
+
+
+def chunk_documents(docs, max_words=DEFAULT_MAX_WORDS, overlap=DEFAULT_OVERLAP):
+    """
+    Wiki oldalak passage-ekre bontása szakaszok és szószám-keret szerint.
+
+    Args:
+        docs (list): Oldalak listája, dict-ek 'title' és 'text' kulcsokkal.
+        max_words (int, optional): Szavak maximális száma passage-enként.
+        overlap (int, optional): Átfedő szavak száma a szakaszon belüli darabok között.
+
+    Returns:
+        list: Passage-ek listája (lásd iter_passages).
+    """
+    passages = list(iter_passages(docs, max_words, overlap))
+    logger.info("Darabolás kész: %d oldal --> %d passage (max_words=%d, overlap=%d)",
+                len(docs), len(passages), max_words, overlap)
+    return passages
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:21:34 2026
+@author: zsolt
+
+Közel azonos passage-ek összevonása indexelés előtt (MinHash + LSH).
+
+A MediaWiki korpuszokban sok a közel azonos szöveg (fordítások, csonkok,
+sablonból generált listák). Ezek mindegyike kódolási időt, indexmemóriát és
+promptbeli helyet foglal, ha több példányuk együtt kerül elő. A dedup lépés
+a darabolás után, a build_index előtt fut:
+
+- Minden passage szó-shingle halmazából MinHash aláírás készül.
+- Az aláírások sávjai (LSH) alapján csak a valószínűleg hasonló párok
+  kerülnek összevetésre, így a futásidő közel lineáris.
+- A becsült Jaccard-hasonlóság threshold feletti passage-ek egy
+  reprezentánsba olvadnak, amelynek 'titles' mezője az összes forrásoldal
+  címét tartalmazza.
+
+A konfiguráció a wiki_rag.ini [dedup] szekciójából olvasható:
+
+    [dedup]
+    enabled = true
+    threshold = 0.85
+    num_perm = 128
+    shingle_size = 3
+    report = data/dedup_report.json
+"""
+import re
+import json
+import zlib
+import configparser
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+DEFAULT_DEDUP_CONFIG = {
+    'enabled': False,
+    'threshold': 0.85,
+    'num_perm': 128,
+    'shingle_size': 3,
+    'report': None,
+}
+# A jelentésben ennyi legnagyobb csoport szerepel
+REPORT_TOP_CLUSTERS = 20
+
+MERSENNE_PRIME = (1 << 31) - 1
+HASH_SEED = 1
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def load_dedup_config(path=CONFIG_PATH):
+    """
+    Deduplikációs beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'enabled', 'threshold' (0..1), 'num_perm', 'shingle_size' és
+            'report' (Path vagy None) kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_DEDUP_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        settings['enabled'] = config.getboolean('dedup', 'enabled', fallback=False)
+        settings['threshold'] = config.getfloat('dedup', 'threshold',
+                                                fallback=DEFAULT_DEDUP_CONFIG['threshold'])
+        settings['num_perm'] = max(config.getint('dedup', 'num_perm',
+                                                 fallback=DEFAULT_DEDUP_CONFIG['num_perm']), 16)
+        settings['shingle_size'] = max(config.getint(
+            'dedup', 'shingle_size', fallback=DEFAULT_DEDUP_CONFIG['shingle_size']), 1)
+        report = config.get('dedup', 'report', fallback='').strip()
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [dedup] konfiguráció (%s), deduplikáció kikapcsolva", error)
+        return dict(DEFAULT_DEDUP_CONFIG)
+
+    if not 0 < settings['threshold'] <= 1:
+        logger.warning("A threshold 0 és 1 közé kell essen (%s), alapértelmezett: %s",
+                       settings['threshold'], DEFAULT_DEDUP_CONFIG['threshold'])
+        settings['threshold'] = DEFAULT_DEDUP_CONFIG['threshold']
+    settings['report'] = Path(report) if report else None
+    return settings
+
+
+def lsh_bands(num_perm, threshold):
+    """
+    Az LSH sávok száma és sávszélessége egy hasonlósági küszöbhöz.
+
+    Két aláírás akkor kerül összevetésre, ha legalább egy sávjuk egyezik;
+    ennek valószínűsége (1/b)^(1/r) hasonlóságnál 50%. A választás a küszöb
+    alatti legközelebbi ilyen pontot adja (inkább több jelölt, mint kihagyott pár).
+
+    Args:
+        num_perm (int): Az aláírás hossza.
+        threshold (float): A Jaccard-hasonlósági küszöb.
+
+    Returns:
+        tuple: (sávok száma, sávonkénti sorok száma).
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """MinHash aláírások szó-shingle halmazokból, rögzített hash-permutációkkal."""
+
+    def __init__(self, num_perm=DEFAULT_DEDUP_CONFIG['num_perm'],
+                 shingle_size=DEFAULT_DEDUP_CONFIG['shingle_size']):
+        """
+        Args:
+            num_perm (int, optional): Az aláírás hossza (hash-függvények száma).
+            shingle_size (int, optional): Szavak száma shingle-önként.
+        """
+        rng = np.random.default_rng(HASH_SEED)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, text):
+        """A szöveg kisbetűs szó-shingle-jeinek 31 bites hash-ei."""
+        words = WORD_PATTERN.findall(text.casefold())
+        size = min(self.shingle_size, len(words))
+        if not size:
+            return np.empty(0, dtype=np.uint64)
+        hashes = {zlib.crc32(' '.join(words[start:start + size]).encode('utf-8'))
+                  for start in range(len(words) - size + 1)}
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes)) & MERSENNE_PRIME
+
+    def signature(self, text):
+        """
+        A szöveg MinHash aláírása.
+
+        Args:
+            text (str): A szöveg.
+
+        Returns:
+            np.ndarray: num_perm hosszú uint64 tömb, vagy None üres szövegnél.
+        """
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        return ((self._a * shingles + self._b) % MERSENNE_PRIME).min(axis=1)
+
+
+def _source_titles(doc):
+    """A passage forrásoldalainak címei (a sajátja elöl)."""
+    titles = [doc['title']] if doc.get('title') else []
+    return titles + [title for title in doc.get('titles') or [] if title not in titles]
+
+
+def deduplicate(passages, threshold=DEFAULT_DEDUP_CONFIG['threshold'],
+                num_perm=DEFAULT_DEDUP_CONFIG['num_perm'],
+                shingle_size=DEFAULT_DEDUP_CONFIG['shingle_size']):
+    """
+    Közel azonos passage-ek összevonása.
+
+    Minden csoportból az első előfordulás marad meg (a sorrend stabil); a
+    reprezentáns 'titles' mezője a csoport összes forrásoldalának címét
+    tartalmazza. Üres szövegű passage-ek változatlanul átmennek.
+
+    Args:
+        passages (list): Passage-ek (dict-ek 'title' és 'text' kulcsokkal).
+        threshold (float, optional): Becsült Jaccard-hasonlósági küszöb.
+        num_perm (int, optional): A MinHash aláírás hossza.
+        shingle_size (int, optional): Szavak száma shingle-önként.
+
+    Returns:
+        tuple: (megtartott passage-ek listája, jelentés dict: 'input', 'kept',
+            'removed', 'clusters', 'threshold' és 'largest').
+    """
+    hasher = MinHasher(num_perm, shingle_size)
+    bands, rows = lsh_bands(num_perm, threshold)
+    buckets = {}
+    signatures = []
+    kept = []
+    members = []
+
+    for passage in passages:
+        signature = hasher.signature(passage.get('text') or '')
+        if signature is None:
+            kept.append(passage)
+            members.append(None)
+            signatures.append(None)
+            continue
+
+        keys = [(band, signature[band * rows:(band + 1) * rows].tobytes())
+                for band in range(bands)]
+        candidates = {position for key in keys for position in buckets.get(key, ())}
+        best, best_similarity = None, threshold
+        for position in candidates:
+            similarity = float(np.mean(signatures[position] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = position, similarity
+
+        if best is None:
+            position = len(kept)
+            kept.append(passage)
+            members.append([passage])
+            signatures.append(signature)
+            for key in keys:
+                buckets.setdefault(key, []).append(position)
+        else:
+            members[best].append(passage)
+
+    clusters = []
+    for position, group in enumerate(members):
+        if group is None or len(group) == 1:
+            continue
+        titles = []
+        for member in group:
+            titles.extend(title for title in _source_titles(member) if title not in titles)
+        kept[position] = {**kept[position], 'titles': titles}
+        clusters.append({'title': kept[position].get('title'),
+                         'section': kept[position].get('section'),
+                         'duplicates': len(group) - 1, 'titles': titles})
+
+    clusters.sort(key=lambda cluster: -cluster['duplicates'])
+    report = {
+        'input': len(passages),
+        'kept': len(kept),
+        'removed': len(passages) - len(kept),
+        'clusters': len(clusters),
+        'threshold': threshold,
+        'largest': clusters[:REPORT_TOP_CLUSTERS],
+    }
+    logger.info("Deduplikáció: %d --> %d passage (%d összevont csoport, küszöb: %.2f)",
+                report['input'], report['kept'], report['clusters'], threshold)
+    return kept, report
+
+
+def save_report(report, path):
+    """
+    Deduplikációs jelentés mentése JSON fájlba.
+
+    Args:
+        report (dict): A deduplicate() jelentése.
+        path (Path): A mentési útvonal.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    logger.info("Deduplikációs jelentés mentve --> %s", path)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:10:27 2026
+@author: zsolt
+
+Lemezen tárolt, azonosító szerint lustán olvasható dokumentumtár.
+
+A dokumentumok JSONL fájlba íródnak (soronként egy JSON rekord), mellé egy
+eltolás-tábla (.offsets.npy) kerül, amely az azonosítók szerint rendezett
+(id, bájt eltolás) párokat tartalmazza. Olvasáskor az eltolás-tábla
+memóriába leképezve nyílik meg (csak az azonosító oszlop kerül a heapre),
+a rekordok kérésre, egyenként töltődnek be.
+"""
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def offsets_path(docs_path):
+    """Az eltolás-tábla útvonala (pl. data/passages.offsets.npy)."""
+    docs_path = Path(docs_path)
+    return docs_path.with_name(docs_path.stem + '.offsets.npy')
+
+
+class DocStoreWriter:
+    """
+    Dokumentumok inkrementális írása JSONL fájlba.
+
+    Context managerként használható; lezáráskor kiírja az eltolás-táblát.
+    Az írás ideiglenes fájlokba történik, amelyek lezáráskor cserével kerülnek
+    a helyükre, így a régi fájlokat olvasó DocStore zavartalanul működik tovább.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (Path): A JSONL fájl útvonala (felülíródik).
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._temp_path = self.path.with_name(self.path.name + '.tmp')
+        self._file = self._temp_path.open('wb')
+        self._ids = []
+        self._offsets = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def write(self, doc):
+        """
+        Egy dokumentum hozzáfűzése.
+
+        Args:
+            doc (dict): A dokumentum, 'id' kulccsal.
+        """
+        self._ids.append(doc['id'])
+        self._offsets.append(self._file.tell())
+        self._file.write(json.dumps(doc, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    def close(self):
+        """A fájl lezárása és az azonosító szerint rendezett eltolás-tábla mentése."""
+        if self._file.closed:
+            return
+        self._file.close()
+
+        table = np.array([self._ids, self._offsets], dtype='int64').T.reshape(-1, 2)
+        table = table[np.argsort(table[:, 0], kind='stable')]
+        table_path = offsets_path(self.path)
+        temp_table_path = table_path.with_name(table_path.name + '.tmp')
+        with temp_table_path.open('wb') as file:
+            np.save(file, table)
+        os.replace(self._temp_path, self.path)
+        os.replace(temp_table_path, table_path)
+        logger.info("Dokumentumtár mentve: %d dokumentum --> %s", len(table), self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DocStore:
+    """
+    Azonosító szerint lustán olvasott dokumentumtár.
+
+    A dict-hez hasonló olvasó interfészt nyújt (get, in, len, iterálás),
+    így az Embedder dokumentumlistája helyett használható.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (Path): A DocStoreWriter által írt JSONL fájl útvonala.
+
+        Raises:
+            FileNotFoundError: Ha a JSONL fájl vagy az eltolás-tábla hiányzik.
+        """
+        self.path = Path(path)
+        self._table = np.load(offsets_path(self.path), mmap_mode='r')
+        # Folytonos azonosító oszlop a bináris kereséshez
+        self._ids = np.ascontiguousarray(self._table[:, 0])
+        self._file = self.path.open('rb')
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, doc_id):
+        return self._position(doc_id) is not None
+
+    def __iter__(self):
+        """A dokumentumok bejárása a fájl sorrendjében (streamelve)."""
+        with self.path.open('r', encoding='utf-8') as file:
+            for line in file:
+                yield json.loads(line)
+
+    def ids(self):
+        """Az összes dokumentumazonosító (rendezett int64 tömb)."""
+        return self._ids
+
+    def _position(self, doc_id):
+        """Az azonosító sora az eltolás-táblában, vagy None."""
+        ids = self._ids
+        position = int(np.searchsorted(ids, doc_id))
+        if position < len(ids) and ids[position] == doc_id:
+            return position
+        return None
+
+    def get(self, doc_id, default=None):
+        """
+        Egy dokumentum beolvasása azonosító szerint.
+
+        Args:
+            doc_id (int): A dokumentum azonosítója.
+            default: Visszatérési érték, ha az azonosító nem létezik.
+
+        Returns:
+            dict: A dokumentum, vagy default.
+        """
+        position = self._position(doc_id)
+        if position is None:
+            return default
+
+        with self._lock:
+            self._file.seek(int(self._table[position, 1]))
+            line = self._file.readline()
+        return json.loads(line)
+
+    def close(self):
+        """A megnyitott fájl lezárása."""
+        self._file.close()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:37 2026
+@author: zsolt
+
+MediaWiki XML dump (pages-articles.xml) importálása hálózat nélkül.
+
+Nagy wikiknél az élő API bejárása lassú, a build gépeken pedig gyakran nincs
+hálózat. Ez a modul a retriever letöltése helyett egy XML dumpból állítja elő
+a data/wiki_pages.json fájlt, ugyanabban a formátumban (title, text, pageid,
+revid, namespace, categories, source), így a további feldolgozás változatlan.
+
+- A dump folyamatosan, iterparse-szal olvasódik; minden <page> elem a
+  feldolgozása után törlődik, így a memóriahasználat oldalanként korlátos.
+- A .bz2 és .gz tömörítés a fájl első bájtjai alapján, automatikusan kezelt.
+- A wiki_rag.ini [selected], [related] és [wiki] limit szabályai ugyanúgy
+  érvényesek, mint az API letöltésnél; a névterek a [dump] szekcióban adhatók meg.
+- Az átirányítás a kiválasztott oldalnál a céloldal tartalmát adja a kért címen.
+- Az áteresztőképesség (oldal/s) a logban és a visszaadott statisztikában látható.
+
+A konfiguráció a wiki_rag.ini [dump] szekciójából olvasható:
+
+    [dump]
+    path = dumps/huwiki-latest-pages-articles.xml.bz2
+    namespaces = 0
+"""
+import os
+import re
+import bz2
+import gzip
+import json
+import time
+import configparser
+import logging
+from pathlib import Path
+from urllib.parse import urlparse
+import xml.etree.ElementTree as ET
+
+from retriever import _parse_selected_pages, load_config, MAX_DOWNLOAD, DEFAULT_OUTPUT
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+DEFAULT_DUMP_CONFIG = {
+    'path': None,          # A dump útvonala; ha meg van adva, az API letöltés helyett ez fut
+    'namespaces': (0,),    # A wiki url-ről és a [related] alapján importált névterek
+}
+# Ennyi beolvasott oldalanként kerül a haladás (és az oldal/s) a logba
+PROGRESS_INTERVAL = 10000
+CATEGORY_NAMESPACE = 14
+BZ2_MAGIC = b'BZh'
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def load_dump_config(path=CONFIG_PATH):
+    """
+    Dump importálási beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'path' (Path vagy None) és 'namespaces' (egészek tuple-je) kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_DUMP_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        dump_path = config.get('dump', 'path', fallback='').strip()
+        namespaces = config.get('dump', 'namespaces', fallback='').strip()
+        if namespaces:
+            settings['namespaces'] = tuple(int(value) for value in namespaces.split(',')
+                                           if value.strip())
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [dump] konfiguráció (%s), dump importálás kikapcsolva", error)
+        return dict(DEFAULT_DUMP_CONFIG)
+    settings['path'] = Path(dump_path) if dump_path else None
+    return settings
+
+
+def open_dump(path):
+    """
+    Dump megnyitása bináris olvasásra, a tömörítés automatikus felismerésével.
+
+    Args:
+        path (Path): A dump útvonala (.xml, .xml.bz2 vagy .xml.gz).
+
+    Returns:
+        file: Olvasható bináris fájlobjektum (kicsomagolt tartalommal).
+
+    Raises:
+        FileNotFoundError: Ha a fájl nem létezik.
+    """
+    with open(path, 'rb') as file:
+        magic = file.read(3)
+    if magic.startswith(BZ2_MAGIC):
+        return bz2.open(path, 'rb')
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _local(tag):
+    """Az XML tag neve névtér nélkül ('{...}page' -> 'page')."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(elem, name, default=None):
+    """Az első adott nevű gyermekelem szövege (névtértől függetlenül)."""
+    for child in elem:
+        if _local(child.tag) == name:
+            return child.text if child.text is not None else ''
+    return default
+
+
+def _parse_siteinfo(elem):
+    """A <siteinfo> elem adatai: 'sitename', 'base' és 'namespaces' (kulcs -> név)."""
+    namespaces = {}
+    for child in elem:
+        if _local(child.tag) == 'namespaces':
+            namespaces = {int(namespace.get('key')): namespace.text or ''
+                          for namespace in child}
+    return {'sitename': _child_text(elem, 'sitename'),
+            'base': _child_text(elem, 'base'),
+            'namespaces': namespaces}
+
+
+def _parse_page(elem):
+    """Egy <page> elem adatai; több revízió esetén az utolsóé a tartalom."""
+    revision = None
+    redirect = None
+    for child in elem:
+        name = _local(child.tag)
+        if name == 'revision':
+            revision = child
+        elif name == 'redirect':
+            redirect = child.get('title')
+    page_id = _child_text(elem, 'id')
+    revision_id = _child_text(revision, 'id') if revision is not None else None
+    return {
+        'title': _child_text(elem, 'title', ''),
+        'text': (_child_text(revision, 'text', '') if revision is not None else '') or '',
+        'pageid': int(page_id) if page_id else None,
+        'revid': int(revision_id) if revision_id else None,
+        'namespace': int(_child_text(elem, 'ns', '0') or 0),
+        'redirect': redirect,
+    }
+
+
+def iter_pages(path, siteinfo=None):
+    """
+    A dump oldalainak folyamatos beolvasása.
+
+    Args:
+        path (Path): A dump útvonala (tömörítve vagy anélkül).
+        siteinfo (dict, optional): Ha meg van adva, a <siteinfo> adataival
+            ('sitename', 'base', 'namespaces') töltődik fel az első oldal előtt.
+
+    Yields:
+        dict: 'title', 'text', 'pageid', 'revid', 'namespace' és 'redirect'
+            (átirányítás célja vagy None) kulcsokkal.
+    """
+    with open_dump(path) as file:
+        root = None
+        for event, elem in ET.iterparse(file, events=('start', 'end')):
+            if root is None:
+                root = elem
+                continue
+            if event != 'end':
+                continue
+            name = _local(elem.tag)
+            if name == 'siteinfo':
+                if siteinfo is not None:
+                    siteinfo.update(_parse_siteinfo(elem))
+                root.clear()
+            elif name == 'page':
+                page = _parse_page(elem)
+                # A feldolgozott elemek törlése: a memória oldalanként korlátos
+                root.clear()
+                yield page
+
+
+def category_pattern(namespaces):
+    """
+    Kategória hivatkozásokat ([[Kategória:Név]]) felismerő reguláris kifejezés.
+
+    Args:
+        namespaces (dict): A siteinfo névterei (kulcs -> név).
+
+    Returns:
+        re.Pattern: Az első csoport a kategória neve.
+    """
+    names = {'Category', namespaces.get(CATEGORY_NAMESPACE) or 'Category'}
+    alternatives = '|'.join(re.escape(name) for name in sorted(names))
+    return re.compile(r'\[\[\s*(?:' + alternatives + r')\s*:\s*([^\]|\n]+?)\s*(?:\|[^\]]*)?\]\]',
+                      re.IGNORECASE)
+
+
+def _to_document(page, source, pattern, title=None):
+    """A beolvasott oldal a retriever oldalformátumában (lásd retriever.page_from_api)."""
+    categories = []
+    for category in pattern.findall(page['text']):
+        if category not in categories:
+            categories.append(category)
+    return {
+        'title': title or page['title'],
+        'text': page['text'],
+        'pageid': page['pageid'],
+        'revid': page['revid'],
+        'namespace': page['namespace'],
+        'categories': categories,
+        'source': source,
+    }
+
+
+class _JsonArrayWriter:
+    """Dokumentumok JSON tömbbe írása egyenként, ideiglenes fájlon keresztül, atomi cserével."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+        self._temp_path = self.path.with_name(self.path.name + '.tmp')
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self._temp_path.open('w', encoding='utf-8')
+        self._file.write('[')
+        return self
+
+    def write(self, doc):
+        self._file.write((',\n' if self.count else '\n')
+                         + json.dumps(doc, ensure_ascii=False))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._file.write('\n]\n')
+        self._file.close()
+        if exc_type is None:
+            os.replace(self._temp_path, self.path)
+        else:
+            self._temp_path.unlink(missing_ok=True)
+        return False
+
+
+def import_dump(dump_path, output_path=DEFAULT_OUTPUT, selected=(), related_root='',
+                related_limit=50, limit=MAX_DOWNLOAD, namespaces=DEFAULT_DUMP_CONFIG['namespaces'],
+                source=None):
+    """
+    Oldalak importálása XML dumpból az auto_fetch_from_config szabályai szerint.
+
+    - Ha sem selected, sem related_root nincs megadva, a namespaces névterek
+      első limit darab (nem átirányító, nem üres) oldala kerül importálásra.
+    - Egyébként a kiválasztott oldalak (a kért sorrendben, bármely névtérből,
+      átirányítás esetén a céloldal tartalmával), majd a maradék limitig a
+      related_root előtaggal kezdődő oldalak.
+
+    Args:
+        dump_path (Path): A dump útvonala (.xml, .xml.bz2 vagy .xml.gz).
+        output_path (Path, optional): A kimeneti JSON fájl. Alapértelmezett: DEFAULT_OUTPUT
+        selected (iterable, optional): A kiválasztott oldalak címei.
+        related_root (str, optional): A kapcsolódó oldalak címelőtagja.
+        related_limit (int, optional): A kapcsolódó oldalak maximális száma.
+        limit (int, optional): Az importált oldalak maximális száma.
+        namespaces (tuple, optional): A wiki szintű és a kapcsolódó importálás névterei.
+        source (str, optional): A forrás wiki azonosítója; alapértelmezés
+            szerint a dump siteinfo base URL-jének hosztja.
+
+    Returns:
+        dict: Statisztika: 'scanned', 'imported', 'missing' (nem talált kiválasztott
+            címek), 'seconds' és 'pages_per_sec'.
+
+    Raises:
+        FileNotFoundError: Ha a dump nem létezik.
+    """
+    selected = list(dict.fromkeys(selected))[:limit]
+    related_limit = min(related_limit, limit - len(selected)) if related_root else 0
+    full = not selected and not related_root
+    namespaces = set(namespaces)
+
+    siteinfo = {}
+    pattern = None
+    wanted = {title: title for title in selected}   # Keresett cím -> kért cím
+    found = {}
+    related = []
+    scanned = 0
+    started = time.perf_counter()
+
+    def done():
+        return len(found) == len(selected) and len(related) >= related_limit
+
+    with _JsonArrayWriter(output_path) as writer:
+        for page in iter_pages(dump_path, siteinfo):
+            scanned += 1
+            if pattern is None:
+                pattern = category_pattern(siteinfo.get('namespaces', {}))
+                source = source or urlparse(siteinfo.get('base') or '').netloc or None
+            if scanned % PROGRESS_INTERVAL == 0:
+                elapsed = time.perf_counter() - started
+                logger.info("Dump: %d oldal beolvasva, %d importálva (%.0f oldal/s)",
+                            scanned, writer.count + len(found) + len(related),
+                            scanned / elapsed if elapsed else 0.0)
+
+            title = page['title']
+            if title in wanted and wanted[title] not in found:
+                if page['redirect']:
+                    wanted.setdefault(page['redirect'], wanted[title])
+                elif page['text'].strip():
+                    found[wanted[title]] = _to_document(page, source, pattern, wanted[title])
+                else:
+                    logger.warning("Üres oldal: %s", title)
+            if page['redirect'] or page['namespace'] not in namespaces or not page['text'].strip():
+                continue
+
+            if full:
+                writer.write(_to_document(page, source, pattern))
+                if writer.count >= limit:
+                    break
+            elif (len(related) < related_limit and title.startswith(related_root)
+                  and title not in wanted):
+                related.append(_to_document(page, source, pattern))
+            if not full and done():
+                break
+
+        # Az átirányítás célja a dumpban a forrás előtt is lehet: második menet
+        pending = {target: requested for target, requested in wanted.items()
+                   if requested not in found and target != requested}
+        if pending and not done():
+            logger.info("Átirányítások céljainak keresése: %d oldal", len(pending))
+            for page in iter_pages(dump_path):
+                requested = pending.get(page['title'])
+                if requested and requested not in found and not page['redirect']:
+                    found[requested] = _to_document(page, source, pattern, requested)
+                    if all(requested in found for requested in pending.values()):
+                        break
+
+        for title in selected:
+            if title in found:
+                writer.write(found[title])
+        for doc in related:
+            writer.write(doc)
+
+    missing = [title for title in selected if title not in found]
+    for title in missing:
+        logger.warning("Az oldal nem található a dumpban: %s", title)
+    elapsed = time.perf_counter() - started
+    stats = {
+        'scanned': scanned,
+        'imported': writer.count,
+        'missing': missing,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(scanned / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info("Dump importálva: %d oldal --> %s (%d beolvasva, %.1f s, %.0f oldal/s)",
+                stats['imported'], output_path, scanned, elapsed, stats['pages_per_sec'])
+    return stats
+
+
+def import_dump_from_config(conf_file='wiki_rag.ini'):
+    """
+    XML dump importálása a konfigurációs fájl alapján (az auto_fetch_from_config megfelelője).
+
+    Args:
+        conf_file (str, optional): A konfigurációs fájl neve/útvonala.
+            Alapértelmezett: 'wiki_rag.ini'
+
+    Returns:
+        dict: Az import_dump statisztikája, vagy None, ha nincs megadva dump
+            vagy a konfiguráció hibás.
+    """
+    settings = load_dump_config(conf_file)
+    if settings['path'] is None:
+        logger.error("A [dump] szekcióban nincs megadva path.")
+        return None
+
+    config = load_config(conf_file)
+    try:
+        selected = _parse_selected_pages(config)
+    except ValueError as error:
+        logger.error(str(error))
+        return None
+    limit_str = config.get('wiki', 'limit', fallback='').strip()
+    related_limit_str = config.get('related', 'limit', fallback='50').strip()
+    return import_dump(
+        settings['path'],
+        selected=selected,
+        related_root=config.get('related', 'root', fallback='').strip(),
+        related_limit=int(related_limit_str) if related_limit_str.isdigit() else 50,
+        limit=int(limit_str) if limit_str.isdigit() else MAX_DOWNLOAD,
+        namespaces=settings['namespaces'],
+        source=config.get('wiki', 'url', fallback='').strip() or None)
+
+
+# Példa használat
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+    )
+
+    import_dump_from_config()
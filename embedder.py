@@ -12,14 +12,133 @@ import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 import logging
 import json
+import hashlib
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
+from encoder_registry import get_encoder, load_encoder_config, compare_backends
+from index_factory import (load_index_config, create_index, train_index, read_index,
+                           apply_search_params, detect_index_type, detect_codec,
+                           with_ids, is_binary, binary_codes, bytes_per_vector,
+                           selector_params, stored_dim, detect_reduction,
+                           stored_ids, unwrap_ivf, remove_ids)
+from parallel_encoder import (encode_texts, load_encoding_config, encoder_loader,
+                              EncoderPool)
+from doc_store import DocStore, DocStoreWriter, offsets_path
+from vector_store import VectorStore
+from bm25 import BM25Index, load_retrieval_config, reciprocal_rank_fusion
+from metadata_filter import MetadataIndex, normalize_filters, matches_filters
+from ranking import (SearchResult, load_search_config, normalize_rows, select_results,
+                     OVERFETCH_FACTOR)
+from embedding_cache import (EmbeddingCache, QueryEmbeddingCache, load_cache_config,
+                             QUERY_DB_NAME, DEFAULT_QUERY_DISK_ROWS,
+                             DEFAULT_QUERY_DISK_DAYS)
 
 
 logger = logging.getLogger(__name__)
 
+INDEX_FILE = Path('data/index.faiss')
+DOCS_FILE = Path('data/passages.json')
+STREAM_DOCS_FILE = Path('data/passages.jsonl')
+VECTORS_FILE = Path('data/vectors.f32')
+STREAM_BATCH_SIZE = 1024
+VERIFY_SAMPLE_SIZE = 64
+RECALL_SAMPLE_SIZE = 100
+RECALL_K = 10
+PREFAULT_CHUNK_SIZE = 1 << 20
+
+
+def _meta_path(index_path):
+    """Az index metaadat fájljának útvonala (pl. data/index.meta.json)."""
+    return index_path.with_name(index_path.stem + '.meta.json')
+
+
+def _bm25_path(index_path):
+    """A lexikális (BM25) index fájljának útvonala (pl. data/index.bm25.json)."""
+    return index_path.with_name(index_path.stem + '.bm25.json')
+
+
+def _fields_path(index_path):
+    """A metaadat (szűrő) index fájljának útvonala (pl. data/index.fields.json)."""
+    return index_path.with_name(index_path.stem + '.fields.json')
+
+
+def _batched(iterable, size):
+    """Egy iterálható sorozat size méretű listákra bontása."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _prefault(paths):
+    """
+    Fájlok előolvasása a lapgyorsítótárba (háttérszálban futtatva).
+
+    A memóriába leképezett index és dokumentumtár lapjai így az első
+    kérdéseknél már nem okoznak lemezolvasást.
+    """
+    total = 0
+    for path in paths:
+        try:
+            with open(path, 'rb') as file:
+                while chunk := file.read(PREFAULT_CHUNK_SIZE):
+                    total += len(chunk)
+        except OSError as error:
+            logger.warning("Előolvasási hiba (%s): %s", path, error)
+    logger.info("Előolvasás kész: %.1f MB", total / 2 ** 20)
+
+
+def page_key(doc):
+    """
+    Egy dokumentum forrásoldalának stabil kulcsa.
+
+    Args:
+        doc (dict): Oldal vagy passage, 'pageid' vagy 'title' kulccsal.
+
+    Returns:
+        str: 'pageid:<azonosító>' ha ismert a MediaWiki oldalazonosító,
+            'title:<cím>' ha ismert a cím, egyébként a szöveg hash-e.
+    """
+    if doc.get('pageid') is not None:
+        return f"pageid:{doc['pageid']}"
+    if doc.get('title'):
+        return f"title:{doc['title']}"
+    return "text:" + hashlib.sha1(doc.get('text', '').encode('utf-8')).hexdigest()
+
+
+def stable_id(key):
+    """
+    Stabil, nemnegatív 64 bites azonosító egy szöveges kulcsból.
+
+    Args:
+        key (str): A kulcs (pl. page_key eredménye).
+
+    Returns:
+        int: 63 bites egész (a FAISS idx_t előjeles, a -1 foglalt).
+    """
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') & 0x7FFF_FFFF_FFFF_FFFF
+
+
+def doc_id(doc):
+    """
+    Egy dokumentum stabil azonosítója az oldal és a passage sorszáma alapján.
+
+    Args:
+        doc (dict): Oldal vagy passage ('chunk' kulccsal, ha passage).
+
+    Returns:
+        int: A dokumentum 63 bites azonosítója.
+    """
+    key = page_key(doc)
+    if doc.get('chunk') is not None:
+        key = f"{key}#{doc['chunk']}"
+    return stable_id(key)
+
+
 class Embedder:
     """
     Dokumentum embedder osztály FAISS indexszel és sentence transformerrel.
@@ -28,13 +147,43 @@ class Embedder:
     Használja a sentence-transformers könyvtárat a szövegek embedding-jéhez és
     a FAISS-t a gyors hasonlósági kereséshez.
 
+    A vektorok stabil 64 bites azonosítók alatt (IndexIDMap2, IVF indexnél az
+    invertált listákban) tárolódnak, így az index oldalanként frissíthető
+    (upsert) és törölhető (remove) teljes újraépítés nélkül.
+
     Attributes:
-        model (SentenceTransformer): A sentence transformer modell.
+        model (SentenceTransformer): A sentence transformer modell (a folyamaton
+            belül megosztott példány, lásd encoder_registry).
+        backend (str): Az encoder backend ('torch', 'onnx', 'int8').
+        backend_report (dict): Az utolsó backend összevetés eredménye
+            (lásd verify_backend), vagy None.
+        embedding_cache (EmbeddingCache): Lemezen tárolt embedding gyorsítótár,
+            vagy None, ha ki van kapcsolva.
+        query_cache (QueryEmbeddingCache): Kérdés embedding LRU gyorsítótár,
+            vagy None, ha ki van kapcsolva.
         index (faiss.Index): A FAISS index a vektorok tárolására.
-        documents (list): A dokumentumok listája.
+        index_type (str): Az index típusa ('flat', 'ivf', 'ivfpq', 'hnsw').
+        codec (str): A vektorok tárolási kódolása ('none', 'fp16', 'sq8', 'pq', 'binary').
+        vector_store (VectorStore): Teljes pontosságú vektorok a pontos
+            újrapontozáshoz, vagy None, ha a rerank ki van kapcsolva.
+        codec_stats (dict): Vektoronkénti memória, a tárolt dimenzió és a flat
+            indexhez mért recall@10 (lásd _measure_codec), vagy None.
+            Dimenziócsökkentésnél (az [index] reduction beállítás) a PCA vagy
+            véletlen vetítés az index része, a kérdésvektorokra is alkalmazódik.
+        read_only (bool): Igaz, ha az index memóriába leképezve, csak olvasható
+            módon töltődött be; az első módosítás előtt a heapre olvasódik.
+        lexical_index (BM25Index): Lexikális index hibrid módban, egyébként None.
+        metadata_index (MetadataIndex): Mezőértékenkénti azonosítók a szűrt
+            kereséshez (névtér, kategória, cím).
+        search_config (dict): A query() alapértelmezett küszöbe, oldalkorlátja
+            és MMR súlya (lásd ranking.load_search_config).
+        documents (list | DocStore): Az indexelt dokumentumok (passage-ek) listája,
+            mindegyik 'id' kulccsal; streamelt építés után lemezen tárolt DocStore.
     """
 
-    def __init__(self, embedding_model_name='sentence-transformers/LaBSE'):
+    def __init__(self, embedding_model_name='sentence-transformers/LaBSE',
+                 index_config=None, cache_config=None, encoding_config=None,
+                 encoder_config=None, retrieval_config=None, search_config=None):
         # Opciók:
         # 'paraphrase-multilingual-mpnet-base-v2' 768 dimenziós, lassab, pontosabb
         # 'paraphrase-multilingual-MiniLM-L12-v2' 384 dimenziós, gyorsabb, de pontatlan
@@ -44,26 +193,94 @@ class Embedder:
 
         Args:
             embedding_model_name (str, optional): A használandó sentence transformer modell neve.
+            index_config (dict, optional): Index beállítások. Ha nincs megadva,
+                a wiki_rag.ini [index] szekciójából töltődik be.
+            cache_config (dict, optional): Gyorsítótár beállítások. Ha nincs megadva,
+                a wiki_rag.ini [cache] szekciójából töltődik be.
+            encoding_config (dict, optional): Kódolási beállítások (munkafolyamatok,
+                batch méret). Ha nincs megadva, a wiki_rag.ini [encoding] szekciójából töltődik be.
+            encoder_config (dict, optional): Encoder backend beállítások. Ha nincs megadva,
+                a wiki_rag.ini [encoder] szekciójából töltődik be. Ha a backend nem
+                tölthető be (pl. hiányzó onnxruntime), a torch backend kerül használatra.
+            retrieval_config (dict, optional): Visszakeresési beállítások (dense vagy
+                hybrid mód). Ha nincs megadva, a wiki_rag.ini [retrieval] szekciójából töltődik be.
+            search_config (dict, optional): A query() szűrési és diverzifikálási
+                beállításai. Ha nincs megadva, a wiki_rag.ini [search] szekciójából töltődik be.
         """
-        self.model = SentenceTransformer(embedding_model_name)
-        self.index = faiss.IndexFlatL2(self.model.get_sentence_embedding_dimension())
+        self.encoder_config = encoder_config or load_encoder_config()
+        self.backend = self.encoder_config['backend']
+        try:
+            self.model = get_encoder(embedding_model_name, self.backend)
+        except (ImportError, ValueError, RuntimeError, OSError) as error:
+            logger.warning("A(z) %s encoder backend nem tölthető be (%s), torch használata",
+                           self.backend, error)
+            self.backend = 'torch'
+            self.model = get_encoder(embedding_model_name)
+        self.backend_report = None
+        self.model_name = embedding_model_name
+        # A gyorsítótárak backendenként külön kulcsteret kapnak (a vektorok kissé eltérnek)
+        cache_name = (embedding_model_name if self.backend == 'torch'
+                      else f"{embedding_model_name}@{self.backend}")
+        self.index_config = index_config or load_index_config()
+        self.encoding_config = encoding_config or load_encoding_config()
+        dim = self.model.get_sentence_embedding_dimension()
+        cache_config = cache_config or load_cache_config()
+        self.embedding_cache = (EmbeddingCache(cache_name, dim, cache_config['dir'])
+                                if cache_config['embeddings'] else None)
+        self.query_cache = None
+        if cache_config.get('queries'):
+            disk_path = (Path(cache_config['dir']) / QUERY_DB_NAME
+                         if cache_config.get('query_disk') else None)
+            self.query_cache = QueryEmbeddingCache(
+                cache_name, cache_config['queries'], disk_path,
+                cache_config.get('query_disk_rows', DEFAULT_QUERY_DISK_ROWS),
+                cache_config.get('query_disk_days', DEFAULT_QUERY_DISK_DAYS))
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        self.index_type = 'flat'
+        self.index_description = 'Flat'
+        self.codec = 'none'
+        self.vector_store = None
+        self.codec_stats = None
+        self.read_only = False
+        self._index_path = None
+        self._prefault_thread = None
+        self.retrieval_config = retrieval_config or load_retrieval_config()
+        self.lexical_index = None
+        self._search_executor = None
+        self.metadata_index = MetadataIndex()
+        self._id_map = None
+        self._removed_positions = set()
+        self.search_config = search_config or load_search_config()
         self.documents = []
-        logger.info("Embedder inicializálva - model: %s", embedding_model_name)
+        self._doc_by_id = {}
+        self._ids_by_page = {}
+        self._encoder_pool = None
+        logger.info("Embedder inicializálva - model: %s, backend: %s",
+                    embedding_model_name, self.backend)
 
-    def build_index(self, docs):
+    def build_index(self, docs, vectors_path=VECTORS_FILE):
         """
         FAISS index építése a megadott dokumentumokból.
 
-        Minden dokumentumhoz embedding-et készít és hozzáadja a FAISS indexhez.
+        Minden dokumentumhoz embedding-et készít, a korpuszméretnek és a
+        konfigurációnak megfelelő típusú indexet hoz létre, szükség esetén
+        betanítja egy mintán, majd a vektorokat a dokumentumok stabil
+        azonosítói alatt adja hozzá. Végül megméri a tömörített index
+        recall@10 értékét a pontos (flat) kereséshez képest.
 
         Args:
             docs (list): Dokumentumok listája, ahol minden elem egy dict 'text' kulccsal.
+            vectors_path (Path, optional): A teljes pontosságú vektorok fájlja
+                (csak rerank > 0 esetén íródik). Alapértelmezett: VECTORS_FILE
 
         Raises:
             ValueError: Ha a dokumentumok listája üres vagy nem megfelelő formátumú.
         """
         logger.info("Index építése: %d dokumentum", len(docs))
-        self.documents = docs
+        docs = self._with_ids(docs)
+        self._set_documents(docs)
+        self._build_lexical_index(docs)
+        self._build_metadata_index(docs)
 
         if not docs:
             logger.warning("Nincs dokumentum az indexeléshez!")
@@ -73,25 +290,583 @@ class Embedder:
         first_doc_text = docs[0].get('text', 'NINCS TEXT MEZŐ')
         logger.debug("Első dokumentum: %s...", first_doc_text[:100])
 
-        embeddings = self.model.encode(
-            [doc['text'] for doc in docs], show_progress_bar=False)
+        vectors = self._encode_documents([doc['text'] for doc in docs])
+        logger.debug("Embedding méret: %s", vectors.shape)
 
-        logger.debug("Embedding méret: %s", embeddings.shape)
-
-        self.index.add(np.array(embeddings).astype('float32'))
+        ids = self._ids_array(docs)
+        self._create_index(vectors, vectors_path=vectors_path)
+        self._add(vectors, ids)
 
         logger.info("Index kész: %d vektor", self.index.ntotal)
+        self.codec_stats = self._measure_codec(vectors, ids)
+        if self.encoder_config['verify'] and self.backend != 'torch':
+            self.verify_backend([doc['text'] for doc in docs[:VERIFY_SAMPLE_SIZE]])
+
+    def build_index_stream(self, docs, docs_path=STREAM_DOCS_FILE,
+                           batch_size=STREAM_BATCH_SIZE, expected_count=None,
+                           vectors_path=VECTORS_FILE):
+        """
+        FAISS index építése tetszőleges dokumentum-iterátorból, korlátos memóriával.
+
+        A dokumentumok batch_size méretű adagokban kerülnek kódolásra és az
+        indexbe; a metaadatok inkrementálisan a docs_path JSONL fájlba íródnak,
+        a memóriában csak az azonosító szerinti eltolás-tábla marad.
+        Tanítást igénylő index típusnál az első train_sample vektor
+        pufferelődik, ezért a memóriacsúcs ettől függ, nem a korpusz méretétől.
+        Az ismétlődő azonosítók kiszűrése csak batch-en belül történik.
+
+        Args:
+            docs (iterable): Dokumentumok ('text' kulcsú dict-ek) tetszőleges
+                iterátora, pl. generátor.
+            docs_path (Path, optional): A dokumentumtár (JSONL) útvonala.
+                Alapértelmezett: STREAM_DOCS_FILE
+            batch_size (int, optional): Egyszerre kódolt dokumentumok száma.
+            expected_count (int, optional): A várható dokumentumszám az index
+                típusának megválasztásához; ha nincs megadva, az első
+                train_sample dokumentum száma alapján dől el.
+            vectors_path (Path, optional): A teljes pontosságú vektorok fájlja
+                (csak rerank > 0 esetén íródik). Alapértelmezett: VECTORS_FILE
+
+        Returns:
+            int: Az indexelt dokumentumok száma.
+        """
+        logger.info("Streamelt index építése (batch: %d) --> %s", batch_size, docs_path)
+        train_limit = self.index_config.get('train_sample') or batch_size
+        pending_docs, pending_vectors = [], []
+        index_ready = False
+        self._build_lexical_index([])
+        self._build_metadata_index([])
+
+        workers = self.encoding_config['workers']
+        if workers > 1:
+            self._encoder_pool = EncoderPool(self.model_name, workers,
+                                             self.encoding_config['batch_size'],
+                                             encoder_loader(self.backend))
+        try:
+            with DocStoreWriter(docs_path) as writer:
+                for batch in _batched(docs, batch_size):
+                    batch = self._with_ids(batch)
+                    vectors = self._encode_documents([doc['text'] for doc in batch])
+                    for doc in batch:
+                        writer.write(doc)
+                    if self.lexical_index is not None:
+                        self.lexical_index.add(batch)
+                    self.metadata_index.add(batch)
+
+                    if index_ready:
+                        self._add(vectors, self._ids_array(batch))
+                        continue
+
+                    # Pufferelés az index létrehozásáig (típusválasztás és tanítás)
+                    pending_docs.extend(doc['id'] for doc in batch)
+                    pending_vectors.append(vectors)
+                    if len(pending_docs) >= train_limit:
+                        self._flush_pending(pending_docs, pending_vectors, expected_count,
+                                            vectors_path)
+                        pending_docs, pending_vectors = [], []
+                        index_ready = True
+
+                if not index_ready and pending_docs:
+                    self._flush_pending(pending_docs, pending_vectors, expected_count,
+                                        vectors_path)
+                elif not index_ready:
+                    logger.warning("Nincs dokumentum az indexeléshez!")
+                    self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(self.index.d))
+                    self._removed_positions = set()
+                    self._index_changed()
+                    self.index_type, self.index_description = 'flat', 'Flat'
+                    self.codec, self.vector_store = 'none', None
+                count = len(writer)
+        finally:
+            if self._encoder_pool is not None:
+                self._encoder_pool.close()
+                self._encoder_pool = None
+
+        self._set_store(DocStore(docs_path))
+        # A teljes vektorhalmaz nincs a memóriában, ezért recall mérés nélkül
+        self.codec_stats = self._measure_codec()
+        logger.info("Streamelt index kész: %d dokumentum, %d vektor",
+                    count, self.index.ntotal)
+        return count
+
+    def _flush_pending(self, ids, vector_batches, expected_count, vectors_path):
+        """A pufferelt vektorokból index létrehozása, tanítása és feltöltése."""
+        vectors = np.vstack(vector_batches)
+        self._create_index(vectors, n_vectors=max(expected_count or 0, len(vectors)),
+                           vectors_path=vectors_path)
+        self._add(vectors, np.array(ids, dtype='int64'))
 
-    def save(self, index_path=Path('data/index.faiss'),
-             docs_path=Path('data/wiki_pages.json')):
+    def upsert(self, docs):
         """
-        Index és dokumentumok mentése fájlokba.
+        Dokumentumok beszúrása vagy cseréje oldalanként, teljes újraépítés nélkül.
+
+        A megadott dokumentumok forrásoldalainak korábbi vektorai törlődnek,
+        majd csak az új dokumentumok kerülnek beágyazásra és az indexbe.
+
+        Args:
+            docs (list): Az érintett oldalak összes dokumentuma (passage-e).
+
+        Returns:
+            int: A beágyazott dokumentumok száma.
+        """
+        docs = self._with_ids(docs)
+        if not docs:
+            return 0
+
+        self._make_writable()
+        self._materialize_documents()
+        pages = {page_key(doc) for doc in docs}
+        self.remove([id_ for page in pages for id_ in self._ids_by_page.get(page, [])])
+
+        vectors = self._encode_documents([doc['text'] for doc in docs])
+        if self.index.ntotal == 0 and not self.documents:
+            # Kiürült index: az új index a meglévő vektortár helyére kerül
+            self._create_index(vectors, vectors_path=(self.vector_store.path if self.vector_store
+                                                      is not None else VECTORS_FILE))
+        self._add(vectors, self._ids_array(docs))
+        if self.retrieval_config['mode'] == 'hybrid' and self.lexical_index is None:
+            self._build_lexical_index(self.documents)
+        if self.lexical_index is not None:
+            self.lexical_index.add(docs)
+        self.metadata_index.add(docs)
+        self._set_documents(self.documents + docs)
+
+        logger.info("Upsert kész: %d oldal, %d dokumentum, %d vektor az indexben",
+                    len(pages), len(docs), self.index.ntotal)
+        return len(docs)
+
+    def remove(self, ids):
+        """
+        Dokumentumok törlése az indexből azonosító szerint.
+
+        Ha az index típusa nem támogatja a törlést (HNSW), a vektorok az
+        indexben maradnak, de belső pozíciójuk töröltként jelölődik, és a
+        keresés kihagyja őket; így egy upsert által ugyanazzal az azonosítóval
+        újra felvett passage régi vektora sem ad találatot.
+
+        Args:
+            ids (iterable): A törlendő dokumentumok azonosítói.
+
+        Returns:
+            int: A ténylegesen törölt dokumentumok száma.
+        """
+        self._materialize_documents()
+        ids = {int(id_) for id_ in ids if int(id_) in self._doc_by_id}
+        if not ids:
+            return 0
+
+        self._make_writable()
+        if self.vector_store is not None:
+            self.vector_store.remove(ids)
+        if self.lexical_index is not None:
+            self.lexical_index.remove(ids)
+        self.metadata_index.remove(ids)
+        self.index = unwrap_ivf(self.index)
+        id_array = np.fromiter(ids, dtype='int64')
+        try:
+            remove_ids(self.index, id_array)
+        except RuntimeError as error:
+            positions = np.flatnonzero(np.isin(self._id_map_array(), id_array))
+            self._removed_positions.update(positions.tolist())
+            logger.info("Az index (%s) nem támogatja a törlést, %d vektor töröltként "
+                        "jelölve a következő újraépítésig (%s)",
+                        self.index_type, len(positions), error)
+        self._index_changed()
+
+        self._set_documents([doc for doc in self.documents if doc['id'] not in ids])
+        logger.info("Törölve: %d dokumentum", len(ids))
+        return len(ids)
+
+    def relocate(self, vectors_path):
+        """
+        A betöltött index leválasztása a forrásfájljairól módosítás előtt.
+
+        A lemezes dokumentumtár és a leképezett index a memóriába töltődik, a
+        teljes pontosságú vektortár pedig vectors_path-ra másolódik, így az
+        upsert(), a remove() és a save() nem írja a betöltött (pl. egy
+        közzétett generációhoz tartozó) fájlokat.
+
+        Args:
+            vectors_path (Path): A vektortár új útvonala.
+        """
+        self._materialize_documents()
+        self._make_writable()
+        if self.vector_store is not None:
+            self.vector_store = self.vector_store.copy(vectors_path)
+
+    def ids_for_pages(self, pages):
+        """
+        Az adott oldalakhoz tartozó dokumentumazonosítók.
+
+        Args:
+            pages (iterable): Oldalcímek vagy oldal dict-ek ('title'/'pageid' kulccsal).
+
+        Returns:
+            list: Az oldalak összes indexelt dokumentumának azonosítója.
+        """
+        self._materialize_documents()
+        ids = []
+        for page in pages:
+            key = page_key(page if isinstance(page, dict) else {'title': page})
+            ids.extend(self._ids_by_page.get(key, []))
+        return ids
+
+    def titles(self):
+        """
+        Az indexelt oldalak címei (a metaadat indexből, a dokumentumok beolvasása nélkül).
+
+        Returns:
+            list: A címek rendezve.
+        """
+        return self.metadata_index.values('title')
+
+    def page_documents(self, title, limit=None):
+        """
+        Egy oldal passage-ei sorrendben, kérdéskódolás és keresés nélkül.
+
+        Args:
+            title (str): Az oldal címe.
+            limit (int, optional): A visszaadandó passage-ek legnagyobb száma.
+
+        Returns:
+            list: Az oldal passage-ei 'chunk' szerint rendezve.
+        """
+        docs = [self._doc_by_id.get(idx) for idx in self.metadata_index.ids_for('title', title)]
+        docs = sorted((doc for doc in docs if doc is not None),
+                      key=lambda doc: doc.get('chunk') or 0)
+        return docs[:limit] if limit else docs
+
+    def verify_backend(self, texts):
+        """
+        A használt backend összevetése a torch referenciával.
+
+        A pontosság (koszinusz-hasonlóság) és a gyorsulás logolásra kerül, és
+        a backend_report attribútumba íródik; ha az átlagos hasonlóság a
+        beállított min_cosine alatt van, figyelmeztetés kerül a logba.
+
+        Args:
+            texts (list): Mintaszövegek (pl. az indexelt passage-ek egy része).
+
+        Returns:
+            dict: Az összevetés eredménye (lásd encoder_registry.compare_backends).
+        """
+        report = compare_backends(self.model_name, texts, self.backend,
+                                  batch_size=self.encoding_config['batch_size'])
+        if report['mean_cosine'] < self.encoder_config['min_cosine']:
+            logger.warning("A(z) %s backend pontossága alacsony: átlagos koszinusz %.4f < %.4f",
+                           self.backend, report['mean_cosine'],
+                           self.encoder_config['min_cosine'])
+        self.backend_report = report
+        return report
+
+    def _encode(self, texts):
+        """Szövegek beágyazása float32 mátrixba."""
+        embeddings = self.model.encode(texts, show_progress_bar=False)
+        return np.ascontiguousarray(embeddings, dtype='float32')
+
+    def _encode_documents(self, texts):
+        """
+        Dokumentumszövegek beágyazása az embedding gyorsítótár használatával.
+
+        Csak a gyorsítótárban nem szereplő szövegek kerülnek a modellbe
+        (nagy mennyiségnél több folyamatban), az új vektorok a gyorsítótárba íródnak.
+        """
+        if self.embedding_cache is None:
+            return self._encode_batch(texts)
+
+        vectors, missing = self.embedding_cache.lookup(texts)
+        if missing:
+            missing_texts = [texts[position] for position in missing]
+            vectors[missing] = self._encode_batch(missing_texts)
+            self.embedding_cache.store(missing_texts, vectors[missing])
+
+        logger.info("Embedding gyorsítótár: %d találat, %d új kódolás",
+                    len(texts) - len(missing), len(missing))
+        return vectors
+
+    def _encode_batch(self, texts):
+        """Tömeges kódolás a beállított munkafolyamat-számmal és batch mérettel."""
+        return encode_texts(texts, self.model, self.model_name,
+                            workers=self.encoding_config['workers'],
+                            batch_size=self.encoding_config['batch_size'],
+                            loader=encoder_loader(self.backend),
+                            pool=self._encoder_pool)
+
+    def _encode_query(self, question):
+        """Kérdés beágyazása (1, dim) mátrixba a kérdés gyorsítótár használatával."""
+        if self.query_cache is None:
+            return self._encode([question])
+
+        vector = self.query_cache.get(question)
+        if vector is None:
+            vector = self._encode([question])[0]
+            self.query_cache.put(question, vector)
+        return vector.reshape(1, -1)
+
+    def _create_index(self, vectors, n_vectors=None, vectors_path=VECTORS_FILE):
+        """
+        Új, betanított index létrehozása a vektorok (vagy a várható vektorszám) alapján.
+
+        Bekapcsolt rerank esetén üres, teljes pontosságú vektortár is létrejön.
+        """
+        index, self.index_type, self.index_description = create_index(
+            vectors.shape[1], n_vectors or len(vectors), self.index_config)
+        train_index(index, vectors, self.index_config)
+        self.index = with_ids(index)
+        self._removed_positions = set()
+        self._index_changed()
+        self.read_only = False
+        self.codec = detect_codec(index)
+        self.vector_store = None
+        if self.index_config.get('rerank'):
+            self.vector_store = VectorStore(vectors_path, vectors.shape[1], create=True)
+
+    def _build_lexical_index(self, docs):
+        """Lexikális index építése hibrid módban (egyébként törlése)."""
+        self.lexical_index = None
+        if self.retrieval_config['mode'] == 'hybrid':
+            self.lexical_index = BM25Index()
+            self.lexical_index.add(docs)
+            logger.info("BM25 index kész: %d dokumentum", len(self.lexical_index))
+
+    def _build_metadata_index(self, docs):
+        """Metaadat (szűrő) index építése a dokumentumokból."""
+        self.metadata_index = MetadataIndex()
+        self.metadata_index.add(docs)
+        self._index_changed()
+
+    def _index_changed(self):
+        """Az index tartalmától függő gyorsítótárak (azonosító-tábla, bitmapek) ürítése."""
+        self._id_map = None
+        self.metadata_index.invalidate()
+
+    def _id_map_array(self):
+        """Az index belső sorrendjében tárolt azonosítók (gyorsítótárazva)."""
+        if self._id_map is None:
+            self._id_map = stored_ids(self.index)
+        return self._id_map
+
+    def _filter_mask(self, filters):
+        """
+        A szűrőnek megfelelő, nem törölt indexsorok bitmapje.
+
+        Returns:
+            np.ndarray: bool bitmap, vagy None, ha nincs szűrő és törölt sor sem.
+        """
+        filters = normalize_filters(filters)
+        if filters is None and not self._removed_positions:
+            return None
+        if filters is None:
+            mask = np.ones(self.index.ntotal, dtype=bool)
+        else:
+            mask = self.metadata_index.mask(filters, self._id_map_array())
+        if self._removed_positions:
+            mask[np.fromiter(self._removed_positions, dtype='int64')] = False
+        return mask
+
+    def _filtered_search(self, queries, k, mask):
+        """
+        Keresés csak a bitmap által engedett indexsorok között.
+
+        A bitmap IDSelectorBitmap-ként a belső (IDMap alatti) index keresésébe
+        kerül, így a kizárt vektorok nem foglalnak helyet a találatok között.
+        Szelektort nem támogató indexnél (flat PQ) a szűrés a szelektivitással
+        arányosan bővített találatlistán történik. Az IVF index az azonosítókat
+        közvetlenül tárolja, ezért ott a szelektor az engedett azonosítókra szűr.
+
+        Returns:
+            tuple: (távolságok, azonosítók) (n, k) méretű tömbök; a hiányzó
+                találatok azonosítója -1.
+        """
+        id_map = self._id_map_array()
+        distances = np.full((len(queries), k), np.inf, dtype='float32')
+        ids = np.full((len(queries), k), -1, dtype='int64')
+        allowed = int(mask.sum())
+        if not allowed:
+            return distances, ids
+
+        if not hasattr(self.index, 'id_map'):
+            selector = faiss.IDSelectorBatch(np.ascontiguousarray(id_map[mask]))
+            return self.index.search(queries, k, params=selector_params(self.index, selector))
+
+        inner = self.index.index if hasattr(self.index, 'id_map') else self.index
+        bitmap = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        params = selector_params(self.index, selector)
+        if params is not None:
+            found_distances, positions = inner.search(queries, k, params=params)
+        else:
+            fetch = min(len(mask), k + 2 * k * len(mask) // allowed)
+            found_distances, positions = inner.search(queries, fetch)
+
+        for row in range(len(queries)):
+            row_positions = positions[row]
+            keep = np.flatnonzero((row_positions >= 0) & mask[row_positions])[:k]
+            distances[row, :len(keep)] = found_distances[row, keep]
+            ids[row, :len(keep)] = id_map[row_positions[keep]]
+        return distances, ids
+
+    def _make_writable(self):
+        """Leképezett (csak olvasható) index beolvasása a heapre módosítás előtt."""
+        if not self.read_only:
+            return
+        logger.info("Csak olvasható index beolvasása módosításhoz: %s", self._index_path)
+        self.index = read_index(self._index_path, binary=is_binary(self.index))
+        apply_search_params(self.index, self.index_config)
+        self._index_changed()
+        self.read_only = False
+
+    def _add(self, vectors, ids):
+        """Vektorok hozzáadása az indexhez (és a teljes pontosságú vektortárhoz)."""
+        if is_binary(self.index):
+            self.index.add_with_ids(binary_codes(vectors), ids)
+        else:
+            self.index.add_with_ids(vectors, ids)
+        self._index_changed()
+        if self.vector_store is not None:
+            self.vector_store.add(ids, vectors)
+
+    def _search(self, queries, k, filters=None):
+        """
+        Keresés az indexben, opcionális szűréssel és pontos újrapontozással.
+
+        Bekapcsolt rerank esetén az index max(k, rerank) jelöltet ad vissza,
+        amelyek a teljes pontosságú vektorokkal pontozódnak újra (L2).
+
+        Args:
+            queries (np.ndarray): (n, dim) méretű float32 kérdésmátrix.
+            k (int): A találatok száma kérdésenként.
+            filters (dict, optional): Metaadat szűrő (lásd metadata_filter).
+
+        Returns:
+            tuple: (távolságok, azonosítók) (n, k) méretű tömbök; a hiányzó
+                találatok azonosítója -1.
+        """
+        candidates = k
+        if self.vector_store is not None:
+            candidates = max(k, self.index_config.get('rerank', 0))
+        search_vectors = binary_codes(queries) if is_binary(self.index) else queries
+        mask = self._filter_mask(filters)
+        if mask is None:
+            distances, ids = self.index.search(search_vectors, candidates)
+        else:
+            distances, ids = self._filtered_search(search_vectors, candidates, mask)
+        if self.vector_store is None:
+            return distances, ids
+
+        exact_distances = np.full((len(queries), k), np.inf, dtype='float32')
+        exact_ids = np.full((len(queries), k), -1, dtype='int64')
+        for row, (query, row_ids) in enumerate(zip(queries, ids)):
+            row_ids = row_ids[row_ids >= 0]
+            vectors, found = self.vector_store.get(row_ids)
+            scores = np.where(found, np.sum((vectors - query) ** 2, axis=1), np.inf)
+            order = np.argsort(scores, kind='stable')[:k]
+            order = order[np.isfinite(scores[order])]
+            exact_distances[row, :len(order)] = scores[order]
+            exact_ids[row, :len(order)] = row_ids[order]
+        return exact_distances, exact_ids
+
+    def _measure_codec(self, vectors=None, ids=None, seed=42):
+        """
+        Tárolási statisztikák és recall@10 a pontos (flat) kereséshez képest.
+
+        A recall a vektorok egy véletlen mintáját kérdésként használva, a
+        teljes keresési úton (dimenziócsökkentés, tömörített index, rerank)
+        mérődik, így a memória és a minőség közötti kompromisszum látható.
+
+        Returns:
+            dict: 'codec', 'reduction', 'dim' (a tárolt dimenzió),
+                'bytes_per_vector', 'float32_bytes_per_vector' (az eredeti
+                dimenzióval), 'rerank' és 'recall_at_10' (None, ha nem mérhető)
+                kulcsokkal.
+        """
+        stats = {
+            'codec': self.codec,
+            'reduction': detect_reduction(self.index),
+            'dim': stored_dim(self.index),
+            'bytes_per_vector': bytes_per_vector(self.index),
+            'float32_bytes_per_vector': 4 * self.index.d,
+            'rerank': self.index_config.get('rerank', 0) if self.vector_store else 0,
+            'recall_at_10': None,
+        }
+        if vectors is not None and len(vectors):
+            rng = np.random.default_rng(seed)
+            sample = rng.choice(len(vectors), min(RECALL_SAMPLE_SIZE, len(vectors)),
+                                replace=False)
+            k = min(RECALL_K, len(vectors))
+            _, exact = faiss.knn(vectors[sample], vectors, k)
+            _, found = self._search(vectors[sample], k)
+            hits = sum(len(set(ids[exact_row]) & set(found_row))
+                       for exact_row, found_row in zip(exact, found))
+            stats['recall_at_10'] = hits / (len(sample) * k)
+
+        logger.info("Codec: %s, dimenzió: %d/%d (%s), %d bájt / vektor (float32: %d), "
+                    "rerank: %d, recall@10: %s",
+                    stats['codec'], stats['dim'], self.index.d, stats['reduction'],
+                    stats['bytes_per_vector'],
+                    stats['float32_bytes_per_vector'], stats['rerank'],
+                    'n/a' if stats['recall_at_10'] is None else f"{stats['recall_at_10']:.3f}")
+        return stats
+
+    @staticmethod
+    def _with_ids(docs):
+        """Dokumentumok másolata stabil 'id' mezővel, ismétlődő azonosítók nélkül."""
+        unique = {}
+        for doc in docs:
+            new_doc = dict(doc, id=doc_id(doc))
+            if new_doc['id'] in unique:
+                logger.warning("Ismétlődő dokumentum: %s, az utolsó marad",
+                               doc.get('title', 'Névtelen'))
+            unique[new_doc['id']] = new_doc
+        return list(unique.values())
+
+    @staticmethod
+    def _ids_array(docs):
+        """A dokumentumok azonosítói int64 tömbként."""
+        return np.array([doc['id'] for doc in docs], dtype='int64')
+
+    def _set_documents(self, docs):
+        """Dokumentumlista és az azonosító szerinti keresőtáblák beállítása."""
+        self.documents = docs
+        self._doc_by_id = {doc['id']: doc for doc in docs}
+        self._ids_by_page = {}
+        for doc in docs:
+            self._ids_by_page.setdefault(page_key(doc), []).append(doc['id'])
+
+    def _set_store(self, store):
+        """Lemezen tárolt dokumentumtár beállítása (oldaltérkép nélkül)."""
+        self.documents = store
+        self._doc_by_id = store
+        self._ids_by_page = {}
+
+    def _materialize_documents(self):
+        """Lemezes dokumentumtár betöltése listába az inkrementális módosításokhoz."""
+        if isinstance(self.documents, DocStore):
+            logger.info("Dokumentumtár betöltése a memóriába módosításhoz: %d dokumentum",
+                        len(self.documents))
+            self._set_documents(list(self.documents))
+
+    def save(self, index_path=INDEX_FILE, docs_path=DOCS_FILE):
+        """
+        Index, index metaadatok és dokumentumok mentése fájlokba.
+
+        A metaadat fájl (index.meta.json) az index típusát, tárolási kódolását
+        és keresési paramétereit tárolja, hogy a load() ugyanazt a konfigurációt
+        állítsa vissza. A teljes pontosságú vektortár a helyén marad, csak az
+        azonosító-táblája és az útvonala íródik ki.
+
+        Az index ideiglenes fájlba íródik és cserével kerül a helyére, így a
+        régi fájlt leképező folyamatok zavartalanul futnak tovább. mmap
+        módban a dokumentumok lustán olvasható dokumentumtárba (a docs_path
+        .jsonl változata) kerülnek.
+        Streamelt építés után a dokumentumok már a dokumentumtárban vannak,
+        ilyenkor csak annak útvonala kerül a metaadatok közé.
 
         Args:
             index_path (Path, optional): A FAISS index mentési útvonala.
-                Alapértelmezett: Path('data/index.faiss')
+                Alapértelmezett: INDEX_FILE
             docs_path (Path, optional): A dokumentumok JSON fájljának mentési útvonala.
-                Alapértelmezett: Path('data/wiki_pages.json')
+                Alapértelmezett: DOCS_FILE
 
         Raises:
             Exception: Ha hiba történik a mentés során.
@@ -101,12 +876,52 @@ class Embedder:
             index_path.parent.mkdir(parents=True, exist_ok=True)
             docs_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Index mentése
-            faiss.write_index(self.index, str(index_path))
+            # Index mentése ideiglenes fájlba, majd csere
+            temp_path = index_path.with_name(index_path.name + '.tmp')
+            if is_binary(self.index):
+                faiss.write_index_binary(self.index, str(temp_path))
+            else:
+                faiss.write_index(self.index, str(temp_path))
+            os.replace(temp_path, index_path)
+
+            # Metaadatok mentése
+            meta = {
+                'model': self.model_name,
+                'backend': self.backend,
+                'type': self.index_type,
+                'factory': self.index_description,
+                'codec': self.codec,
+                'codec_stats': self.codec_stats,
+                'dim': self.index.d,
+                'nprobe': self.index_config['nprobe'],
+                'ef_search': self.index_config['ef_search'],
+            }
+            if self._removed_positions:
+                meta['removed_positions'] = sorted(self._removed_positions)
+            if self.vector_store is not None:
+                self.vector_store.flush()
+                meta['vectors'] = str(self.vector_store.path)
+            if self.lexical_index is not None:
+                self.lexical_index.save(_bm25_path(index_path))
+                meta['bm25'] = str(_bm25_path(index_path))
+            self.metadata_index.save(_fields_path(index_path))
+            meta['fields'] = str(_fields_path(index_path))
+            if isinstance(self.documents, DocStore):
+                meta['doc_store'] = str(self.documents.path)
+                docs_path = self.documents.path
+            elif self.index_config.get('mmap'):
+                docs_path = docs_path.with_suffix('.jsonl')
+                with DocStoreWriter(docs_path) as writer:
+                    for doc in self.documents:
+                        writer.write(doc)
+                meta['doc_store'] = str(docs_path)
+            with _meta_path(index_path).open('w', encoding='utf-8') as file:
+                json.dump(meta, file, ensure_ascii=False, indent=2)
 
             # Dokumentumok mentése
-            with docs_path.open('w', encoding='utf-8') as file:
-                json.dump(self.documents, file, ensure_ascii=False, indent=2)
+            if 'doc_store' not in meta:
+                with docs_path.open('w', encoding='utf-8') as file:
+                    json.dump(self.documents, file, ensure_ascii=False, indent=2)
 
             logger.info("Index mentve: %d dokumentum, fájlok: %s, %s",
                         len(self.documents), index_path, docs_path)
@@ -114,31 +929,89 @@ class Embedder:
             logger.error("Hiba index mentése közben: %s", error)
             raise
 
-    def load(self, index_path=Path('data/index.faiss'),
-             docs_path=Path('data/wiki_pages.json')):
+    def load(self, index_path=INDEX_FILE, docs_path=DOCS_FILE):
         """
         Index és dokumentumok betöltése fájlokból.
 
+        Az [index] mmap beállítás esetén az index csak olvasható, memóriába
+        leképezett módon nyílik meg, a dokumentumtár (ha van) pedig lustán,
+        eltolás-tábla alapján olvasódik; így az indulási idő és a folyamat
+        saját memóriája nem nő a korpusz méretével, és az azonos gépen futó
+        folyamatok közös fizikai lapokat használnak. prefault esetén a fájlok
+        egy háttérszálban előolvasódnak.
+
         Args:
             index_path (Path, optional): A FAISS index fájl útvonala.
-                Alapértelmezett: Path('data/index.faiss')
+                Alapértelmezett: INDEX_FILE
             docs_path (Path, optional): A dokumentumok JSON fájljának útvonala.
-                Alapértelmezett: Path('data/wiki_pages.json')
+                Alapértelmezett: DOCS_FILE
 
         Raises:
             FileNotFoundError: Ha a fájlok nem találhatók.
             Exception: Ha egyéb hiba történik a betöltés során.
         """
         try:
-            # Index betöltése
-            self.index = faiss.read_index(str(index_path))
+            # Index betöltése, típus és keresési paraméterek visszaállítása
+            meta = {}
+            meta_path = _meta_path(index_path)
+            if meta_path.exists():
+                with meta_path.open('r', encoding='utf-8') as file:
+                    meta = json.load(file)
+            mmap = bool(self.index_config.get('mmap'))
+            self.index = read_index(index_path, mmap=mmap, binary=meta.get('codec') == 'binary')
+            self.read_only = mmap
+            self._index_path = index_path
+            self._removed_positions = set(meta.get('removed_positions', []))
+            self._index_changed()
+            if meta:
+                self.index_type = meta.get('type', detect_index_type(self.index))
+                self.index_description = meta.get('factory', '')
+                if meta.get('backend', 'torch') != self.backend:
+                    logger.warning("Az index %s backenddel készült, a kérdések %s backenddel "
+                                   "kódolódnak", meta.get('backend', 'torch'), self.backend)
+                search_params = {key: meta[key] for key in ('nprobe', 'ef_search') if key in meta}
+                self.index_config = {**self.index_config, **search_params}
+            else:
+                self.index_type = detect_index_type(self.index)
+                self.index_description = ''
+            apply_search_params(self.index, self.index_config)
+            self.codec = meta.get('codec') or detect_codec(self.index)
+            self.codec_stats = meta.get('codec_stats')
+            self.vector_store = None
+            if (meta.get('vectors') and self.index_config.get('rerank')
+                    and Path(meta['vectors']).exists()):
+                self.vector_store = VectorStore(meta['vectors'], self.index.d)
+
+            if self.index_config.get('prefault'):
+                self._start_prefault(index_path, meta)
+
+            # Dokumentumok betöltése (streamelt építésnél lusta dokumentumtárból)
+            if meta.get('doc_store'):
+                self._set_store(DocStore(meta['doc_store']))
+                self._load_lexical_index(index_path)
+                self._load_metadata_index(index_path)
+                logger.info("Index betöltve: %d dokumentum (dokumentumtár), %d vektor, típus: %s",
+                            len(self.documents), self.index.ntotal, self.index_type)
+                return
 
-            # Dokumentumok betöltése
+            if mmap:
+                logger.warning("A dokumentumok JSON-ból töltődnek (nem lusta); "
+                               "mmap módban az index újramentése javasolt")
             with docs_path.open('r', encoding='utf-8') as file:
-                self.documents = json.load(file)
+                documents = json.load(file)
 
-            logger.info("Index betöltve: %d dokumentum, %d vektor",
-                        len(self.documents), self.index.ntotal)
+            # Régi (pozíció alapú) formátum: az azonosító a pozíció
+            if documents and 'id' not in documents[0]:
+                logger.warning("Azonosító nélküli dokumentumok, pozíció alapú "
+                               "azonosítás; teljes újraépítés javasolt")
+                for position, doc in enumerate(documents):
+                    doc['id'] = position
+            self._set_documents(documents)
+            self._load_lexical_index(index_path)
+            self._load_metadata_index(index_path)
+
+            logger.info("Index betöltve: %d dokumentum, %d vektor, típus: %s",
+                        len(self.documents), self.index.ntotal, self.index_type)
 
         except FileNotFoundError as error:
             logger.error("Index fájl nem található: %s", error)
@@ -147,17 +1020,185 @@ class Embedder:
             logger.error("Index betöltési hiba: %s", error)
             raise
 
-    def query(self, question, top_k=3):
+    def _retrieve(self, question, top_k, filters=None, query_vector=None):
+        """
+        A kérdéshez legjobban illeszkedő dokumentumazonosítók.
+
+        Hibrid módban a BM25 keresés egy háttérszálon fut, a kérdés kódolásával
+        és a FAISS kereséssel párhuzamosan; a két lista reciprok rangfúzióval
+        egyesül. Szűrő esetén a FAISS keresés csak a megfelelő vektorok között
+        fut, a BM25 találatai utólag szűrődnek. Megadott query_vector esetén a
+        kérdés nem kódolódik újra.
+
+        Returns:
+            tuple: ((azonosító, pontszám) párok listája, a kérdés vektora); a
+                pontszám dense módban az L2 távolság, hibrid módban az RRF pontszám.
+        """
+        if self.lexical_index is None:
+            if query_vector is None:
+                query_vector = self._encode_query(question)
+            distances, indices = self._search(query_vector, top_k, filters)
+            return [(int(idx), float(distance))
+                    for idx, distance in zip(indices[0], distances[0]) if idx >= 0], query_vector
+
+        candidates = max(top_k, self.retrieval_config['candidates'])
+        if self._search_executor is None:
+            self._search_executor = ThreadPoolExecutor(max_workers=4,
+                                                       thread_name_prefix='bm25')
+        lexical = self._search_executor.submit(self.lexical_index.search, question, candidates)
+        if query_vector is None:
+            query_vector = self._encode_query(question)
+        _, indices = self._search(query_vector, candidates, filters)
+        dense_ids = [int(idx) for idx in indices[0] if idx >= 0]
+        lexical_ids = [idx for idx, _ in lexical.result()]
+        if filters:
+            filters = normalize_filters(filters)
+            lexical_ids = [idx for idx in lexical_ids
+                           if matches_filters(self._doc_by_id.get(idx) or {}, filters)]
+
+        fused = reciprocal_rank_fusion([dense_ids, lexical_ids], self.retrieval_config['rrf_k'])
+        logger.debug("Hibrid keresés: %d dense, %d BM25 jelölt", len(dense_ids), len(lexical_ids))
+        return fused[:top_k], query_vector
+
+    def _stored_vectors(self, ids):
+        """
+        Az indexben tárolt vektorok azonosító szerint, újrakódolás nélkül.
+
+        A teljes pontosságú vektortár (ha van) az elsődleges forrás; egyébként
+        az index rekonstruálja a vektorokat (tömörített kódolásnál közelítőleg,
+        bináris indexnél a ±1 előjelvektorként).
+
+        Args:
+            ids (list): Az azonosítók.
+
+        Returns:
+            np.ndarray: (len(ids), dim) méretű float32 mátrix.
+        """
+        ids = np.asarray(ids, dtype='int64')
+        if self.vector_store is not None:
+            vectors, found = self.vector_store.get(ids)
+            if found.all():
+                return vectors
+        if is_binary(self.index):
+            codes = np.vstack([self.index.reconstruct(int(idx)) for idx in ids])
+            bits = np.unpackbits(codes, axis=1)[:, :self.index.d]
+            return bits.astype('float32') * 2 - 1
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None and ivf.direct_map.no():
+            if hasattr(self.index, 'id_map'):
+                ivf.make_direct_map()
+            else:
+                # Nem sorszám azonosítók: hash tábla alapú közvetlen leképezés
+                ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return self.index.reconstruct_batch(ids)
+
+    def search(self, question, top_k=3, min_score=None, max_per_page=0, mmr_lambda=None,
+               filters=None, query_vector=None):
+        """
+        Pontozott keresés küszöbbel, oldalkorláttal és opcionális MMR-rel.
+
+        A pontszám a kérdés és a tárolt dokumentumvektor koszinusz-hasonlósága
+        (dense és hibrid módban egyaránt), így a küszöb módtól függetlenül
+        értelmezhető. Oldalkorlát vagy MMR esetén OVERFETCH_FACTOR-szor több
+        jelölt kerül visszakeresésre; a diverzifikáláshoz a jelöltek tárolt
+        vektorai kellenek, a passage-ek nem kódolódnak újra.
+
+        Args:
+            question (str): A keresendő kérdés vagy szöveg.
+            top_k (int, optional): A visszaadandó találatok legnagyobb száma.
+                Alapértelmezett: 3
+            min_score (float, optional): Minimális koszinusz-hasonlóság.
+            max_per_page (int, optional): Oldalanként legfeljebb ennyi passage
+                (0: nincs korlát).
+            mmr_lambda (float, optional): Az MMR relevanciasúlya 0 és 1 között
+                (None: nincs MMR, a visszakeresés sorrendje marad).
+            filters (dict, optional): Metaadat szűrő, pl. {'namespace': 0,
+                'category': ['Python'], 'title_prefix': 'Python/'}; a szűrés a
+                FAISS keresésen belül történik (lásd metadata_filter).
+            query_vector (np.ndarray, optional): Előre kódolt (1, dim) méretű
+                kérdésvektor (pl. a shardok közös kérdéskódolásához).
+
+        Returns:
+            list: SearchResult objektumok helyezés szerint.
+
+        Raises:
+            ValueError: Érvénytelen szűrőkifejezés esetén.
+        """
+        filters = normalize_filters(filters)
+        if self.index.ntotal == 0 or not self.documents:
+            return []
+
+        fetch = top_k
+        if max_per_page or mmr_lambda is not None:
+            fetch = top_k * OVERFETCH_FACTOR
+        ranked, query_vector = self._retrieve(question, fetch, filters, query_vector)
+
+        candidates = []
+        for idx, _ in ranked:
+            doc = self._doc_by_id.get(idx)
+            if doc is not None:
+                candidates.append((idx, doc))
+            else:
+                logger.warning("Érvénytelen azonosító: %d", idx)
+        if not candidates:
+            return []
+
+        vectors = normalize_rows(self._stored_vectors([idx for idx, _ in candidates]))
+        scores = vectors @ normalize_rows(query_vector)[0]
+        pages = [page_key(doc) for _, doc in candidates]
+        selected = select_results(scores, vectors, pages, top_k, min_score=min_score,
+                                  max_per_page=max_per_page, mmr_lambda=mmr_lambda)
+
+        results = [SearchResult(doc_id=candidates[position][0], score=float(scores[position]),
+                                rank=rank, document=candidates[position][1])
+                   for rank, position in enumerate(selected, start=1)]
+        logger.debug("Pontozott keresés: %d jelölt, %d találat", len(candidates), len(results))
+        return results
+
+    def _load_lexical_index(self, index_path):
+        """Lexikális index betöltése hibrid módban; ha nincs mentve, felépítése."""
+        self.lexical_index = None
+        if self.retrieval_config['mode'] != 'hybrid':
+            return
+        if _bm25_path(index_path).exists():
+            self.lexical_index = BM25Index.load(_bm25_path(index_path))
+        else:
+            logger.warning("Nincs mentett BM25 index, felépítés a dokumentumokból")
+            self._build_lexical_index(self.documents)
+
+    def _load_metadata_index(self, index_path):
+        """Metaadat index betöltése; ha nincs mentve, felépítése a dokumentumokból."""
+        if _fields_path(index_path).exists():
+            self.metadata_index = MetadataIndex.load(_fields_path(index_path))
+            self._index_changed()
+        else:
+            logger.warning("Nincs mentett metaadat index, felépítés a dokumentumokból")
+            self._build_metadata_index(self.documents)
+
+    def _start_prefault(self, index_path, meta):
+        """Az index és a hozzá tartozó fájlok előolvasása háttérszálban."""
+        paths = [index_path]
+        if meta.get('doc_store'):
+            paths += [Path(meta['doc_store']), offsets_path(meta['doc_store'])]
+        if self.vector_store is not None:
+            paths.append(self.vector_store.path)
+        self._prefault_thread = threading.Thread(target=_prefault, args=(paths,),
+                                                 name='index-prefault', daemon=True)
+        self._prefault_thread.start()
+
+    def query(self, question, top_k=3, filters=None):
         """
         Keresés a dokumentumok között egy kérdés alapján.
 
         A kérdéshez embedding-et készít és megkeresi a legközelebbi dokumentumokat
-        a FAISS indexben.
+        a FAISS indexben. A küszöb, az oldalkorlát és az MMR a search_config
+        szerint érvényesül (lásd search()).
 
         Args:
             question (str): A keresendő kérdés vagy szöveg.
             top_k (int, optional): A visszaadandó dokumentumok száma.
                 Alapértelmezett: 3
+            filters (dict, optional): Metaadat szűrő (lásd search()).
 
         Returns:
             list: A legközelebbi dokumentumok listája, üres lista hiba esetén.
@@ -181,27 +1222,17 @@ class Embedder:
 
         # Keresés
         try:
-            q_embed = self.model.encode([question],
-                                        show_progress_bar=False).astype('float32')
-            distances, indices = self.index.search(q_embed, top_k)
-
-            logger.debug("Keresési eredmények - távolságok: %s", distances[0])
-            logger.debug("Keresési eredmények - indexek: %s", indices[0])
-
-            # Biztonságos dokumentum lekérés
-            results = []
-            for i, idx in enumerate(indices[0]):
-                if idx >= 0 and idx < len(self.documents):
-                    doc = self.documents[idx]
-                    doc_preview = doc.get('text', '')[:100]
-                    logger.debug("Találat %d (távolság: %.3f): %s...",
-                                 i + 1, distances[0][i], doc_preview)
-                    results.append(doc)
-                else:
-                    logger.warning("Érvénytelen index: %d", idx)
+            results = self.search(question, top_k,
+                                  min_score=self.search_config['min_score'],
+                                  max_per_page=self.search_config['max_per_page'],
+                                  mmr_lambda=self.search_config['mmr_lambda'],
+                                  filters=filters)
+            for result in results:
+                logger.debug("Találat %d (pontszám: %.3f): %s...", result.rank,
+                             result.score, result.document.get('text', '')[:100])
 
             logger.info("Keresés befejezve - %d találat", len(results))
-            return results
+            return [result.document for result in results]
 
         except Exception as error:
             logger.error("Hiba keresés közben: %s", error)
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:05:44 2026
+@author: zsolt
+
+Tartalom-címzett, lemezen tárolt embedding gyorsítótár.
+
+A gyorsítótár kulcsa a (modellnév, beágyazott szöveg) pár SHA-256 hash-e, így
+a változatlan szövegek újraindexeléskor nem kerülnek újra a modellbe, és az
+index típusa is átállítható újrakódolás nélkül.
+
+Tárolás modellenként külön könyvtárban:
+- vectors.f32: float32 sorok egymás után (memóriába leképezhető mátrix)
+- keys.txt:    soronként egy kulcs, a sor sorszáma a mátrix sorindexe
+
+A kérdések embedding-jeihez korlátos méretű LRU gyorsítótár tartozik
+(QueryEmbeddingCache), opcionális, újraindítást túlélő SQLite réteggel. A
+lemezes réteg is korlátos: a sorok számát és a bejegyzések korát a
+query_disk_rows és query_disk_days beállítás korlátozza.
+
+Több példány (shardok, több RAG rendszer vagy folyamat) ugyanazt a könyvtárat
+használhatja: a hozzáfűzés fájlzár alatt, a kulcsok újraolvasása után, a
+vektorfájl méretéből számolt sorindextől történik.
+
+A gyorsítótár a data/ könyvtáron kívül van, így a clear_cache() nem törli.
+A konfiguráció a wiki_rag.ini [cache] szekciójából olvasható:
+
+    [cache]
+    embeddings = true
+    dir = cache/embeddings
+    queries = 1024
+    query_disk = false
+    query_disk_rows = 100000
+    query_disk_days = 30
+"""
+import re
+import time
+import queue
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+import configparser
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: csak a folyamaton belüli zár marad
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+DEFAULT_CACHE_DIR = Path('cache/embeddings')
+DEFAULT_QUERY_CACHE_SIZE = 1024
+DEFAULT_QUERY_DISK_ROWS = 100000
+DEFAULT_QUERY_DISK_DAYS = 30
+QUERY_DB_NAME = 'queries.sqlite'
+LOCK_FILE = 'lock'
+# A lemezes kérdés-réteg sorkorlátja ennyi beszúrásonként érvényesül (és megnyitáskor)
+QUERY_DISK_PRUNE_EVERY = 256
+# Lemezes találatnál a használati idő csak ennél régebbi érték esetén frissül (mp)
+QUERY_DISK_TOUCH_INTERVAL = 3600.0
+# Az író háttérszál ennyi másodperc tétlenség után leáll (a következő írás újraindítja)
+QUERY_DISK_WRITER_IDLE = 5.0
+
+_process_lock = threading.Lock()
+
+
+def load_cache_config(path=CONFIG_PATH):
+    """
+    Gyorsítótár beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'embeddings' (bool), 'dir' (Path), 'queries' (int, a kérdés LRU
+            mérete, 0 = kikapcsolva), 'query_disk' (bool), 'query_disk_rows'
+            (int, a lemezes réteg maximális sorszáma) és 'query_disk_days'
+            (int, a használatlan bejegyzések maximális kora napokban,
+            0 = korlátlan) kulcsokkal. Az embedding gyorsítótár és a lemezes
+            kérdés-réteg alapértelmezetten ki van kapcsolva.
+    """
+    config = configparser.ConfigParser()
+    defaults = {'embeddings': False, 'dir': DEFAULT_CACHE_DIR,
+                'queries': DEFAULT_QUERY_CACHE_SIZE, 'query_disk': False,
+                'query_disk_rows': DEFAULT_QUERY_DISK_ROWS,
+                'query_disk_days': DEFAULT_QUERY_DISK_DAYS}
+    settings = dict(defaults)
+
+    try:
+        config.read(path, encoding='utf-8')
+        settings['embeddings'] = config.getboolean('cache', 'embeddings', fallback=False)
+        settings['queries'] = max(config.getint(
+            'cache', 'queries', fallback=DEFAULT_QUERY_CACHE_SIZE), 0)
+        settings['query_disk'] = config.getboolean('cache', 'query_disk', fallback=False)
+        settings['query_disk_rows'] = max(config.getint(
+            'cache', 'query_disk_rows', fallback=DEFAULT_QUERY_DISK_ROWS), 1)
+        settings['query_disk_days'] = max(config.getint(
+            'cache', 'query_disk_days', fallback=DEFAULT_QUERY_DISK_DAYS), 0)
+        cache_dir = config.get('cache', 'dir', fallback='').strip()
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [cache] konfiguráció (%s), alapértelmezett beállítások", error)
+        return defaults
+
+    if cache_dir:
+        settings['dir'] = Path(cache_dir)
+    return settings
+
+
+class EmbeddingCache:
+    """
+    Lemezen tárolt embedding gyorsítótár egy modellhez.
+
+    Attributes:
+        model_name (str): A modell neve, amelyhez a vektorok tartoznak.
+        dim (int): A vektorok dimenziója.
+        directory (Path): A modellhez tartozó gyorsítótár könyvtár.
+    """
+
+    def __init__(self, model_name, dim, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Gyorsítótár megnyitása (vagy létrehozása).
+
+        Args:
+            model_name (str): A modell neve.
+            dim (int): A vektorok dimenziója.
+            cache_dir (Path, optional): A gyorsítótár gyökérkönyvtára.
+                Alapértelmezett: DEFAULT_CACHE_DIR
+        """
+        self.model_name = model_name
+        self.dim = dim
+        self.directory = Path(cache_dir) / re.sub(r'[^\w.-]+', '_', model_name)
+        self._vectors_path = self.directory / 'vectors.f32'
+        self._keys_path = self.directory / 'keys.txt'
+        self._rows = {}
+        self._matrix = None
+        self.hits = 0
+        self.misses = 0
+        if self._vectors_path.exists():
+            with self._locked():
+                self._load_keys()
+            logger.info("Embedding gyorsítótár betöltve: %d vektor (%s)",
+                        len(self._rows), self.directory)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def key(self, text):
+        """
+        Egy szöveg gyorsítótár kulcsa.
+
+        Args:
+            text (str): A beágyazandó szöveg.
+
+        Returns:
+            str: A (modellnév, szöveg) pár SHA-256 hash-e hexadecimálisan.
+        """
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    @contextmanager
+    def _locked(self):
+        """
+        Kizárólagos hozzáférés a gyorsítótár könyvtárához.
+
+        Folyamaton belül szálzár, folyamatok között a könyvtárbeli zárfájlra
+        tett fcntl zár (ahol elérhető) védi a fájlokat.
+        """
+        with _process_lock:
+            if fcntl is None:
+                yield
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with (self.directory / LOCK_FILE).open('a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_keys(self):
+        """
+        Kulcsindex (újra)beolvasása; a hívó tartja a zárat (lásd _locked).
+
+        Félbeszakadt írás után a kulcs nélküli vektorok levágásra kerülnek,
+        hogy a sorindexek és a kulcsok összhangban maradjanak.
+        """
+        self._rows = {}
+        if not self._vectors_path.exists():
+            return
+
+        row_bytes = 4 * self.dim
+        complete_rows = self._vectors_path.stat().st_size // row_bytes
+        if self._keys_path.exists():
+            with self._keys_path.open('r', encoding='ascii') as file:
+                for row, line in enumerate(file):
+                    if row >= complete_rows or len(line.strip()) != 64:
+                        logger.warning("Embedding gyorsítótár: csonka bejegyzések kihagyva")
+                        break
+                    self._rows[line.strip()] = row
+
+        if self._vectors_path.stat().st_size != len(self._rows) * row_bytes:
+            with self._vectors_path.open('r+b') as file:
+                file.truncate(len(self._rows) * row_bytes)
+            with self._keys_path.open('w', encoding='ascii') as file:
+                file.write(''.join(f"{key}\n" for key in self._rows))
+
+    def _vectors(self):
+        """A vektormátrix memóriába leképezve (csak olvasásra)."""
+        rows = len(self._rows)
+        if self._matrix is None or self._matrix.shape[0] < rows:
+            self._matrix = np.memmap(self._vectors_path, dtype='float32', mode='r',
+                                     shape=(rows, self.dim))
+        return self._matrix
+
+    def lookup(self, texts):
+        """
+        Szövegek vektorainak kikeresése.
+
+        Hiányzó szövegek esetén, ha közben más példány bővítette a közös
+        könyvtárat, a kulcsok újraolvasása után még egyszer keres.
+
+        Args:
+            texts (list): A beágyazandó szövegek.
+
+        Returns:
+            tuple: (vektorok, hiányzó indexek). A vektorok (len(texts), dim) méretű
+                float32 mátrix, a hiányzó szövegek sorai nullák.
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype='float32')
+        found, rows, missing = [], [], []
+        keys = [self.key(text) for text in texts]
+
+        # Kulcssoronként 64 hexa karakter és sortörés: eltérő méret = új bejegyzések
+        if (any(key not in self._rows for key in keys) and self._keys_path.exists()
+                and self._keys_path.stat().st_size != 65 * len(self._rows)):
+            with self._locked():
+                self._load_keys()
+
+        for position, key in enumerate(keys):
+            row = self._rows.get(key)
+            if row is None:
+                missing.append(position)
+            else:
+                found.append(position)
+                rows.append(row)
+
+        if rows:
+            vectors[found] = self._vectors()[rows]
+
+        self.hits += len(found)
+        self.misses += len(missing)
+        return vectors, missing
+
+    def store(self, texts, vectors):
+        """
+        Új vektorok hozzáfűzése a gyorsítótárhoz.
+
+        Előbb a vektorok, majd a kulcsok íródnak ki, így megszakadt írás után
+        sem kerülhet kulcs hiányzó vektorhoz. Az írás zár alatt, a közben más
+        példányok által hozzáfűzött kulcsok újraolvasása után történik, így a
+        sorindexek a közös fájlban is helyesek.
+
+        Args:
+            texts (list): A beágyazott szövegek.
+            vectors (np.ndarray): A hozzájuk tartozó vektorok.
+        """
+        keys = [self.key(text) for text in texts]
+        if all(key in self._rows for key in keys):
+            return
+
+        with self._locked():
+            self._load_keys()
+            new_keys, new_rows = {}, []
+            for key, vector in zip(keys, vectors):
+                if key in self._rows or key in new_keys:
+                    continue
+                new_keys[key] = len(new_rows)
+                new_rows.append(vector)
+
+            if not new_keys:
+                return
+
+            # _load_keys után a vektorfájl pontosan len(self._rows) sort tartalmaz
+            start = len(self._rows)
+            with self._vectors_path.open('ab') as file:
+                file.write(np.asarray(new_rows, dtype='float32').tobytes())
+            with self._keys_path.open('a', encoding='ascii') as file:
+                file.write(''.join(f"{key}\n" for key in new_keys))
+
+            for offset, key in enumerate(new_keys):
+                self._rows[key] = start + offset
+        logger.debug("Embedding gyorsítótár: %d új vektor", len(new_keys))
+
+
+def normalize_question(question):
+    """
+    Kérdés normalizálása gyorsítótár kulcsnak.
+
+    Unicode NFC normalizálás, kisbetűsítés, whitespace összevonás és a
+    záró írásjelek elhagyása, így a csak ezekben eltérő kérdések egy
+    bejegyzést kapnak.
+
+    Args:
+        question (str): A felhasználó kérdése.
+
+    Returns:
+        str: A normalizált kérdés.
+    """
+    text = unicodedata.normalize('NFC', question).casefold()
+    text = ' '.join(text.split())
+    return text.rstrip(' ?!.…')
+
+
+class QueryEmbeddingCache:
+    """
+    Korlátos méretű LRU gyorsítótár kérdés embedding-ekhez.
+
+    Szálbiztos, találat/tévesztés számlálókkal. Opcionálisan SQLite alapú
+    lemezes réteget is használ, amely túléli az újraindítást. A lemezes
+    réteg bejegyzései az utolsó használat idejét is tárolják: megnyitáskor a
+    max_disk_age_days-nél régebbiek, megnyitáskor és QUERY_DISK_PRUNE_EVERY
+    beszúrásonként a max_disk_rows fölötti legrégebben használtak törlődnek.
+
+    A lemezes írások (beszúrás, használati idő frissítése) háttérszálon,
+    kötegelt véglegesítéssel futnak, így a kérdések feldolgozását csak a
+    memóriabeli tévesztéskori olvasás terheli. Az író szál tétlenül leáll,
+    így a lecserélt (pl. generációváltáskor eldobott) példányok nem tartanak
+    életben szálat. Leállításkor a még ki nem írt bejegyzések elveszhetnek
+    (lásd close).
+
+    Attributes:
+        max_size (int): A memóriában tartott bejegyzések maximális száma.
+        max_disk_rows (int): A lemezes réteg sorainak maximális száma.
+        max_disk_age_days (int): A lemezes bejegyzések maximális kora
+            napokban az utolsó használat óta (0 = korlátlan).
+        hits (int): Találatok száma (memória vagy lemez).
+        misses (int): Tévesztések száma.
+        disk_hits (int): A lemezes rétegből kiszolgált találatok száma.
+    """
+
+    def __init__(self, model_name, max_size=DEFAULT_QUERY_CACHE_SIZE, disk_path=None,
+                 max_disk_rows=DEFAULT_QUERY_DISK_ROWS,
+                 max_disk_age_days=DEFAULT_QUERY_DISK_DAYS):
+        """
+        Kérdés gyorsítótár létrehozása.
+
+        Args:
+            model_name (str): A modell neve (a lemezes kulcs része).
+            max_size (int, optional): Az LRU maximális mérete.
+            disk_path (Path, optional): Az SQLite fájl útvonala; None esetén
+                csak memóriában tárol.
+            max_disk_rows (int, optional): A lemezes réteg maximális sorszáma.
+            max_disk_age_days (int, optional): A lemezes bejegyzések maximális
+                kora napokban (0 = korlátlan).
+        """
+        self.model_name = model_name
+        self.max_size = max_size
+        self.max_disk_rows = max_disk_rows
+        self.max_disk_age_days = max_disk_age_days
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._writer_lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._writer = None
+        self._inserts = 0
+
+        if disk_path is not None:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS query_embeddings "
+                             "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                             "used REAL NOT NULL DEFAULT 0)")
+            columns = [row[1] for row in self._db.execute(
+                "PRAGMA table_info(query_embeddings)")]
+            if 'used' not in columns:
+                # Korábbi séma: a meglévő bejegyzések a migráció idejét kapják
+                self._db.execute("ALTER TABLE query_embeddings "
+                                 "ADD COLUMN used REAL NOT NULL DEFAULT 0")
+                self._db.execute("UPDATE query_embeddings SET used = ?", (time.time(),))
+            self._db.execute("CREATE INDEX IF NOT EXISTS query_embeddings_used "
+                             "ON query_embeddings (used)")
+            self._prune_disk(expire=True)
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, question):
+        """
+        Egy kérdés gyorsítótárazott embedding-je.
+
+        Args:
+            question (str): A kérdés (normalizálás előtt).
+
+        Returns:
+            np.ndarray: A vektor (float32), vagy None, ha nincs a gyorsítótárban.
+        """
+        key = normalize_question(question)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute("SELECT vector, used FROM query_embeddings WHERE key = ?",
+                                       (f"{self.model_name}\0{key}",)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            vector = np.frombuffer(row[0], dtype='float32').copy()
+            self._put(key, vector)
+            self.hits += 1
+            self.disk_hits += 1
+        now = time.time()
+        if now - row[1] > QUERY_DISK_TOUCH_INTERVAL:
+            self._enqueue("UPDATE query_embeddings SET used = ? WHERE key = ?",
+                          (now, f"{self.model_name}\0{key}"))
+        return vector
+
+    def put(self, question, vector):
+        """
+        Kérdés embedding tárolása.
+
+        Args:
+            question (str): A kérdés (normalizálás előtt).
+            vector (np.ndarray): A kérdés egydimenziós embedding-je.
+        """
+        key = normalize_question(question)
+        vector = np.array(vector, dtype='float32').reshape(-1)
+        with self._lock:
+            self._put(key, vector)
+        if self._db is not None:
+            self._enqueue("INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?)",
+                          (f"{self.model_name}\0{key}", vector.tobytes(), time.time()))
+
+    def _enqueue(self, statement, params):
+        """Lemezes írás sorba állítása; szükség esetén az író szál indítása."""
+        with self._writer_lock:
+            self._writes.put((statement, params))
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop,
+                                                name='query-cache-writer', daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        """Lemezes írások háttérszálon: a várakozó írások egy tranzakcióban véglegesülnek."""
+        while True:
+            try:
+                batch = [self._writes.get(timeout=QUERY_DISK_WRITER_IDLE)]
+            except queue.Empty:
+                with self._writer_lock:
+                    if self._writes.empty():
+                        self._writer = None
+                        return
+                continue
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._db_lock:
+                    for statement, params in batch:
+                        self._db.execute(statement, params)
+                        self._inserts += statement.startswith('INSERT')
+                    if self._inserts >= QUERY_DISK_PRUNE_EVERY:
+                        self._inserts = 0
+                        self._prune_disk()
+                    self._db.commit()
+            except sqlite3.Error as error:
+                logger.warning("Kérdés gyorsítótár (lemez) írási hiba: %s", error)
+            for _ in batch:
+                self._writes.task_done()
+
+    def flush(self):
+        """Megvárja, amíg a várakozó lemezes írások véglegesülnek."""
+        self._writes.join()
+
+    def close(self):
+        """A várakozó írások kiírása és a lemezes réteg lezárása."""
+        if self._db is None:
+            return
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+            self._db = None
+
+    def _prune_disk(self, expire=False):
+        """
+        A lemezes réteg korlátainak érvényesítése (a hívó véglegesít).
+
+        Args:
+            expire (bool, optional): A max_disk_age_days-nél régebben használt
+                bejegyzések is törlődjenek (megnyitáskor).
+        """
+        removed = 0
+        if expire and self.max_disk_age_days > 0:
+            cutoff = time.time() - self.max_disk_age_days * 86400
+            removed += self._db.execute("DELETE FROM query_embeddings WHERE used < ?",
+                                        (cutoff,)).rowcount
+        removed += self._db.execute(
+            "DELETE FROM query_embeddings WHERE key IN (SELECT key FROM query_embeddings "
+            "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_disk_rows,)).rowcount
+        if removed:
+            logger.debug("Kérdés gyorsítótár (lemez): %d bejegyzés törölve", removed)
+
+    def _put(self, key, vector):
+        """Bejegyzés beszúrása az LRU-ba, a legrégebbi elem kiejtésével."""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """
+        Gyorsítótár statisztikák.
+
+        Returns:
+            dict: 'size', 'max_size', 'hits', 'misses', 'disk_hits' és 'hit_rate' kulcsokkal.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:20:51 2026
+@author: zsolt
+
+Folyamatszintű encoder nyilvántartás.
+
+Minden sentence transformer modell folyamatonként egyszer töltődik be, az
+Embedder példányok (adatfrissítés, több RAGSystem, tesztek) ugyanazt a
+betöltött modellt kapják meg, így nem kell újra beolvasni a súlyokat.
+
+A modell CPU-n gyorsabb, alternatív backenddel is futtatható:
+- torch: a referencia, teljes pontosságú PyTorch modell
+- onnx:  ONNX Runtime-ra exportált modell (optimum[onnxruntime] szükséges)
+- int8:  dinamikusan int8-ra kvantált PyTorch modell (Linear rétegek)
+
+A konfiguráció a wiki_rag.ini [encoder] szekciójából olvasható:
+
+    [encoder]
+    backend = torch
+    verify = false
+    min_cosine = 0.98
+"""
+import time
+import threading
+import configparser
+import logging
+from pathlib import Path
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+BACKENDS = ('torch', 'onnx', 'int8')
+DEFAULT_BACKEND = 'torch'
+DEFAULT_MIN_COSINE = 0.98
+
+_encoders = {}
+_lock = threading.Lock()
+
+
+def load_encoder_config(path=CONFIG_PATH):
+    """
+    Encoder backend beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'backend' (str), 'verify' (bool, pontosság-ellenőrzés indexépítéskor)
+            és 'min_cosine' (float, az elvárt átlagos koszinusz-hasonlóság a
+            referencia backendhez) kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    defaults = {'backend': DEFAULT_BACKEND, 'verify': False,
+                'min_cosine': DEFAULT_MIN_COSINE}
+    settings = dict(defaults)
+
+    try:
+        config.read(path, encoding='utf-8')
+        backend = config.get('encoder', 'backend', fallback=DEFAULT_BACKEND).strip().lower()
+        settings['verify'] = config.getboolean('encoder', 'verify', fallback=False)
+        settings['min_cosine'] = config.getfloat('encoder', 'min_cosine',
+                                                 fallback=DEFAULT_MIN_COSINE)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [encoder] konfiguráció (%s), alapértelmezett beállítások", error)
+        return defaults
+
+    if backend not in BACKENDS:
+        logger.warning("Ismeretlen encoder backend: %s, alapértelmezett: %s",
+                       backend, DEFAULT_BACKEND)
+        backend = DEFAULT_BACKEND
+    settings['backend'] = backend
+    return settings
+
+
+def _load(model_name, backend):
+    """Modell betöltése a megadott backenddel."""
+    if backend == 'onnx':
+        return SentenceTransformer(model_name, backend='onnx')
+
+    model = SentenceTransformer(model_name)
+    if backend == 'int8':
+        import torch
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def get_encoder(model_name, backend=DEFAULT_BACKEND):
+    """
+    Betöltött encoder lekérése, első használatkor betöltéssel.
+
+    A betöltés zár alatt történik, így párhuzamos hívások esetén is csak
+    egy példány jön létre (modellnév és backend páronként).
+
+    Args:
+        model_name (str): A sentence transformer modell neve.
+        backend (str, optional): 'torch', 'onnx' vagy 'int8'.
+
+    Returns:
+        SentenceTransformer: A megosztott modellpéldány.
+
+    Raises:
+        ValueError: Ismeretlen backend esetén.
+        ImportError: Ha a backend függőségei nincsenek telepítve.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Ismeretlen encoder backend: {backend}")
+
+    with _lock:
+        encoder = _encoders.get((model_name, backend))
+        if encoder is None:
+            logger.info("Encoder betöltése: %s (%s)", model_name, backend)
+            encoder = _load(model_name, backend)
+            _encoders[(model_name, backend)] = encoder
+        else:
+            logger.debug("Encoder újrahasznosítva: %s (%s)", model_name, backend)
+        return encoder
+
+
+def loaded_encoders():
+    """
+    A már betöltött modellek.
+
+    Returns:
+        list: (modellnév, backend) párok listája.
+    """
+    with _lock:
+        return list(_encoders)
+
+
+def release_encoder(model_name=None):
+    """
+    Encoder eltávolítása a nyilvántartásból (a memória felszabadításához).
+
+    Args:
+        model_name (str, optional): A modell neve (minden backendje törlődik);
+            None esetén az összes modell törlődik.
+    """
+    with _lock:
+        if model_name is None:
+            _encoders.clear()
+            return
+        for key in [key for key in _encoders if key[0] == model_name]:
+            del _encoders[key]
+
+
+def _timed_encode(model, texts, batch_size):
+    """Kódolás float32 mátrixba, a futási idővel együtt."""
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    return np.asarray(vectors, dtype='float32'), time.perf_counter() - start
+
+
+def compare_backends(model_name, texts, backend, reference=DEFAULT_BACKEND, batch_size=32):
+    """
+    Egy backend pontosságának és sebességének összevetése a referencia backenddel.
+
+    Mindkét modell egy bemelegítő kódolás után ugyanazokat a szövegeket
+    kódolja; a pontosság a megfelelő vektorpárok koszinusz-hasonlósága.
+
+    Args:
+        model_name (str): A modell neve.
+        texts (list): A mintaszövegek.
+        backend (str): A vizsgált backend.
+        reference (str, optional): A referencia backend. Alapértelmezett: 'torch'
+        batch_size (int, optional): Batch méret.
+
+    Returns:
+        dict: 'backend', 'reference', 'texts', 'mean_cosine', 'min_cosine',
+            'reference_seconds', 'backend_seconds' és 'speedup' kulcsokkal.
+
+    Raises:
+        ValueError: Ha nincs mintaszöveg.
+    """
+    if not texts:
+        raise ValueError("A backend összevetéséhez legalább egy szöveg szükséges")
+
+    reference_model = get_encoder(model_name, reference)
+    backend_model = get_encoder(model_name, backend)
+    for model in (reference_model, backend_model):
+        model.encode(texts[:1], show_progress_bar=False)
+
+    expected, reference_seconds = _timed_encode(reference_model, texts, batch_size)
+    actual, backend_seconds = _timed_encode(backend_model, texts, batch_size)
+
+    norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    cosines = np.sum(expected * actual, axis=1) / np.maximum(norms, 1e-12)
+    report = {
+        'backend': backend,
+        'reference': reference,
+        'texts': len(texts),
+        'mean_cosine': float(cosines.mean()),
+        'min_cosine': float(cosines.min()),
+        'reference_seconds': reference_seconds,
+        'backend_seconds': backend_seconds,
+        'speedup': reference_seconds / backend_seconds if backend_seconds > 0 else 0.0,
+    }
+    logger.info("Backend összevetés (%s vs %s, %d szöveg): átlagos koszinusz %.4f, "
+                "minimum %.4f, gyorsulás %.2fx", backend, reference, len(texts),
+                report['mean_cosine'], report['min_cosine'], report['speedup'])
+    return report
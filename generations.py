@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:07:41 2026
+@author: zsolt
+
+Verziózott (generációs) index-állományok atomi közzététellel.
+
+Minden indexépítés egy új generációs könyvtárba ír (data/generations/<név>/),
+amely az indexet, a dokumentumokat és a kiegészítő fájlokat tartalmazza. Az
+építés végén a manifest.json rögzíti a fájlok méretét és SHA-256
+ellenőrzőösszegét, majd a CURRENT mutatófájl ideiglenes fájlba írás és
+os.replace() cseréjével a generációra áll. Így az olvasók mindig egy
+teljes, egymáshoz illő index- és dokumentumpárt látnak: a félbemaradt
+építés nem kerül közzétételre, a régi generáció pedig a csere után is
+olvasható marad, amíg a takarítás el nem távolítja.
+
+A konfiguráció a wiki_rag.ini [generations] szekciójából olvasható:
+
+    [generations]
+    keep = 2
+    verify = false
+    check_interval = 5
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import configparser
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+GENERATIONS_DIR = Path('data/generations')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+GENERATION_INDEX_FILE = 'index.faiss'
+GENERATION_DOCS_FILE = 'passages.json'
+GENERATION_VECTORS_FILE = 'vectors.f32'
+DEFAULT_GENERATION_CONFIG = {
+    'keep': 2,                 # Megőrzött generációk száma (a közzétettel együtt)
+    # Betöltéskor teljes ellenőrzőösszeg-vizsgálat (a méretek mindig ellenőrződnek);
+    # alapértelmezetten ki, mert az ideje a korpusszal nő, és lassítja az indulást
+    'verify': False,
+    'check_interval': 5.0,     # Új generáció keresése ennyi másodpercenként (0: soha)
+}
+CHECKSUM_CHUNK_SIZE = 1 << 20
+
+
+class GenerationError(Exception):
+    """Hiányzó vagy sérült generáció"""
+    pass
+
+
+def load_generation_config(path=CONFIG_PATH):
+    """
+    Generációkezelési beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'keep', 'verify' és 'check_interval' kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_GENERATION_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        settings['keep'] = max(config.getint('generations', 'keep',
+                                             fallback=DEFAULT_GENERATION_CONFIG['keep']), 1)
+        settings['verify'] = config.getboolean('generations', 'verify',
+                                               fallback=DEFAULT_GENERATION_CONFIG['verify'])
+        settings['check_interval'] = max(config.getfloat(
+            'generations', 'check_interval',
+            fallback=DEFAULT_GENERATION_CONFIG['check_interval']), 0.0)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [generations] konfiguráció (%s), alapértelmezett beállítások", error)
+        return dict(DEFAULT_GENERATION_CONFIG)
+    return settings
+
+
+def file_checksum(path):
+    """
+    Fájl SHA-256 ellenőrzőösszege (darabonkénti olvasással).
+
+    Args:
+        path (Path): A fájl útvonala.
+
+    Returns:
+        str: Hexadecimális ellenőrzőösszeg.
+    """
+    digest = hashlib.sha256()
+    with Path(path).open('rb') as file:
+        while chunk := file.read(CHECKSUM_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    """Szöveg írása ideiglenes fájlba, lemezre ürítéssel, majd cserével."""
+    temp_path = path.with_name(path.name + '.tmp')
+    with temp_path.open('w', encoding='utf-8') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def new_generation(root=GENERATIONS_DIR):
+    """
+    Új, üres generációs könyvtár létrehozása.
+
+    A név időbélyeggel kezdődik, így a generációk ábécérendje egyben
+    a létrehozásuk sorrendje.
+
+    Args:
+        root (Path, optional): A generációk könyvtára. Alapértelmezett: GENERATIONS_DIR
+
+    Returns:
+        Path: Az új generáció könyvtára.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    for attempt in range(1000):
+        generation = root / f"{stamp}-{attempt:03d}"
+        try:
+            generation.mkdir()
+        except FileExistsError:
+            continue
+        logger.info("Új generáció: %s", generation)
+        return generation
+    raise GenerationError(f"Nem hozható létre új generáció: {root}")
+
+
+def write_manifest(generation, sources=(), **info):
+    """
+    A generáció fájljainak méretét és ellenőrzőösszegét rögzítő manifest írása.
+
+    Args:
+        generation (Path): A generáció könyvtára.
+        sources (iterable, optional): Bemeneti fájlok (pl. a wiki oldalak JSON-ja),
+            amelyek ellenőrzőösszege a generáció eredetét rögzíti.
+        **info: További leíró adatok (pl. dokumentumszám, indextípus).
+
+    Returns:
+        dict: A megírt manifest.
+    """
+    generation = Path(generation)
+    files = {}
+    for path in sorted(generation.rglob('*')):
+        name = path.relative_to(generation).as_posix()
+        if path.is_file() and name != MANIFEST_FILE and not name.endswith('.tmp'):
+            files[name] = {'size': path.stat().st_size, 'sha256': file_checksum(path)}
+    manifest = {
+        'generation': generation.name,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'files': files,
+        'sources': {str(source): file_checksum(source)
+                    for source in sources if Path(source).is_file()},
+        **info,
+    }
+    _write_atomic(generation / MANIFEST_FILE,
+                  json.dumps(manifest, ensure_ascii=False, indent=2))
+    logger.debug("Manifest mentve: %d fájl --> %s", len(files), generation)
+    return manifest
+
+
+def verify_generation(generation, checksums=True):
+    """
+    A generáció fájljainak ellenőrzése a manifest alapján.
+
+    Args:
+        generation (Path): A generáció könyvtára.
+        checksums (bool, optional): Ellenőrzőösszegek vizsgálata is (különben
+            csak a méretek). Alapértelmezett: True
+
+    Returns:
+        dict: A manifest.
+
+    Raises:
+        GenerationError: Hiányzó manifest vagy fájl, illetve eltérő méret
+            vagy ellenőrzőösszeg esetén.
+    """
+    generation = Path(generation)
+    try:
+        with (generation / MANIFEST_FILE).open('r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as error:
+        raise GenerationError(f"Olvashatatlan manifest: {generation} ({error})")
+
+    for name, expected in manifest.get('files', {}).items():
+        path = generation / name
+        if not path.is_file():
+            raise GenerationError(f"Hiányzó fájl a(z) {generation.name} generációban: {name}")
+        if path.stat().st_size != expected['size']:
+            raise GenerationError(f"Eltérő méret a(z) {generation.name} generációban: {name}")
+        if checksums and file_checksum(path) != expected['sha256']:
+            raise GenerationError(
+                f"Eltérő ellenőrzőösszeg a(z) {generation.name} generációban: {name}")
+    return manifest
+
+
+def publish(generation, root=GENERATIONS_DIR):
+    """
+    Generáció közzététele: a CURRENT mutató atomi átállítása.
+
+    Args:
+        generation (Path): A generáció könyvtára (root alatt).
+        root (Path, optional): A generációk könyvtára. Alapértelmezett: GENERATIONS_DIR
+
+    Raises:
+        GenerationError: Ha a generáció nem teljes (lásd verify_generation).
+    """
+    generation = Path(generation)
+    verify_generation(generation, checksums=False)
+    _write_atomic(Path(root) / CURRENT_FILE, generation.name + '\n')
+    logger.info("Generáció közzétéve: %s", generation.name)
+
+
+def current_generation(root=GENERATIONS_DIR):
+    """
+    A közzétett generáció könyvtára.
+
+    Args:
+        root (Path, optional): A generációk könyvtára. Alapértelmezett: GENERATIONS_DIR
+
+    Returns:
+        Path: A CURRENT által mutatott generáció, vagy None, ha nincs
+            közzétett (vagy a mutatott generáció hiányzik).
+    """
+    root = Path(root)
+    try:
+        name = (root / CURRENT_FILE).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    generation = root / name
+    if not name or not (generation / MANIFEST_FILE).is_file():
+        logger.warning("A CURRENT mutató hiányzó generációra mutat: %s", name)
+        return None
+    return generation
+
+
+def prune_generations(root=GENERATIONS_DIR, keep=DEFAULT_GENERATION_CONFIG['keep'],
+                      protect=()):
+    """
+    Régi generációk törlése; a közzétett és a legújabb keep darab megmarad.
+
+    A közzétettnél újabb (még épülő) generációk és a protect-ben megadott,
+    még használatban lévő (pl. memóriába leképezett vektorokkal kiszolgáló)
+    generációk nem törlődnek.
+
+    Args:
+        root (Path, optional): A generációk könyvtára. Alapértelmezett: GENERATIONS_DIR
+        keep (int, optional): A megőrzött generációk száma.
+        protect (iterable, optional): Nem törölhető generációk nevei.
+
+    Returns:
+        list: A törölt generációk nevei.
+    """
+    current = current_generation(root)
+    if current is None:
+        return []
+    older = sorted(path.name for path in Path(root).iterdir()
+                   if path.is_dir() and path.name < current.name)
+    protect = set(protect)
+    removed = [name for name in older[:max(len(older) - (keep - 1), 0)]
+               if name not in protect]
+    for name in removed:
+        shutil.rmtree(Path(root) / name, ignore_errors=True)
+    if removed:
+        logger.info("Régi generációk törölve: %s", ', '.join(removed))
+    return removed
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:20:05 2026
+@author: zsolt
+
+FAISS index gyár az Embedder számára.
+
+Támogatott index típusok:
+- flat:  pontos (brute-force) keresés, kis korpuszhoz
+- ivf:   IVF-Flat, klaszterezett közelítő keresés
+- ivfpq: IVF-PQ, klaszterezett keresés product quantization tömörítéssel
+- hnsw:  HNSW gráf alapú közelítő keresés
+- auto:  flat a küszöbérték alatt, afölött ivf
+
+A vektorok tárolási kódolása (codec) a flat, ivf és hnsw típusnál választható:
+- none:   float32 (4 bájt / dimenzió)
+- fp16:   float16 (2 bájt / dimenzió)
+- sq8:    8 bites skalár kvantálás (1 bájt / dimenzió)
+- pq:     product quantization (pq_m * pq_nbits bit)
+- binary: előjelbitek, Hamming-távolság (1 bit / dimenzió, csak flat)
+
+Tömörített kódolásnál a rerank > 0 beállítás ennyi jelöltet a lemezen tárolt
+teljes pontosságú vektorokkal pontosan újrapontoz (lásd vector_store).
+
+Opcionális dimenziócsökkentés (reduction) a tárolás előtt, reduce_dim
+dimenzióra (IndexPreTransform):
+- pca: tanított főkomponens-vetítés (a korpusz varianciáját őrzi meg)
+- rr:  véletlen ortonormált vetítés (tanítás nélkül, adatfüggetlen)
+A transzformáció az indexszel együtt tanul, mentődik és töltődik be, a
+kérdésvektorokra pedig a keresés automatikusan alkalmazza.
+
+mmap = true esetén a mentett index csak olvasható, memóriába leképezett
+módon töltődik be (gyors indulás, a folyamatok közös fizikai lapokat
+használnak); prefault = true esetén a fájlok a háttérben előolvasódnak.
+
+A konfiguráció a wiki_rag.ini [index] szekciójából olvasható:
+
+    [index]
+    type = auto
+    codec = none
+    rerank = 0
+    auto_threshold = 100000
+    nlist = 0
+    nprobe = 16
+    pq_m = 16
+    pq_nbits = 8
+    hnsw_m = 32
+    ef_search = 64
+    train_sample = 50000
+    reduction = none
+    reduce_dim = 0
+    mmap = false
+    prefault = false
+"""
+import math
+import configparser
+import logging
+from pathlib import Path
+import numpy as np
+import faiss
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+INDEX_TYPES = ('auto', 'flat', 'ivf', 'ivfpq', 'hnsw')
+CODECS = ('none', 'fp16', 'sq8', 'pq', 'binary')
+REDUCTIONS = ('none', 'pca', 'rr')
+
+DEFAULT_INDEX_CONFIG = {
+    'type': 'auto',
+    'codec': 'none',
+    'rerank': 0,            # 0: nincs pontos újrapontozás
+    'auto_threshold': 100000,
+    'nlist': 0,             # 0: automatikus (4 * sqrt(n))
+    'nprobe': 16,
+    'pq_m': 16,
+    'pq_nbits': 8,
+    'hnsw_m': 32,
+    'ef_search': 64,
+    'train_sample': 50000,
+    'reduction': 'none',
+    'reduce_dim': 0,        # 0: nincs dimenziócsökkentés
+    'mmap': False,
+    'prefault': False,
+}
+
+# Legalább ennyi tanítóvektor jusson egy IVF klaszterre (FAISS ajánlás)
+MIN_POINTS_PER_CENTROID = 39
+
+
+def load_index_config(path=CONFIG_PATH):
+    """
+    Index beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: Az index beállításai, hiányzó vagy hibás értékek helyett
+            az alapértelmezettekkel.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_INDEX_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+    except configparser.Error as error:
+        logger.warning("Hibás konfiguráció (%s), alapértelmezett index beállítások", error)
+        return settings
+
+    if not config.has_section('index'):
+        return settings
+
+    index_type = config.get('index', 'type', fallback='auto').strip().lower() or 'auto'
+    if index_type not in INDEX_TYPES:
+        logger.warning("Ismeretlen index típus: %s, 'auto' használata", index_type)
+        index_type = 'auto'
+    settings['type'] = index_type
+
+    codec = config.get('index', 'codec', fallback='none').strip().lower() or 'none'
+    if codec not in CODECS:
+        logger.warning("Ismeretlen codec: %s, 'none' használata", codec)
+        codec = 'none'
+    settings['codec'] = codec
+
+    reduction = config.get('index', 'reduction', fallback='none').strip().lower() or 'none'
+    if reduction not in REDUCTIONS:
+        logger.warning("Ismeretlen dimenziócsökkentés: %s, 'none' használata", reduction)
+        reduction = 'none'
+    settings['reduction'] = reduction
+
+    for key, default in DEFAULT_INDEX_CONFIG.items():
+        if key in ('type', 'codec', 'reduction'):
+            continue
+        try:
+            if isinstance(default, bool):
+                settings[key] = config.getboolean('index', key, fallback=default)
+                continue
+            value = config.getint('index', key, fallback=default)
+        except ValueError:
+            logger.warning("Érvénytelen [index] %s érték, alapértelmezett: %s", key, default)
+            value = default
+        settings[key] = max(value, 0)
+
+    return settings
+
+
+def resolve_index_type(n_vectors, config):
+    """
+    A ténylegesen használt index típus meghatározása.
+
+    Args:
+        n_vectors (int): Az indexelendő vektorok száma.
+        config (dict): Index beállítások (load_index_config).
+
+    Returns:
+        str: 'flat', 'ivf', 'ivfpq' vagy 'hnsw'.
+    """
+    index_type = config.get('type', 'auto')
+    if index_type != 'auto':
+        return index_type
+    if n_vectors >= config.get('auto_threshold', DEFAULT_INDEX_CONFIG['auto_threshold']):
+        return 'ivf'
+    return 'flat'
+
+
+def _nlist_for(n_vectors, config):
+    """IVF klaszterszám a konfiguráció és a vektorszám alapján."""
+    nlist = config.get('nlist') or int(4 * math.sqrt(max(n_vectors, 1)))
+    max_nlist = max(n_vectors // MIN_POINTS_PER_CENTROID, 1)
+    return max(min(nlist, max_nlist), 1)
+
+
+def _pq_m_for(dim, requested_m):
+    """A kért PQ alvektor-számhoz legközelebbi, a dimenziót osztó érték."""
+    for m in range(min(requested_m, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def _storage_string(codec, dim, config):
+    """A vektorok tárolási kódolásának factory leírója."""
+    if codec == 'fp16':
+        return 'SQfp16'
+    if codec == 'sq8':
+        return 'SQ8'
+    if codec == 'pq':
+        return f"PQ{_pq_m_for(dim, config['pq_m'])}x{config['pq_nbits']}"
+    return 'Flat'
+
+
+def reduced_dim(dim, n_vectors, config):
+    """
+    A tárolt vektorok dimenziója a dimenziócsökkentés után.
+
+    Args:
+        dim (int): Az eredeti dimenzió.
+        n_vectors (int): Az indexelendő vektorok száma (a PCA tanításához).
+        config (dict): Index beállítások ('reduction', 'reduce_dim').
+
+    Returns:
+        int: A csökkentett dimenzió, vagy None, ha nincs (vagy nem lehetséges)
+            dimenziócsökkentés.
+    """
+    reduction = config.get('reduction', 'none')
+    target = config.get('reduce_dim', 0)
+    if reduction == 'none' or not target:
+        return None
+    if target >= dim:
+        logger.warning("A reduce_dim (%d) nem kisebb a dimenziónál (%d), "
+                       "dimenziócsökkentés kihagyva", target, dim)
+        return None
+    if reduction == 'pca' and n_vectors <= target:
+        logger.warning("Kevés vektor (%d) a PCA tanításhoz (reduce_dim: %d), "
+                       "dimenziócsökkentés kihagyva", n_vectors, target)
+        return None
+    return target
+
+
+def build_factory_string(index_type, dim, n_vectors, config):
+    """
+    FAISS index_factory leíró összeállítása.
+
+    Args:
+        index_type (str): 'flat', 'ivf', 'ivfpq' vagy 'hnsw'.
+        dim (int): A vektorok dimenziója.
+        n_vectors (int): Az indexelendő vektorok száma.
+        config (dict): Index beállítások (a 'codec' a tárolási kódolás,
+            a 'reduction' és 'reduce_dim' az opcionális dimenziócsökkentés).
+
+    Returns:
+        str: A faiss.index_factory számára átadható leíró (pl. 'IVF256,SQ8'
+            vagy 'PCA256,HNSW32').
+
+    Raises:
+        ValueError: Ismeretlen index típus vagy codec esetén.
+    """
+    codec = config.get('codec', 'none')
+    if codec not in CODECS or codec == 'binary':
+        raise ValueError(f"A codec nem adható meg factory leíróval: {codec}")
+
+    prefix = ''
+    target = reduced_dim(dim, n_vectors, config)
+    if target is not None:
+        prefix = f"{config['reduction'].upper()}{target},"
+        dim = target
+
+    storage = _storage_string(codec, dim, config)
+    if index_type == 'flat':
+        return prefix + storage
+    if index_type == 'ivf':
+        return f"{prefix}IVF{_nlist_for(n_vectors, config)},{storage}"
+    if index_type == 'ivfpq':
+        m = _pq_m_for(dim, config['pq_m'])
+        return f"{prefix}IVF{_nlist_for(n_vectors, config)},PQ{m}x{config['pq_nbits']}"
+    if index_type == 'hnsw':
+        if codec == 'none':
+            return f"{prefix}HNSW{config['hnsw_m']}"
+        return f"{prefix}HNSW{config['hnsw_m']},{storage}"
+    raise ValueError(f"Ismeretlen index típus: {index_type}")
+
+
+def create_index(dim, n_vectors, config):
+    """
+    Új, üres FAISS index létrehozása a beállítások és a korpuszméret alapján.
+
+    Ha a kért típushoz túl kevés a vektor (pl. PQ tanításhoz), egyszerűbb
+    típusra vált vissza. A binary codec bináris (Hamming) flat indexet ad,
+    amelybe a vektorok a binary_codes() kódjaiként kerülnek.
+
+    Args:
+        dim (int): A vektorok dimenziója.
+        n_vectors (int): Az indexelendő vektorok száma.
+        config (dict): Index beállítások.
+
+    Returns:
+        tuple: (faiss.Index vagy faiss.IndexBinary, index típus, factory leíró)
+    """
+    index_type = resolve_index_type(n_vectors, config)
+    codec = config.get('codec', 'none')
+
+    if index_type == 'ivfpq' and n_vectors < 2 ** config['pq_nbits']:
+        logger.warning("Kevés vektor (%d) a PQ tanításhoz, IVF-Flat használata", n_vectors)
+        index_type = 'ivf'
+    if codec == 'pq' and n_vectors < 2 ** config['pq_nbits']:
+        logger.warning("Kevés vektor (%d) a PQ tanításhoz, sq8 codec használata", n_vectors)
+        codec = 'sq8'
+    if codec == 'binary' and (index_type != 'flat' or dim % 8):
+        logger.warning("A binary codec csak 8-cal osztható dimenziójú flat indexszel "
+                       "használható (%s, %d), sq8 codec használata", index_type, dim)
+        codec = 'sq8'
+
+    if codec == 'binary' and config.get('reduction', 'none') != 'none':
+        logger.warning("A binary codec dimenziócsökkentéssel nem használható, "
+                       "dimenziócsökkentés kihagyva")
+
+    if codec == 'binary':
+        index = faiss.IndexBinaryFlat(dim)
+        logger.info("Index típus: flat (BFlat, binary), %d vektor", n_vectors)
+        return index, 'flat', 'BFlat'
+
+    description = build_factory_string(index_type, dim, n_vectors, dict(config, codec=codec))
+    index = faiss.index_factory(dim, description, faiss.METRIC_L2)
+    apply_search_params(index, config)
+
+    logger.info("Index típus: %s (%s), %d vektor", index_type, description, n_vectors)
+    return index, index_type, description
+
+
+def train_index(index, vectors, config, seed=42):
+    """
+    Index tanítása a vektorok egy véletlen mintáján, ha szükséges.
+
+    Args:
+        index (faiss.Index): A tanítandó index.
+        vectors (np.ndarray): Az összes indexelendő vektor (float32).
+        config (dict): Index beállítások ('train_sample').
+        seed (int, optional): A mintavétel véletlen magja.
+    """
+    if index.is_trained:
+        return
+
+    sample_size = config.get('train_sample') or len(vectors)
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    else:
+        sample = vectors
+
+    logger.info("Index tanítása: %d mintavektor", len(sample))
+    index.train(np.ascontiguousarray(sample, dtype='float32'))
+
+
+def read_index(path, mmap=False, binary=False):
+    """
+    Mentett index beolvasása, opcionálisan memóriába leképezve.
+
+    Leképezett módban a vektorkódok nem kerülnek a heapre: a lapok igény
+    szerint töltődnek be, és az ugyanazt a fájlt leképező folyamatok
+    közösen használják őket. Az így betöltött index csak olvasható.
+
+    Args:
+        path (Path): Az index fájl útvonala.
+        mmap (bool, optional): Csak olvasható, memóriába leképezett betöltés.
+        binary (bool, optional): Bináris (Hamming) index.
+
+    Returns:
+        faiss.Index vagy faiss.IndexBinary
+    """
+    flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    if binary:
+        return faiss.read_index_binary(str(path), flags)
+    return faiss.read_index(str(path), flags)
+
+
+def is_binary(index):
+    """Igaz, ha az index bináris (Hamming-távolságú) index."""
+    return isinstance(index, faiss.IndexBinary)
+
+
+def binary_codes(vectors):
+    """
+    Vektorok bináris kódja: dimenziónként az előjelbit, bájtokba csomagolva.
+
+    Args:
+        vectors (np.ndarray): (n, dim) méretű float mátrix, dim osztható 8-cal.
+
+    Returns:
+        np.ndarray: (n, dim / 8) méretű uint8 mátrix.
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def with_ids(index):
+    """
+    Index előkészítése stabil azonosítós tárolásra.
+
+    Az IVF indexek az azonosítókat a saját invertált listáikban tárolják
+    (add_with_ids), ezért nem kapnak IDMap2 csomagolást: az IVF törlés nem
+    számozza át a megmaradt belső sorszámokat, így a csomagoló azonosító-
+    táblája a törlés után elcsúszna. A többi index IDMap2-be kerül.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A becsomagolandó index.
+
+    Returns:
+        faiss.IndexIDMap2, faiss.IndexBinaryIDMap2 vagy az IVF index maga.
+    """
+    if is_binary(index):
+        return faiss.IndexBinaryIDMap2(index)
+    if faiss.try_extract_index_ivf(index) is not None:
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def unwrap_ivf(index):
+    """
+    IDMap2-be csomagolt (régebbi formátumú) IVF index átalakítása közvetlen azonosítósra.
+
+    Az invertált listák belső sorszámai a csomagoló azonosító-táblája szerinti
+    stabil azonosítókra cserélődnek (lásd with_ids). Más indexet változatlanul ad vissza.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A vizsgálandó index.
+
+    Returns:
+        faiss.Index: Az átalakított IVF index, vagy az eredeti index.
+    """
+    if is_binary(index) or not hasattr(index, 'id_map'):
+        return index
+    inner = faiss.downcast_index(index.index)
+    if faiss.try_extract_index_ivf(inner) is None:
+        return index
+
+    id_map = stored_ids(index)
+    inner = faiss.clone_index(inner)
+    ivf = faiss.try_extract_index_ivf(inner)
+    ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    invlists = ivf.invlists
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if not size:
+            continue
+        positions = faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy()
+        codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), size * invlists.code_size).copy()
+        labels = np.ascontiguousarray(id_map[positions], dtype='int64')
+        invlists.update_entries(list_no, 0, size, faiss.swig_ptr(labels), faiss.swig_ptr(codes))
+    logger.info("IDMap2 csomagolású IVF index átalakítva (%d vektor)", inner.ntotal)
+    return inner
+
+
+def stored_ids(index):
+    """
+    Az indexben tárolt azonosítók az index belső sorrendjében.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A vizsgálandó index.
+
+    Returns:
+        np.ndarray: int64 azonosítók; IVF indexnél az invertált listák
+            sorrendjében, azonosító nélküli indexnél a pozíciók.
+    """
+    if hasattr(index, 'id_map'):
+        return faiss.vector_to_array(index.id_map).astype('int64')
+    ivf = None if is_binary(index) else faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return np.arange(index.ntotal, dtype='int64')
+    invlists = ivf.invlists
+    parts = [faiss.rev_swig_ptr(invlists.get_ids(list_no), invlists.list_size(list_no)).copy()
+             for list_no in range(ivf.nlist) if invlists.list_size(list_no)]
+    return np.concatenate(parts).astype('int64') if parts else np.zeros(0, dtype='int64')
+
+
+def remove_ids(index, ids):
+    """
+    Vektorok törlése azonosító szerint.
+
+    IVF indexnél a (lustán épített) közvetlen leképezés előbb törlődik, mert
+    a hash tábla alapú leképezés csak tömb szelektorral engedne törölni.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): Az index.
+        ids (np.ndarray): A törlendő azonosítók (int64).
+
+    Returns:
+        int: A törölt vektorok száma.
+
+    Raises:
+        RuntimeError: Ha az index nem támogatja a törlést (HNSW).
+    """
+    ivf = None if is_binary(index) else faiss.try_extract_index_ivf(index)
+    if ivf is not None and not ivf.direct_map.no():
+        ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    return index.remove_ids(ids)
+
+
+def base_index(index):
+    """
+    A csomagoló indexek (IndexIDMap, IndexPreTransform) alatti index visszaadása.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A vizsgálandó index.
+
+    Returns:
+        faiss.Index: A legbelső, downcastolt index.
+    """
+    if is_binary(index):
+        while isinstance(index, (faiss.IndexBinaryIDMap, faiss.IndexBinaryIDMap2)):
+            index = index.index
+        return index
+
+    index = faiss.downcast_index(index)
+    while isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexPreTransform)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def bytes_per_vector(index):
+    """
+    Egy vektor tárolt kódjának mérete bájtban (azonosító és gráf nélkül).
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A vizsgálandó index.
+
+    Returns:
+        int: A kódméret bájtban.
+    """
+    index = base_index(index)
+    storage = getattr(index, 'storage', None)
+    if storage is not None:
+        index = faiss.downcast_index(storage)
+    return int(index.code_size)
+
+
+def detect_codec(index):
+    """
+    Tárolási kódolás meghatározása egy betöltött indexből (metaadat hiányában).
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A vizsgálandó index.
+
+    Returns:
+        str: 'none', 'fp16', 'sq8', 'pq' vagy 'binary'.
+    """
+    if is_binary(index):
+        return 'binary'
+    code_size = bytes_per_vector(index)
+    dim = stored_dim(index)
+    if code_size == 4 * dim:
+        return 'none'
+    if code_size == 2 * dim:
+        return 'fp16'
+    if code_size == dim:
+        return 'sq8'
+    return 'pq'
+
+
+def stored_dim(index):
+    """
+    A tárolt vektorok dimenziója (dimenziócsökkentés után).
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A vizsgálandó index.
+
+    Returns:
+        int: A legbelső index dimenziója.
+    """
+    return int(base_index(index).d)
+
+
+def detect_reduction(index):
+    """
+    Dimenziócsökkentés típusa egy betöltött indexből.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A vizsgálandó index.
+
+    Returns:
+        str: 'pca', 'rr' vagy 'none'.
+    """
+    if is_binary(index):
+        return 'none'
+    inner = faiss.downcast_index(index)
+    while isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        inner = faiss.downcast_index(inner.index)
+    if not isinstance(inner, faiss.IndexPreTransform) or not inner.chain.size():
+        return 'none'
+    transform = faiss.downcast_VectorTransform(inner.chain.at(0))
+    if isinstance(transform, faiss.PCAMatrix):
+        return 'pca'
+    if isinstance(transform, faiss.RandomRotationMatrix):
+        return 'rr'
+    return 'none'
+
+
+def apply_search_params(index, config):
+    """
+    Keresési paraméterek (nprobe, efSearch) beállítása az indexen.
+
+    Args:
+        index (faiss.Index): A beállítandó index.
+        config (dict): Index beállítások ('nprobe', 'ef_search').
+    """
+    if is_binary(index):
+        return
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = max(min(config.get('nprobe', 1), ivf.nlist), 1)
+
+    hnsw = getattr(base_index(index), 'hnsw', None)
+    if hnsw is not None:
+        hnsw.efSearch = max(config.get('ef_search', 16), 1)
+
+
+def selector_params(index, selector):
+    """
+    Keresési paraméterek ID szelektorral, az indexen beállított nprobe/efSearch
+    értékekkel.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): Az index (csomagolva is lehet).
+        selector (faiss.IDSelector): A keresést szűrő szelektor.
+
+    Returns:
+        faiss.SearchParameters: A paraméterek, vagy None, ha az index nem
+            támogatja a szelektoros keresést (flat PQ).
+    """
+    if is_binary(index):
+        return faiss.SearchParameters(sel=selector)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+
+    base = base_index(index)
+    if isinstance(base, faiss.IndexPQ):
+        return None
+    hnsw = getattr(base, 'hnsw', None)
+    if hnsw is not None:
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def detect_index_type(index):
+    """
+    Index típus meghatározása egy betöltött indexből (metaadat hiányában).
+
+    Args:
+        index (faiss.Index): A vizsgálandó index.
+
+    Returns:
+        str: 'flat', 'ivf', 'ivfpq' vagy 'hnsw'.
+    """
+    if is_binary(index):
+        return 'flat'
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return 'ivfpq' if isinstance(faiss.downcast_index(ivf), faiss.IndexIVFPQ) else 'ivf'
+    if hasattr(base_index(index), 'hnsw'):
+        return 'hnsw'
+    return 'flat'
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:10:36 2026
+@author: zsolt
+
+Metaadat alapú szűrés a vektoros kereséshez.
+
+A passage-ek az oldaluktól öröklik a metaadatokat ('namespace', 'categories',
+'title', 'source'). A MetadataIndex mezőértékenként tárolja a dokumentumazonosítókat,
+és ezekből az index belső sorrendjéhez igazított bitmapeket készít
+(gyorsítótárazva), amelyek a FAISS keresésbe IDSelectorBitmap-ként kerülnek;
+így a szűrt keresés nem kér le és dob el fölösleges jelölteket.
+
+Szűrőkifejezés: dict, a kulcsok a FILTER_FIELDS elemei, az értékek egy érték
+vagy értékek listája. Egy mezőn belül az értékek VAGY, a mezők között ÉS
+kapcsolatban vannak:
+
+    {'namespace': 0, 'category': ['Python', 'Flask'], 'title_prefix': 'Python/'}
+"""
+import bisect
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FILTER_FIELDS = ('namespace', 'category', 'title_prefix', 'source')
+# A title_prefix szűrő a 'title' mező értékein, előtagként illeszkedik
+INDEXED_FIELDS = ('namespace', 'category', 'title', 'source')
+MASK_CACHE_SIZE = 256
+
+
+def normalize_filters(filters):
+    """
+    Szűrőkifejezés ellenőrzése és egységes alakra hozása.
+
+    Args:
+        filters (dict): Szűrőkifejezés (lásd a modul leírását), vagy None.
+
+    Returns:
+        dict: Mező -> szöveges értékek rendezett tuple-je; None, ha nincs szűrés.
+
+    Raises:
+        ValueError: Ismeretlen mező vagy üres értéklista esetén.
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise ValueError(f"A szűrőnek dict-nek kell lennie: {filters!r}")
+
+    normalized = {}
+    for field, values in filters.items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Ismeretlen szűrőmező: {field} "
+                             f"(támogatott: {', '.join(FILTER_FIELDS)})")
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        values = tuple(sorted({str(value) for value in values}))
+        if not values:
+            raise ValueError(f"Üres értéklista a(z) {field} szűrőben")
+        normalized[field] = values
+    return normalized
+
+
+def doc_values(doc, field):
+    """
+    Egy dokumentum értékei egy indexelt mezőben.
+
+    A 'title' mező az összevont (deduplikált) passage-ek további
+    forrásoldalainak címeit ('titles') is tartalmazza.
+
+    Args:
+        doc (dict): A dokumentum.
+        field (str): 'namespace', 'category', 'title' vagy 'source'.
+
+    Returns:
+        list: A szöveges értékek (hiányzó mező esetén üres lista).
+    """
+    if field == 'category':
+        return [str(category) for category in doc.get('categories') or []]
+    if field == 'title' and doc.get('titles'):
+        titles = [str(doc['title'])] if doc.get('title') is not None else []
+        return titles + [str(title) for title in doc['titles'] if str(title) not in titles]
+    value = doc.get(field)
+    return [] if value is None else [str(value)]
+
+
+def matches_filters(doc, filters):
+    """
+    Igaz, ha a dokumentum megfelel a (normalizált) szűrőnek.
+
+    Args:
+        doc (dict): A dokumentum.
+        filters (dict): normalize_filters eredménye, vagy None.
+
+    Returns:
+        bool: A szűrés eredménye (szűrő nélkül mindig igaz).
+    """
+    for field, values in (filters or {}).items():
+        if field == 'title_prefix':
+            titles = doc_values(doc, 'title')
+            if not any(title.startswith(prefix) for title in titles for prefix in values):
+                return False
+        elif not set(doc_values(doc, field)) & set(values):
+            return False
+    return True
+
+
+class MetadataIndex:
+    """
+    Mezőértékenkénti azonosítóhalmazok és a belőlük készített keresési bitmapek.
+
+    A bitmapek az index belső sorrendjére (az IDMap azonosító-táblájára)
+    vonatkoznak; az index változásakor az invalidate() üríti a gyorsítótárat.
+    """
+
+    def __init__(self):
+        self._values = {field: {} for field in INDEXED_FIELDS}
+        self._ids = set()
+        self._sorted_titles = None
+        self._masks = OrderedDict()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, doc_id):
+        return int(doc_id) in self._ids
+
+    def add(self, docs):
+        """
+        Dokumentumok metaadatainak felvétele; létező azonosító értékei lecserélődnek.
+
+        Args:
+            docs (iterable): Dokumentumok 'id' kulccsal.
+        """
+        docs = list(docs)
+        self.remove([doc['id'] for doc in docs if doc['id'] in self._ids])
+        for doc in docs:
+            self._ids.add(int(doc['id']))
+            for field in INDEXED_FIELDS:
+                for value in doc_values(doc, field):
+                    self._values[field].setdefault(value, set()).add(int(doc['id']))
+        self._sorted_titles = None
+        self.invalidate()
+
+    def remove(self, ids):
+        """
+        Azonosítók törlése minden mezőből.
+
+        Args:
+            ids (iterable): A törlendő azonosítók.
+        """
+        ids = {int(doc_id) for doc_id in ids} & self._ids
+        if not ids:
+            return
+        self._ids -= ids
+        for values in self._values.values():
+            for value in list(values):
+                values[value] -= ids
+                if not values[value]:
+                    del values[value]
+        self._sorted_titles = None
+        self.invalidate()
+
+    def invalidate(self):
+        """A bitmap gyorsítótár ürítése (az index tartalmának változásakor)."""
+        self._masks.clear()
+
+    def values(self, field):
+        """Egy mező ismert értékei rendezve."""
+        return sorted(self._values[field])
+
+    def ids_for(self, field, value):
+        """Egy mezőérték dokumentumazonosítói rendezve."""
+        return sorted(self._values[field].get(str(value), ()))
+
+    def _prefix_ids(self, prefix):
+        """A prefix-szel kezdődő című dokumentumok azonosítói."""
+        if self._sorted_titles is None:
+            self._sorted_titles = sorted(self._values['title'])
+        titles = self._sorted_titles
+        ids = set()
+        for position in range(bisect.bisect_left(titles, prefix), len(titles)):
+            if not titles[position].startswith(prefix):
+                break
+            ids |= self._values['title'][titles[position]]
+        return ids
+
+    def _value_mask(self, field, value, id_map):
+        """Egy mezőérték bitmapje (bool tömb az index belső sorrendjében), gyorsítótárazva."""
+        key = (field, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            if field == 'title_prefix':
+                ids = self._prefix_ids(value)
+            else:
+                ids = self._values[field].get(value, ())
+            mask = np.isin(id_map, np.fromiter(ids, dtype='int64', count=len(ids)))
+            self._masks[key] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        else:
+            self._masks.move_to_end(key)
+        return mask
+
+    def mask(self, filters, id_map):
+        """
+        A szűrőnek megfelelő indexsorok bitmapje.
+
+        Args:
+            filters (dict): normalize_filters eredménye.
+            id_map (np.ndarray): Az index belső sorrendjében tárolt azonosítók.
+
+        Returns:
+            np.ndarray: len(id_map) hosszú bool tömb.
+        """
+        result = np.ones(len(id_map), dtype=bool)
+        for field, values in filters.items():
+            field_mask = np.zeros(len(id_map), dtype=bool)
+            for value in values:
+                field_mask |= self._value_mask(field, value, id_map)
+            result &= field_mask
+        return result
+
+    def save(self, path):
+        """
+        Index mentése JSON fájlba.
+
+        Args:
+            path (Path): A mentési útvonal.
+        """
+        data = {field: {value: sorted(ids) for value, ids in values.items()}
+                for field, values in self._values.items()}
+        data['ids'] = sorted(self._ids)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        logger.debug("Metaadat index mentve --> %s", path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Mentett index betöltése.
+
+        Args:
+            path (Path): A JSON fájl útvonala.
+
+        Returns:
+            MetadataIndex: A betöltött index.
+
+        Raises:
+            FileNotFoundError: Ha a fájl nem létezik.
+        """
+        with Path(path).open('r', encoding='utf-8') as file:
+            data = json.load(file)
+
+        index = cls()
+        for field in INDEXED_FIELDS:
+            index._values[field] = {value: set(ids) for value, ids in data.get(field, {}).items()}
+        index._ids = set(data.get('ids', []))
+        logger.info("Metaadat index betöltve: %d cím, %d kategória",
+                    len(index._values['title']), len(index._values['category']))
+        return index
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:22:10 2026
+@author: zsolt
+
+Többfolyamatos, hossz szerint csoportosított szövegkódolás indexépítéshez.
+
+A szövegek hossz szerint rendezve, közel azonos hosszúságú batch-ekben
+kerülnek a modellbe (kevesebb padding), a batch-eket egy folyamatkészlet
+dolgozza fel, az eredmény pedig az eredeti sorrendbe áll vissza.
+Minden munkafolyamat egyszer tölti be a modellt.
+
+A konfiguráció a wiki_rag.ini [encoding] szekciójából olvasható:
+
+    [encoding]
+    workers = 4
+    batch_size = 32
+"""
+import os
+import time
+import configparser
+import logging
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+DEFAULT_WORKERS = 1
+DEFAULT_BATCH_SIZE = 32
+
+# A munkafolyamat saját modellpéldánya (folyamatonként egyszer töltődik be)
+_worker_model = None
+
+
+def load_encoding_config(path=CONFIG_PATH):
+    """
+    Kódolási beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'workers' és 'batch_size' kulcsokkal. A workers = 0 érték
+            a CPU magok számát jelenti.
+    """
+    config = configparser.ConfigParser()
+    settings = {'workers': DEFAULT_WORKERS, 'batch_size': DEFAULT_BATCH_SIZE}
+
+    try:
+        config.read(path, encoding='utf-8')
+        workers = config.getint('encoding', 'workers', fallback=DEFAULT_WORKERS)
+        batch_size = config.getint('encoding', 'batch_size', fallback=DEFAULT_BATCH_SIZE)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [encoding] konfiguráció (%s), alapértelmezett értékek", error)
+        return settings
+
+    settings['workers'] = workers if workers > 0 else (os.cpu_count() or 1)
+    settings['batch_size'] = batch_size if batch_size > 0 else DEFAULT_BATCH_SIZE
+    return settings
+
+
+def length_buckets(texts, batch_size):
+    """
+    Szövegindexek hossz szerint rendezett batch-ekre bontása.
+
+    Args:
+        texts (list): A kódolandó szövegek.
+        batch_size (int): A batch-ek mérete.
+
+    Returns:
+        list: Indexlisták; egy batch-en belül a szövegek közel azonos hosszúak.
+    """
+    order = sorted(range(len(texts)), key=lambda position: len(texts[position]))
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def _load_sentence_transformer(model_name, backend='torch'):
+    """
+    Alapértelmezett modellbetöltő a munkafolyamatokhoz.
+
+    Más backendhez functools.partial-lal paraméterezhető (a partial objektum
+    a munkafolyamatokba átadható).
+    """
+    from encoder_registry import get_encoder
+    return get_encoder(model_name, backend)
+
+
+def encoder_loader(backend='torch'):
+    """
+    Munkafolyamatokba átadható modellbetöltő a megadott backendhez.
+
+    Args:
+        backend (str, optional): Az encoder backend ('torch', 'onnx', 'int8').
+
+    Returns:
+        callable: model_name -> modell függvény.
+    """
+    if backend == 'torch':
+        return _load_sentence_transformer
+    return partial(_load_sentence_transformer, backend=backend)
+
+
+def _init_worker(model_name, loader, threads):
+    """Munkafolyamat inicializálása: szálkorlát és modell betöltése."""
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = loader(model_name)
+
+
+def _encode_batch(texts, batch_size):
+    """Egy batch kódolása a munkafolyamat modelljével."""
+    embeddings = _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    return np.asarray(embeddings, dtype='float32')
+
+
+class EncoderPool:
+    """
+    Tartós munkafolyamat-készlet több egymást követő kódoláshoz.
+
+    Streamelt indexépítésnél a batch-ek ugyanazt a készletet használják,
+    így a modell munkafolyamatonként csak egyszer töltődik be.
+    Context managerként használható.
+    """
+
+    def __init__(self, model_name, workers, batch_size=DEFAULT_BATCH_SIZE,
+                 loader=_load_sentence_transformer):
+        """
+        Args:
+            model_name (str): A munkafolyamatok által betöltendő modell neve.
+            workers (int): Munkafolyamatok száma.
+            batch_size (int, optional): Batch méret.
+            loader (callable, optional): Modulszintű modellbetöltő függvény.
+        """
+        self.workers = workers
+        self.batch_size = batch_size
+        threads = max((os.cpu_count() or 1) // workers, 1)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(model_name, loader, threads))
+
+    def encode(self, texts, dim):
+        """
+        Szövegek kódolása hossz szerinti batch-ekben, az eredeti sorrendben.
+
+        Args:
+            texts (list): A kódolandó szövegek.
+            dim (int): Az embedding dimenziója.
+
+        Returns:
+            np.ndarray: (len(texts), dim) méretű float32 mátrix.
+        """
+        vectors = np.zeros((len(texts), dim), dtype='float32')
+        buckets = length_buckets(texts, self.batch_size)
+        results = self._executor.map(
+            _encode_batch,
+            [[texts[position] for position in bucket] for bucket in buckets],
+            [self.batch_size] * len(buckets))
+        for bucket, batch_vectors in zip(buckets, results):
+            vectors[bucket] = batch_vectors
+        return vectors
+
+    def close(self):
+        """A munkafolyamatok leállítása."""
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def encode_texts(texts, model, model_name, workers=DEFAULT_WORKERS,
+                 batch_size=DEFAULT_BATCH_SIZE, loader=_load_sentence_transformer,
+                 pool=None):
+    """
+    Szövegek kódolása, nagy mennyiségnél többfolyamatos, hossz szerint csoportosított módon.
+
+    Ha workers <= 1, vagy a szövegek nem töltenek meg munkafolyamatonként
+    legalább egy batch-et, a kódolás a hívó folyamatban, a már betöltött
+    modellel történik. A teljesítmény (dokumentum/s) logolásra kerül.
+
+    Args:
+        texts (list): A kódolandó szövegek.
+        model: A hívó folyamatban már betöltött modell (encode metódussal).
+        model_name (str): A modell neve, ezt töltik be a munkafolyamatok.
+        workers (int, optional): Munkafolyamatok száma.
+        batch_size (int, optional): Batch méret.
+        loader (callable, optional): Modellbetöltő függvény (modulszintű,
+            hogy a munkafolyamatokba átadható legyen).
+        pool (EncoderPool, optional): Már futó munkafolyamat-készlet; ha meg van
+            adva, a kódolás ezt használja új készlet indítása helyett.
+
+    Returns:
+        np.ndarray: (len(texts), dim) méretű float32 mátrix az eredeti sorrendben.
+    """
+    start = time.perf_counter()
+    dim = model.get_sentence_embedding_dimension()
+
+    if pool is not None:
+        vectors = pool.encode(texts, dim)
+        mode = f"{pool.workers} folyamat (tartós készlet)"
+    elif workers <= 1 or len(texts) < workers * batch_size:
+        embeddings = model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+        vectors = np.ascontiguousarray(embeddings, dtype='float32')
+        mode = "1 folyamat"
+    else:
+        with EncoderPool(model_name, workers, batch_size, loader) as new_pool:
+            vectors = new_pool.encode(texts, dim)
+        mode = f"{workers} folyamat"
+
+    elapsed = time.perf_counter() - start
+    logger.info("Kódolás: %d dokumentum %.2f s alatt (%.1f dokumentum/s, %s)",
+                len(texts), elapsed, len(texts) / elapsed if elapsed > 0 else 0.0, mode)
+    return vectors
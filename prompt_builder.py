@@ -18,8 +18,8 @@ def build_prompt(contexts, question):
     a wiki tartalmak alapján.
 
     Args:
-        contexts (list): MediaWiki dokumentumok listája. Minden elem egy dict,
-            amely 'title' és 'text' kulcsokat tartalmaz.
+        contexts (list): MediaWiki passage-ek listája. Minden elem egy dict,
+            amely 'title' és 'text', opcionálisan 'section' kulcsokat tartalmaz.
         question (str): A felhasználó kérdése, amire választ kell adni.
 
     Returns:
@@ -36,6 +36,7 @@ def build_prompt(contexts, question):
     Note:
         Ha nincs kontextus megadva, a függvény egy alapértelmezett üzenetet
         ad vissza, amely jelzi, hogy nincs releváns információ.
+        A passage-ek fejléce az oldal címe és (ha van) a szakasz címe.
         A wiki szövegek maximum 1200 karakterre vannak levágva.
     """
     if not contexts:
@@ -49,7 +50,9 @@ def build_prompt(contexts, question):
     
     for i, doc in enumerate(contexts, 1):
         title = doc.get('title', f'Oldal {i}')
-        # Hosszabb szöveg több kontextusért
+        if doc.get('section'):
+            title = f"{title} / {doc['section']}"
+        # A passage-ek már a darabolás során rövidek, a vágás csak védőkorlát
         text = doc.get('text', '').strip()[:1200]
         prompt += f"== {title} ==\n{text}\n\n"
 
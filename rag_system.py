@@ -10,8 +10,8 @@ logikáját valósítja meg, mely közös háttérként szolgál mind CLI, mind
 
 Feladatai:
 - A szükséges adatok (wiki dokumentumok) letöltése, frissítése, gyorsítótár és embedder index kezelése.
-- Dokumentumok betöltése és indexelése embedding alapú kereséshez.
-- Releváns dokumentumok visszakeresése a felhasználói kérdésekhez.
+- Dokumentumok betöltése, szakasz-alapú passage-ekre bontása és indexelése embedding alapú kereséshez.
+- Releváns passage-ek visszakeresése a felhasználói kérdésekhez.
 - Kérdésből végső választ generáló prompt összeállítása és LLM (Ollama) hívása.
 - A rendszer állapotának, inicializáltságának, betöltött dokumentumoknak és indexnek lekérdezése.
 - Különböző leállítási, cleanup és signal kezelési funkciók biztosítása, így az LLM processzek szabályos leállítása.
@@ -26,7 +26,10 @@ Fő osztály:
 
 Kiemelt függvények/módszerek:
 - `initialize()`: Teljes rendszer inicializálása, adatfrissítés, dokumentum- és indexbetöltés.
-- `refresh_data()`: Manuális adatfrissítés, újrainicializálás.
+- `refresh_data()`: Adatfrissítés: inkrementálisan (csak a wikin változott oldalak
+  letöltése és újrakódolása), vagy ha az nem lehetséges, teljes letöltés és újrainicializálás.
+- `rebuild_index()` / `swap_generation()`: Új indexgeneráció építése, illetve
+  közzétett generáció cseréje a kérdések feldolgozásának megszakítása nélkül.
 - `process_question(question)`: Felhasználói kérdés alapján releváns dokumentum keresése, prompt generálás, LLM hívás és válasz tisztítása.
 - `get_system_info()`: Részletes rendszerállapot-lekérdezés.
 - Cleanup, signal és context manager támogatás.
@@ -34,19 +37,34 @@ Kiemelt függvények/módszerek:
 from docs_loader import clear_cache, should_refresh_data, load_docs, WIKI_FILE
 from prompt_builder import build_prompt
 from text_cleaner import clean_wiki_text
-from retriever import auto_fetch_from_config
+from retriever import auto_fetch_from_config, sync_from_config
+from dump_importer import import_dump_from_config, load_dump_config
 from ollama_runner import run_ollama_model, stop_ollama_model
-from embedder import Embedder
+from embedder import Embedder, INDEX_FILE, page_key
+from sharded_embedder import ShardedEmbedder, load_shard_config
+from chunker import chunk_documents, load_chunking_config
 from model_loader import get_model
+from reranker import Reranker, load_reranker_config
+from title_index import TitleIndex
+from dedup import deduplicate, load_dedup_config, save_report
+from generations import (new_generation, write_manifest, publish, current_generation,
+                         verify_generation, prune_generations, load_generation_config,
+                         GENERATION_INDEX_FILE, GENERATION_DOCS_FILE, GENERATION_VECTORS_FILE)
 import atexit
+import time
 import signal
 import sys
+import threading
+from collections import Counter
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Oldalnév-kérdésnél (címindex találat) ennyi passage kerül a promptba
+TITLE_FAST_PATH_PASSAGES = 3
+
 
 class RAGInitializationError(Exception):
     """RAG rendszer inicializálási hiba"""
@@ -66,7 +84,17 @@ class RAGSystem:
 
     def __init__(self):
         self._docs = None
+        self._passages = None
         self._embedder = None
+        self._reranker = None
+        self._title_index = None
+        self._dedup_report = None
+        self._generation = None
+        self._generation_config = load_generation_config()
+        self._swap_lock = threading.Lock()
+        self._generation_users = Counter()
+        self._swap_thread = None
+        self._last_generation_check = 0
         self._initialized = False
         self._last_config_check = 0
         self._cleanup_registered = False
@@ -161,7 +189,7 @@ class RAGSystem:
             if should_refresh_data():
                 logger.info("🔄 Adatok frissítése...")
                 clear_cache()
-                auto_fetch_from_config()
+                self._fetch_data()
 
                 # Ellenőrizzük, hogy sikerült-e a letöltés
                 if not Path(WIKI_FILE).exists():
@@ -174,6 +202,17 @@ class RAGSystem:
             logger.error(f"❌ Hiba az adatok frissítése során: {error}")
             return False
 
+    def _fetch_data(self) -> None:
+        """
+        Wiki oldalak letöltése: a [dump] path megadásakor XML dumpból
+        (hálózat nélkül), egyébként a MediaWiki API-n keresztül
+        """
+        if load_dump_config()['path'] is not None:
+            logger.info("📦 Oldalak importálása XML dumpból...")
+            import_dump_from_config()
+        else:
+            auto_fetch_from_config()
+
     def _load_documents(self) -> bool:
         """
         Dokumentumok betöltése
@@ -189,39 +228,374 @@ class RAGSystem:
             titles = [doc.get('title', 'Névtelen') for doc in self._docs]
             logger.info(
                 f"📄 Oldalak: {', '.join(titles[:5])}{'...' if len(titles) > 5 else ''}")
+
+            # Szakasz-alapú darabolás az indexeléshez
+            chunking = load_chunking_config()
+            self._passages = chunk_documents(self._docs, **chunking)
+            logger.info(f"✂️  Passage-ek: {len(self._passages)} darab")
+            self._passages = self._deduplicate(self._passages)
             return True
         except Exception as error:
             logger.error(f"❌ Hiba az adatok betöltése közben: {error}")
             return False
 
+    def _deduplicate(self, passages: list) -> list:
+        """
+        Közel azonos passage-ek összevonása, ha a [dedup] szekcióban be van kapcsolva
+
+        Returns:
+            list: Az indexelendő passage-ek
+        """
+        config = load_dedup_config()
+        if not config['enabled']:
+            return passages
+        passages, self._dedup_report = deduplicate(
+            passages, config['threshold'], config['num_perm'], config['shingle_size'])
+        if config['report']:
+            save_report(self._dedup_report, config['report'])
+        logger.info(f"🧬 Deduplikáció: {self._dedup_report['removed']} passage összevonva, "
+                    f"{len(passages)} marad")
+        return passages
+
     def _initialize_embedder(self) -> bool:
         """
         Embedder inicializálása és index betöltése/építése
+        A [shards] partition beállítás esetén shardolt index készül, egyébként
+        a közzétett generáció töltődik be, illetve új generáció épül
 
         Returns:
             bool: True ha sikerült, False ha hiba történt
         """
         try:
-            self._embedder = Embedder()
+            shard_config = load_shard_config()
+            sharded = shard_config['partition'] != 'none'
+            generation = None
+            if sharded:
+                self._embedder = ShardedEmbedder(shard_config=shard_config)
+                index_exists = bool(self._embedder.saved_shards())
+            else:
+                self._embedder = Embedder()
+                generation = current_generation()
+                index_exists = generation is not None or INDEX_FILE.exists()
 
             # Index betöltése vagy építése
-            if Path('data/index.faiss').exists() and not should_refresh_data():
+            if index_exists and not should_refresh_data():
                 logger.info("📊 Index betöltése...")
-                self._embedder.load()
+                if generation is not None:
+                    self._load_generation(self._embedder, generation)
+                    self._generation = generation.name
+                else:
+                    self._embedder.load()
             else:
                 logger.info("🔨 Index építése...")
-                if self._docs is None:
+                if self._passages is None:
                     logger.error(
                         "❌ Nincs betöltött dokumentum az index építéshez!")
                     return False
-                self._embedder.build_index(self._docs)
-                self._embedder.save()
+                if sharded:
+                    self._embedder.build_index(self._passages)
+                    self._embedder.save()
+                else:
+                    self._generation = self._build_generation(self._embedder, self._passages).name
+                    self._prune_generations()
                 logger.info("✅ Index mentve")
             return True
         except Exception as error:
             logger.error(f"❌ Hiba az embedder inicializálása során: {error}")
             return False
 
+    def _load_generation(self, embedder: Embedder, generation: Path) -> None:
+        """
+        Generáció betöltése egy embedderbe: a fájlméretek mindig, az
+        ellenőrzőösszegek csak bekapcsolt verify esetén ellenőrződnek
+
+        Raises:
+            GenerationError: Ha a generáció hiányos vagy sérült
+        """
+        verify_generation(generation, checksums=self._generation_config['verify'])
+        embedder.load(generation / GENERATION_INDEX_FILE, generation / GENERATION_DOCS_FILE)
+        logger.info(f"📦 Generáció betöltve: {generation.name}")
+
+    def _build_generation(self, embedder: Embedder, passages: list) -> Path:
+        """
+        Index építése új generációba, manifest írása és közzététel
+
+        A régi generációk takarítása a hívó dolga, a csere után (lásd _prune_generations).
+
+        Returns:
+            Path: A közzétett generáció könyvtára
+        """
+        generation = new_generation()
+        embedder.build_index(passages, vectors_path=generation / GENERATION_VECTORS_FILE)
+        embedder.save(generation / GENERATION_INDEX_FILE, generation / GENERATION_DOCS_FILE)
+        write_manifest(generation, sources=[WIKI_FILE], documents=len(embedder.documents),
+                       index_type=embedder.index_type, model=embedder.model_name)
+        publish(generation)
+        return generation
+
+    def _prune_generations(self) -> None:
+        """
+        Régi generációk törlése a csere után
+
+        Az aktív generáció és a futó kérdések által még használt (memóriába
+        leképezett vektorokkal kiszolgáló) generációk nem törlődnek; ezeket az
+        utolsó kérdés befejeztével a _release_generation takarítja.
+        """
+        with self._swap_lock:
+            protect = {self._generation, *self._generation_users}
+        prune_generations(keep=self._generation_config['keep'], protect=protect)
+
+    def _acquire_generation(self) -> tuple:
+        """
+        Az aktív embedder, címindex és generáció lefoglalása egy kérdéshez
+
+        Returns:
+            tuple: (embedder, címindex, generáció neve); a generációt a
+                _release_generation szabadítja fel
+        """
+        with self._swap_lock:
+            if self._generation is not None:
+                self._generation_users[self._generation] += 1
+            return self._embedder, self._title_index, self._generation
+
+    def _release_generation(self, generation: Optional[str]) -> None:
+        """
+        Kérdés által foglalt generáció felszabadítása
+
+        Ha egy lecserélt generációt már egy kérdés sem használ, a takarítás
+        ekkor fut le.
+        """
+        if generation is None:
+            return
+        with self._swap_lock:
+            self._generation_users[generation] -= 1
+            if self._generation_users[generation] > 0:
+                return
+            del self._generation_users[generation]
+            replaced = generation != self._generation
+        if replaced:
+            self._prune_generations()
+
+    def _initialize_reranker(self) -> None:
+        """
+        Cross-encoder újrarangsoroló inicializálása, ha be van kapcsolva.
+        Hiba esetén a rendszer újrarangsorolás nélkül működik tovább.
+        """
+        config = load_reranker_config()
+        if not config['enabled']:
+            self._reranker = None
+            return
+        if self._reranker is not None and self._reranker.config == config:
+            return
+        try:
+            self._reranker = Reranker(config)
+            self._reranker.warmup()
+            logger.info(f"🎚️  Újrarangsoroló kész: {config['model']}")
+        except Exception as error:
+            logger.warning(f"⚠️  Újrarangsoroló nem elérhető, kihagyva: {error}")
+            self._reranker = None
+
+    def _build_title_index(self, embedder) -> Optional[TitleIndex]:
+        """
+        Címindex építése az embedder indexelt oldalainak címeiből.
+        Hiba esetén a rendszer címfelismerés nélkül működik tovább.
+        """
+        try:
+            title_index = TitleIndex(embedder.titles())
+            logger.info(f"🔤 Címindex kész: {len(title_index)} cím")
+            return title_index
+        except Exception as error:
+            logger.warning(f"⚠️  Címindex nem elérhető, kihagyva: {error}")
+            return None
+
+    def _initialize_title_index(self) -> None:
+        """Címindex építése az aktuális embedderhez"""
+        self._title_index = self._build_title_index(self._embedder)
+
+    def suggest_titles(self, prefix: str, limit: int = 10) -> list:
+        """
+        Oldalcím javaslatok egy előtaghoz (ékezet- és kisbetű-függetlenül)
+
+        Args:
+            prefix (str): A begépelt előtag
+            limit (int): A javaslatok legnagyobb száma
+
+        Returns:
+            list: Oldalcímek, üres lista ha nincs címindex
+        """
+        if self._title_index is None:
+            return []
+        return self._title_index.suggest(prefix, limit)
+
+    def _title_fast_path(self, question: str, filters: Optional[Dict[str, Any]],
+                         embedder, title_index: Optional[TitleIndex]) -> list:
+        """
+        Oldalnév-kérdés felismerése a címindexszel
+
+        Ha a kérdés egy oldal neve (pl. "Madrid"), az oldal első passage-ei
+        kerülnek a promptba kérdéskódolás és vektoros keresés nélkül.
+
+        Returns:
+            list: Az oldal passage-ei, üres lista ha a kérdés nem oldalnév
+        """
+        if title_index is None or filters:
+            return []
+        title = title_index.match(question)
+        if title is None:
+            return []
+        results = embedder.page_documents(title, TITLE_FAST_PATH_PASSAGES)
+        if results:
+            logger.info(f"⚡ Címtalálat: {title} ({len(results)} passage)")
+        return results
+
+    def swap_generation(self, generation: Optional[Path] = None) -> bool:
+        """
+        Közzétett generáció betöltése és atomi cseréje
+
+        A betöltés új embedderbe történik, a futó kérdések közben a régi
+        generációval dolgoznak; a csere után az új kérdések az új generációt látják.
+
+        Args:
+            generation (Path, optional): A generáció könyvtára (alapértelmezett: a közzétett)
+
+        Returns:
+            bool: True ha megtörtént a csere, False ha nem volt új generáció vagy hiba történt
+        """
+        try:
+            generation = generation or current_generation()
+            if generation is None or generation.name == self._generation:
+                return False
+            previous = self._generation
+            embedder = Embedder()
+            self._load_generation(embedder, generation)
+            title_index = self._build_title_index(embedder)
+            with self._swap_lock:
+                self._embedder, self._title_index = embedder, title_index
+                self._generation = generation.name
+            logger.info(f"🔁 Generáció csere: {previous} -> {generation.name}")
+            self._prune_generations()
+            return True
+        except Exception as error:
+            logger.error(f"❌ Hiba a generáció cseréje során: {error}")
+            return False
+
+    def _check_generation(self) -> None:
+        """
+        Új közzétett generáció figyelése (check_interval másodpercenként)
+        Új generáció esetén a betöltés és csere háttérszálon fut
+        """
+        interval = self._generation_config['check_interval']
+        now = time.monotonic()
+        if (not interval or isinstance(self._embedder, ShardedEmbedder)
+                or now - self._last_generation_check < interval):
+            return
+        self._last_generation_check = now
+        if self._swap_thread is not None and self._swap_thread.is_alive():
+            return
+        generation = current_generation()
+        if generation is None or generation.name == self._generation:
+            return
+        logger.info(f"🆕 Új generáció érhető el: {generation.name}")
+        self._swap_thread = threading.Thread(target=self.swap_generation, args=(generation,),
+                                             name='generation-swap', daemon=True)
+        self._swap_thread.start()
+
+    def rebuild_index(self) -> bool:
+        """
+        Index újraépítése a betöltött wiki adatokból új generációba, majd csere
+
+        A kérdések feldolgozása az építés alatt a régi generációval folytatódik.
+
+        Returns:
+            bool: True ha sikerült, False ha hiba történt
+        """
+        if isinstance(self._embedder, ShardedEmbedder):
+            logger.error("❌ Shardolt indexnél a shardok egyenként építendők újra")
+            return False
+        try:
+            logger.info("🔨 Új indexgeneráció építése...")
+            docs = load_docs()
+            passages = self._deduplicate(chunk_documents(docs, **load_chunking_config()))
+            embedder = Embedder()
+            generation = self._build_generation(embedder, passages)
+            title_index = self._build_title_index(embedder)
+            with self._swap_lock:
+                self._docs, self._passages = docs, passages
+                self._embedder, self._title_index = embedder, title_index
+                self._generation = generation.name
+            logger.info(f"✅ Új generáció aktív: {self._generation}")
+            self._prune_generations()
+            return True
+        except Exception as error:
+            logger.error(f"❌ Hiba az index újraépítése során: {error}")
+            return False
+
+    def _apply_changes(self, changes: Dict[str, list]) -> bool:
+        """
+        Inkrementális frissítés változásainak átvezetése az indexbe
+
+        Csak a frissített oldalak passage-ei kódolódnak újra (upsert), a törölt
+        és a frissített oldalak korábbi passage-ei törlődnek. Generációs indexnél a módosított index a
+        közzétett generáció másolataként új generációba kerül, shardolt indexnél
+        az érintett shardok másolata módosul; mindkét esetben atomi csere
+        következik, a kérdések addig a régi indexszel dolgoznak. A
+        duplikátumszűrés a következő teljes újraépítéskor fut.
+
+        Args:
+            changes (dict): A sync_from_config eredménye ('updated' és 'removed')
+
+        Returns:
+            bool: True ha sikerült, False ha hiba történt
+        """
+        updated, removed = changes['updated'], changes['removed']
+        if not updated and not removed:
+            logger.info("✅ Nincs változás a wikin")
+            return True
+        sharded = isinstance(self._embedder, ShardedEmbedder)
+        base = None if sharded else current_generation()
+        if not sharded and base is None:
+            return self.rebuild_index()
+        try:
+            docs = load_docs()
+            passages = chunk_documents(updated, **load_chunking_config())
+            generation = None
+            if sharded:
+                # Shardonként másolaton módosul, majd atomi cserével lép életbe
+                embedder = self._embedder
+                embedder.update_shards(updated + removed, passages)
+            else:
+                generation = new_generation()
+                embedder = Embedder()
+                self._load_generation(embedder, base)
+                embedder.relocate(generation / GENERATION_VECTORS_FILE)
+                # A frissített oldalak régi passage-ei is törlődnek: az üressé
+                # vált (kiürített, átirányítássá alakított) oldalaknak nincs új passage-e
+                embedder.remove(embedder.ids_for_pages(updated + removed))
+                embedder.upsert(passages)
+                embedder.save(generation / GENERATION_INDEX_FILE, generation / GENERATION_DOCS_FILE)
+                write_manifest(generation, sources=[WIKI_FILE], documents=len(embedder.documents),
+                               index_type=embedder.index_type, model=embedder.model_name,
+                               base=base.name)
+                publish(generation)
+            title_index = self._build_title_index(embedder)
+
+            affected = {page_key(page) for page in updated + removed}
+            kept = [passage for passage in self._passages or []
+                    if page_key(passage) not in affected]
+            with self._swap_lock:
+                self._docs, self._passages = docs, kept + passages
+                self._embedder, self._title_index = embedder, title_index
+                if generation is not None:
+                    self._generation = generation.name
+            if generation is not None:
+                self._prune_generations()
+            logger.info(f"✅ Inkrementális frissítés kész: {len(updated)} oldal frissítve "
+                        f"({len(passages)} passage), {len(removed)} törölve")
+            return True
+        except Exception as error:
+            logger.error(f"❌ Hiba a változások indexelése során: {error}")
+            return False
+
     def initialize(self) -> bool:
         """
         Teljes rendszer inicializálása
@@ -249,6 +623,10 @@ class RAGSystem:
                 raise RAGInitializationError(
                     "Embedder inicializálása sikertelen")
 
+            # Opcionális újrarangsoroló (a modell induláskor töltődik be)
+            self._initialize_reranker()
+            self._initialize_title_index()
+
             self._initialized = True
             logger.info("🎯 RAG rendszer kész!")
             return True
@@ -259,14 +637,29 @@ class RAGSystem:
             logger.error(f"❌ Váratlan hiba az inicializálás során: {error}")
             raise RAGInitializationError(f"Inicializálási hiba: {str(error)}")
 
-    def refresh_data(self) -> bool:
+    def refresh_data(self, full: bool = False) -> bool:
         """
-        Manuális adatfrissítés és újrainicializálás
+        Adatfrissítés
+
+        Inicializált rendszernél, API forrásnál és változatlan konfigurációnál először
+        inkrementális frissítés történik (csak a legutóbbi szinkronizáció óta
+        változott oldalak letöltése és újrakódolása). Ha ez nem lehetséges,
+        vagy full=True, a gyorsítótár törlődik és teljes újrainicializálás következik.
+
+        Args:
+            full (bool): Teljes letöltés és újraépítés kényszerítése
 
         Returns:
             bool: True ha sikerült, False ha hiba történt
         """
         try:
+            if (not full and self._initialized and not should_refresh_data()
+                    and load_dump_config()['path'] is None):
+                changes = sync_from_config()
+                if changes is not None:
+                    logger.info("🔄 Inkrementális adatfrissítés...")
+                    return self._apply_changes(changes)
+
             logger.info("🔄 Manuális adatfrissítés...")
 
             # Cache törlése
@@ -275,7 +668,10 @@ class RAGSystem:
             # Reinicializálás
             self._initialized = False
             self._docs = None
+            self._passages = None
             self._embedder = None
+            self._title_index = None
+            self._generation = None
 
             return self.initialize()
 
@@ -283,12 +679,15 @@ class RAGSystem:
             logger.error(f"❌ Hiba az adatfrissítés során: {error}")
             return False
 
-    def process_question(self, question: str) -> str:
+    def process_question(self, question: str,
+                         filters: Optional[Dict[str, Any]] = None) -> str:
         """
         Kérdés feldolgozása és válasz generálása
 
         Args:
             question (str): A felhasználó kérdése
+            filters (Dict[str, Any], optional): Metaadat szűrő a visszakereséshez,
+                pl. {'category': 'Python'} (lásd metadata_filter)
 
         Returns:
             str: A tisztított válasz
@@ -306,9 +705,24 @@ class RAGSystem:
             question = question.strip()
             logger.info(f"🔍 Kérdés feldolgozása: {question[:50]}...")
 
-            # Releváns dokumentumok keresése
-            results = self._embedder.query(question)
-            logger.debug(f"📊 Találat: {len(results)} dokumentum")
+            # A kérdés végig ugyanazt a generációt (embedder és címindex) használja;
+            # a keresés végéig a generáció foglalt, így a takarítás nem törli
+            self._check_generation()
+            embedder, title_index, generation = self._acquire_generation()
+            try:
+                # Releváns passage-ek keresése: oldalnévnél a címindexből, egyébként
+                # vektoros kereséssel (újrarangsorolásnál több jelölttel)
+                started = time.perf_counter()
+                results = self._title_fast_path(question, filters, embedder, title_index)
+                if not results and self._reranker is not None:
+                    candidates = embedder.query(question, top_k=self._reranker.candidates,
+                                                filters=filters)
+                    results = self._reranker.rerank(question, candidates, started=started)
+                elif not results:
+                    results = embedder.query(question, filters=filters)
+            finally:
+                self._release_generation(generation)
+            logger.debug(f"📊 Találat: {len(results)} passage")
 
             # Prompt építése és válasz generálása
             logger.info("🤖 Válasz generálása...")
@@ -335,8 +749,23 @@ class RAGSystem:
         info = {
             "initialized": self._initialized,
             "documents_loaded": len(self._docs) if self._docs else 0,
+            "passages_indexed": len(self._embedder.documents) if self._embedder else 0,
             "embedder_ready": self._embedder is not None,
-            "index_exists": Path('data/index.faiss').exists(),
+            "index_type": self._embedder.index_type if self._embedder else None,
+            "encoder_backend": self._embedder.backend if self._embedder else None,
+            "backend_report": self._embedder.backend_report if self._embedder else None,
+            "codec": self._embedder.codec_stats if self._embedder else None,
+            "retrieval_mode": (self._embedder.retrieval_config['mode']
+                               if self._embedder else None),
+            "search": self._embedder.search_config if self._embedder else None,
+            "query_cache": (self._embedder.query_cache.stats()
+                            if self._embedder and self._embedder.query_cache else None),
+            "reranker": self._reranker.stats() if self._reranker else None,
+            "titles_indexed": len(self._title_index) if self._title_index else 0,
+            "dedup": ({key: self._dedup_report[key] for key in ('input', 'kept', 'clusters')}
+                      if self._dedup_report else None),
+            "generation": self._generation,
+            "index_exists": INDEX_FILE.exists() or current_generation() is not None,
             "wiki_file_exists": Path(WIKI_FILE).exists(),
             "cleanup_registered": self._cleanup_registered
         }
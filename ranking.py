@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:04:12 2026
+@author: zsolt
+
+Pontozott találatok, hasonlósági küszöb és diverzifikálás (MMR).
+
+A visszakeresés jelöltjei koszinusz-hasonlóságot kapnak a kérdéshez; a
+küszöb alatti találatok kiesnek, oldalanként legfeljebb max_per_page passage
+marad, és bekapcsolt MMR (maximal marginal relevance) esetén a sorrend a
+relevancia és a már kiválasztott passage-ektől való eltérés súlyozott
+összege szerint alakul, így kevesebb közel azonos passage kerül a promptba.
+
+A konfiguráció a wiki_rag.ini [search] szekciójából olvasható:
+
+    [search]
+    min_score = 0.3
+    max_per_page = 2
+    mmr_lambda = 0.7
+"""
+import configparser
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+DEFAULT_SEARCH_CONFIG = {
+    'min_score': None,
+    'max_per_page': 0,
+    'mmr_lambda': None,
+}
+
+# Oldalkorlát vagy MMR esetén ennyiszer több jelölt kerül visszakeresésre
+OVERFETCH_FACTOR = 4
+
+
+@dataclass
+class SearchResult:
+    """
+    Egy keresési találat.
+
+    Attributes:
+        doc_id (int): A dokumentum stabil azonosítója.
+        score (float): Koszinusz-hasonlóság a kérdéshez (-1..1, nagyobb a jobb).
+        rank (int): Helyezés a találati listában (1-től).
+        document (dict): A dokumentum (passage).
+    """
+    doc_id: int
+    score: float
+    rank: int
+    document: dict
+
+
+def _optional_float(config, key):
+    """Üresen hagyható lebegőpontos beállítás (üres: None)."""
+    value = config.get('search', key, fallback='').strip()
+    return float(value) if value else None
+
+
+def load_search_config(path=CONFIG_PATH):
+    """
+    Keresési (szűrési és diverzifikálási) beállítások betöltése.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'min_score' (None: nincs küszöb), 'max_per_page' (0: nincs
+            oldalkorlát) és 'mmr_lambda' (None: nincs MMR) kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_SEARCH_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        settings['min_score'] = _optional_float(config, 'min_score')
+        settings['max_per_page'] = max(config.getint('search', 'max_per_page', fallback=0), 0)
+        settings['mmr_lambda'] = _optional_float(config, 'mmr_lambda')
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [search] konfiguráció (%s), alapértelmezett beállítások", error)
+        return dict(DEFAULT_SEARCH_CONFIG)
+
+    if settings['mmr_lambda'] is not None and not 0 <= settings['mmr_lambda'] <= 1:
+        logger.warning("Az mmr_lambda 0 és 1 közé kell essen (%s), MMR kikapcsolva",
+                       settings['mmr_lambda'])
+        settings['mmr_lambda'] = None
+    return settings
+
+
+def normalize_rows(vectors):
+    """
+    Sorvektorok egységnyi hosszra normálása (a nullvektorok nullák maradnak).
+
+    Args:
+        vectors (np.ndarray): (n, dim) méretű mátrix.
+
+    Returns:
+        np.ndarray: A normált float32 mátrix.
+    """
+    vectors = np.asarray(vectors, dtype='float32')
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def select_results(scores, vectors, pages, top_k, min_score=None,
+                   max_per_page=0, mmr_lambda=None):
+    """
+    Jelöltek kiválasztása küszöb, oldalkorlát és opcionális MMR alapján.
+
+    MMR nélkül a jelöltek eredeti (visszakeresési) sorrendje marad. MMR esetén
+    minden lépésben az a jelölt kerül a listába, amelyre
+    mmr_lambda * hasonlóság(kérdés) - (1 - mmr_lambda) * max hasonlóság(kiválasztottak)
+    a legnagyobb.
+
+    Args:
+        scores (np.ndarray): A jelöltek hasonlósága a kérdéshez.
+        vectors (np.ndarray): A jelöltek normált vektorai (csak MMR-hez kell).
+        pages (list): A jelöltek oldalkulcsai (csak oldalkorláthoz kell).
+        top_k (int): A kiválasztandó jelöltek száma.
+        min_score (float, optional): Minimális hasonlóság.
+        max_per_page (int, optional): Oldalanként legfeljebb ennyi jelölt (0: nincs korlát).
+        mmr_lambda (float, optional): A relevancia súlya (1: csak relevancia).
+
+    Returns:
+        list: A kiválasztott jelöltek pozíciói sorrendben.
+    """
+    scores = np.asarray(scores, dtype='float32')
+    allowed = np.ones(len(scores), dtype=bool)
+    if min_score is not None:
+        allowed &= scores >= min_score
+    page_array = np.array(pages, dtype=object) if max_per_page else None
+    per_page = {}
+
+    def take(position):
+        allowed[position] = False
+        if max_per_page:
+            page = pages[position]
+            per_page[page] = per_page.get(page, 0) + 1
+            if per_page[page] >= max_per_page:
+                allowed[page_array == page] = False
+
+    selected = []
+    if mmr_lambda is None:
+        for position in range(len(scores)):
+            if len(selected) == top_k:
+                break
+            if allowed[position]:
+                selected.append(position)
+                take(position)
+        return selected
+
+    similarities = vectors @ vectors.T
+    redundancy = np.zeros(len(scores), dtype='float32')
+    while len(selected) < top_k and allowed.any():
+        mmr = mmr_lambda * scores - (1 - mmr_lambda) * redundancy
+        mmr[~allowed] = -np.inf
+        position = int(np.argmax(mmr))
+        selected.append(position)
+        take(position)
+        redundancy = np.maximum(redundancy, similarities[position])
+    return selected
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:12:47 2026
+@author: zsolt
+
+Cross-encoder alapú újrarangsorolás a visszakeresett passage-ekhez.
+
+A visszakeresés a végső találatszámnál több jelöltet ad vissza, a
+cross-encoder a (kérdés, passage) párokat egyetlen batch-ben pontozza, és a
+legjobb top_k marad. A párok pontszámai LRU gyorsítótárba kerülnek.
+
+Az újrarangsorolásnak saját időkerete van: ha a kérés eddigi ideje és a
+becsült pontozási idő együtt túllépné, a lépés kimarad, és a visszakeresés
+sorrendje marad érvényben, így a pontosság nem rontja a válaszidő-csúcsokat.
+A pontozási idő becslése hívásonkénti fix költségből és páronkénti
+költségből áll, és minden valódi pontozás a mért értékre állítja. Hogy egy
+túlbecsült költség ne kapcsolja ki végleg az újrarangsorolást, kihagyáskor
+legfeljebb PROBE_INTERVAL másodpercenként egy háttérszálon futó próbapontozás
+méri újra a költséget (a kérés válaszidejét nem terhelve).
+
+A konfiguráció a wiki_rag.ini [reranker] szekciójából olvasható:
+
+    [reranker]
+    enabled = true
+    model = cross-encoder/mmarco-mMiniLMv2-L12-H384-v1
+    candidates = 20
+    top_k = 3
+    budget_ms = 300
+    cache = 4096
+"""
+import time
+import hashlib
+import threading
+import configparser
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from embedding_cache import normalize_question
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+DEFAULT_RERANKER_CONFIG = {
+    'enabled': False,
+    'model': 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1',
+    'candidates': 20,
+    'top_k': 3,
+    'budget_ms': 300,
+    'cache': 4096,
+    'batch_size': 32,
+}
+
+# Kihagyott újrarangsorolás után legfeljebb ennyi másodpercenként fut
+# háttérben próbapontozás a költségbecslés frissítésére
+PROBE_INTERVAL = 30.0
+
+
+def load_reranker_config(path=CONFIG_PATH):
+    """
+    Újrarangsorolási beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'enabled', 'model', 'candidates', 'top_k', 'budget_ms' (0: nincs
+            időkeret), 'cache' (0: nincs gyorsítótár) és 'batch_size' kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_RERANKER_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        settings['enabled'] = config.getboolean('reranker', 'enabled', fallback=False)
+        settings['model'] = (config.get('reranker', 'model', fallback='').strip()
+                             or DEFAULT_RERANKER_CONFIG['model'])
+        for key in ('candidates', 'top_k', 'budget_ms', 'cache', 'batch_size'):
+            settings[key] = max(config.getint('reranker', key,
+                                              fallback=DEFAULT_RERANKER_CONFIG[key]), 0)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [reranker] konfiguráció (%s), újrarangsorolás kikapcsolva", error)
+        return dict(DEFAULT_RERANKER_CONFIG)
+
+    settings['top_k'] = max(settings['top_k'], 1)
+    settings['candidates'] = max(settings['candidates'], settings['top_k'])
+    settings['batch_size'] = settings['batch_size'] or DEFAULT_RERANKER_CONFIG['batch_size']
+    return settings
+
+
+def _load_cross_encoder(model_name):
+    """Alapértelmezett modellbetöltő."""
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name)
+
+
+class Reranker:
+    """
+    Cross-encoder újrarangsoroló pár-gyorsítótárral és időkerettel.
+
+    A modell az első használatkor töltődik be. Szálbiztos.
+
+    Attributes:
+        config (dict): A beállítások (lásd load_reranker_config).
+    """
+
+    def __init__(self, config=None, loader=_load_cross_encoder):
+        """
+        Args:
+            config (dict, optional): Beállítások; ha nincs megadva, a wiki_rag.ini
+                [reranker] szekciójából töltődnek be.
+            loader (callable, optional): Modellbetöltő (modellnév -> predict metódusú objektum).
+        """
+        self.config = config or load_reranker_config()
+        self._loader = loader
+        self._model = None
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._pair_seconds = None
+        self._call_seconds = 0.0
+        self._last_probe = None
+        self._probe_thread = None
+        self.calls = 0
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def candidates(self):
+        """A visszakereséstől kért jelöltek száma."""
+        return self.config['candidates']
+
+    def _get_model(self):
+        """A cross-encoder modell (első hívásra betöltve)."""
+        with self._model_lock:
+            if self._model is None:
+                logger.info("Cross-encoder betöltése: %s", self.config['model'])
+                self._model = self._loader(self.config['model'])
+            return self._model
+
+    @staticmethod
+    def _pair_key(question, doc):
+        """A (kérdés, passage) pár gyorsítótár kulcsa (a passage szövegének hash-e)."""
+        passage = hashlib.sha1(doc.get('text', '').encode('utf-8')).hexdigest()
+        return normalize_question(question), passage
+
+    def rerank(self, question, docs, top_k=None, started=None):
+        """
+        Passage-ek újrarangsorolása a kérdéshez.
+
+        Args:
+            question (str): A kérdés.
+            docs (list): A visszakeresett jelöltek relevancia szerinti sorrendben.
+            top_k (int, optional): A megtartandó passage-ek száma
+                (alapértelmezett: a beállított top_k).
+            started (float, optional): A kérés kezdete (time.perf_counter()); az
+                időkeret ettől számít. Ha nincs megadva, a hívás pillanatától.
+
+        Returns:
+            list: A legjobb top_k passage; időkeret-túllépés esetén a
+                visszakeresés sorrendjében.
+        """
+        top_k = top_k or self.config['top_k']
+        started = time.perf_counter() if started is None else started
+        if len(docs) <= 1:
+            return docs[:top_k]
+
+        keys = [self._pair_key(question, doc) for doc in docs]
+        with self._lock:
+            self.calls += 1
+            scores = [self._scores.get(key) for key in keys]
+            for key, score in zip(keys, scores):
+                if score is not None:
+                    self._scores.move_to_end(key)
+        missing = [position for position, score in enumerate(scores) if score is None]
+
+        pairs = [(question, docs[position].get('text', '')) for position in missing]
+        missing_keys = [keys[position] for position in missing]
+        if missing and not self._within_budget(started, len(missing)):
+            with self._lock:
+                self.skipped += 1
+            logger.info("Újrarangsorolás kihagyva (időkeret: %d ms)", self.config['budget_ms'])
+            # Csak a becsült költség miatti kihagyásnál kell újramérni
+            if self._estimate(len(missing)) > self.config['budget_ms'] / 1000:
+                self._start_probe(pairs, missing_keys)
+            return docs[:top_k]
+
+        if missing:
+            for position, score in zip(missing, self._score(pairs, missing_keys)):
+                scores[position] = score
+
+        with self._lock:
+            self.hits += len(docs) - len(missing)
+            self.misses += len(missing)
+
+        order = sorted(range(len(docs)), key=lambda position: scores[position], reverse=True)
+        logger.debug("Újrarangsorolás: %d jelölt, %d gyorsítótárból",
+                     len(docs), len(docs) - len(missing))
+        return [docs[position] for position in order[:top_k]]
+
+    def _score(self, pairs, keys):
+        """
+        Párok pontozása egy batch-ben, a költségbecslés frissítésével és tárolással.
+
+        Returns:
+            list: A pontszámok a párok sorrendjében.
+        """
+        model = self._get_model()
+        scoring_start = time.perf_counter()
+        predicted = model.predict(pairs, batch_size=self.config['batch_size'],
+                                  show_progress_bar=False)
+        self._update_cost(time.perf_counter() - scoring_start, len(pairs))
+        scores = [float(score) for score in predicted]
+        self._store(keys, scores)
+        return scores
+
+    def _start_probe(self, pairs, keys):
+        """
+        Háttérbeli próbapontozás indítása a kihagyott párokra.
+
+        Az utolsó mérés (bemelegítés, pontozás vagy próba) után legfeljebb
+        PROBE_INTERVAL másodpercenként egy, és egyszerre csak egy fut; a mért idő frissíti a költségbecslést, a pontszámok a
+        gyorsítótárba kerülnek.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if ((self._last_probe is not None and now - self._last_probe < PROBE_INTERVAL)
+                    or (self._probe_thread is not None and self._probe_thread.is_alive())):
+                return
+            self._last_probe = now
+            self._probe_thread = threading.Thread(target=self._probe, args=(pairs, keys),
+                                                  name='reranker-probe', daemon=True)
+            thread = self._probe_thread
+        thread.start()
+
+    def _probe(self, pairs, keys):
+        """Próbapontozás (háttérszálon); hiba esetén csak naplóz."""
+        try:
+            self._score(pairs, keys)
+            logger.debug("Újrarangsorolás próbapontozás: %.1f ms/pár",
+                         (self._pair_seconds or 0.0) * 1000)
+        except Exception as error:
+            logger.warning("Hiba az újrarangsorolás próbapontozása közben: %s", error)
+
+    def warmup(self):
+        """
+        A modell betöltése és próbapontozás a költségbecsléshez.
+
+        Egy egypáros és egy jelöltszámnyi (candidates) páros batch ideje
+        különválasztja a hívásonkénti fix költséget és a páronkénti költséget.
+        Induláskor hívva az első kérdés nem a modellbetöltésre költi az időkeretet.
+        """
+        model = self._get_model()
+        pairs = max(self.config['candidates'], 2)
+        start = time.perf_counter()
+        model.predict([('kérdés', 'válasz')], show_progress_bar=False)
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        model.predict([('kérdés', 'válasz')] * pairs, batch_size=self.config['batch_size'],
+                      show_progress_bar=False)
+        batch = time.perf_counter() - start
+
+        per_pair = max(batch - single, 0.0) / (pairs - 1)
+        with self._lock:
+            self._pair_seconds = per_pair
+            self._call_seconds = max(single - per_pair, 0.0)
+            self._last_probe = time.monotonic()
+
+    def _within_budget(self, started, pairs):
+        """Igaz, ha az eddigi idő és a becsült pontozási idő belefér a keretbe."""
+        budget = self.config['budget_ms'] / 1000
+        if budget <= 0:
+            return True
+        elapsed = time.perf_counter() - started
+        return elapsed + self._estimate(pairs) <= budget
+
+    def _estimate(self, pairs):
+        """A pairs darab pár becsült pontozási ideje másodpercben."""
+        return self._call_seconds + (self._pair_seconds or 0.0) * pairs
+
+    def _update_cost(self, seconds, pairs):
+        """
+        A páronkénti pontozási idő becslése a mért időből (a fix költség levonásával).
+
+        Átlagolás helyett a legutóbbi mérés érvényes, így egy keretet
+        rendszeresen túllépő modell a következő kérésnél már kimarad. Ha a
+        mért idő a fix költségnél is kisebb, az is a mért értékre csökken.
+        """
+        with self._lock:
+            if seconds < self._call_seconds:
+                self._call_seconds, self._pair_seconds = seconds, 0.0
+            else:
+                self._pair_seconds = (seconds - self._call_seconds) / max(pairs, 1)
+            self._last_probe = time.monotonic()
+
+    def _store(self, keys, scores):
+        """Pontszámok tárolása az LRU gyorsítótárban."""
+        if not self.config['cache']:
+            return
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.config['cache']:
+                self._scores.popitem(last=False)
+
+    def stats(self):
+        """
+        Újrarangsorolási statisztikák.
+
+        Returns:
+            dict: 'calls', 'skipped', 'cache_size', 'hits', 'misses',
+                'pair_ms' (becsült páronkénti pontozási idő) és 'call_ms'
+                (becsült hívásonkénti fix költség) kulcsokkal.
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'skipped': self.skipped,
+                'cache_size': len(self._scores),
+                'hits': self.hits,
+                'misses': self.misses,
+                'pair_ms': None if self._pair_seconds is None else self._pair_seconds * 1000,
+                'call_ms': self._call_seconds * 1000,
+            }
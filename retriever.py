@@ -11,20 +11,88 @@ Ez a modul MediaWiki alapú wiki oldalak letöltésére szolgál különböző m
 - Kiválasztott oldalak letöltése
 - Kapcsolódó oldalak keresése prefix alapján
 - Konfigurációs fájl alapú automatikus letöltés
+
+Az oldalak tartalma és metaadatai cím szerinti, kötegelt API lekérdezésekkel
+érkeznek (action=query, prop=revisions|categories): egy kérés legfeljebb
+API_BATCH_SIZE cím összes oldalát adja vissza, így a letöltés oldalanként egy
+helyett kötegenként egy kérést igényel. Az összes oldal letöltésénél a címek
+előbb list=allpages lekérdezéssel listázódnak (kérésenként legfeljebb
+LIST_BATCH_SIZE cím), majd ugyanígy, cím szerint töltődnek le.
+
+A letöltő függvények egy közös, egyszer bejelentkezett kapcsolaton
+(WikiSession) dolgoznak, amely connection poolt használ. A kötegek
+párhuzamosan, szálkészletben töltődnek le, a kérések ütemét pedig egy
+globális (kérés/másodperc) korlát szabályozza. A beállítások a
+wiki_rag.ini [fetch] szekciójából olvashatók:
+
+    [fetch]
+    workers = 4
+    rate_limit = 10
+
+Teljes letöltés után a szinkronizáció ideje a data/sync_state.json fájlba
+kerül. A frissítés (sync_from_config) ettől kezdve csak az azóta létrehozott,
+szerkesztett, átnevezett vagy törölt oldalakat tölti le újra: a változások a
+list=recentchanges listából, a recentchanges megőrzési idejénél régebbi
+állapotnál pedig a tárolt és az aktuális revid-ek kötegelt összevetéséből
+derülnek ki ([sync] szekció).
+
+A letöltött oldalak kötegenként, azonnal egy csak hozzáfűzhető JSONL fájlba
+íródnak (PageWriter), mellette egy ellenőrzőpont rögzíti a címlistázás
+(apcontinue) pozícióját, a kihagyott és a sikertelen kötegek címeit; a befejezett címek maguk a
+JSONL sorai. Megszakadt letöltés újraindításkor onnan folytatódik, ahol
+abbamaradt, és a memóriahasználat nem nő a korpusz méretével. A részleges
+fájlok a data/ mappán kívül (DOWNLOAD_DIR) vannak, így a teljes frissítés
+gyorsítótár-törlése sem veszíti el őket.
 """
 
 import os
 import json
+import time
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import configparser
 import logging
 import mwclient
+import requests
 
 logger = logging.getLogger(__name__)
 
 CONFIG_PATH = Path('wiki_rag.ini')
 DEFAULT_OUTPUT = Path('data/wiki_pages.json')
 MAX_DOWNLOAD = 100  # Maximálisan letölthető oldalak száma konstans
+# A MediaWiki API egy kérésben legfeljebb ennyi oldal tartalmát adja vissza
+API_BATCH_SIZE = 50
+# A lapozási (continue) kulcsok közül ezek a generátorhoz tartoznak; a többi
+# azt jelzi, hogy az aktuális köteg oldalainak adatai még nem teljesek
+GENERATOR_CONTINUE_KEYS = {'continue', 'gapcontinue'}
+PAGE_QUERY_PARAMS = {
+    'prop': 'revisions|categories',
+    'rvprop': 'content|ids',
+    'rvslots': 'main',
+    'cllimit': 'max',
+    'redirects': 1,
+    'formatversion': 2,
+}
+# Címlistázásnál (list=allpages) egy kérés ennyi címet adhat vissza
+LIST_BATCH_SIZE = 500
+# A folyamatban lévő letöltések JSONL fájljai és ellenőrzőpontjai
+DOWNLOAD_DIR = Path('cache/downloads')
+SYNC_STATE_FILE = Path('data/sync_state.json')
+DEFAULT_SYNC_CONFIG = {
+    'incremental': True,   # Frissítéskor csak a megváltozott oldalak letöltése
+    'max_age': 30.0,       # Napok; régebbi állapotnál revid-összevetés (recentchanges megőrzési ideje)
+}
+# A recentchanges lekérdezés ennyivel az utolsó szinkronizáció előttről indul
+# (óraeltérés ellen; a változatlan revid-ű oldalak úgyis kimaradnak)
+SYNC_OVERLAP = timedelta(minutes=5)
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+DEFAULT_FETCH_CONFIG = {
+    'workers': 4,          # Párhuzamosan letöltött kötegek száma
+    'rate_limit': 10.0,    # Kérések másodpercenként, az összes szálra együtt (0: korlátlan)
+}
 
 
 def load_config(path=CONFIG_PATH):
@@ -43,6 +111,485 @@ def load_config(path=CONFIG_PATH):
     return config
 
 
+def load_fetch_config(path=CONFIG_PATH):
+    """
+    Letöltési (párhuzamosítási) beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'workers' és 'rate_limit' kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_FETCH_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        settings['workers'] = max(config.getint('fetch', 'workers',
+                                                fallback=DEFAULT_FETCH_CONFIG['workers']), 1)
+        settings['rate_limit'] = max(config.getfloat(
+            'fetch', 'rate_limit', fallback=DEFAULT_FETCH_CONFIG['rate_limit']), 0.0)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [fetch] konfiguráció (%s), alapértelmezett beállítások", error)
+        return dict(DEFAULT_FETCH_CONFIG)
+    return settings
+
+
+def load_sync_config(path=CONFIG_PATH):
+    """
+    Inkrementális szinkronizációs beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'incremental' és 'max_age' (napok) kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_SYNC_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        settings['incremental'] = config.getboolean(
+            'sync', 'incremental', fallback=DEFAULT_SYNC_CONFIG['incremental'])
+        settings['max_age'] = max(config.getfloat(
+            'sync', 'max_age', fallback=DEFAULT_SYNC_CONFIG['max_age']), 0.0)
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [sync] konfiguráció (%s), alapértelmezett beállítások", error)
+        return dict(DEFAULT_SYNC_CONFIG)
+    return settings
+
+
+class RateLimiter:
+    """Szálbiztos kérésütemező: legfeljebb rate kérés másodpercenként."""
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate (float): Kérések másodpercenként; 0 esetén nincs korlát.
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Várakozás a következő kérés időpontjáig (a helyet azonnal lefoglalja)."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class WikiSession:
+    """Egyszer bejelentkezett wiki kapcsolat, ütemezett kérésekkel és szálkészlettel."""
+
+    def __init__(self, site, source, workers=DEFAULT_FETCH_CONFIG['workers'],
+                 rate_limit=DEFAULT_FETCH_CONFIG['rate_limit']):
+        """
+        Args:
+            site (mwclient.Site): A (bejelentkezett) wiki site.
+            source (str): A forrás wiki azonosítója (a site URL).
+            workers (int, optional): Párhuzamosan letöltött kötegek száma.
+            rate_limit (float, optional): Kérések másodpercenként (0: korlátlan).
+        """
+        self.site = site
+        self.source = source
+        self.workers = workers
+        self.limiter = RateLimiter(rate_limit)
+
+    def api(self, action, **params):
+        """API kérés a globális ütemezés betartásával (lásd mwclient.Site.api)."""
+        self.limiter.wait()
+        return self.site.api(action, **params)
+
+    def map(self, function, items):
+        """
+        Függvény párhuzamos alkalmazása az elemekre, az eredmények sorrendjében.
+
+        Args:
+            function (callable): Az alkalmazandó függvény.
+            items (list): Az elemek.
+
+        Returns:
+            list: Az eredmények az elemek sorrendjében.
+        """
+        if self.workers <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items)),
+                                thread_name_prefix='wiki-fetch') as executor:
+            return list(executor.map(function, items))
+
+
+def open_session(site_url, path='/w/', username=None, password=None,
+                 conf_file=CONFIG_PATH):
+    """
+    Közös wiki kapcsolat nyitása: connection pool és egyszeri bejelentkezés.
+
+    Args:
+        site_url (str): A wiki site URL-je.
+        path (str, optional): A wiki útvonal. Alapértelmezett: '/w/'
+        username (str, optional): Felhasználónév bejelentkezéshez.
+        password (str, optional): Jelszó bejelentkezéshez.
+        conf_file (Path, optional): A [fetch] beállításokat tartalmazó
+            konfigurációs fájl. Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        WikiSession: A megnyitott kapcsolat.
+
+    Raises:
+        mwclient.errors.LoginError: Ha a bejelentkezés sikertelen.
+    """
+    settings = load_fetch_config(conf_file)
+    pool = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                            pool_maxsize=settings['workers'])
+    pool.mount('https://', adapter)
+    pool.mount('http://', adapter)
+    site = connect(site_url, path, username, password, pool=pool)
+    logger.info("Letöltés: %d szál, %s kérés/s", settings['workers'],
+                settings['rate_limit'] or 'korlátlan')
+    return WikiSession(site, site_url, **settings)
+
+
+def page_from_api(data, source, title=None):
+    """
+    Egy wiki oldal az API (formatversion=2) válaszából.
+
+    A 'namespace', 'categories' és 'source' mezőket a passage-ek az oldaltól
+    öröklik (lásd chunker), így a keresés névtérre, kategóriára és forrás
+    wikire szűrhető (lásd metadata_filter), az index pedig forrás szerint
+    shardolható (lásd sharded_embedder).
+
+    Args:
+        data (dict): Az oldal a query válasz 'pages' listájából.
+        source (str): A forrás wiki azonosítója (a site URL).
+        title (str, optional): A tárolandó cím (pl. a kért cím átirányításnál);
+            alapértelmezés szerint az oldal címe.
+
+    Returns:
+        dict: 'title', 'text', 'pageid', 'revid', 'namespace', 'categories'
+            (kategórianevek előtag nélkül) és 'source' kulcsokkal.
+    """
+    revision = (data.get('revisions') or [{}])[0]
+    content = revision.get('slots', {}).get('main', revision).get('content', '')
+    return {
+        'title': title or data['title'],
+        'text': content,
+        'pageid': data.get('pageid'),
+        'revid': revision.get('revid'),
+        'namespace': data.get('ns', 0),
+        'categories': [category['title'].split(':', 1)[-1]
+                       for category in data.get('categories', [])],
+        'source': source,
+    }
+
+
+def _merge_page(pages, data):
+    """Lapozott válaszban többször érkező oldal adatainak egyesítése."""
+    key = data.get('pageid') or data['title']
+    page = pages.setdefault(key, {})
+    for field, value in data.items():
+        if isinstance(value, list):
+            page.setdefault(field, []).extend(value)
+        else:
+            page.setdefault(field, value)
+
+
+def query_pages(site, **params):
+    """
+    Kötegelt oldallekérdezés a lapozás (continue) követésével.
+
+    Egy köteg oldalainak adatai (pl. a kategóriák) több válaszban is
+    érkezhetnek; a köteg akkor teljes, amikor a lapozás már csak a
+    generátort lépteti tovább.
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        **params: A query paraméterei (titles=... vagy generator=...).
+
+    Yields:
+        tuple: (oldalak listája a válasz formátumában, címálnevek dict:
+            feloldott cím -> kért cím a normalizálás és az átirányítások szerint).
+    """
+    params = {**PAGE_QUERY_PARAMS, **params}
+    request = dict(params)
+    pages, aliases = {}, {}
+    while True:
+        result = site.api('query', **request)
+        query = result.get('query', {})
+        for data in query.get('pages', []):
+            _merge_page(pages, data)
+        for alias in query.get('normalized', []) + query.get('redirects', []):
+            aliases[alias['to']] = alias['from']
+
+        continuation = result.get('continue')
+        if not continuation or not set(continuation) - GENERATOR_CONTINUE_KEYS:
+            yield list(pages.values()), aliases
+            pages, aliases = {}, {}
+        if not continuation:
+            return
+        request = {**params, **continuation}
+
+
+def _requested_title(title, aliases):
+    """A feloldott (normalizált, átirányított) címhez tartozó eredeti kért cím."""
+    seen = set()
+    while title in aliases and title not in seen:
+        seen.add(title)
+        title = aliases[title]
+    return title
+
+
+def _fetch_batch(site, batch, source, missing=None, failed=None):
+    """Egy legfeljebb API_BATCH_SIZE címből álló köteg letöltése (cím -> oldal)."""
+    found = {}
+    logger.debug("Kötegelt letöltés: %d cím (%s...)", len(batch), batch[0])
+    try:
+        for pages, aliases in query_pages(site, titles='|'.join(batch)):
+            for data in pages:
+                title = _requested_title(data['title'], aliases)
+                if data.get('missing') or data.get('invalid'):
+                    logger.warning("Az oldal nem létezik: %s", title)
+                    if missing is not None:
+                        missing.add(title)
+                    continue
+                page = page_from_api(data, source, title)
+                if not page['text'].strip():
+                    logger.warning("Üres oldal: %s", title)
+                    continue
+                found[title] = page
+                # Ha az átirányítás célja is kérve volt (pl. átnevezés után a
+                # régi és az új cím), a saját címén is megmarad
+                if data['title'] != title and data['title'] in batch:
+                    found[data['title']] = page_from_api(data, source)
+                logger.info("Sikeresen letöltve: %s (%d karakter)",
+                            title, len(page['text']))
+    except Exception as error:
+        logger.error("Hiba a(z) %s... köteg letöltése közben: %s", batch[0], error)
+        if failed is not None:
+            failed.update(title for title in batch
+                          if title not in found and (missing is None or title not in missing))
+    return found
+
+
+def fetch_titles(site, titles, source, missing=None, failed=None):
+    """
+    Oldalak letöltése cím szerint, API_BATCH_SIZE címenként egy kéréssel.
+
+    WikiSession esetén a kötegek párhuzamosan töltődnek le.
+    Átirányításnál a céloldal tartalma töltődik le, de a kért cím marad meg.
+    Hiányzó vagy üres oldalak logolva lesznek, de nem törlik meg a folyamatot.
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        titles (list): A letöltendő oldalak címei.
+        source (str): A forrás wiki azonosítója (a site URL).
+        missing (set, optional): Ha meg van adva, a wikin nem létező oldalak
+            címei ide kerülnek (a hibás kötegek címei nem).
+        failed (set, optional): Ha meg van adva, a hibás (pl. hálózati hiba
+            miatt meg nem érkezett) kötegek le nem töltött címei ide kerülnek.
+
+    Returns:
+        list: A letöltött oldalak a kért sorrendben (lásd page_from_api).
+    """
+    batches = [titles[start:start + API_BATCH_SIZE]
+               for start in range(0, len(titles), API_BATCH_SIZE)]
+
+    def fetch(batch):
+        return _fetch_batch(site, batch, source, missing, failed)
+
+    found = {}
+    for result in (site.map(fetch, batches) if isinstance(site, WikiSession)
+                   else map(fetch, batches)):
+        found.update(result)
+    return [found[title] for title in titles if title in found]
+
+
+def list_titles(site, limit):
+    """
+    Nem átirányító oldalak címeinek listázása (list=allpages), a limitig.
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        limit (int): A listázandó címek maximális száma.
+
+    Returns:
+        list: Az oldalcímek ábécérendben.
+    """
+    titles = []
+    cursor = {}
+    while len(titles) < limit:
+        batch, cursor = list_titles_page(site, limit - len(titles), cursor)
+        titles.extend(batch)
+        if cursor is None:
+            break
+    return titles[:limit]
+
+
+def list_titles_page(site, limit, cursor=None):
+    """
+    Egy kérésnyi (legfeljebb LIST_BATCH_SIZE) nem átirányító oldalcím listázása.
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        limit (int): A listázandó címek maximális száma.
+        cursor (dict, optional): Az előző kérés folytatási pozíciója
+            (pl. {'apcontinue': 'Madrid', 'continue': '-||'}).
+
+    Returns:
+        tuple: (oldalcímek listája, a következő kérés pozíciója vagy None,
+            ha nincs több oldal).
+    """
+    request = {'list': 'allpages', 'apfilterredir': 'nonredirects',
+               'aplimit': min(limit, LIST_BATCH_SIZE), 'formatversion': 2, **(cursor or {})}
+    result = site.api('query', **request)
+    titles = [page['title'] for page in result.get('query', {}).get('allpages', [])]
+    return titles[:limit], result.get('continue')
+
+
+def search_prefix(site, root_title, limit):
+    """
+    Adott előtaggal kezdődő oldalcímek keresése (list=prefixsearch).
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        root_title (str): A keresési prefix.
+        limit (int): Maximum találatok száma.
+
+    Returns:
+        list: A talált oldalcímek.
+    """
+    results = site.api('query', list='prefixsearch', pssearch=root_title, pslimit=limit)
+    return [res['title'] for res in results.get('query', {}).get('prefixsearch', [])]
+
+
+def latest_revisions(site, titles):
+    """
+    Oldalak aktuális revid-jei kötegelt prop=info lekérdezéssel.
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        titles (list): Az oldalcímek.
+
+    Returns:
+        dict: Kért cím -> aktuális revid (None, ha az oldal nem létezik).
+    """
+    def fetch(batch):
+        result = site.api('query', prop='info', titles='|'.join(batch),
+                          redirects=1, formatversion=2)
+        query = result.get('query', {})
+        aliases = {alias['to']: alias['from']
+                   for alias in query.get('normalized', []) + query.get('redirects', [])}
+        return {_requested_title(data['title'], aliases):
+                None if data.get('missing') or data.get('invalid') else data.get('lastrevid')
+                for data in query.get('pages', [])}
+
+    batches = [titles[start:start + API_BATCH_SIZE]
+               for start in range(0, len(titles), API_BATCH_SIZE)]
+    revisions = {}
+    for result in (site.map(fetch, batches) if isinstance(site, WikiSession)
+                   else map(fetch, batches)):
+        revisions.update(result)
+    return revisions
+
+
+def recent_changes(site, since):
+    """
+    Az adott időpont óta történt változások a list=recentchanges alapján.
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        since (datetime): A kezdő időpont (UTC).
+
+    Returns:
+        tuple: (érintett címek halmaza: szerkesztett, létrehozott, átnevezett
+            vagy törölt oldalak; új fő névtérbeli címek halmaza: létrehozott
+            oldalak és átnevezések céljai).
+    """
+    touched, created = set(), set()
+    request = {'list': 'recentchanges', 'rcdir': 'newer',
+               'rcstart': since.strftime(TIMESTAMP_FORMAT),
+               'rcprop': 'title|ids|timestamp|loginfo', 'rctype': 'edit|new|log',
+               'rclimit': 'max', 'formatversion': 2}
+    while True:
+        result = site.api('query', **request)
+        for change in result.get('query', {}).get('recentchanges', []):
+            kind, title = change.get('type'), change['title']
+            if kind in ('edit', 'new'):
+                touched.add(title)
+                if kind == 'new' and change.get('ns', 0) == 0:
+                    created.add(title)
+            elif change.get('logtype') == 'move':
+                touched.add(title)
+                params = change.get('logparams', {})
+                if params.get('target_title') and params.get('target_ns', 0) == 0:
+                    created.add(params['target_title'])
+            elif change.get('logtype') == 'delete':
+                touched.add(title)
+        if 'continue' not in result:
+            break
+        request.update(result['continue'])
+    logger.info("Változások %s óta: %d érintett, %d új cím",
+                since.strftime(TIMESTAMP_FORMAT), len(touched), len(created))
+    return touched, created
+
+
+def load_sync_state(path=SYNC_STATE_FILE):
+    """
+    Az utolsó szinkronizáció állapota.
+
+    Args:
+        path (Path, optional): Az állapotfájl útvonala. Alapértelmezett: SYNC_STATE_FILE
+
+    Returns:
+        dict: 'site' és 'timestamp' (datetime, UTC) kulcsokkal, vagy None, ha
+            nincs (vagy olvashatatlan) állapot.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+        state['timestamp'] = datetime.strptime(
+            state['timestamp'], TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+        return state
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        logger.warning("Olvashatatlan szinkronizációs állapot (%s): %s", path, error)
+        return None
+
+
+def save_sync_state(site_url, timestamp, path=SYNC_STATE_FILE):
+    """
+    A szinkronizáció állapotának mentése (atomi cserével).
+
+    Args:
+        site_url (str): A forrás wiki URL-je.
+        timestamp (datetime): A szinkronizáció kezdete (UTC); a következő
+            frissítés az ezutáni változásokat keresi.
+        path (Path, optional): Az állapotfájl útvonala. Alapértelmezett: SYNC_STATE_FILE
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + '.tmp')
+    temp_path.write_text(json.dumps({'site': site_url,
+                                     'timestamp': timestamp.strftime(TIMESTAMP_FORMAT)}),
+                         encoding='utf-8')
+    os.replace(temp_path, path)
+    logger.debug("Szinkronizációs állapot mentve: %s", timestamp.strftime(TIMESTAMP_FORMAT))
+
+
+class DownloadIncompleteError(Exception):
+    """Hiányos letöltés: sikertelen kötegek címei még letöltésre várnak"""
+    pass
+
+
 def _parse_selected_pages(config):
     """
     Feldolgozza a [selected] szekció pages beállításait.
@@ -84,10 +631,222 @@ def _parse_selected_pages(config):
     return pages
 
 
+class PageWriter:
+    """
+    Letöltött oldalak folyamatos mentése csak hozzáfűzhető JSONL fájlba, ellenőrzőponttal.
+
+    Az ellenőrzőpont a letöltési tervet (site és a címlista vagy limit
+    lenyomata), a címlistázás folytatási pozícióját (cursor), a nem létező
+    vagy üres, ezért kihagyott címeket és a sikertelen kötegek még letöltésre
+    váró címeit rögzíti. Azonos tervű újraindításkor a JSONL-ben már szereplő
+    (befejezett) és a kihagyott címek nem töltődnek le újra; eltérő terv
+    esetén a letöltés elölről kezdődik.
+
+    Attributes:
+        completed (set): A már mentett oldalak címei.
+        skipped (set): A kihagyott (nem létező vagy üres) címek.
+        failed (set): A sikertelen kötegek még le nem töltött címei.
+        cursor (dict): A címlistázás folytatási pozíciója (None: még nem indult).
+        count (int): A mentett oldalak száma.
+    """
+
+    def __init__(self, output_path, plan, directory=None):
+        """
+        Args:
+            output_path (Path): A végleges (JSON) kimeneti fájl útvonala.
+            plan (dict): A letöltés leírása; csak azonos terv folytatható.
+            directory (Path, optional): A részleges fájlok könyvtára.
+                Alapértelmezett: DOWNLOAD_DIR
+        """
+        output_path = Path(output_path)
+        directory = Path(directory or DOWNLOAD_DIR)
+        self.path = directory / f"{output_path.stem}.jsonl"
+        self.checkpoint_path = directory / f"{output_path.stem}.checkpoint.json"
+        self.plan = json.loads(json.dumps(plan, ensure_ascii=False))
+        self.completed = set()
+        self.skipped = set()
+        self.failed = set()
+        self.cursor = None
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        checkpoint = self._read_checkpoint()
+        if checkpoint is not None and checkpoint.get('plan') == self.plan and self.path.exists():
+            self.cursor = checkpoint.get('cursor')
+            self.skipped = set(checkpoint.get('skipped', []))
+            self.failed = set(checkpoint.get('failed', []))
+            self._recover()
+            self.failed -= self.completed
+            logger.info("Letöltés folytatása: %d oldal kész, %d kihagyva, %d újrapróbálandó (%s)",
+                        self.count, len(self.skipped), len(self.failed), self.path)
+        else:
+            self.path.write_bytes(b'')
+            self.save_checkpoint()
+
+    def _read_checkpoint(self):
+        """Az ellenőrzőpont beolvasása (None, ha nincs vagy olvashatatlan)."""
+        try:
+            with self.checkpoint_path.open('r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            logger.warning("Olvashatatlan ellenőrzőpont (%s): %s", self.checkpoint_path, error)
+            return None
+
+    def _recover(self):
+        """A befejezett címek beolvasása; a félbemaradt utolsó sor levágása."""
+        valid = 0
+        with self.path.open('rb') as file:
+            for line in file:
+                try:
+                    page = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                self.completed.add(page['title'])
+                valid += len(line)
+        if valid < self.path.stat().st_size:
+            logger.warning("Félbemaradt sor levágva: %s", self.path)
+            with self.path.open('r+b') as file:
+                file.truncate(valid)
+        self.count = len(self.completed)
+
+    def pending(self, titles):
+        """A még le nem töltött (nem befejezett és nem kihagyott) címek, sorrendben."""
+        return [title for title in titles
+                if title not in self.completed and title not in self.skipped]
+
+    def write(self, pages, skipped=(), failed=()):
+        """
+        Oldalak hozzáfűzése (lemezre ürítéssel), majd az ellenőrzőpont frissítése.
+
+        Args:
+            pages (list): A letöltött oldalak.
+            skipped (iterable, optional): Nem létező vagy üres címek.
+            failed (iterable, optional): Sikertelen kötegek le nem töltött címei.
+        """
+        with self.path.open('a', encoding='utf-8') as file:
+            for page in pages:
+                file.write(json.dumps(page, ensure_ascii=False) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self.completed.update(page['title'] for page in pages)
+        self.count = len(self.completed)
+        self.skipped.update(skipped)
+        self.failed = (self.failed | set(failed)) - self.completed - self.skipped
+        self.save_checkpoint()
+
+    def save_checkpoint(self, cursor=None):
+        """
+        Az ellenőrzőpont atomi mentése.
+
+        Args:
+            cursor (dict, optional): Új címlistázási pozíció; ha nincs megadva,
+                a korábbi marad.
+        """
+        if cursor is not None:
+            self.cursor = cursor
+        temp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + '.tmp')
+        temp_path.write_text(json.dumps({'plan': self.plan, 'cursor': self.cursor,
+                                         'pages': self.count, 'skipped': sorted(self.skipped),
+                                         'failed': sorted(self.failed)},
+                                        ensure_ascii=False), encoding='utf-8')
+        os.replace(temp_path, self.checkpoint_path)
+
+    def finish(self, output_path):
+        """
+        A letöltés lezárása: a JSONL átírása a végleges JSON fájlba, a részleges fájlok törlése.
+
+        Az átírás soronként, ideiglenes fájlon keresztül, atomi cserével
+        történik. Ha egyetlen oldal sem töltődött le, a kimeneti fájl nem változik.
+        Ha sikertelen kötegek címei még letöltésre várnak, a kimeneti fájl nem
+        változik, a részleges fájlok és az ellenőrzőpont pedig megmaradnak, így
+        az újraindított letöltés csak ezeket tölti le.
+
+        Args:
+            output_path (Path): A végleges JSON fájl útvonala.
+
+        Returns:
+            int: A mentett oldalak száma.
+
+        Raises:
+            DownloadIncompleteError: Ha vannak még letöltésre váró címek.
+        """
+        output_path = Path(output_path)
+        if self.failed:
+            raise DownloadIncompleteError(
+                f"{len(self.failed)} oldal letöltése sikertelen, az újraindított letöltés "
+                f"folytatja ({self.checkpoint_path})")
+        if self.count:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = output_path.with_name(output_path.name + '.tmp')
+            with self.path.open('r', encoding='utf-8') as source, \
+                    temp_path.open('w', encoding='utf-8') as target:
+                target.write('[')
+                for number, line in enumerate(source):
+                    target.write((',\n' if number else '\n') + line.rstrip('\n'))
+                target.write('\n]\n')
+            os.replace(temp_path, output_path)
+        self.path.unlink(missing_ok=True)
+        self.checkpoint_path.unlink(missing_ok=True)
+        return self.count
+
+
+def download_titles(site, titles, writer, source):
+    """
+    Oldalak letöltése cím szerint a PageWriter-be, csoportonkénti mentéssel.
+
+    Egy csoport annyi köteg, ahány szálon a kapcsolat párhuzamosan tölt; a
+    csoport oldalai a letöltés után azonnal a JSONL fájlba kerülnek. A már
+    befejezett vagy kihagyott címek kimaradnak; a sikertelen kötegek címei
+    az ellenőrzőpontba kerülnek (lásd PageWriter.failed).
+
+    Args:
+        site (WikiSession vagy mwclient.Site): A wiki kapcsolat.
+        titles (list): A letöltendő oldalak címei.
+        writer (PageWriter): A mentést végző író.
+        source (str): A forrás wiki azonosítója (a site URL).
+
+    Returns:
+        int: Az ebben a hívásban letöltött oldalak száma.
+    """
+    pending = writer.pending(titles)
+    group_size = API_BATCH_SIZE * max(getattr(site, 'workers', 1), 1)
+    downloaded = 0
+    for start in range(0, len(pending), group_size):
+        missing, failed = set(), set()
+        pages = fetch_titles(site, pending[start:start + group_size], source,
+                             missing=missing, failed=failed)
+        writer.write(pages, missing, failed)
+        downloaded += len(pages)
+        logger.info("Letöltési állapot: %d/%d oldal kész", writer.count,
+                    len(titles) - len(writer.skipped))
+    return downloaded
+
+
+def _plan_digest(titles):
+    """Címlista rövid lenyomata az ellenőrzőpont tervéhez."""
+    return hashlib.sha1('\n'.join(titles).encode('utf-8')).hexdigest()
+
+
+def _write_pages(pages, output_path):
+    """Oldalak JSON-ba írása ideiglenes fájlon keresztül, atomi cserével."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(pages, file, ensure_ascii=False, indent=2)
+    os.replace(temp_path, output_path)
+
+
 def save_pages(pages, output_path):
     """
     Wiki oldalak mentése JSON fájlba.
 
+    A fájl ideiglenes fájlba íródik és cserével kerül a helyére, így az
+    olvasók (pl. egy párhuzamos indexépítés) soha nem látnak félig írt fájlt.
+
     Args:
         pages (list): A mentendő wiki oldalak listája (dict-ek 'title' és 'text' kulcsokkal).
         output_path (str vagy Path): A kimeneti fájl útvonala.
@@ -95,13 +854,11 @@ def save_pages(pages, output_path):
     Raises:
         OSError: Ha a könyvtár létrehozása vagy a fájl írása nem sikerül.
     """
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as file:
-        json.dump(pages, file, ensure_ascii=False, indent=2)
+    _write_pages(pages, output_path)
     logger.info("Letöltve: %d oldal --> %s", len(pages), output_path)
 
 
-def connect(site_url, path, username=None, password=None):
+def connect(site_url, path, username=None, password=None, pool=None):
     """
     Kapcsolódás MediaWiki site-hoz.
 
@@ -110,6 +867,7 @@ def connect(site_url, path, username=None, password=None):
         path (str): A wiki útvonal (pl. '/w/').
         username (str, optional): Felhasználónév bejelentkezéshez.
         password (str, optional): Jelszó bejelentkezéshez.
+        pool (requests.Session, optional): Megosztott HTTP kapcsolat (connection pool).
 
     Returns:
         mwclient.Site: A MediaWiki site objektum.
@@ -118,7 +876,8 @@ def connect(site_url, path, username=None, password=None):
         mwclient.errors.LoginError: Ha a bejelentkezés sikertelen.
     """
     logger.info("Csatlakozás: https://%s%s", site_url, path)
-    site = mwclient.Site(site_url, path=path)
+    site = (mwclient.Site(site_url, path=path) if pool is None
+            else mwclient.Site(site_url, path=path, pool=pool))
     if username and password:
         site.login(username, password)
         logger.info("Bejelentkezés sikeres")
@@ -126,10 +885,20 @@ def connect(site_url, path, username=None, password=None):
 
 
 def fetch_wiki_pages(site_url, path='/wiki/', username=None,
-                     password=None, limit=50, output_path=DEFAULT_OUTPUT):
+                     password=None, limit=50, output_path=DEFAULT_OUTPUT, session=None):
     """
     Wiki oldalak letöltése az összes oldal listájából.
 
+    A letöltés két lépésben, listázási lapról listázási lapra halad:
+    1. A nem átirányító oldalak címei list=allpages lekérdezéssel
+       listázódnak, kérésenként legfeljebb LIST_BATCH_SIZE (és a limitből még
+       hiányzó számú) cím (lásd list_titles_page).
+    2. A lap címeinek tartalma cím szerint, API_BATCH_SIZE címenként egy
+       kéréssel, párhuzamos kötegekben töltődik le (lásd download_titles és
+       fetch_titles), és azonnal a JSONL fájlba kerül (lásd PageWriter).
+    Megszakadt letöltés az utolsó mentett apcontinue pozíciótól folytatódik;
+    a sikertelen kötegek címei újraindításkor elsőként töltődnek le.
+
     Args:
         site_url (str): A wiki site URL-je.
         path (str, optional): A wiki útvonal. Alapértelmezett: '/wiki/'
@@ -138,32 +907,33 @@ def fetch_wiki_pages(site_url, path='/wiki/', username=None,
         limit (int, optional): Letöltendő oldalak száma. Alapértelmezett: 50
         output_path (Path, optional): Kimeneti fájl útvonala.
             Alapértelmezett: DEFAULT_OUTPUT
+        session (WikiSession, optional): Megosztott kapcsolat; ha nincs megadva,
+            újat nyit.
 
     Raises:
         Exception: Ha a wiki kapcsolat vagy letöltés sikertelen.
     """
-    site = connect(site_url, path, username, password)
-    pages = []
+    session = session or open_session(site_url, path, username, password)
     logger.info("Wiki oldalak letöltése kezdődik - limit: %d", limit)
 
-    for i, page in enumerate(site.allpages()):
-        if i >= limit:
+    writer = PageWriter(output_path, {'site': site_url, 'mode': 'allpages', 'limit': limit})
+    if writer.failed:
+        # A korábbi futás sikertelen kötegei (a cursor már túl van rajtuk)
+        download_titles(session, sorted(writer.failed), writer, site_url)
+    cursor = writer.cursor or {}
+    while writer.count < limit:
+        titles, cursor = list_titles_page(session, limit - writer.count, cursor)
+        download_titles(session, titles, writer, site_url)
+        if cursor is None:
             break
-        try:
-            text = page.text()
-            pages.append({'title': page.name, 'text': text})
-            logger.debug(
-                "Oldal letöltve: %s (%d karakter)",
-                page.name,
-                len(text))
-        except Exception as error:
-            logger.warning("Oldal kihagyva %s: %s", page.name, error)
+        writer.save_checkpoint(cursor)
 
-    save_pages(pages, output_path)
+    count = writer.finish(output_path)
+    logger.info("Letöltve: %d oldal --> %s", count, output_path)
 
 
 def fetch_selected_pages(site_url, titles, path='/w/',
-                         username=None, password=None):
+                         username=None, password=None, session=None):
     """
     Kiválasztott wiki oldalak letöltése címek alapján.
 
@@ -173,60 +943,32 @@ def fetch_selected_pages(site_url, titles, path='/w/',
         path (str, optional): A wiki útvonal. Alapértelmezett: '/w/'
         username (str, optional): Felhasználónév bejelentkezéshez.
         password (str, optional): Jelszó bejelentkezéshez.
+        session (WikiSession, optional): Megosztott kapcsolat; ha nincs megadva,
+            újat nyit.
 
     Note:
         Az oldalak a DEFAULT_OUTPUT útvonalra kerülnek mentésre.
         Hiányzó vagy üres oldalak logolva lesznek, de nem törlik meg a folyamatot.
     """
-    site = mwclient.Site(site_url, path=path)
-    if username and password:
-        site.login(username, password)
-        logger.info("Bejelentkezés sikeres")
-
-    pages = []
-    logger.info("Csatlakozás: https://%s%s", site_url, path)
+    session = session or open_session(site_url, path, username, password)
     logger.info("Letöltendő oldalak: %s", titles)
+    titles = list(titles)
+    writer = PageWriter(DEFAULT_OUTPUT, {'site': site_url, 'titles': _plan_digest(titles)})
+    download_titles(session, titles, writer, site_url)
+    count = writer.finish(DEFAULT_OUTPUT)
 
-    for title in titles:
-        try:
-            logger.debug("Letöltés: %s", title)
-            page = site.pages[title]
-
-            # Ellenőrizzük, hogy létezik-e az oldal
-            if not page.exists:
-                logger.warning("Az oldal nem létezik: %s", title)
-                continue
-
-            text = page.text()
-            if text.strip():  # Ellenőrizzük, hogy van-e tartalom
-                pages.append({
-                    'title': title,
-                    'text': text
-                })
-                logger.info(
-                    "Sikeresen letöltve: %s (%d karakter)",
-                    title,
-                    len(text))
-            else:
-                logger.warning("Üres oldal: %s", title)
-        except Exception as error:
-            logger.error("Hiba '%s' letöltése közben: %s", title, error)
-
-    # Mentés és eredmény kiírása
-    if pages:
-        os.makedirs(os.path.dirname(DEFAULT_OUTPUT), exist_ok=True)
-        with open(DEFAULT_OUTPUT, 'w', encoding='utf-8') as file:
-            json.dump(pages, file, ensure_ascii=False, indent=2)
+    # Eredmény kiírása
+    if count:
         logger.info(
             "Összesen letöltve: %d oldal --> %s",
-            len(pages),
+            count,
             DEFAULT_OUTPUT)
     else:
         logger.error("Nem sikerült egyetlen oldalt sem letölteni.")
 
 
 def fetch_related_pages(site_url, root_title, limit=50,
-                        path='/w/', username=None, password=None):
+                        path='/w/', username=None, password=None, session=None):
     """
     Kapcsolódó oldalak letöltése prefix keresés alapján.
 
@@ -237,28 +979,17 @@ def fetch_related_pages(site_url, root_title, limit=50,
         path (str, optional): A wiki útvonal. Alapértelmezett: '/w/'
         username (str, optional): Felhasználónév bejelentkezéshez.
         password (str, optional): Jelszó bejelentkezéshez.
+        session (WikiSession, optional): Megosztott kapcsolat; ha nincs megadva,
+            újat nyit.
 
     Note:
         A talált oldalak a fetch_selected_pages függvényen keresztül töltődnek le.
     """
-    site = mwclient.Site(site_url, path=path)
-    if username and password:
-        site.login(username, password)
-        logger.info("Bejelentkezés sikeres")
-
-    logger.info("Csatlakozás: https://%s%s", site_url, path)
+    session = session or open_session(site_url, path, username, password)
     logger.info("Keresés: '%s' kezdetű oldalak", root_title)
 
     try:
-        results = site.api(
-            'query',
-            list='prefixsearch',
-            pssearch=root_title,
-            pslimit=limit)
-        titles = [
-            res['title'] for res in results.get(
-                'query', {}).get(
-                'prefixsearch', [])]
+        titles = search_prefix(session, root_title, limit)
 
         if not titles:
             logger.warning(
@@ -267,19 +998,14 @@ def fetch_related_pages(site_url, root_title, limit=50,
             return
 
         logger.info("Talált oldalak (%d): %s", len(titles), titles)
-        fetch_selected_pages(
-            site_url,
-            titles,
-            path=path,
-            username=username,
-            password=password)
+        fetch_selected_pages(site_url, titles, path=path, session=session)
 
     except Exception as error:
         logger.error("Hiba prefixsearch közben: %s", error)
 
 
 def fetch_selected_pages_return(
-        site_url, titles, path='/w/', username=None, password=None):
+        site_url, titles, path='/w/', username=None, password=None, session=None):
     """
     Kiválasztott oldalak letöltése és visszaadása (mentés nélkül).
 
@@ -289,6 +1015,8 @@ def fetch_selected_pages_return(
         path (str, optional): A wiki útvonal. Alapértelmezett: '/w/'
         username (str, optional): Felhasználónév bejelentkezéshez.
         password (str, optional): Jelszó bejelentkezéshez.
+        session (WikiSession, optional): Megosztott kapcsolat; ha nincs megadva,
+            újat nyit.
 
     Returns:
         list: A letöltött oldalak listája (dict-ek 'title' és 'text' kulcsokkal).
@@ -297,53 +1025,26 @@ def fetch_selected_pages_return(
         Ez a függvény nem ment fájlba, csak visszaadja az adatokat.
         Hiányzó vagy üres oldalak kihagyásra kerülnek.
     """
-    site = mwclient.Site(site_url, path=path)
-    if username and password:
-        site.login(username, password)
-        logger.info("Bejelentkezés sikeres")
-
-    pages = []
-    logger.info("Csatlakozás: https://%s%s", site_url, path)
+    session = session or open_session(site_url, path, username, password)
     logger.info("Letöltendő oldalak: %s", titles)
-
-    for title in titles:
-        try:
-            logger.debug("Letöltés: %s", title)
-            page = site.pages[title]
-
-            if not page.exists:
-                logger.warning("Az oldal nem létezik: %s", title)
-                continue
-
-            text = page.text()
-            if text.strip():
-                pages.append({
-                    'title': title,
-                    'text': text
-                })
-                logger.info(
-                    "Sikeresen letöltve: %s (%d karakter)",
-                    title,
-                    len(text))
-            else:
-                logger.warning("Üres oldal: %s", title)
-        except Exception as error:
-            logger.error("Hiba '%s' letöltése közben: %s", title, error)
-
-    return pages
+    return fetch_titles(session, list(titles), site_url)
 
 
 def fetch_related_pages_return(
-        site_url, root_title, limit=50, path='/w/', username=None, password=None):
+        site_url, root_title, limit=50, path='/w/', username=None, password=None,
+        session=None):
     """
     Kapcsolódó oldalak letöltése és visszaadása (mentés nélkül).
 
     Args:
-        site_url (root_title (str): A keresési prefix.
+        site_url (str): A wiki site URL-je.
+        root_title (str): A keresési prefix.
         limit (int, optional): Maximum találatok száma. Alapértelmezett: 50
         path (str, optional): A wiki útvonal. Alapértelmezett: '/w/'
         username (str, optional): Felhasználónév bejelentkezéshez.
         password (str, optional): Jelszó bejelentkezéshez.
+        session (WikiSession, optional): Megosztott kapcsolat; ha nincs megadva,
+            újat nyit.
 
     Returns:
         list: A letöltött kapcsolódó oldalak listája, üres lista hiba esetén.
@@ -352,24 +1053,11 @@ def fetch_related_pages_return(
         Ez a függvény nem ment fájlba, csak visszaadja az adatokat.
         Prefix keresést használ a MediaWiki API-n keresztül.
     """
-    site = mwclient.Site(site_url, path=path)
-    if username and password:
-        site.login(username, password)
-        logger.info("Bejelentkezés sikeres")
-
-    logger.info("Csatlakozás: https://%s%s", site_url, path)
+    session = session or open_session(site_url, path, username, password)
     logger.info("Keresés: '%s' kezdetű oldalak", root_title)
 
     try:
-        results = site.api(
-            'query',
-            list='prefixsearch',
-            pssearch=root_title,
-            pslimit=limit)
-        titles = [
-            res['title'] for res in results.get(
-                'query', {}).get(
-                'prefixsearch', [])]
+        titles = search_prefix(session, root_title, limit)
 
         if not titles:
             logger.warning(
@@ -378,8 +1066,7 @@ def fetch_related_pages_return(
             return []
 
         logger.info("Talált oldalak (%d): %s", len(titles), titles)
-        return fetch_selected_pages_return(
-            site_url, titles, path=path, username=username, password=password)
+        return fetch_selected_pages_return(site_url, titles, path=path, session=session)
 
     except Exception as error:
         logger.error("Hiba prefixsearch közben: %s", error)
@@ -397,6 +1084,7 @@ def auto_fetch_from_config(conf_file='wiki_rag.ini'):
     2. Ha nincs limit megadva a [wiki] szekcióban, a MAX_DOWNLOAD konstans lép érvénybe.
     3. Az összes letöltendő oldal nem haladhatja meg a limitet.
     4. Ha keveredik a pages és pages.N formátum, figyelmeztető üzenettel kilép.
+    5. Megszakadt letöltés újraindításkor folytatódik (lásd PageWriter).
 
     Args:
         conf_file (str, optional): A konfigurációs fájl neve/útvonala.
@@ -458,8 +1146,8 @@ def auto_fetch_from_config(conf_file='wiki_rag.ini'):
     related_limit = int(
         related_limit_str) if related_limit_str.isdigit() else 50
 
-    all_pages = []  # Közös lista az összes oldal számára
-    total_pages_count = 0
+    started = datetime.now(timezone.utc)
+    session = open_session(site_url, path, username, password, conf_file=conf_file)
 
     # 1. eset: Ha mind a [selected] és [related] üres, akkor a wiki url-ét töltjük le
     if not selected_pages and not related_root:
@@ -470,8 +1158,10 @@ def auto_fetch_from_config(conf_file='wiki_rag.ini'):
             username=username, 
             password=password, 
             limit=max_total_limit, 
-            output_path=DEFAULT_OUTPUT
+            output_path=DEFAULT_OUTPUT,
+            session=session
         )
+        save_sync_state(site_url, started)
         return
 
     # 2. eset: selected pages feldolgozása
@@ -483,51 +1173,158 @@ def auto_fetch_from_config(conf_file='wiki_rag.ini'):
             selected_pages = selected_pages[:max_total_limit]
         
         logger.info("Kiválasztott oldalak letöltése: %s", selected_pages)
-        selected_data = fetch_selected_pages_return(
-            site_url, selected_pages, path=path, username=username, password=password)
-        all_pages.extend(selected_data)
-        total_pages_count += len(selected_data)
+    titles = list(dict.fromkeys(selected_pages))
 
     # 3. eset: related pages feldolgozása (ha még van hely a limitben)
-    if related_root and total_pages_count < max_total_limit:
-        remaining_limit = max_total_limit - total_pages_count
+    if related_root and len(selected_pages) < max_total_limit:
+        remaining_limit = max_total_limit - len(selected_pages)
         actual_related_limit = min(related_limit, remaining_limit)
         
         logger.info(
             "Kapcsolódó oldalak letöltése: '%s' gyök alapján, limit: %d (maradék hely: %d)",
             related_root, actual_related_limit, remaining_limit)
         
-        related_data = fetch_related_pages_return(
-            site_url,
-            related_root,
-            limit=actual_related_limit,
-            path=path,
-            username=username,
-            password=password)
-        all_pages.extend(related_data)
-        total_pages_count += len(related_data)
-    elif related_root and total_pages_count >= max_total_limit:
+        try:
+            related_titles = search_prefix(session, related_root, actual_related_limit)
+            logger.info("Talált oldalak (%d): %s", len(related_titles), related_titles)
+            titles.extend(title for title in related_titles if title not in titles)
+        except Exception as error:
+            logger.error("Hiba prefixsearch közben: %s", error)
+    elif related_root:
         logger.warning("A limit (%d) már elérve a selected oldalakkal, related oldalakat nem töltjük le", max_total_limit)
 
-    # Végleges ellenőrzés és mentés
-    if total_pages_count > max_total_limit:
-        logger.warning("A letöltött oldalak száma (%d) meghaladja a limitet (%d), csak az első %d oldalt mentjük", 
-                     total_pages_count, max_total_limit, max_total_limit)
-        all_pages = all_pages[:max_total_limit]
-
-    # Végső mentés
-    if all_pages:
-        os.makedirs(os.path.dirname(DEFAULT_OUTPUT), exist_ok=True)
-        with open(DEFAULT_OUTPUT, 'w', encoding='utf-8') as file:
-            json.dump(all_pages, file, ensure_ascii=False, indent=2)
+    # A selected és a related oldalak együtt, párhuzamos kötegekben töltődnek
+    # le a közös kapcsolaton, folyamatos mentéssel (lásd PageWriter)
+    titles = titles[:max_total_limit]
+    writer = PageWriter(DEFAULT_OUTPUT, {'site': site_url, 'titles': _plan_digest(titles)})
+    download_titles(session, titles, writer, site_url)
+    count = writer.finish(DEFAULT_OUTPUT)
+
+    # Eredmény kiírása
+    if count:
+        save_sync_state(site_url, started)
         logger.info(
             "Összesen letöltve: %d oldal --> %s",
-            len(all_pages),
+            count,
             DEFAULT_OUTPUT)
     else:
         logger.error("Nem sikerült egyetlen oldalt sem letölteni.")
 
 
+def sync_from_config(conf_file='wiki_rag.ini'):
+    """
+    Inkrementális frissítés: csak a legutóbbi szinkronizáció óta változott oldalak letöltése.
+
+    A letöltött oldalak közül a változott (létrehozott, szerkesztett,
+    átnevezett vagy törölt) oldalak újra letöltődnek; akiknek a revid-je nem
+    változott, kimaradnak. Átnevezett oldal csak az új címén szerepel a
+    frissítettek között (a régi cím átirányítása nem külön oldal). Ha egy
+    köteg letöltése sikertelen, a sikeres változások érvényesülnek, de a
+    szinkronizációs állapot nem frissül, így a következő frissítés újra
+    lekéri őket. A wiki
+    url-ről letöltött ([selected] és [related] nélküli) korpuszhoz az új
+    oldalak a limitig, a [related] korpuszhoz a gyök előtaggal kezdődő új
+    oldalak adódnak hozzá. Az eredmény a DEFAULT_OUTPUT
+    fájlba íródik, és frissül a szinkronizációs állapot.
+
+    Args:
+        conf_file (str, optional): A konfigurációs fájl neve/útvonala.
+            Alapértelmezett: 'wiki_rag.ini'
+
+    Returns:
+        dict: 'updated' (a frissített vagy új oldalak) és 'removed' (a törölt,
+            illetve lecserélt oldalazonosítójú oldalak korábbi változata)
+            kulcsokkal, vagy None, ha inkrementális frissítés nem lehetséges
+            (nincs állapot vagy letöltött adat, kikapcsolva, más a wiki);
+            ilyenkor teljes letöltés szükséges.
+    """
+    settings = load_sync_config(conf_file)
+    state = load_sync_state()
+    if not settings['incremental'] or state is None:
+        logger.info("Inkrementális frissítés nem lehetséges, teljes letöltés szükséges")
+        return None
+
+    config = load_config(conf_file)
+    site_url = config.get('wiki', 'url', fallback='').strip()
+    if not site_url or state.get('site') != site_url:
+        logger.info("A szinkronizációs állapot más wikihez tartozik, teljes letöltés szükséges")
+        return None
+    try:
+        with open(DEFAULT_OUTPUT, 'r', encoding='utf-8') as file:
+            pages = json.load(file)
+        selected_pages = _parse_selected_pages(config)
+    except (OSError, ValueError) as error:
+        logger.warning("Inkrementális frissítés nem lehetséges: %s", error)
+        return None
+
+    limit_str = config.get('wiki', 'limit', fallback='').strip()
+    limit = int(limit_str) if limit_str.isdigit() else MAX_DOWNLOAD
+    related_root = config.get('related', 'root', fallback='').strip()
+    if not selected_pages and not related_root:
+        def in_scope(title):
+            return True
+    elif related_root:
+        def in_scope(title):
+            return title.startswith(related_root)
+    else:
+        def in_scope(title):
+            return False
+
+    started = datetime.now(timezone.utc)
+    session = open_session(site_url, config.get('wiki', 'path', fallback='/w/').strip(),
+                           config.get('wiki', 'username', fallback=None),
+                           config.get('wiki', 'password', fallback=None), conf_file=conf_file)
+    tracked = {page['title']: page for page in pages}
+
+    if started - state['timestamp'] > timedelta(days=settings['max_age']):
+        logger.info("Az utolsó szinkronizáció régebbi %s napnál, revid-összevetés",
+                    settings['max_age'])
+        revisions = latest_revisions(session, list(tracked))
+        touched = {title for title, page in tracked.items()
+                   if revisions.get(title, page.get('revid')) != page.get('revid')}
+        created = set()
+    else:
+        touched, created = recent_changes(session, state['timestamp'] - SYNC_OVERLAP)
+
+    room = max(limit - len(pages), 0)
+    new_titles = sorted(title for title in created - set(tracked) if in_scope(title))[:room]
+    refetch = sorted(title for title in touched if title in tracked) + new_titles
+
+    missing, failed = set(), set()
+    fetched = {page['title']: page for page in fetch_titles(
+        session, refetch, site_url, missing=missing, failed=failed)}
+    # Átnevezés: az oldal (pageid) az új címen él tovább; a régi cím
+    # átirányítása ugyanarra a pageid-re oldódik fel, ezért kimarad
+    moved = {page['pageid'] for title, page in fetched.items()
+             if title not in tracked and page.get('pageid')}
+    moved_from = {title for title, page in tracked.items()
+                  if fetched.get(title, page).get('pageid') in moved}
+    updated = [page for title, page in fetched.items()
+               if title not in moved_from and
+               (title not in tracked or page.get('revid') != tracked[title].get('revid'))]
+    removed = [tracked[title] for title in sorted(missing)
+               if title in tracked and title not in moved_from]
+    removed += [tracked[page['title']] for page in updated if page['title'] in tracked
+                and page.get('pageid') != tracked[page['title']].get('pageid')]
+
+    if updated or removed or moved_from:
+        gone = ({page['title'] for page in removed} - set(fetched)) | moved_from
+        changed = {page['title']: page for page in updated}
+        pages = [changed.pop(page['title'], page) for page in pages
+                 if page['title'] not in gone] + list(changed.values())
+        _write_pages(pages, DEFAULT_OUTPUT)
+    if failed:
+        # A sikertelen kötegek változásai a következő frissítéskor újra
+        # letöltődnek: az állapot a korábbi időponton marad
+        logger.warning("%d oldal letöltése sikertelen, a szinkronizációs állapot "
+                       "nem frissül", len(failed))
+    else:
+        save_sync_state(site_url, started)
+    logger.info("Inkrementális frissítés: %d oldal frissítve, %d törölve (%d lekérdezve)",
+                len(updated), len(removed), len(refetch))
+    return {'updated': updated, 'removed': removed}
+
+
 # Példa használat
 if __name__ == "__main__":
     # Logging beállítása csak a fő fájlban
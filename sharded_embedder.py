@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:14:27 2026
+@author: zsolt
+
+Shardolt index párhuzamos (scatter-gather) kereséssel.
+
+Több nagy wiki esetén egyetlen FAISS index és dokumentumfájl nem skálázódik.
+A ShardedEmbedder N shardot kezel; minden shard egy önálló Embedder saját
+indexszel és dokumentum-szegmenssel a shard könyvtárában. A dokumentumok
+az oldalkulcs hash-e ('hash') vagy a forrás wiki ('source') szerint
+oszlanak el, így egy oldal összes passage-e ugyanabba a shardba kerül.
+
+A kérdés egyszer kódolódik, a keresés szálkészleten fut az összes shardon,
+és a találatok a koszinusz-pontszám szerint egyesülnek. A shardok egyenként
+építhetők, menthetők és tölthetők újra; a csere atomi, így egy wiki
+frissítése alatt a többi shard zavartalanul keres.
+
+A konfiguráció a wiki_rag.ini [shards] szekciójából olvasható:
+
+    [shards]
+    partition = hash
+    count = 4
+    dir = data/shards
+    workers = 0
+"""
+import re
+import shutil
+import threading
+import configparser
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from embedder import Embedder, page_key, stable_id
+from embedding_cache import load_cache_config
+from ranking import (SearchResult, load_search_config, normalize_rows, select_results,
+                     OVERFETCH_FACTOR)
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path('wiki_rag.ini')
+PARTITIONS = ('none', 'hash', 'source')
+DEFAULT_SHARD_CONFIG = {
+    'partition': 'none',
+    'count': 4,
+    'dir': Path('data/shards'),
+    'workers': 0,           # 0: shardonként egy szál
+}
+DEFAULT_SOURCE = 'default'
+SHARD_INDEX_FILE = 'index.faiss'
+SHARD_DOCS_FILE = 'passages.json'
+SHARD_VECTORS_FILE = 'vectors.f32'
+# Inkrementális frissítéskor a vektortár felváltva a két fájlba kerül, így a
+# még kereső régi shard leképezett vektorfájlja nem íródik felül
+SHARD_VECTORS_ALT_FILE = 'vectors.next.f32'
+
+
+def load_shard_config(path=CONFIG_PATH):
+    """
+    Shardolási beállítások betöltése a konfigurációs fájlból.
+
+    Args:
+        path (Path, optional): A konfigurációs fájl útvonala.
+            Alapértelmezett: CONFIG_PATH
+
+    Returns:
+        dict: 'partition' ('none', 'hash' vagy 'source'), 'count' (a hash
+            shardok száma), 'dir' (Path) és 'workers' kulcsokkal.
+    """
+    config = configparser.ConfigParser()
+    settings = dict(DEFAULT_SHARD_CONFIG)
+
+    try:
+        config.read(path, encoding='utf-8')
+        partition = config.get('shards', 'partition', fallback='none').strip().lower()
+        settings['count'] = max(config.getint('shards', 'count',
+                                              fallback=DEFAULT_SHARD_CONFIG['count']), 1)
+        settings['workers'] = max(config.getint('shards', 'workers', fallback=0), 0)
+        shard_dir = config.get('shards', 'dir', fallback='').strip()
+    except (configparser.Error, ValueError) as error:
+        logger.warning("Hibás [shards] konfiguráció (%s), shardolás kikapcsolva", error)
+        return dict(DEFAULT_SHARD_CONFIG)
+
+    if partition not in PARTITIONS:
+        logger.warning("Ismeretlen shardolási mód: %s, shardolás kikapcsolva", partition)
+        partition = 'none'
+    settings['partition'] = partition
+    if shard_dir:
+        settings['dir'] = Path(shard_dir)
+    return settings
+
+
+def shard_name(source):
+    """Fájlrendszer-biztos shardnév egy forrásazonosítóból."""
+    return re.sub(r'[^\w.-]+', '_', str(source)).strip('_') or DEFAULT_SOURCE
+
+
+class _ShardDocuments:
+    """Az összes shard dokumentumainak csak olvasható, lusta nézete."""
+
+    def __init__(self, shards):
+        self._shards = shards
+
+    def __len__(self):
+        return sum(len(shard.documents) for shard in self._shards)
+
+    def __iter__(self):
+        for shard in self._shards:
+            yield from shard.documents
+
+
+class ShardedEmbedder:
+    """
+    Több Embedder shard közös kereső felülettel.
+
+    A query() és search() az Embedder azonos nevű metódusaival egyező
+    eredményt ad; a shardok kezelése (build_shard, load_shard, save_shard)
+    shardonként, a többi shard keresésének blokkolása nélkül történik.
+
+    Attributes:
+        config (dict): A shardolási beállítások (lásd load_shard_config).
+        search_config (dict): A query() alapértelmezett küszöbe, oldalkorlátja
+            és MMR súlya.
+    """
+
+    def __init__(self, embedding_model_name='sentence-transformers/LaBSE', shard_config=None,
+                 index_config=None, cache_config=None, encoding_config=None,
+                 encoder_config=None, retrieval_config=None, search_config=None):
+        """
+        Args:
+            embedding_model_name (str, optional): A sentence transformer modell neve.
+            shard_config (dict, optional): Shardolási beállítások. Ha nincs megadva,
+                a wiki_rag.ini [shards] szekciójából töltődnek be.
+            index_config, cache_config, encoding_config, encoder_config,
+            retrieval_config, search_config (dict, optional): A shardok
+                Embedder példányainak beállításai (lásd Embedder).
+        """
+        self.config = shard_config or load_shard_config()
+        self.model_name = embedding_model_name
+        self.search_config = search_config or load_search_config()
+        cache_config = cache_config or load_cache_config()
+        # A kérdést a közös encoder kódolja egyszer, a shardoknak nem kell kérdés gyorsítótár
+        self._encoder = Embedder(embedding_model_name, index_config, cache_config,
+                                 encoding_config, encoder_config, retrieval_config,
+                                 self.search_config)
+        self._shard_options = (index_config, {**cache_config, 'queries': 0}, encoding_config,
+                               encoder_config, retrieval_config, self.search_config)
+        self._shards = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        logger.info("Shardolt embedder inicializálva - mód: %s, könyvtár: %s",
+                    self.config['partition'], self.config['dir'])
+
+    # -- Tulajdonságok (az Embedderrel kompatibilis felület) --
+
+    @property
+    def shard_names(self):
+        """A betöltött shardok nevei rendezve."""
+        with self._lock:
+            return sorted(self._shards)
+
+    def shard(self, name):
+        """Egy shard Embedder példánya (KeyError, ha nincs ilyen)."""
+        with self._lock:
+            return self._shards[name]
+
+    def _snapshot(self):
+        """A shardok (név, Embedder) párjai egy adott pillanatban."""
+        with self._lock:
+            return sorted(self._shards.items())
+
+    @property
+    def documents(self):
+        """Az összes shard dokumentumai (lusta nézet, len() és iterálás)."""
+        return _ShardDocuments([shard for _, shard in self._snapshot()])
+
+    @property
+    def backend(self):
+        """Az encoder backend (a shardok közös modellje)."""
+        return self._encoder.backend
+
+    @property
+    def backend_report(self):
+        """Az encoder backend összevetésének eredménye, vagy None."""
+        return self._encoder.backend_report
+
+    @property
+    def query_cache(self):
+        """A közös kérdés embedding gyorsítótár, vagy None."""
+        return self._encoder.query_cache
+
+    @property
+    def retrieval_config(self):
+        """A visszakeresési beállítások (dense vagy hybrid)."""
+        return self._encoder.retrieval_config
+
+    @property
+    def index_type(self):
+        """A shardok index típusai ('sharded:flat,ivf' alakban)."""
+        types = sorted({shard.index_type for _, shard in self._snapshot()})
+        return f"sharded:{','.join(types)}"
+
+    @property
+    def codec_stats(self):
+        """Shardonkénti tárolási statisztikák."""
+        return {name: shard.codec_stats for name, shard in self._snapshot()}
+
+    # -- Particionálás --
+
+    def shard_for(self, doc):
+        """
+        A dokumentum shardjának neve.
+
+        Args:
+            doc (dict): Oldal vagy passage.
+
+        Returns:
+            str: hash módban a page_key hash-e alapján '0'..'count-1' (azonos
+                szélességre nullákkal kiegészítve), source módban a forrás
+                ('source' mező) fájlrendszer-biztos neve.
+        """
+        if self.config['partition'] == 'source':
+            return shard_name(doc.get('source') or DEFAULT_SOURCE)
+        count = self.config['count']
+        width = len(str(count - 1))
+        return f"{stable_id(page_key(doc)) % count:0{width}d}"
+
+    def partition(self, docs):
+        """
+        Dokumentumok szétosztása shardok szerint.
+
+        Args:
+            docs (iterable): Dokumentumok.
+
+        Returns:
+            dict: shardnév -> dokumentumlista.
+        """
+        parts = {}
+        for doc in docs:
+            parts.setdefault(self.shard_for(doc), []).append(doc)
+        return parts
+
+    def _shard_dir(self, name):
+        return Path(self.config['dir']) / name
+
+    def _new_shard(self):
+        return Embedder(self.model_name, *self._shard_options)
+
+    def _swap(self, name, shard):
+        """Shard atomi cseréje (a folyamatban lévő keresések a régi példányt használják)."""
+        with self._lock:
+            self._shards[name] = shard
+
+    # -- Építés, mentés, betöltés --
+
+    def build_shard(self, name, docs):
+        """
+        Egy shard teljes újraépítése; a kész shard atomi cserével kerül a helyére.
+
+        Args:
+            name (str): A shard neve.
+            docs (list): A shard dokumentumai.
+
+        Returns:
+            Embedder: Az új shard.
+        """
+        logger.info("Shard építése: %s (%d dokumentum)", name, len(docs))
+        shard_dir = self._shard_dir(name)
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        shard = self._new_shard()
+        shard.build_index(docs, vectors_path=shard_dir / SHARD_VECTORS_FILE)
+        self._swap(name, shard)
+        return shard
+
+    def build_index(self, docs):
+        """
+        Az összes shard felépítése a dokumentumokból.
+
+        A dokumentum nélkül maradt (pl. megszűnt forrású vagy a shardszám
+        változása miatt elavult) shardok a keresésből és a lemezről is törlődnek.
+
+        Args:
+            docs (list): Dokumentumok; a shardok között shard_for szerint oszlanak el.
+        """
+        parts = self.partition(docs)
+        logger.info("Shardolt index építése: %d dokumentum, %d shard", len(docs), len(parts))
+        for name, part in sorted(parts.items()):
+            self.build_shard(name, part)
+
+        stale = (set(self.shard_names) | set(self.saved_shards())) - set(parts)
+        for name in sorted(stale):
+            logger.info("Elavult shard törlése: %s", name)
+            with self._lock:
+                self._shards.pop(name, None)
+            shutil.rmtree(self._shard_dir(name), ignore_errors=True)
+
+    def save_shard(self, name):
+        """
+        Egy shard mentése a saját könyvtárába.
+
+        Args:
+            name (str): A shard neve.
+        """
+        shard_dir = self._shard_dir(name)
+        self.shard(name).save(shard_dir / SHARD_INDEX_FILE, shard_dir / SHARD_DOCS_FILE)
+
+    def save(self):
+        """Az összes shard mentése."""
+        for name in self.shard_names:
+            self.save_shard(name)
+
+    def saved_shards(self):
+        """A shard könyvtárban mentett shardok nevei."""
+        root = Path(self.config['dir'])
+        if not root.exists():
+            return []
+        return sorted(path.parent.name for path in root.glob(f'*/{SHARD_INDEX_FILE}'))
+
+    def load_shard(self, name):
+        """
+        Egy mentett shard (újra)betöltése; atomi cserével kerül a helyére.
+
+        Args:
+            name (str): A shard neve.
+
+        Raises:
+            FileNotFoundError: Ha a shard fájljai nem léteznek.
+        """
+        shard_dir = self._shard_dir(name)
+        shard = self._new_shard()
+        shard.load(shard_dir / SHARD_INDEX_FILE, shard_dir / SHARD_DOCS_FILE)
+        self._swap(name, shard)
+        return shard
+
+    def load(self):
+        """
+        Az összes mentett shard betöltése.
+
+        Raises:
+            FileNotFoundError: Ha nincs mentett shard.
+        """
+        names = self.saved_shards()
+        if not names:
+            raise FileNotFoundError(f"Nincs mentett shard: {self.config['dir']}")
+        for name in names:
+            self.load_shard(name)
+        logger.info("Shardok betöltve: %s (%d dokumentum)", ', '.join(names),
+                    len(self.documents))
+
+    # -- Inkrementális módosítás --
+
+    def update_shards(self, pages, docs):
+        """
+        Oldalak passage-einek cseréje és törlése shardonként, másolaton (copy-on-write).
+
+        Az érintett shard mentett állapota egy új Embedder példányba töltődik,
+        a módosítások ebben történnek, majd mentés után a load_shard atomi
+        cserével teszi a helyére. A folyamatban lévő keresések addig a régi,
+        változatlan példányt (indexet és dokumentumokat együtt) használják.
+
+        Args:
+            pages (list): A cserélendő vagy törlendő oldalak (oldal dict-ek vagy címek);
+                összes korábbi passage-ük törlődik.
+            docs (list): Az új passage-ek.
+
+        Returns:
+            list: A módosított shardok nevei.
+        """
+        pages = list(pages)
+        parts = self.partition(docs)
+        affected = set(parts) | {name for name, shard in self._snapshot()
+                                 if shard.ids_for_pages(pages)}
+        saved = set(self.saved_shards())
+        for name in sorted(affected):
+            if name not in saved:
+                if name in parts:
+                    self.build_shard(name, parts[name])
+                    self.save_shard(name)
+                continue
+
+            shard_dir = self._shard_dir(name)
+            shard = self._new_shard()
+            shard.load(shard_dir / SHARD_INDEX_FILE, shard_dir / SHARD_DOCS_FILE)
+            current = shard.vector_store.path.name if shard.vector_store is not None else None
+            vectors_file = (SHARD_VECTORS_ALT_FILE if current == SHARD_VECTORS_FILE
+                            else SHARD_VECTORS_FILE)
+            shard.relocate(shard_dir / vectors_file)
+            shard.remove(shard.ids_for_pages(pages))
+            shard.upsert(parts.get(name, []))
+            shard.save(shard_dir / SHARD_INDEX_FILE, shard_dir / SHARD_DOCS_FILE)
+            self.load_shard(name)
+            logger.info("Shard frissítve: %s", name)
+        return sorted(affected)
+
+    def upsert(self, docs):
+        """
+        Dokumentumok beszúrása vagy cseréje a megfelelő shardokban.
+
+        Args:
+            docs (list): Az érintett oldalak összes dokumentuma.
+
+        Returns:
+            int: A beágyazott dokumentumok száma.
+        """
+        count = 0
+        for name, part in sorted(self.partition(docs).items()):
+            with self._lock:
+                shard = self._shards.get(name)
+                if shard is None:
+                    shard = self._shards[name] = self._new_shard()
+            count += shard.upsert(part)
+        return count
+
+    def remove(self, ids):
+        """
+        Dokumentumok törlése az összes shardból azonosító szerint.
+
+        Returns:
+            int: A ténylegesen törölt dokumentumok száma.
+        """
+        ids = list(ids)
+        return sum(shard.remove(ids) for _, shard in self._snapshot())
+
+    def ids_for_pages(self, pages):
+        """Az adott oldalakhoz tartozó dokumentumazonosítók az összes shardból."""
+        pages = list(pages)
+        return [id_ for _, shard in self._snapshot() for id_ in shard.ids_for_pages(pages)]
+
+    def titles(self):
+        """Az összes shard oldalcímei rendezve."""
+        return sorted({title for _, shard in self._snapshot() for title in shard.titles()})
+
+    def page_documents(self, title, limit=None):
+        """Egy oldal passage-ei sorrendben (lásd Embedder.page_documents)."""
+        for _, shard in self._snapshot():
+            docs = shard.page_documents(title, limit)
+            if docs:
+                return docs
+        return []
+
+    # -- Keresés --
+
+    def _pool(self, shard_count):
+        """A scatter-gather szálkészlet (első használatkor létrehozva)."""
+        with self._executor_lock:
+            if self._executor is None:
+                workers = self.config['workers'] or max(shard_count, 1)
+                self._executor = ThreadPoolExecutor(max_workers=workers,
+                                                    thread_name_prefix='shard-search')
+            return self._executor
+
+    def search(self, question, top_k=3, min_score=None, max_per_page=0, mmr_lambda=None,
+               filters=None):
+        """
+        Pontozott keresés az összes shardon párhuzamosan (lásd Embedder.search).
+
+        A kérdés egyszer kódolódik; minden shard a küszöbbel és szűrővel
+        visszakeresett jelöltjeit adja vissza, amelyek a koszinusz-pontszám
+        szerint egyesülnek. Az oldalkorlát és az MMR az egyesített listán,
+        a shardok tárolt vektoraival érvényesül.
+
+        Returns:
+            list: SearchResult objektumok helyezés szerint.
+        """
+        shards = [(name, shard) for name, shard in self._snapshot() if shard.index.ntotal]
+        if not shards:
+            return []
+
+        fetch = top_k
+        if max_per_page or mmr_lambda is not None:
+            fetch = top_k * OVERFETCH_FACTOR
+        query_vector = self._encoder._encode_query(question)
+        pool = self._pool(len(shards))
+        futures = [(shard, pool.submit(shard.search, question, fetch, min_score=min_score,
+                                       max_per_page=max_per_page, filters=filters,
+                                       query_vector=query_vector))
+                   for _, shard in shards]
+        candidates = [(shard, result) for shard, future in futures for result in future.result()]
+        candidates.sort(key=lambda item: item[1].score, reverse=True)
+        if not candidates:
+            return []
+
+        scores = np.array([result.score for _, result in candidates], dtype='float32')
+        pages = [page_key(result.document) for _, result in candidates]
+        vectors = None
+        if mmr_lambda is not None:
+            vectors = np.vstack([shard._stored_vectors([result.doc_id])
+                                 for shard, result in candidates])
+            vectors = normalize_rows(vectors)
+        selected = select_results(scores, vectors, pages, top_k, max_per_page=max_per_page,
+                                  mmr_lambda=mmr_lambda)
+
+        results = [SearchResult(doc_id=candidates[position][1].doc_id,
+                                score=candidates[position][1].score, rank=rank,
+                                document=candidates[position][1].document)
+                   for rank, position in enumerate(selected, start=1)]
+        logger.debug("Shardolt keresés: %d shard, %d jelölt, %d találat",
+                     len(shards), len(candidates), len(results))
+        return results
+
+    def query(self, question, top_k=3, filters=None):
+        """
+        Keresés az összes shardon (lásd Embedder.query).
+
+        Returns:
+            list: A legközelebbi dokumentumok listája, üres lista hiba esetén.
+        """
+        try:
+            results = self.search(question, top_k,
+                                  min_score=self.search_config['min_score'],
+                                  max_per_page=self.search_config['max_per_page'],
+                                  mmr_lambda=self.search_config['mmr_lambda'],
+                                  filters=filters)
+            logger.info("Shardolt keresés befejezve - %d találat", len(results))
+            return [result.document for result in results]
+        except Exception as error:
+            logger.error("Hiba shardolt keresés közben: %s", error)
+            return []
+
+    def close(self):
+        """A keresési szálkészlet leállítása."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -164,6 +164,24 @@ def test_api_ask_success(mock_rag, client):
     assert json_data['status'] == "success"
 
 
+def test_api_ask_filters(mock_rag, client):
+    """Metaadat szűrős API kérdés tesztelése"""
+    mock_rag.process_question.return_value = "Szűrt válasz"
+
+    response = client.post('/api/ask',
+                          json={'question': 'Kérdés', 'filters': {'category': 'Python'}},
+                          content_type='application/json')
+    assert response.status_code == 200
+    mock_rag.process_question.assert_called_once_with('Kérdés',
+                                                      filters={'category': ('Python',)})
+
+    response = client.post('/api/ask',
+                          json={'question': 'Kérdés', 'filters': {'szerző': 'X'}},
+                          content_type='application/json')
+    assert response.status_code == 400
+    assert 'Ismeretlen szűrőmező' in response.get_json()['error']
+
+
 def test_api_ask_missing_question(mock_rag, client):
     """Hiányzó kérdés API kérés tesztelése"""
     response = client.post('/api/ask', 
@@ -240,6 +258,28 @@ def test_api_ask_uninitialized_rag(client):
         mock_rag.initialize.assert_called_once()
 
 
+# ============================================================================
+# SUGGEST ENDPOINT TESZTEK
+# ============================================================================
+
+def test_api_suggest(mock_rag, client):
+    """Címjavaslat végpont tesztelése"""
+    mock_rag.suggest_titles.return_value = ["Madrid", "Madridi Királyi Palota"]
+
+    response = client.get('/api/suggest?q=madr&limit=5')
+    assert response.status_code == 200
+    assert response.get_json()['suggestions'] == ["Madrid", "Madridi Királyi Palota"]
+    mock_rag.suggest_titles.assert_called_once_with('madr', 5)
+
+
+def test_api_suggest_empty_prefix(mock_rag, client):
+    """Üres előtag tesztelése"""
+    response = client.get('/api/suggest?q=')
+    assert response.status_code == 200
+    assert response.get_json()['suggestions'] == []
+    mock_rag.suggest_titles.assert_not_called()
+
+
 # ============================================================================
 # REFRESH ENDPOINT TESZTEK
 # ============================================================================
@@ -521,7 +561,7 @@ def test_very_long_question(mock_rag, client):
                           content_type='application/json')
     
     assert response.status_code == 200
-    mock_rag.process_question.assert_called_once_with(expected_question)
+    mock_rag.process_question.assert_called_once_with(expected_question, filters=None)
 
 
 def test_special_characters_question(mock_rag, client):
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:40:16 2026
+
+@author: zsolt
+"""
+
+import pytest
+from bm25 import BM25Index, tokenize, reciprocal_rank_fusion, load_retrieval_config
+
+
+@pytest.fixture
+def docs():
+    return [
+        {'id': 1, 'text': 'Petőfi Sándor 1823-ban született Kiskőrösön.'},
+        {'id': 2, 'text': 'A szabadságharc 1848-ban kezdődött.'},
+        {'id': 3, 'text': 'Az ISO-8859-2 kódolás a közép-európai nyelvekhez készült.'},
+        {'id': 4, 'text': 'A kutya ugat, a macska alszik, a kutya fut.'},
+    ]
+
+
+@pytest.fixture
+def index(docs):
+    index = BM25Index()
+    index.add(docs)
+    return index
+
+
+def test_tokenize():
+    assert tokenize('Petőfi SÁNDOR, 1848-ban!') == ['petőfi', 'sándor', '1848', 'ban']
+
+
+def test_exact_matches(index):
+    assert index.search('Mikor született Petőfi?', top_k=1)[0][0] == 1
+    assert index.search('1848', top_k=1)[0][0] == 2
+    assert index.search('ISO-8859-2', top_k=1)[0][0] == 3
+    assert index.search('zsiráf') == []
+
+
+def test_term_frequency_raises_score(index):
+    index.add([{'id': 5, 'text': 'A kutya egy háziállat, a macska is.'}])
+    ids = [doc_id for doc_id, _ in index.search('kutya')]
+    assert ids == [4, 5]
+
+
+def test_remove_and_replace(index):
+    index.remove([2])
+    assert index.search('1848') == []
+    assert 2 not in index and len(index) == 3
+
+    index.add([{'id': 1, 'text': 'Arany János Nagyszalontán született.'}])
+    assert index.search('Petőfi') == []
+    assert index.search('Arany')[0][0] == 1
+    assert len(index) == 3
+
+
+def test_save_and_load(index, tmp_path):
+    index.remove([4])
+    index.save(tmp_path / 'index.bm25.json')
+    loaded = BM25Index.load(tmp_path / 'index.bm25.json')
+
+    assert len(loaded) == 3
+    assert loaded.search('kutya') == []
+    assert loaded.search('Petőfi') == index.search('Petőfi')
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4]], k=60)
+    assert [doc_id for doc_id, _ in fused] == [3, 1, 2, 4]
+    assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_load_retrieval_config(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[retrieval]\nmode = Hybrid\nrrf_k = 0\ncandidates = 20\n',
+                           encoding='utf-8')
+    assert load_retrieval_config(config_file) == {'mode': 'hybrid', 'rrf_k': 60,
+                                                  'candidates': 20}
+    assert load_retrieval_config(tmp_path / 'nincs.ini')['mode'] == 'dense'
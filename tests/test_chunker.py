@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:48:02 2026
+
+@author: zsolt
+"""
+
+import pytest
+from chunker import (split_sections, chunk_text, chunk_documents,
+                     load_chunking_config, DEFAULT_MAX_WORDS, DEFAULT_OVERLAP)
+
+
+WIKITEXT = """'''Madrid''' Spanyolország fővárosa.
+
+== Történelem ==
+A város a 9. században alakult ki.
+
+=== Középkor ===
+Mór erődítmény volt.
+
+== Földrajz ==
+
+"""
+
+
+def test_split_sections():
+    sections = split_sections(WIKITEXT)
+    assert [title for title, _ in sections] == ['', 'Történelem', 'Középkor']
+    assert sections[0][1].startswith("'''Madrid'''")
+    assert sections[2][1] == 'Mór erődítmény volt.'
+
+
+def test_split_sections_without_headings():
+    assert split_sections('Csak egy bekezdés.') == [('', 'Csak egy bekezdés.')]
+    assert split_sections('   ') == []
+
+
+def test_chunk_text_short_text_is_single_chunk():
+    assert chunk_text('egy kettő három', max_words=5, overlap=1) == ['egy kettő három']
+
+
+def test_chunk_text_overlap():
+    text = ' '.join(str(i) for i in range(10))
+    chunks = chunk_text(text, max_words=4, overlap=2)
+    assert chunks == ['0 1 2 3', '2 3 4 5', '4 5 6 7', '6 7 8 9']
+
+
+def test_chunk_text_keeps_line_breaks():
+    chunks = chunk_text('első sor\nmásodik sor', max_words=10, overlap=0)
+    assert chunks == ['első sor\nmásodik sor']
+
+
+def test_chunk_text_invalid_arguments():
+    with pytest.raises(ValueError):
+        chunk_text('szöveg', max_words=0)
+    with pytest.raises(ValueError):
+        chunk_text('szöveg', max_words=3, overlap=3)
+
+
+def test_chunk_documents_back_pointers():
+    docs = [{'title': 'Madrid', 'text': WIKITEXT, 'pageid': 42}]
+    passages = chunk_documents(docs, max_words=50, overlap=5)
+
+    assert len(passages) == 3
+    assert all(p['title'] == 'Madrid' and p['pageid'] == 42 for p in passages)
+    assert [p['section'] for p in passages] == ['', 'Történelem', 'Középkor']
+    assert [p['chunk'] for p in passages] == [0, 1, 2]
+
+
+def test_chunk_documents_empty_text():
+    assert chunk_documents([{'title': 'Üres', 'text': ''}, {'title': 'Nincs'}]) == []
+
+
+def test_load_chunking_config(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[chunking]\nmax_words = 80\noverlap = 10\n', encoding='utf-8')
+    assert load_chunking_config(config_file) == {'max_words': 80, 'overlap': 10}
+
+
+def test_load_chunking_config_defaults_and_invalid(tmp_path):
+    assert load_chunking_config(tmp_path / 'nincs.ini') == {
+        'max_words': DEFAULT_MAX_WORDS, 'overlap': DEFAULT_OVERLAP}
+
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[chunking]\nmax_words = 20\noverlap = 25\n', encoding='utf-8')
+    settings = load_chunking_config(config_file)
+    assert settings['max_words'] == 20
+    assert settings['overlap'] < 20
+
+
+def test_load_chunking_config_ignores_old_max_tokens(tmp_path, caplog):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[chunking]\nmax_tokens = 150\n', encoding='utf-8')
+    assert load_chunking_config(config_file) == {
+        'max_words': DEFAULT_MAX_WORDS, 'overlap': DEFAULT_OVERLAP}
+    assert 'max_tokens' in caplog.text
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:58:46 2026
+
+@author: zsolt
+"""
+
+import json
+import pytest
+from dedup import MinHasher, deduplicate, lsh_bands, load_dedup_config, save_report
+
+TEXT = ("Madrid Spanyolország fővárosa és legnépesebb városa, a Manzanares folyó "
+        "partján fekszik az Ibériai-félsziget közepén. A város az ország politikai, "
+        "gazdasági és kulturális központja, itt található a királyi palota, a Prado "
+        "múzeum és számos egyetem. A városban a nyár forró és száraz, a tél hűvös.")
+
+
+@pytest.fixture
+def passages():
+    return [
+        {'title': 'Madrid', 'section': 'Bevezető', 'text': TEXT},
+        {'title': 'Barcelona', 'section': 'Bevezető',
+         'text': 'Barcelona Katalónia fővárosa a Földközi-tenger partján.'},
+        {'title': 'Madrid (város)', 'section': 'Bevezető', 'text': TEXT + ' Forrás: wiki.'},
+        {'title': 'Üres', 'text': ''},
+        {'title': 'Madrid/Másolat', 'section': 'Bevezető', 'text': TEXT.upper()},
+    ]
+
+
+def test_signature_similarity():
+    hasher = MinHasher(num_perm=128)
+    first, second = hasher.signature(TEXT), hasher.signature(TEXT + ' Forrás: wiki.')
+    assert first.shape == (128,)
+    assert (first == hasher.signature(TEXT.lower())).all()
+    assert 0.8 < (first == second).mean() < 1
+    assert (first == hasher.signature('Barcelona Katalónia fővárosa.')).mean() < 0.2
+    assert hasher.signature('  ') is None
+
+
+def test_lsh_bands():
+    assert lsh_bands(128, 0.85) == (16, 8)
+    bands, rows = lsh_bands(128, 0.5)
+    assert bands * rows == 128 and (1 / bands) ** (1 / rows) <= 0.5
+
+
+def test_deduplicate(passages):
+    kept, report = deduplicate(passages, threshold=0.85)
+    assert [passage['title'] for passage in kept] == ['Madrid', 'Barcelona', 'Üres']
+    assert kept[0]['titles'] == ['Madrid', 'Madrid (város)', 'Madrid/Másolat']
+    assert 'titles' not in kept[1]
+    assert 'titles' not in passages[0]
+    assert report['input'] == 5 and report['kept'] == 3 and report['removed'] == 2
+    assert report['largest'][0]['duplicates'] == 2
+
+
+def test_deduplicate_threshold(passages):
+    kept, report = deduplicate(passages, threshold=1.0)
+    assert len(kept) == 4
+    assert kept[0]['titles'] == ['Madrid', 'Madrid/Másolat']
+
+
+def test_load_dedup_config_and_report(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text("[dedup]\nenabled = true\nthreshold = 1.5\n"
+                           f"report = {tmp_path / 'dedup.json'}\n")
+    config = load_dedup_config(config_file)
+    assert config['enabled'] is True and config['threshold'] == 0.85
+    assert load_dedup_config(tmp_path / 'nincs.ini')['enabled'] is False
+
+    save_report({'input': 2, 'kept': 1}, config['report'])
+    assert json.loads(config['report'].read_text()) == {'input': 2, 'kept': 1}
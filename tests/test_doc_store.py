@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:47:03 2026
+
+@author: zsolt
+"""
+
+import pytest
+from doc_store import DocStore, DocStoreWriter, offsets_path
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = tmp_path / 'passages.jsonl'
+    with DocStoreWriter(path) as writer:
+        writer.write({'id': 30, 'title': 'Madrid', 'text': 'Főváros.'})
+        writer.write({'id': 10, 'title': 'Sevilla', 'text': 'Andalúzia.'})
+        writer.write({'id': 20, 'title': 'Zaragoza', 'text': 'Aragónia.'})
+    return path
+
+
+def test_writer_creates_offsets(store_path):
+    assert offsets_path(store_path).name == 'passages.offsets.npy'
+    assert offsets_path(store_path).exists()
+
+
+def test_get_by_id(store_path):
+    store = DocStore(store_path)
+    assert len(store) == 3
+    assert store.get(20)['title'] == 'Zaragoza'
+    assert store.get(30)['text'] == 'Főváros.'
+    assert store.get(99) is None
+    assert 10 in store
+    assert 11 not in store
+    assert store.ids().tolist() == [10, 20, 30]
+    store.close()
+
+
+def test_iteration_keeps_file_order(store_path):
+    store = DocStore(store_path)
+    assert [doc['title'] for doc in store] == ['Madrid', 'Sevilla', 'Zaragoza']
+    store.close()
+
+
+def test_empty_store(tmp_path):
+    path = tmp_path / 'ures.jsonl'
+    DocStoreWriter(path).close()
+    store = DocStore(path)
+    assert len(store) == 0
+    assert store.get(1) is None
+    store.close()
+
+
+def test_missing_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DocStore(tmp_path / 'nincs.jsonl')
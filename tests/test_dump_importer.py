@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:02:15 2026
+
+@author: zsolt
+"""
+
+import bz2
+import gzip
+import json
+import pytest
+
+import dump_importer
+
+
+def page_xml(pageid, title, text, ns=0, redirect=None, revisions=1):
+    """Egy <page> elem a MediaWiki export formátumában."""
+    redirect_xml = f'<redirect title="{redirect}" />' if redirect else ''
+    revision_xml = ''.join(
+        f"<revision><id>{pageid * 100 + number}</id><contributor><username>Teszt</username>"
+        f"<id>7</id></contributor><text bytes=\"{len(text)}\" xml:space=\"preserve\">"
+        f"{text if number == revisions - 1 else 'régi változat'}</text></revision>"
+        for number in range(revisions))
+    return (f"<page><title>{title}</title><ns>{ns}</ns><id>{pageid}</id>"
+            f"{redirect_xml}{revision_xml}</page>")
+
+
+DUMP = (
+    '<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" xml:lang="hu">'
+    '<siteinfo><sitename>Wikipédia</sitename>'
+    '<base>https://hu.wikipedia.org/wiki/Kezdőlap</base>'
+    '<namespaces><namespace key="0" case="first-letter" />'
+    '<namespace key="14" case="first-letter">Kategória</namespace></namespaces></siteinfo>'
+    + page_xml(1, 'Sevilla', 'Sevilla Andalúzia fővárosa. [[Kategória:Spanyol városok|Sevilla]]')
+    + page_xml(2, 'Madrid', 'Madrid Spanyolország fővárosa. [[Kategória:Fővárosok]] '
+                            '[[Category:Spanyol városok]]', revisions=2)
+    + page_xml(3, 'Andalúzia fővárosa', '#ÁTIRÁNYÍTÁS [[Sevilla]]', redirect='Sevilla')
+    + page_xml(4, 'Kategória:Fővárosok', 'Fővárosok listája.', ns=14)
+    + page_xml(5, 'Madridi metró', 'A madridi metró.')
+    + page_xml(6, 'Üres', '')
+    + page_xml(7, 'Madridi Atlético', 'Labdarúgócsapat.')
+    + '</mediawiki>'
+)
+
+
+@pytest.fixture
+def dump(tmp_path):
+    path = tmp_path / 'huwiki-pages-articles.xml'
+    path.write_text(DUMP, encoding='utf-8')
+    return path
+
+
+def read_output(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def test_iter_pages(dump):
+    siteinfo = {}
+    pages = list(dump_importer.iter_pages(dump, siteinfo))
+
+    assert siteinfo['base'] == 'https://hu.wikipedia.org/wiki/Kezdőlap'
+    assert siteinfo['namespaces'][14] == 'Kategória'
+    assert [page['title'] for page in pages][:3] == ['Sevilla', 'Madrid', 'Andalúzia fővárosa']
+    # Több revízió esetén az utolsó tartalma és azonosítója
+    assert pages[1]['text'].startswith('Madrid Spanyolország')
+    assert pages[1]['pageid'] == 2 and pages[1]['revid'] == 201
+    assert pages[2]['redirect'] == 'Sevilla'
+    assert pages[3]['namespace'] == 14
+
+
+@pytest.mark.parametrize('compress', [bz2.compress, gzip.compress])
+def test_compressed_dump(dump, tmp_path, compress):
+    compressed = tmp_path / 'dump.xml.packed'
+    compressed.write_bytes(compress(dump.read_bytes()))
+
+    assert list(dump_importer.iter_pages(compressed)) == list(dump_importer.iter_pages(dump))
+
+
+def test_import_whole_wiki(dump, tmp_path):
+    output = tmp_path / 'data' / 'wiki_pages.json'
+    stats = dump_importer.import_dump(dump, output, limit=3)
+
+    docs = read_output(output)
+    # Átirányítás, más névtér és üres oldal kimarad; a limit érvényes
+    assert [doc['title'] for doc in docs] == ['Sevilla', 'Madrid', 'Madridi metró']
+    assert docs[0] == {
+        'title': 'Sevilla',
+        'text': 'Sevilla Andalúzia fővárosa. [[Kategória:Spanyol városok|Sevilla]]',
+        'pageid': 1, 'revid': 100, 'namespace': 0,
+        'categories': ['Spanyol városok'], 'source': 'hu.wikipedia.org',
+    }
+    assert docs[1]['categories'] == ['Fővárosok', 'Spanyol városok']
+    assert stats['imported'] == 3 and stats['scanned'] == 5
+    assert stats['pages_per_sec'] > 0
+    assert not (tmp_path / 'data' / 'wiki_pages.json.tmp').exists()
+
+
+def test_import_selected_and_related(dump, tmp_path):
+    output = tmp_path / 'wiki_pages.json'
+    stats = dump_importer.import_dump(
+        dump, output, selected=['Kategória:Fővárosok', 'Andalúzia fővárosa', 'Toledo'],
+        related_root='Madrid', related_limit=2, limit=10, source='example.org')
+
+    docs = read_output(output)
+    # A kiválasztott oldalak a kért sorrendben (az átirányítás célja a kért címen),
+    # majd a kapcsolódó oldalak a related_limit-ig
+    assert [doc['title'] for doc in docs] == [
+        'Kategória:Fővárosok', 'Andalúzia fővárosa', 'Madrid', 'Madridi metró']
+    assert docs[1]['text'].startswith('Sevilla Andalúzia') and docs[1]['pageid'] == 1
+    assert {doc['source'] for doc in docs} == {'example.org'}
+    assert stats['missing'] == ['Toledo']
+
+
+def test_import_dump_from_config(dump, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'wiki_rag.ini').write_text(
+        f"[wiki]\nurl = hu.wikipedia.org\nlimit = 10\n\n"
+        f"[dump]\npath = {dump}\nnamespaces = 0, 14\n", encoding='utf-8')
+
+    assert dump_importer.load_dump_config('wiki_rag.ini') == {'path': dump, 'namespaces': (0, 14)}
+    stats = dump_importer.import_dump_from_config('wiki_rag.ini')
+
+    docs = read_output(dump_importer.DEFAULT_OUTPUT)
+    assert stats['imported'] == 5
+    assert 'Kategória:Fővárosok' in [doc['title'] for doc in docs]
+
+
+def test_import_dump_from_config_without_path(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text("[wiki]\nurl = hu.wikipedia.org\n", encoding='utf-8')
+    assert dump_importer.import_dump_from_config(config_file) is None
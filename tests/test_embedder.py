@@ -11,7 +11,10 @@ import json
 import numpy as np
 from pathlib import Path
 from unittest import mock
-from embedder import Embedder
+import embedder as embedder_module
+from embedder import Embedder, doc_id, page_key, stable_id
+from index_factory import load_index_config, base_index
+from doc_store import DocStore
 
 
 @pytest.fixture
@@ -82,9 +85,395 @@ def test_query_invalid_document_index(embedder_instance):
     # FAISS indexbe manuálisan rakjunk plusz vektort, ami nem tartozik dokumentumhoz
     index_dim = embedder_instance.index.d
     extra_vector = np.random.rand(1, index_dim).astype('float32')
-    embedder_instance.index.add(extra_vector)
+    embedder_instance.index.add_with_ids(extra_vector, np.array([12345], dtype='int64'))
 
     # Most 2 vektor van, de csak 1 dokumentum
     results = embedder_instance.query('keresés')
     assert isinstance(results, list)
     assert len(results) >= 1  # Legalább az első valid találat
+
+
+def test_index_type_persisted(tmp_path, dummy_docs):
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config={**load_index_config(tmp_path / 'nincs.ini'),
+                                      'type': 'hnsw', 'ef_search': 40})
+    embedder.build_index(dummy_docs)
+    assert embedder.index_type == 'hnsw'
+
+    index_path = tmp_path / 'index.faiss'
+    embedder.save(index_path, tmp_path / 'docs.json')
+    assert (tmp_path / 'index.meta.json').exists()
+
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2')
+    new_embedder.load(index_path, tmp_path / 'docs.json')
+    assert new_embedder.index_type == 'hnsw'
+    assert base_index(new_embedder.index).hnsw.efSearch == 40
+
+
+def test_documents_have_stable_ids(embedder_instance):
+    docs = [{'title': 'Madrid', 'chunk': 0, 'text': 'Madrid Spanyolország fővárosa.'}]
+    embedder_instance.build_index(docs)
+    assert embedder_instance.documents[0]['id'] == doc_id(docs[0])
+    assert 'id' not in docs[0]
+
+
+def test_upsert_replaces_page_passages(embedder_instance):
+    embedder_instance.build_index([
+        {'title': 'Madrid', 'chunk': 0, 'text': 'Madrid Spanyolország fővárosa.'},
+        {'title': 'Madrid', 'chunk': 1, 'text': 'Madrid lakossága nagy.'},
+        {'title': 'Sevilla', 'chunk': 0, 'text': 'Sevilla Andalúzia székhelye.'},
+    ])
+
+    embedded = embedder_instance.upsert([
+        {'title': 'Madrid', 'chunk': 0, 'text': 'Madrid a Manzanares partján fekszik.'},
+    ])
+
+    assert embedded == 1
+    assert embedder_instance.index.ntotal == 2
+    assert sorted(doc['title'] for doc in embedder_instance.documents) == ['Madrid', 'Sevilla']
+    results = embedder_instance.query('Manzanares', top_k=2)
+    assert all(doc['text'] != 'Madrid lakossága nagy.' for doc in results)
+
+
+def test_remove_by_page(embedder_instance, dummy_docs):
+    docs = [dict(doc, title=f'Oldal {i}') for i, doc in enumerate(dummy_docs)]
+    embedder_instance.build_index(docs)
+
+    removed = embedder_instance.remove(embedder_instance.ids_for_pages(['Oldal 0']))
+
+    assert removed == 1
+    assert embedder_instance.index.ntotal == 2
+    results = embedder_instance.query('kutya ugat', top_k=3)
+    assert all(doc['title'] != 'Oldal 0' for doc in results)
+
+
+@pytest.mark.parametrize('index_type', ['ivf', 'ivfpq'])
+def test_upsert_and_remove_ivf(tmp_path, index_type):
+    docs = [{'title': f'Oldal {i}', 'categories': ['Páros' if i % 2 else 'Páratlan'],
+             'text': f'{i}. oldal: a kutya ugat, szó{i} szó{i * 3}.'} for i in range(80)]
+    config = {**load_index_config(tmp_path / 'nincs.ini'), 'type': index_type,
+              'nlist': 2, 'nprobe': 2, 'pq_m': 8, 'pq_nbits': 4}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config=config)
+    embedder.build_index(docs)
+    assert embedder.index_type == index_type
+
+    embedder.remove(embedder.ids_for_pages([f'Oldal {i}' for i in range(0, 40, 3)]))
+    embedder.upsert([{'title': 'Oldal 5', 'categories': ['Páros'], 'text': 'Frissített szöveg.'}])
+
+    # Minden találat a saját dokumentumára mutat, törölt oldal nem jelenik meg
+    for i in (41, 62, 79):
+        results = embedder.query(docs[i]['text'], top_k=1)
+        assert results[0]['title'] == f'Oldal {i}'
+    assert embedder.query('Frissített szöveg.', top_k=1)[0]['text'] == 'Frissített szöveg.'
+    results = embedder.search('kutya ugat', top_k=5, mmr_lambda=0.5)
+    assert len(results) == 5
+    results = embedder.query('kutya ugat', top_k=50, filters={'category': 'Páros'})
+    assert results and all(doc['categories'] == ['Páros'] for doc in results)
+    assert not {doc['title'] for doc in results} & {f'Oldal {i}' for i in range(3, 40, 6)}
+
+
+def test_hnsw_upsert_hides_old_vectors(tmp_path, dummy_docs):
+    docs = [dict(doc, title=f'Oldal {i}') for i, doc in enumerate(dummy_docs)]
+    config = {**load_index_config(tmp_path / 'nincs.ini'), 'type': 'hnsw'}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config=config)
+    embedder.build_index(docs)
+    embedder.upsert([{'title': 'Oldal 0', 'text': 'A hal úszik a vízben.'}])
+
+    def check(instance):
+        # A régi szöveg vektora törölt, az azonosító csak egyszer szerepel
+        results = instance.search('A kutya ugat a holdra.', top_k=4)
+        assert results[0].document['title'] != 'Oldal 0'
+        assert len({result.doc_id for result in results}) == len(results) == 3
+
+    check(embedder)
+    embedder.save(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                            index_config=config)
+    new_embedder.load(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    check(new_embedder)
+
+
+def test_stable_id_is_deterministic():
+    assert stable_id('title:Madrid') == stable_id('title:Madrid')
+    assert 0 <= stable_id('title:Madrid') < 2 ** 63
+    assert doc_id({'title': 'Madrid', 'chunk': 0}) != doc_id({'title': 'Madrid', 'chunk': 1})
+    assert page_key({'title': 'Madrid', 'pageid': 7}) == 'pageid:7'
+
+
+def test_build_index_uses_embedding_cache(tmp_path, dummy_docs):
+    cache_config = {'embeddings': True, 'dir': tmp_path / 'cache'}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        cache_config=cache_config)
+    embedder.build_index(dummy_docs)
+
+    with mock.patch.object(embedder.model, 'encode', wraps=embedder.model.encode) as encode:
+        embedder.build_index(dummy_docs + [{'text': 'Új dokumentum.'}])
+
+    encode.assert_called_once()
+    assert encode.call_args[0][0] == ['Új dokumentum.']
+    assert embedder.index.ntotal == len(dummy_docs) + 1
+
+
+def test_query_uses_query_cache(embedder_instance, dummy_docs):
+    embedder_instance.build_index(dummy_docs)
+    first = embedder_instance.query('Mit csinál a kutya?', top_k=1)
+
+    with mock.patch.object(embedder_instance.model, 'encode') as encode:
+        second = embedder_instance.query('mit csinál a kutya', top_k=1)
+
+    encode.assert_not_called()
+    assert first == second
+    assert embedder_instance.query_cache.stats()['hits'] == 1
+
+
+def test_build_index_stream(tmp_path, embedder_instance, dummy_docs):
+    docs_path = tmp_path / 'passages.jsonl'
+    count = embedder_instance.build_index_stream(
+        (doc for doc in dummy_docs + [{'text': 'Negyedik.'}]), docs_path, batch_size=2)
+
+    assert count == 4
+    assert embedder_instance.index.ntotal == 4
+    assert len(embedder_instance.documents) == 4
+    results = embedder_instance.query('A kutya ugat a holdra.', top_k=1)
+    assert results[0]['text'] == 'A kutya ugat a holdra.'
+
+    index_path = tmp_path / 'index.faiss'
+    embedder_instance.save(index_path, tmp_path / 'docs.json')
+    assert not (tmp_path / 'docs.json').exists()
+
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2')
+    new_embedder.load(index_path, tmp_path / 'docs.json')
+    assert len(new_embedder.documents) == 4
+    assert new_embedder.query('Negyedik.', top_k=1)[0]['text'] == 'Negyedik.'
+
+
+def test_upsert_after_stream_build(tmp_path, embedder_instance):
+    embedder_instance.build_index_stream(
+        iter([{'title': 'Madrid', 'text': 'Madrid.'}]), tmp_path / 'passages.jsonl')
+    embedder_instance.upsert([{'title': 'Sevilla', 'text': 'Sevilla.'}])
+
+    assert isinstance(embedder_instance.documents, list)
+    assert embedder_instance.index.ntotal == 2
+
+
+def test_embedders_share_encoder(embedder_instance):
+    other = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2')
+    assert other.model is embedder_instance.model
+
+
+def test_unavailable_backend_falls_back_to_torch():
+    config = {'backend': 'onnx', 'verify': False, 'min_cosine': 0.98}
+    real_get_encoder = embedder_module.get_encoder
+
+    def get_encoder(model_name, backend='torch'):
+        if backend == 'onnx':
+            raise ImportError('optimum hiányzik')
+        return real_get_encoder(model_name, backend)
+
+    with mock.patch('embedder.get_encoder', side_effect=get_encoder):
+        embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                            encoder_config=config)
+    assert embedder.backend == 'torch'
+
+
+def test_verify_backend_report(embedder_instance, dummy_docs):
+    embedder_instance.backend = 'int8'
+    embedder_instance.encoder_config = {'backend': 'int8', 'verify': True, 'min_cosine': 0.98}
+    report = {'backend': 'int8', 'mean_cosine': 0.999, 'min_cosine': 0.998, 'speedup': 1.8}
+    with mock.patch('embedder.compare_backends', return_value=report) as compare:
+        embedder_instance.build_index(dummy_docs)
+
+    compare.assert_called_once()
+    assert compare.call_args.args[1] == [doc['text'] for doc in dummy_docs]
+    assert embedder_instance.backend_report == report
+
+
+@pytest.mark.parametrize('codec', ['fp16', 'sq8', 'binary'])
+def test_codec_with_rerank(tmp_path, dummy_docs, codec):
+    config = {**load_index_config(tmp_path / 'nincs.ini'), 'type': 'flat',
+              'codec': codec, 'rerank': 10}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config=config)
+    embedder.build_index(dummy_docs, vectors_path=tmp_path / 'vectors.f32')
+
+    assert embedder.codec == codec
+    assert embedder.codec_stats['bytes_per_vector'] < embedder.codec_stats['float32_bytes_per_vector']
+    # A pontos újrapontozás miatt a recall a flat indexével egyezik
+    assert embedder.codec_stats['recall_at_10'] == 1.0
+    assert embedder.query('Mit csinál a kutya?', top_k=1)[0]['text'] == dummy_docs[0]['text']
+
+    embedder.save(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                            index_config=config)
+    new_embedder.load(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    assert new_embedder.codec == codec
+    assert len(new_embedder.vector_store) == len(dummy_docs)
+    assert new_embedder.query('Mit csinál a kutya?', top_k=1)[0]['text'] == dummy_docs[0]['text']
+
+
+def test_rerank_after_remove(tmp_path, dummy_docs):
+    config = {**load_index_config(tmp_path / 'nincs.ini'), 'codec': 'sq8', 'rerank': 10}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config=config)
+    embedder.build_index(dummy_docs, vectors_path=tmp_path / 'vectors.f32')
+    embedder.remove([embedder.documents[0]['id']])
+
+    results = embedder.query('Mit csinál a kutya?', top_k=3)
+    assert len(results) == 2
+    assert dummy_docs[0]['text'] not in [doc['text'] for doc in results]
+
+
+def test_mmap_load(tmp_path, dummy_docs):
+    config = {**load_index_config(tmp_path / 'nincs.ini'), 'mmap': True, 'prefault': True}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config=config)
+    embedder.build_index(dummy_docs)
+    embedder.save(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    # mmap módban a dokumentumok lusta dokumentumtárba kerülnek
+    assert (tmp_path / 'docs.jsonl').exists()
+    assert not (tmp_path / 'docs.json').exists()
+
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                            index_config=config)
+    new_embedder.load(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    new_embedder._prefault_thread.join(timeout=10)
+    assert new_embedder.read_only
+    assert isinstance(new_embedder.documents, DocStore)
+    assert new_embedder.query('Mit csinál a kutya?', top_k=1)[0]['text'] == dummy_docs[0]['text']
+
+    # Az első módosítás előtt az index a heapre olvasódik
+    new_embedder.upsert([{'title': 'Új', 'text': 'A hal úszik a vízben.'}])
+    assert not new_embedder.read_only
+    assert new_embedder.index.ntotal == len(dummy_docs) + 1
+
+
+def test_hybrid_retrieval(tmp_path, dummy_docs):
+    retrieval = {'mode': 'hybrid', 'rrf_k': 60, 'candidates': 10}
+    docs = dummy_docs + [{'title': 'Kód', 'text': 'A XK-4711 termékkód egy gyári jelölés.'}]
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        retrieval_config=retrieval)
+    embedder.build_index(docs)
+    assert len(embedder.lexical_index) == len(docs)
+    assert embedder.query('XK-4711', top_k=1)[0]['title'] == 'Kód'
+
+    embedder.save(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    assert (tmp_path / 'index.bm25.json').exists()
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                            retrieval_config=retrieval)
+    new_embedder.load(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    assert len(new_embedder.lexical_index) == len(docs)
+
+    new_embedder.remove(new_embedder.ids_for_pages(['Kód']))
+    assert len(new_embedder.lexical_index) == len(dummy_docs)
+    assert all(doc.get('title') != 'Kód' for doc in new_embedder.query('XK-4711', top_k=3))
+
+
+def test_scored_search(dummy_docs):
+    docs = dummy_docs + [{'title': 'Kutya', 'chunk': i, 'text': f'A kutya ugat, {i}. rész.'}
+                         for i in range(3)]
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2')
+    embedder.build_index(docs)
+
+    results = embedder.search('A kutya ugat', top_k=4)
+    assert [result.rank for result in results] == [1, 2, 3, 4]
+    assert all(-1.0 <= result.score <= 1.0 for result in results)
+    assert results[0].doc_id == results[0].document['id']
+
+    capped = embedder.search('A kutya ugat', top_k=4, max_per_page=1)
+    assert sum(result.document.get('title') == 'Kutya' for result in capped) == 1
+
+    threshold = results[1].score
+    assert all(result.score >= threshold
+               for result in embedder.search('A kutya ugat', top_k=4, min_score=threshold))
+
+    diverse = embedder.search('A kutya ugat', top_k=2, mmr_lambda=0.3)
+    assert len(diverse) == 2
+    assert len({page_key(result.document) for result in diverse}) == 2
+
+
+def test_query_uses_search_config(dummy_docs):
+    docs = [{'title': 'Kutya', 'chunk': i, 'text': f'A kutya ugat, {i}. rész.'} for i in range(3)]
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        search_config={'min_score': None, 'max_per_page': 1, 'mmr_lambda': None})
+    embedder.build_index(dummy_docs + docs)
+    results = embedder.query('A kutya ugat', top_k=3)
+    assert sum(doc.get('title') == 'Kutya' for doc in results) == 1
+
+
+@pytest.mark.parametrize('index_type,codec', [('flat', 'none'), ('ivf', 'sq8'),
+                                              ('hnsw', 'none'), ('flat', 'pq'),
+                                              ('flat', 'binary')])
+def test_filtered_query(tmp_path, index_type, codec):
+    docs = [{'title': f'{"Python" if i % 2 else "Rust"}/{i}', 'namespace': 0,
+             'categories': ['Python' if i % 2 else 'Rust'], 'text': f'A kutya ugat, {i}. rész.'}
+            for i in range(64)]
+    config = {**load_index_config(tmp_path / 'nincs.ini'), 'type': index_type, 'codec': codec,
+              'nlist': 4, 'nprobe': 4, 'pq_m': 8, 'pq_nbits': 4}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config=config)
+    embedder.build_index(docs)
+
+    results = embedder.query('kutya', top_k=5, filters={'category': 'Rust'})
+    assert len(results) == 5
+    assert all(doc['categories'] == ['Rust'] for doc in results)
+    results = embedder.query('kutya', top_k=5, filters={'title_prefix': 'Python/'})
+    assert results and all(doc['title'].startswith('Python/') for doc in results)
+    assert embedder.query('kutya', filters={'category': 'Go'}) == []
+
+
+def test_filtered_query_after_update(tmp_path, dummy_docs):
+    docs = [dict(doc, title=f'Oldal {i}', categories=['Állat']) for i, doc in enumerate(dummy_docs)]
+    retrieval = {'mode': 'hybrid', 'rrf_k': 60, 'candidates': 10}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        retrieval_config=retrieval)
+    embedder.build_index(docs)
+    embedder.upsert([{'title': 'Hal', 'categories': ['Víz'], 'text': 'A hal úszik a vízben.'}])
+    assert [doc['title'] for doc in embedder.query('kutya', filters={'category': 'Víz'})] == ['Hal']
+
+    embedder.save(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    assert (tmp_path / 'index.fields.json').exists()
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                            retrieval_config=retrieval)
+    new_embedder.load(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    new_embedder.remove(new_embedder.ids_for_pages(['Oldal 0']))
+    results = new_embedder.query('A kutya ugat a holdra.', top_k=3, filters={'category': 'Állat'})
+    assert {doc['title'] for doc in results} == {'Oldal 1', 'Oldal 2'}
+
+
+def test_titles_and_page_documents():
+    docs = [{'title': 'Madrid', 'chunk': i, 'text': f'Madrid {i}. része.'} for i in (2, 0, 1)]
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2')
+    embedder.build_index(docs + [{'title': 'Barcelona', 'text': 'Barcelona.'}])
+    assert embedder.titles() == ['Barcelona', 'Madrid']
+    assert [doc['chunk'] for doc in embedder.page_documents('Madrid')] == [0, 1, 2]
+    assert len(embedder.page_documents('Madrid', limit=2)) == 2
+    assert embedder.page_documents('Sevilla') == []
+
+
+@pytest.mark.parametrize('reduction', ['pca', 'rr'])
+def test_dimensionality_reduction(tmp_path, reduction):
+    docs = [{'title': f'Oldal {i}', 'text': f'A kutya ugat, a macska alszik, {i}. rész {i * 7}.'}
+            for i in range(64)] + [{'title': 'Madár', 'text': 'A madarak repülnek az égen.'}]
+    config = {**load_index_config(tmp_path / 'nincs.ini'), 'type': 'flat',
+              'reduction': reduction, 'reduce_dim': 32}
+    embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                        index_config=config)
+    embedder.build_index(docs)
+
+    stats = embedder.codec_stats
+    assert (stats['reduction'], stats['dim']) == (reduction, 32)
+    assert stats['bytes_per_vector'] * 2 == stats['float32_bytes_per_vector']
+    assert stats['recall_at_10'] is not None
+    assert embedder.query('Hol repülnek a madarak?', top_k=1)[0]['title'] == 'Madár'
+
+    embedder.save(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    new_embedder = Embedder(embedding_model_name='paraphrase-multilingual-mpnet-base-v2',
+                            index_config=config)
+    new_embedder.load(tmp_path / 'index.faiss', tmp_path / 'docs.json')
+    assert new_embedder.codec_stats['dim'] == 32
+    assert new_embedder.query('Hol repülnek a madarak?', top_k=1)[0]['title'] == 'Madár'
+    results = new_embedder.search('Hol repülnek a madarak?', top_k=2,
+                                  filters={'title_prefix': 'Oldal'})
+    assert len(results) == 2 and all(-1 <= result.score <= 1 for result in results)
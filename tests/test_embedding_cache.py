@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:41:19 2026
+
+@author: zsolt
+"""
+
+import sqlite3
+import numpy as np
+from embedding_cache import (EmbeddingCache, QueryEmbeddingCache, load_cache_config,
+                             normalize_question, DEFAULT_CACHE_DIR, DEFAULT_QUERY_CACHE_SIZE,
+                             DEFAULT_QUERY_DISK_ROWS, DEFAULT_QUERY_DISK_DAYS)
+
+
+def test_lookup_and_store(tmp_path):
+    cache = EmbeddingCache('teszt-modell', 4, tmp_path)
+    vectors, missing = cache.lookup(['a', 'b'])
+    assert missing == [0, 1]
+    assert not vectors.any()
+
+    cache.store(['a', 'b'], np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype='float32'))
+    vectors, missing = cache.lookup(['b', 'c', 'a'])
+
+    assert missing == [1]
+    assert vectors[0].tolist() == [0, 1, 0, 0]
+    assert vectors[2].tolist() == [1, 0, 0, 0]
+    assert cache.hits == 2
+    assert cache.misses == 3
+
+
+def test_persistence_across_instances(tmp_path):
+    EmbeddingCache('teszt-modell', 3, tmp_path).store(
+        ['szöveg'], np.array([[0.5, 0.25, 1.0]], dtype='float32'))
+
+    cache = EmbeddingCache('teszt-modell', 3, tmp_path)
+    vectors, missing = cache.lookup(['szöveg'])
+    assert len(cache) == 1
+    assert missing == []
+    assert vectors[0].tolist() == [0.5, 0.25, 1.0]
+
+
+def test_instances_share_directory(tmp_path):
+    first = EmbeddingCache('teszt-modell', 2, tmp_path)
+    second = EmbeddingCache('teszt-modell', 2, tmp_path)
+    first.store(['x'], np.array([[1, 1]], dtype='float32'))
+    second.store(['y'], np.array([[2, 2]], dtype='float32'))
+    first.store(['z', 'y'], np.array([[3, 3], [4, 4]], dtype='float32'))
+
+    vectors, missing = second.lookup(['y', 'x', 'z'])
+    assert missing == []
+    assert vectors.tolist() == [[2, 2], [1, 1], [3, 3]]
+    assert (first.directory / 'vectors.f32').stat().st_size == 3 * 8
+
+
+def test_key_depends_on_model(tmp_path):
+    first = EmbeddingCache('modell-a', 2, tmp_path)
+    second = EmbeddingCache('modell/b', 2, tmp_path)
+    assert first.key('x') != second.key('x')
+    assert first.directory != second.directory
+
+
+def test_duplicate_texts_stored_once(tmp_path):
+    cache = EmbeddingCache('teszt-modell', 2, tmp_path)
+    cache.store(['x', 'x'], np.ones((2, 2), dtype='float32'))
+    cache.store(['x'], np.ones((1, 2), dtype='float32'))
+    assert len(cache) == 1
+    assert (cache.directory / 'vectors.f32').stat().st_size == 8
+
+
+def test_truncated_vectors_are_dropped(tmp_path):
+    cache = EmbeddingCache('teszt-modell', 2, tmp_path)
+    cache.store(['x', 'y'], np.ones((2, 2), dtype='float32'))
+
+    # Félbeszakadt írás szimulálása: a második vektor csonka
+    vectors_path = cache.directory / 'vectors.f32'
+    with vectors_path.open('r+b') as file:
+        file.truncate(12)
+
+    reopened = EmbeddingCache('teszt-modell', 2, tmp_path)
+    assert len(reopened) == 1
+    assert vectors_path.stat().st_size == 8
+    reopened.store(['y'], np.full((1, 2), 2, dtype='float32'))
+    vectors, missing = reopened.lookup(['x', 'y'])
+    assert missing == []
+    assert vectors[1].tolist() == [2, 2]
+
+
+def test_load_cache_config(tmp_path):
+    assert load_cache_config(tmp_path / 'nincs.ini') == {
+        'embeddings': False, 'dir': DEFAULT_CACHE_DIR,
+        'queries': DEFAULT_QUERY_CACHE_SIZE, 'query_disk': False,
+        'query_disk_rows': DEFAULT_QUERY_DISK_ROWS, 'query_disk_days': DEFAULT_QUERY_DISK_DAYS}
+
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[cache]\nembeddings = true\ndir = /tmp/emb\n'
+                           'queries = 16\nquery_disk = yes\nquery_disk_rows = 500\n'
+                           'query_disk_days = 0\n', encoding='utf-8')
+    settings = load_cache_config(config_file)
+    assert settings['embeddings'] is True
+    assert str(settings['dir']) == '/tmp/emb'
+    assert settings['queries'] == 16
+    assert settings['query_disk'] is True
+    assert settings['query_disk_rows'] == 500
+    assert settings['query_disk_days'] == 0
+
+
+def test_normalize_question():
+    assert normalize_question('  Mi  Madrid   FŐVÁROSA?? ') == 'mi madrid fővárosa'
+    assert normalize_question('Mi Madrid fővárosa') == normalize_question('mi madrid fővárosa?')
+
+
+def test_query_cache_lru_and_counters():
+    cache = QueryEmbeddingCache('teszt-modell', max_size=2)
+    assert cache.get('első') is None
+
+    cache.put('első', np.array([1, 0], dtype='float32'))
+    cache.put('második', np.array([0, 1], dtype='float32'))
+    assert cache.get('Első?').tolist() == [1, 0]
+
+    # A 'második' a legrégebben használt, ezért kiesik
+    cache.put('harmadik', np.array([1, 1], dtype='float32'))
+    assert cache.get('második') is None
+    assert len(cache) == 2
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['hit_rate'] == 1 / 3
+
+
+def test_query_cache_disk_tier(tmp_path):
+    db_path = tmp_path / 'queries.sqlite'
+    writer = QueryEmbeddingCache('teszt-modell', disk_path=db_path)
+    writer.put('Hol van Madrid?', np.array([0.5, 0.5], dtype='float32'))
+    writer.close()
+
+    cache = QueryEmbeddingCache('teszt-modell', disk_path=db_path)
+    assert cache.get('hol van madrid').tolist() == [0.5, 0.5]
+    assert cache.stats()['disk_hits'] == 1
+    assert QueryEmbeddingCache('másik-modell', disk_path=db_path).get('hol van madrid') is None
+
+
+def test_query_cache_disk_tier_row_limit(tmp_path):
+    db_path = tmp_path / 'queries.sqlite'
+    cache = QueryEmbeddingCache('teszt-modell', disk_path=db_path, max_disk_rows=2)
+    for number, question in enumerate(['első', 'második', 'harmadik']):
+        cache.put(question, np.array([number, 0], dtype='float32'))
+    cache.flush()
+
+    # A memóriát megkerülve: a legrégebben használt 'első' kiesett a lemezről
+    reopened = QueryEmbeddingCache('teszt-modell', disk_path=db_path, max_disk_rows=2)
+    assert reopened.get('első') is None
+    assert reopened.get('harmadik').tolist() == [2, 0]
+    with sqlite3.connect(str(db_path)) as db:
+        assert db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0] == 2
+
+
+def test_query_cache_disk_tier_expires_on_open(tmp_path):
+    db_path = tmp_path / 'queries.sqlite'
+    cache = QueryEmbeddingCache('teszt-modell', disk_path=db_path, max_disk_age_days=30)
+    cache.put('régi', np.array([1, 0], dtype='float32'))
+    cache.put('friss', np.array([0, 1], dtype='float32'))
+    cache.close()
+    with sqlite3.connect(str(db_path)) as db:
+        db.execute("UPDATE query_embeddings SET used = used - 31 * 86400 WHERE key = ?",
+                   ('teszt-modell\0régi',))
+
+    reopened = QueryEmbeddingCache('teszt-modell', disk_path=db_path, max_disk_age_days=30)
+    assert reopened.get('régi') is None
+    assert reopened.get('friss').tolist() == [0, 1]
+
+
+def test_query_cache_migrates_old_disk_schema(tmp_path):
+    db_path = tmp_path / 'queries.sqlite'
+    with sqlite3.connect(str(db_path)) as db:
+        db.execute("CREATE TABLE query_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        db.execute("INSERT INTO query_embeddings VALUES (?, ?)",
+                   ('teszt-modell\0madrid', np.array([1, 1], dtype='float32').tobytes()))
+
+    cache = QueryEmbeddingCache('teszt-modell', disk_path=db_path)
+    assert cache.get('Madrid').tolist() == [1, 1]
+    cache.put('barcelona', np.array([0, 1], dtype='float32'))
+    cache.flush()
+    assert QueryEmbeddingCache('teszt-modell', disk_path=db_path).get('barcelona') is not None
+
+
+def test_query_cache_disk_writes_are_batched(tmp_path, monkeypatch):
+    monkeypatch.setattr('embedding_cache.QUERY_DISK_PRUNE_EVERY', 4)
+    db_path = tmp_path / 'queries.sqlite'
+    cache = QueryEmbeddingCache('teszt-modell', max_size=1, disk_path=db_path, max_disk_rows=2)
+
+    def disk_rows():
+        with sqlite3.connect(str(db_path)) as db:
+            return dict(db.execute("SELECT key, used FROM query_embeddings"))
+
+    # A sorkorlát csak QUERY_DISK_PRUNE_EVERY beszúrásonként érvényesül
+    for number in range(3):
+        cache.put(f'kérdés {number}', np.array([number, 0], dtype='float32'))
+    cache.flush()
+    assert len(disk_rows()) == 3
+    cache.put('kérdés 3', np.array([3, 0], dtype='float32'))
+    cache.flush()
+    assert sorted(disk_rows()) == ['teszt-modell\0kérdés 2', 'teszt-modell\0kérdés 3']
+
+    # Friss bejegyzés lemezes találatánál a használati idő nem íródik újra
+    used = disk_rows()
+    assert cache.get('kérdés 2').tolist() == [2, 0]
+    cache.flush()
+    assert disk_rows() == used
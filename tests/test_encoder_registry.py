@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:38:12 2026
+
+@author: zsolt
+"""
+
+import threading
+import pytest
+import numpy as np
+from unittest import mock
+import encoder_registry
+from encoder_registry import (get_encoder, loaded_encoders, release_encoder,
+                              load_encoder_config, compare_backends)
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    release_encoder()
+    yield
+    release_encoder()
+
+
+@mock.patch('encoder_registry.SentenceTransformer')
+def test_model_loaded_once(mock_st):
+    first = get_encoder('modell-a')
+    second = get_encoder('modell-a')
+
+    assert first is second
+    mock_st.assert_called_once_with('modell-a')
+    assert loaded_encoders() == [('modell-a', 'torch')]
+
+
+@mock.patch('encoder_registry.SentenceTransformer', side_effect=lambda name: object())
+def test_models_are_keyed_by_name(mock_st):
+    assert get_encoder('modell-a') is not get_encoder('modell-b')
+    assert sorted(loaded_encoders()) == [('modell-a', 'torch'), ('modell-b', 'torch')]
+
+
+@mock.patch('encoder_registry.SentenceTransformer', side_effect=lambda name: object())
+def test_release_encoder(mock_st):
+    first = get_encoder('modell-a')
+    release_encoder('modell-a')
+    assert loaded_encoders() == []
+    assert get_encoder('modell-a') is not first
+
+
+@mock.patch('encoder_registry.SentenceTransformer')
+def test_concurrent_access_loads_once(mock_st):
+    threads = [threading.Thread(target=get_encoder, args=('modell-a',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    mock_st.assert_called_once()
+
+
+@mock.patch('encoder_registry.SentenceTransformer', side_effect=lambda name, **kwargs: object())
+def test_backends_are_cached_separately(mock_st):
+    assert get_encoder('modell-a', 'onnx') is not get_encoder('modell-a')
+    mock_st.assert_any_call('modell-a', backend='onnx')
+    assert sorted(loaded_encoders()) == [('modell-a', 'onnx'), ('modell-a', 'torch')]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_encoder('modell-a', 'tensorrt')
+
+
+def test_load_encoder_config(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[encoder]\nbackend = INT8\nverify = true\nmin_cosine = 0.95\n',
+                           encoding='utf-8')
+    assert load_encoder_config(config_file) == {'backend': 'int8', 'verify': True,
+                                                'min_cosine': 0.95}
+
+    config_file.write_text('[encoder]\nbackend = gpu\n', encoding='utf-8')
+    assert load_encoder_config(config_file)['backend'] == 'torch'
+    assert load_encoder_config(tmp_path / 'nincs.ini') == {
+        'backend': 'torch', 'verify': False, 'min_cosine': 0.98}
+
+
+class ScaledModel:
+    """Tesztmodell: a referencia vektorok skálázott, zajos változata."""
+
+    def __init__(self, noise):
+        self.noise = noise
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        vectors = np.array([[len(text), text.count('a') + 1.0, 1.0] for text in texts])
+        return vectors * 2 + self.noise
+
+
+def test_compare_backends():
+    encoders = {('modell-a', 'torch'): ScaledModel(0.0), ('modell-a', 'int8'): ScaledModel(0.01)}
+    with mock.patch.dict(encoder_registry._encoders, encoders):
+        report = compare_backends('modell-a', ['alma', 'körte', 'szilva'], 'int8')
+
+    assert report['backend'] == 'int8' and report['reference'] == 'torch'
+    assert report['texts'] == 3
+    assert 0.99 < report['min_cosine'] <= report['mean_cosine'] <= 1.0 + 1e-6
+    assert report['speedup'] > 0
+
+    with pytest.raises(ValueError):
+        compare_backends('modell-a', [], 'int8')
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:52:09 2026
+
+@author: zsolt
+"""
+
+import json
+import pytest
+from generations import (new_generation, write_manifest, verify_generation, publish,
+                         current_generation, prune_generations, load_generation_config,
+                         GenerationError, CURRENT_FILE, MANIFEST_FILE)
+
+
+def build(root, text='index'):
+    generation = new_generation(root)
+    (generation / 'index.faiss').write_text(text)
+    (generation / 'passages.json').write_text('[]')
+    write_manifest(generation, documents=0)
+    return generation
+
+
+def test_publish_and_current(tmp_path):
+    assert current_generation(tmp_path) is None
+    first = build(tmp_path)
+    second = build(tmp_path)
+    assert first.name < second.name
+
+    publish(first, tmp_path)
+    assert current_generation(tmp_path) == first
+    publish(second, tmp_path)
+    assert current_generation(tmp_path) == second
+    assert (tmp_path / CURRENT_FILE).read_text().strip() == second.name
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_manifest_checksums(tmp_path):
+    source = tmp_path / 'wiki_pages.json'
+    source.write_text('[{"title": "Madrid"}]')
+    generation = new_generation(tmp_path / 'generations')
+    (generation / 'index.faiss').write_text('index')
+    manifest = write_manifest(generation, sources=[source], documents=1)
+
+    assert set(manifest['files']) == {'index.faiss'}
+    assert manifest['files']['index.faiss']['size'] == 5
+    assert len(manifest['sources'][str(source)]) == 64
+    assert manifest['documents'] == 1
+    assert json.loads((generation / MANIFEST_FILE).read_text()) == manifest
+    assert verify_generation(generation) == manifest
+
+
+def test_verify_detects_damage(tmp_path):
+    generation = build(tmp_path)
+    (generation / 'index.faiss').write_text('INDEX')
+    with pytest.raises(GenerationError, match='ellenőrzőösszeg'):
+        verify_generation(generation)
+    verify_generation(generation, checksums=False)
+
+    (generation / 'index.faiss').unlink()
+    with pytest.raises(GenerationError, match='Hiányzó'):
+        publish(generation, tmp_path)
+    assert current_generation(tmp_path) is None
+
+
+def test_unfinished_generation_is_not_published(tmp_path):
+    generation = new_generation(tmp_path)
+    (generation / 'index.faiss').write_text('index')
+    with pytest.raises(GenerationError, match='manifest'):
+        publish(generation, tmp_path)
+    (tmp_path / CURRENT_FILE).write_text(generation.name)
+    assert current_generation(tmp_path) is None
+
+
+def test_prune_generations(tmp_path):
+    generations = [build(tmp_path) for _ in range(4)]
+    publish(generations[2], tmp_path)
+
+    removed = prune_generations(tmp_path, keep=2)
+    assert removed == [generations[0].name]
+    assert [path.is_dir() for path in generations] == [False, True, True, True]
+    assert prune_generations(tmp_path, keep=1) == [generations[1].name]
+
+
+def test_prune_generations_keeps_protected(tmp_path):
+    generations = [build(tmp_path) for _ in range(3)]
+    publish(generations[2], tmp_path)
+
+    assert prune_generations(tmp_path, keep=1, protect={generations[1].name}) == [
+        generations[0].name]
+    assert generations[1].is_dir()
+    assert prune_generations(tmp_path, keep=1) == [generations[1].name]
+
+
+def test_load_generation_config(tmp_path):
+    assert load_generation_config(tmp_path / 'nincs.ini')['verify'] is False
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text("[generations]\nkeep = 0\nverify = true\ncheck_interval = 1.5\n")
+    assert load_generation_config(config_file) == {'keep': 1, 'verify': True,
+                                                   'check_interval': 1.5}
+    config_file.write_text("[generations]\nkeep = sok\n")
+    assert load_generation_config(config_file)['keep'] == 2
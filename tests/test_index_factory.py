@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:52:31 2026
+
+@author: zsolt
+"""
+
+import numpy as np
+import faiss
+import pytest
+from index_factory import (load_index_config, resolve_index_type, build_factory_string,
+                           create_index, train_index, apply_search_params,
+                           detect_index_type, detect_codec, bytes_per_vector, binary_codes,
+                           with_ids, base_index, read_index, stored_dim, detect_reduction,
+                           stored_ids, unwrap_ivf, remove_ids, DEFAULT_INDEX_CONFIG)
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.random((2000, 32), dtype='float32')
+
+
+def test_load_index_config_defaults(tmp_path):
+    assert load_index_config(tmp_path / 'nincs.ini') == DEFAULT_INDEX_CONFIG
+
+
+def test_load_index_config_values(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[index]\ntype = HNSW\nhnsw_m = 16\nnprobe = abc\n', encoding='utf-8')
+    config = load_index_config(config_file)
+    assert config['type'] == 'hnsw'
+    assert config['hnsw_m'] == 16
+    assert config['nprobe'] == DEFAULT_INDEX_CONFIG['nprobe']
+
+
+def test_load_index_config_unknown_type(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[index]\ntype = lsh\n', encoding='utf-8')
+    assert load_index_config(config_file)['type'] == 'auto'
+
+
+def test_load_index_config_codec(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[index]\ncodec = SQ8\nrerank = 50\n', encoding='utf-8')
+    config = load_index_config(config_file)
+    assert config['codec'] == 'sq8'
+    assert config['rerank'] == 50
+
+    config_file.write_text('[index]\ncodec = lsh\n', encoding='utf-8')
+    assert load_index_config(config_file)['codec'] == 'none'
+
+
+def test_load_index_config_reduction(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[index]\nreduction = PCA\nreduce_dim = 256\n', encoding='utf-8')
+    config = load_index_config(config_file)
+    assert (config['reduction'], config['reduce_dim']) == ('pca', 256)
+
+    config_file.write_text('[index]\nreduction = opq\n', encoding='utf-8')
+    assert load_index_config(config_file)['reduction'] == 'none'
+
+
+@pytest.mark.parametrize('reduction', ['pca', 'rr'])
+def test_reduction(vectors, reduction):
+    config = dict(DEFAULT_INDEX_CONFIG, type='flat', codec='sq8', reduction=reduction, reduce_dim=8)
+    index, _, description = create_index(vectors.shape[1], len(vectors), config)
+    train_index(index, vectors, config)
+    index = with_ids(index)
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype='int64'))
+
+    assert description == f'{reduction.upper()}8,SQ8'
+    assert (index.d, stored_dim(index)) == (vectors.shape[1], 8)
+    assert detect_reduction(index) == reduction
+    assert detect_codec(index) == 'sq8'
+    assert bytes_per_vector(index) == 8
+    _, ids = index.search(vectors[:5], 1)
+    assert ids[:, 0].tolist() == list(range(5))
+    assert detect_reduction(with_ids(faiss.IndexFlatL2(vectors.shape[1]))) == 'none'
+
+
+def test_load_index_config_flags(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[index]\nmmap = yes\nprefault = maybe\n', encoding='utf-8')
+    config = load_index_config(config_file)
+    assert config['mmap'] is True
+    assert config['prefault'] is False
+
+
+def test_resolve_auto_type():
+    config = dict(DEFAULT_INDEX_CONFIG, auto_threshold=1000)
+    assert resolve_index_type(999, config) == 'flat'
+    assert resolve_index_type(1000, config) == 'ivf'
+    assert resolve_index_type(10, dict(config, type='hnsw')) == 'hnsw'
+
+
+def test_factory_strings():
+    config = dict(DEFAULT_INDEX_CONFIG, nlist=64, pq_m=10)
+    assert build_factory_string('flat', 32, 5000, config) == 'Flat'
+    assert build_factory_string('ivf', 32, 5000, config) == 'IVF64,Flat'
+    # A PQ alvektor-szám a dimenzió osztójára igazodik
+    assert build_factory_string('ivfpq', 32, 5000, config) == 'IVF64,PQ8x8'
+    assert build_factory_string('hnsw', 32, 5000, config) == 'HNSW32'
+    with pytest.raises(ValueError):
+        build_factory_string('lsh', 32, 5000, config)
+
+
+def test_codec_factory_strings():
+    config = dict(DEFAULT_INDEX_CONFIG, nlist=64, pq_m=8)
+    assert build_factory_string('flat', 32, 5000, dict(config, codec='fp16')) == 'SQfp16'
+    assert build_factory_string('ivf', 32, 5000, dict(config, codec='sq8')) == 'IVF64,SQ8'
+    assert build_factory_string('flat', 32, 5000, dict(config, codec='pq')) == 'PQ8x8'
+    assert build_factory_string('hnsw', 32, 5000, dict(config, codec='sq8')) == 'HNSW32,SQ8'
+    with pytest.raises(ValueError):
+        build_factory_string('flat', 32, 5000, dict(config, codec='binary'))
+
+
+
+def test_reduction_factory_strings():
+    config = dict(DEFAULT_INDEX_CONFIG, nlist=64, pq_m=8, reduction='pca', reduce_dim=16)
+    assert build_factory_string('flat', 32, 5000, config) == 'PCA16,Flat'
+    assert build_factory_string('ivfpq', 32, 5000, config) == 'PCA16,IVF64,PQ8x8'
+    assert build_factory_string('hnsw', 32, 5000, dict(config, reduction='rr')) == 'RR16,HNSW32'
+    # Túl nagy célméret vagy kevés tanítóvektor esetén nincs csökkentés
+    assert build_factory_string('flat', 32, 5000, dict(config, reduce_dim=32)) == 'Flat'
+    assert build_factory_string('flat', 32, 10, config) == 'Flat'
+    assert build_factory_string('flat', 32, 10, dict(config, reduction='rr')) == 'RR16,Flat'
+
+def test_nlist_clamped_to_training_points():
+    config = dict(DEFAULT_INDEX_CONFIG, nlist=1024)
+    assert build_factory_string('ivf', 32, 390, config) == 'IVF10,Flat'
+
+
+@pytest.mark.parametrize('index_type', ['flat', 'ivf', 'ivfpq', 'hnsw'])
+def test_create_train_and_search(vectors, index_type):
+    config = dict(DEFAULT_INDEX_CONFIG, type=index_type, train_sample=1000,
+                  nlist=8, pq_m=8, pq_nbits=4)
+    index, actual_type, _ = create_index(vectors.shape[1], len(vectors), config)
+    train_index(index, vectors, config)
+    index.add(vectors)
+
+    assert actual_type == index_type
+    assert detect_index_type(index) == index_type
+    assert index.ntotal == len(vectors)
+    _, ids = index.search(vectors[:5], 1)
+    assert (ids[:, 0] >= 0).all()
+
+
+def test_ivfpq_falls_back_with_few_vectors(vectors):
+    config = dict(DEFAULT_INDEX_CONFIG, type='ivfpq')
+    _, index_type, _ = create_index(vectors.shape[1], 100, config)
+    assert index_type == 'ivf'
+
+
+def test_apply_search_params():
+    index = faiss.index_factory(32, 'IVF16,Flat')
+    apply_search_params(index, {'nprobe': 8, 'ef_search': 20})
+    assert faiss.extract_index_ivf(index).nprobe == 8
+
+    hnsw_index = faiss.index_factory(32, 'HNSW8')
+    apply_search_params(hnsw_index, {'nprobe': 8, 'ef_search': 20})
+    assert hnsw_index.hnsw.efSearch == 20
+
+
+@pytest.mark.parametrize('codec, code_size', [('none', 128), ('fp16', 64), ('sq8', 32),
+                                              ('pq', 4), ('binary', 4)])
+def test_codecs(vectors, codec, code_size):
+    config = dict(DEFAULT_INDEX_CONFIG, type='flat', codec=codec, pq_m=8, pq_nbits=4)
+    index, index_type, _ = create_index(vectors.shape[1], len(vectors), config)
+    train_index(index, vectors, config)
+    index = with_ids(index)
+    data = binary_codes(vectors - 0.5) if codec == 'binary' else vectors
+    index.add_with_ids(data, np.arange(len(vectors), dtype='int64') + 1000)
+
+    assert index_type == 'flat'
+    assert detect_codec(index) == codec
+    assert bytes_per_vector(index) == code_size
+    _, ids = index.search(data[:5], 1)
+    assert (ids[:, 0] >= 1000).all()
+
+
+@pytest.mark.parametrize('description', ['IVF8,Flat', 'PCA16,IVF8,SQ8', 'IVF8,PQ8x4'])
+def test_ivf_ids_survive_removal(vectors, description):
+    index = faiss.index_factory(vectors.shape[1], description)
+    index.train(vectors)
+    index = with_ids(index)
+    faiss.extract_index_ivf(index).nprobe = 8
+    ids = np.arange(len(vectors), dtype='int64') * 7 + 3
+    index.add_with_ids(vectors, ids)
+
+    # Az IVF saját maga tárolja az azonosítókat (nincs IDMap2 csomagolás)
+    assert not hasattr(index, 'id_map')
+    faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+    assert remove_ids(index, ids[:1000:2]) == 500
+    _, found = index.search(vectors[1500:1505], 1)
+    assert found[:, 0].tolist() == ids[1500:1505].tolist()
+    assert sorted(stored_ids(index).tolist()) == sorted(set(ids.tolist()) - set(ids[:1000:2].tolist()))
+
+
+def test_unwrap_ivf(vectors):
+    index = faiss.index_factory(vectors.shape[1], 'IVF8,Flat')
+    index.train(vectors)
+    wrapped = faiss.IndexIDMap2(index)
+    ids = np.arange(len(vectors), dtype='int64') + 1000
+    wrapped.add_with_ids(vectors, ids)
+
+    unwrapped = unwrap_ivf(wrapped)
+    faiss.extract_index_ivf(unwrapped).nprobe = 8
+    assert not hasattr(unwrapped, 'id_map') and unwrapped.ntotal == len(vectors)
+    remove_ids(unwrapped, ids[:10])
+    _, found = unwrapped.search(vectors[10:15], 1)
+    assert found[:, 0].tolist() == ids[10:15].tolist()
+    flat = with_ids(faiss.IndexFlatL2(vectors.shape[1]))
+    assert unwrap_ivf(flat) is flat
+
+
+def test_binary_codec_requires_flat(vectors):
+    config = dict(DEFAULT_INDEX_CONFIG, type='hnsw', codec='binary')
+    index, _, description = create_index(vectors.shape[1], len(vectors), config)
+    assert description == 'HNSW32,SQ8'
+    assert detect_codec(index) == 'sq8'
+    assert base_index(index).hnsw is not None
+
+
+@pytest.mark.parametrize('description', ['Flat', 'IVF8,Flat', 'HNSW16'])
+def test_read_index_mmap(tmp_path, vectors, description):
+    index = faiss.index_factory(vectors.shape[1], description)
+    index.train(vectors)
+    index.add(vectors)
+    faiss.write_index(index, str(tmp_path / 'index.faiss'))
+
+    mapped = read_index(tmp_path / 'index.faiss', mmap=True)
+    assert mapped.ntotal == len(vectors)
+    _, ids = mapped.search(vectors[:3], 1)
+    assert ids[:, 0].tolist() == [0, 1, 2]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:48:05 2026
+
+@author: zsolt
+"""
+
+import pytest
+import numpy as np
+from metadata_filter import MetadataIndex, normalize_filters, matches_filters
+
+
+@pytest.fixture
+def docs():
+    return [
+        {'id': 10, 'title': 'Python/Flask', 'namespace': 0, 'categories': ['Python', 'Web']},
+        {'id': 11, 'title': 'Python/Numpy', 'namespace': 0, 'categories': ['Python']},
+        {'id': 12, 'title': 'Sablon:Python', 'namespace': 10, 'categories': []},
+        {'id': 13, 'title': 'Rust', 'namespace': 0, 'categories': ['Rust']},
+    ]
+
+
+def test_normalize_filters():
+    assert normalize_filters(None) is None
+    assert normalize_filters({'namespace': 0, 'category': ['Web', 'Python']}) == {
+        'namespace': ('0',), 'category': ('Python', 'Web')}
+    with pytest.raises(ValueError):
+        normalize_filters({'szerző': 'X'})
+    with pytest.raises(ValueError):
+        normalize_filters({'category': []})
+
+
+def test_mask(docs):
+    index = MetadataIndex()
+    index.add(docs)
+    id_map = np.array([13, 12, 11, 10], dtype='int64')
+
+    def selected(filters):
+        mask = index.mask(normalize_filters(filters), id_map)
+        return sorted(id_map[mask].tolist())
+
+    assert selected({'category': 'Python'}) == [10, 11]
+    assert selected({'category': ['Web', 'Rust']}) == [10, 13]
+    assert selected({'namespace': 0, 'title_prefix': 'Python/'}) == [10, 11]
+    assert selected({'namespace': 10, 'category': 'Python'}) == []
+
+    # Csere és törlés után a bitmapek újraszámolódnak
+    index.add([dict(docs[0], categories=['Web'])])
+    index.remove([11])
+    assert selected({'category': 'Python'}) == []
+    assert len(index) == 3
+
+
+def test_matches_filters(docs):
+    filters = normalize_filters({'namespace': 0, 'title_prefix': 'Python/'})
+    assert [matches_filters(doc, filters) for doc in docs] == [True, True, False, False]
+    assert matches_filters(docs[3], None)
+
+
+def test_save_and_load(tmp_path, docs):
+    index = MetadataIndex()
+    index.add(docs)
+    index.save(tmp_path / 'fields.json')
+
+    loaded = MetadataIndex.load(tmp_path / 'fields.json')
+    assert len(loaded) == len(docs)
+    assert loaded.values('category') == ['Python', 'Rust', 'Web']
+    mask = loaded.mask(normalize_filters({'category': 'Rust'}), np.array([10, 13]))
+    assert mask.tolist() == [False, True]
+
+
+def test_merged_titles():
+    doc = {'id': 20, 'title': 'Madrid', 'titles': ['Madrid', 'Madrid (város)']}
+    index = MetadataIndex()
+    index.add([doc])
+    assert index.ids_for('title', 'Madrid (város)') == [20]
+    assert matches_filters(doc, normalize_filters({'title_prefix': 'Madrid ('}))
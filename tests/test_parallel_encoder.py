@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:51:36 2026
+
+@author: zsolt
+"""
+
+import numpy as np
+from parallel_encoder import (encode_texts, length_buckets, load_encoding_config,
+                              DEFAULT_BATCH_SIZE)
+
+
+class LengthModel:
+    """Determinisztikus teszt modell: a vektor a szöveg hossza és első betűje."""
+
+    def __init__(self, model_name=None):
+        self.batch_sizes = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.batch_sizes.append(len(texts))
+        return np.array([[len(text), ord(text[0])] for text in texts], dtype='float32')
+
+
+def load_length_model(model_name):
+    return LengthModel(model_name)
+
+
+TEXTS = ['hosszú szöveg itt', 'a', 'közepes', 'bb', 'leghosszabb szöveg mind közül', 'c']
+
+
+def test_length_buckets():
+    buckets = length_buckets(TEXTS, 2)
+    assert buckets == [[1, 5], [3, 2], [0, 4]]
+
+
+def test_encode_texts_single_process():
+    model = LengthModel()
+    vectors = encode_texts(TEXTS, model, 'teszt', workers=1, batch_size=4)
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [len(text) for text in TEXTS]
+
+
+def test_encode_texts_multi_process_keeps_order():
+    model = LengthModel()
+    vectors = encode_texts(TEXTS, model, 'teszt', workers=2, batch_size=2,
+                           loader=load_length_model)
+
+    assert model.batch_sizes == []  # a hívó folyamat modellje nem kódolt
+    assert vectors[:, 0].tolist() == [len(text) for text in TEXTS]
+    assert vectors[:, 1].tolist() == [ord(text[0]) for text in TEXTS]
+
+
+def test_load_encoding_config(tmp_path):
+    assert load_encoding_config(tmp_path / 'nincs.ini')['batch_size'] == DEFAULT_BATCH_SIZE
+
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[encoding]\nworkers = 0\nbatch_size = 64\n', encoding='utf-8')
+    settings = load_encoding_config(config_file)
+    assert settings['workers'] >= 1
+    assert settings['batch_size'] == 64
@@ -49,3 +49,10 @@ def test_build_prompt_missing_title():
 
     assert "== Oldal 1 ==" in prompt
     assert "Ez egy névtelen oldal szövege." in prompt
+
+
+def test_build_prompt_with_section():
+    contexts = [{'title': 'Madrid', 'section': 'Történelem', 'text': 'A város a 9. században alakult ki.'}]
+    prompt = build_prompt(contexts, "Mikor alakult Madrid?")
+
+    assert "== Madrid / Történelem ==" in prompt
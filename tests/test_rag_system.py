@@ -59,3 +59,192 @@ def test_get_system_info_uninitialized(rag):
     assert info["initialized"] is False
     assert info["documents_loaded"] == 0
     assert info["embedder_ready"] is False
+
+
+@patch("rag_system.should_refresh_data", return_value=False)
+@patch("rag_system.Path.exists", return_value=True)
+@patch("rag_system.load_docs", return_value=[{"title": "Teszt oldal", "text": "Ez egy teszt szöveg"}])
+@patch("rag_system.Embedder")
+@patch("rag_system.load_reranker_config")
+@patch("rag_system.Reranker")
+@patch("rag_system.build_prompt", return_value="KONTEKSTUS + KÉRDÉS")
+@patch("rag_system.run_ollama_model", return_value="Budapest.")
+@patch("rag_system.clean_wiki_text", return_value="Budapest")
+def test_process_question_with_reranker(
+    mock_clean, mock_run, mock_prompt, mock_reranker_class, mock_reranker_config,
+    mock_embedder_class, mock_load_docs, mock_exists, mock_refresh, rag
+):
+    candidates = [{"title": f"Teszt {i}", "text": "szöveg"} for i in range(10)]
+    mock_embedder = MagicMock()
+    mock_embedder.query.return_value = candidates
+    mock_embedder_class.return_value = mock_embedder
+    mock_reranker_config.return_value = {"enabled": True, "model": "teszt"}
+    mock_reranker = MagicMock(candidates=10)
+    mock_reranker.rerank.return_value = candidates[:3]
+    mock_reranker_class.return_value = mock_reranker
+
+    rag.initialize()
+    assert rag.process_question("Mi Magyarország fővárosa?") == "Budapest"
+    mock_embedder.query.assert_called_with("Mi Magyarország fővárosa?", top_k=10, filters=None)
+    assert mock_reranker.rerank.call_args.args[1] == candidates
+    mock_prompt.assert_called_once_with(candidates[:3], "Mi Magyarország fővárosa?")
+
+
+@patch("rag_system.should_refresh_data", return_value=False)
+@patch("rag_system.Path.exists", return_value=True)
+@patch("rag_system.load_docs", return_value=[{"title": "Madrid", "text": "Madrid Spanyolország fővárosa"}])
+@patch("rag_system.Embedder")
+@patch("rag_system.build_prompt", return_value="KONTEKSTUS + KÉRDÉS")
+@patch("rag_system.run_ollama_model", return_value="Madrid.")
+@patch("rag_system.clean_wiki_text", return_value="Madrid")
+def test_process_question_title_fast_path(
+    mock_clean, mock_run, mock_prompt, mock_embedder_class, mock_load_docs, mock_exists, mock_refresh, rag
+):
+    passages = [{"title": "Madrid", "chunk": 0, "text": "Madrid Spanyolország fővárosa"}]
+    mock_embedder = MagicMock()
+    mock_embedder.titles.return_value = ["Madrid", "Barcelona"]
+    mock_embedder.page_documents.return_value = passages
+    mock_embedder_class.return_value = mock_embedder
+
+    rag.initialize()
+    assert rag.suggest_titles("mad") == ["Madrid"]
+    assert rag.process_question("madrid?") == "Madrid"
+    mock_embedder.page_documents.assert_called_once_with("Madrid", 3)
+    mock_embedder.query.assert_not_called()
+    mock_prompt.assert_called_once_with(passages, "madrid?")
+
+    rag.process_question("Mi Madrid lakossága?")
+    mock_embedder.query.assert_called_once_with("Mi Madrid lakossága?", filters=None)
+
+
+@patch("rag_system.should_refresh_data", return_value=False)
+@patch("rag_system.Path.exists", return_value=True)
+@patch("rag_system.load_docs", return_value=[{"title": "Madrid", "text": "Madrid Spanyolország fővárosa"}])
+@patch("rag_system.Embedder")
+@patch("rag_system.verify_generation")
+@patch("rag_system.current_generation")
+@patch("rag_system.build_prompt", return_value="KONTEKSTUS + KÉRDÉS")
+@patch("rag_system.run_ollama_model", return_value="Madrid.")
+@patch("rag_system.clean_wiki_text", return_value="Madrid")
+def test_swap_generation(
+    mock_clean, mock_run, mock_prompt, mock_current, mock_verify, mock_embedder_class,
+    mock_load_docs, mock_exists, mock_refresh, rag, tmp_path
+):
+    old_embedder, new_embedder = MagicMock(), MagicMock()
+    old_embedder.titles.return_value = []
+    new_embedder.titles.return_value = ["Madrid"]
+    mock_embedder_class.side_effect = [old_embedder, new_embedder]
+    first, second = tmp_path / "20261018-120000-000", tmp_path / "20261018-130000-000"
+    mock_current.return_value = first
+    rag._generation_config["check_interval"] = 0
+
+    rag.initialize()
+    old_embedder.load.assert_called_once_with(first / "index.faiss", first / "passages.json")
+    # Betöltéskor alapértelmezetten csak a fájlméretek ellenőrződnek
+    mock_verify.assert_called_once_with(first, checksums=False)
+    assert rag.get_system_info()["generation"] == first.name
+
+    mock_current.return_value = second
+    rag.process_question("Mi Madrid lakossága?")
+    old_embedder.query.assert_called_once()
+
+    assert rag.swap_generation() is True
+    assert rag.swap_generation() is False
+    new_embedder.load.assert_called_once_with(second / "index.faiss", second / "passages.json")
+    assert rag.get_system_info()["generation"] == second.name
+    assert rag.suggest_titles("mad") == ["Madrid"]
+    rag.process_question("Mi Madrid lakossága?")
+    new_embedder.query.assert_called_once()
+
+
+@patch("rag_system.should_refresh_data", return_value=False)
+@patch("rag_system.Path.exists", return_value=True)
+@patch("rag_system.load_docs", return_value=[{"title": "Madrid", "text": "Madrid Spanyolország fővárosa"}])
+@patch("rag_system.Embedder")
+@patch("rag_system.verify_generation")
+@patch("rag_system.current_generation")
+@patch("rag_system.prune_generations")
+@patch("rag_system.build_prompt", return_value="KONTEKSTUS + KÉRDÉS")
+@patch("rag_system.run_ollama_model", return_value="Madrid.")
+@patch("rag_system.clean_wiki_text", return_value="Madrid")
+def test_prune_keeps_generation_in_use(
+    mock_clean, mock_run, mock_prompt, mock_prune, mock_current, mock_verify,
+    mock_embedder_class, mock_load_docs, mock_exists, mock_refresh, rag, tmp_path
+):
+    old_embedder, new_embedder = MagicMock(), MagicMock()
+    old_embedder.titles.return_value = new_embedder.titles.return_value = []
+    mock_embedder_class.side_effect = [old_embedder, new_embedder]
+    first, second = tmp_path / "20261018-120000-000", tmp_path / "20261018-130000-000"
+    mock_current.return_value = first
+    rag._generation_config["check_interval"] = 0
+    rag.initialize()
+
+    # A csere a régi generáción futó keresés közben történik
+    def query_during_swap(*args, **kwargs):
+        assert rag.swap_generation(second) is True
+        return []
+    old_embedder.query.side_effect = query_during_swap
+    rag.process_question("Mi Madrid lakossága?")
+
+    protected = [call.kwargs["protect"] for call in mock_prune.call_args_list]
+    # A csere utáni takarításnál a régi generáció még foglalt, a keresés végén már nem
+    assert protected == [{first.name, second.name}, {second.name}]
+    assert rag._generation_users == {}
+
+
+@patch("rag_system.should_refresh_data", return_value=False)
+@patch("rag_system.Path.exists", return_value=True)
+@patch("rag_system.load_docs", return_value=[{"title": "Madrid", "text": "Madrid Spanyolország fővárosa"}])
+@patch("rag_system.Embedder")
+@patch("rag_system.verify_generation")
+@patch("rag_system.current_generation")
+@patch("rag_system.sync_from_config")
+@patch("rag_system.new_generation")
+@patch("rag_system.write_manifest")
+@patch("rag_system.publish")
+@patch("rag_system.prune_generations")
+def test_refresh_data_incremental(
+    mock_prune, mock_publish, mock_manifest, mock_new, mock_sync, mock_current, mock_verify,
+    mock_embedder_class, mock_load_docs, mock_exists, mock_refresh, rag, tmp_path
+):
+    old_embedder, new_embedder = MagicMock(), MagicMock()
+    new_embedder.titles.return_value = ["Madrid"]
+    mock_embedder_class.side_effect = [old_embedder, new_embedder]
+    first, second = tmp_path / "20261018-120000-000", tmp_path / "20261018-130000-000"
+    mock_current.return_value = first
+    mock_new.return_value = second
+    rag.initialize()
+
+    updated = {"title": "Madrid", "pageid": 1, "revid": 11, "text": "Madrid Spanyolország fővárosa."}
+    removed = {"title": "Toledo", "pageid": 2, "revid": 20, "text": "Toledo"}
+    mock_sync.return_value = {"updated": [updated], "removed": [removed]}
+
+    assert rag.refresh_data() is True
+    # Csak a frissített oldal kódolódik újra, a közzétett generáció másolatába
+    new_embedder.load.assert_called_once_with(first / "index.faiss", first / "passages.json")
+    new_embedder.relocate.assert_called_once_with(second / "vectors.f32")
+    new_embedder.ids_for_pages.assert_called_once_with([updated, removed])
+    passages = new_embedder.upsert.call_args[0][0]
+    assert {passage["title"] for passage in passages} == {"Madrid"}
+    new_embedder.save.assert_called_once_with(second / "index.faiss", second / "passages.json")
+    mock_publish.assert_called_once_with(second)
+    assert rag.get_system_info()["generation"] == second.name
+    assert rag.suggest_titles("mad") == ["Madrid"]
+
+    mock_sync.return_value = {"updated": [], "removed": []}
+    assert rag.refresh_data() is True
+    assert mock_embedder_class.call_count == 2
+
+
+@patch("rag_system.auto_fetch_from_config")
+@patch("rag_system.import_dump_from_config")
+@patch("rag_system.load_dump_config")
+def test_fetch_data_source(mock_dump_config, mock_import, mock_fetch, rag, tmp_path):
+    mock_dump_config.return_value = {"path": tmp_path / "dump.xml.bz2", "namespaces": (0,)}
+    rag._fetch_data()
+    mock_import.assert_called_once()
+    mock_fetch.assert_not_called()
+
+    mock_dump_config.return_value = {"path": None, "namespaces": (0,)}
+    rag._fetch_data()
+    mock_fetch.assert_called_once()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:37:50 2026
+
+@author: zsolt
+"""
+
+import numpy as np
+from ranking import load_search_config, normalize_rows, select_results
+
+
+def test_load_search_config(tmp_path):
+    assert load_search_config(tmp_path / 'nincs.ini') == {
+        'min_score': None, 'max_per_page': 0, 'mmr_lambda': None}
+
+    path = tmp_path / 'wiki_rag.ini'
+    path.write_text('[search]\nmin_score = 0.3\nmax_per_page = 2\nmmr_lambda = 0.7\n',
+                    encoding='utf-8')
+    assert load_search_config(path) == {'min_score': 0.3, 'max_per_page': 2, 'mmr_lambda': 0.7}
+
+    path.write_text('[search]\nmmr_lambda = 1.5\n', encoding='utf-8')
+    assert load_search_config(path)['mmr_lambda'] is None
+
+
+def test_min_score_and_page_cap():
+    scores = np.array([0.9, 0.8, 0.7, 0.6, 0.2])
+    pages = ['a', 'a', 'a', 'b', 'c']
+    assert select_results(scores, None, pages, 5) == [0, 1, 2, 3, 4]
+    assert select_results(scores, None, pages, 5, min_score=0.5) == [0, 1, 2, 3]
+    assert select_results(scores, None, pages, 3, max_per_page=1) == [0, 3, 4]
+
+
+def test_mmr_prefers_diverse_candidates():
+    vectors = normalize_rows([[1.0, 0.0], [0.99, 0.01], [0.6, 0.8]])
+    scores = np.array([0.95, 0.94, 0.7])
+    pages = ['a', 'b', 'c']
+    assert select_results(scores, vectors, pages, 2, mmr_lambda=1.0) == [0, 1]
+    # A közel azonos második jelölt helyett a különböző kerül előre
+    assert select_results(scores, vectors, pages, 2, mmr_lambda=0.5) == [0, 2]
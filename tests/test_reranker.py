@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:41:09 2026
+
+@author: zsolt
+"""
+
+import time
+import pytest
+from reranker import Reranker, load_reranker_config, DEFAULT_RERANKER_CONFIG
+
+
+class OverlapModel:
+    """Tesztmodell: a pontszám a kérdés és a passage közös szavainak száma."""
+
+    def __init__(self, delay=0.0, pair_delay=0.0):
+        self.delay = delay
+        self.pair_delay = pair_delay
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        time.sleep(self.delay + self.pair_delay * len(pairs))
+        return [len(set(question.lower().split()) & set(text.lower().split()))
+                for question, text in pairs]
+
+
+@pytest.fixture
+def docs():
+    return [
+        {'id': 1, 'text': 'a macska alszik'},
+        {'id': 2, 'text': 'a kutya a kertben ugat'},
+        {'id': 3, 'text': 'a kutya ugat'},
+    ]
+
+
+def make_reranker(model, **overrides):
+    config = dict(DEFAULT_RERANKER_CONFIG, enabled=True, **overrides)
+    return Reranker(config, loader=lambda name: model)
+
+
+def test_rerank_orders_by_score(docs):
+    model = OverlapModel()
+    reranker = make_reranker(model, top_k=2)
+    results = reranker.rerank('hol ugat a kutya', docs)
+    assert [doc['id'] for doc in results] == [2, 3]
+    # Egyetlen batch-ben pontoz
+    assert model.calls == [3]
+
+
+def test_pair_scores_are_cached(docs):
+    model = OverlapModel()
+    reranker = make_reranker(model)
+    reranker.rerank('Hol ugat a kutya?', docs)
+    reranker.rerank('hol ugat a kutya', docs + [{'id': 4, 'text': 'ugat'}])
+
+    assert model.calls == [3, 1]
+    stats = reranker.stats()
+    assert stats['hits'] == 3 and stats['misses'] == 4
+    assert stats['cache_size'] == 4
+
+
+def test_budget_exhausted_skips(docs):
+    model = OverlapModel()
+    reranker = make_reranker(model, budget_ms=50, top_k=2)
+    started = time.perf_counter() - 1.0
+    results = reranker.rerank('hol ugat a kutya', docs, started=started)
+
+    assert [doc['id'] for doc in results] == [1, 2]
+    assert model.calls == []
+    assert reranker.stats()['skipped'] == 1
+
+
+def test_budget_uses_cost_estimate(docs):
+    model = OverlapModel(pair_delay=0.05)
+    reranker = make_reranker(model, budget_ms=100, candidates=3)
+    reranker.warmup()
+    assert reranker.stats()['pair_ms'] >= 40
+
+    # 3 pár becsült ideje (~150 ms) nem fér a keretbe
+    reranker.rerank('hol ugat a kutya', docs)
+    assert reranker.stats()['skipped'] == 1
+    assert model.calls == [1, 3]
+
+
+def test_warmup_separates_call_overhead():
+    # Lassú hívás (80 ms fix költség), de a batch-elt pontozás belefér a keretbe
+    model = OverlapModel(delay=0.08, pair_delay=0.001)
+    reranker = make_reranker(model, budget_ms=150, candidates=20, top_k=3)
+    reranker.warmup()
+    stats = reranker.stats()
+    assert stats['call_ms'] >= 60 and stats['pair_ms'] < 10
+
+    docs = [{'id': i, 'text': f'a kutya ugat {i}'} for i in range(20)]
+    reranker.rerank('hol ugat a kutya', docs)
+    assert reranker.stats()['skipped'] == 0
+    assert model.calls == [1, 20, 20]
+
+
+def test_over_budget_model_is_not_retried_on_requests(docs):
+    # Mindig keret fölötti modell: a kérések nem futtatják, és a friss mérés
+    # után PROBE_INTERVAL-on belül próbapontozás sem indul
+    model = OverlapModel(delay=0.2)
+    reranker = make_reranker(model, budget_ms=100, candidates=3)
+    reranker.warmup()
+
+    for attempt in range(20):
+        started = time.perf_counter()
+        reranker.rerank(f'hol ugat a kutya {attempt}', docs, started=started)
+        assert time.perf_counter() - started < 0.1
+    assert reranker._probe_thread is None
+
+    assert reranker.stats()['skipped'] == 20
+    assert model.calls == [1, 3]
+    assert reranker.stats()['call_ms'] + 3 * reranker.stats()['pair_ms'] > 100
+
+
+def test_probe_restores_reranking(docs, monkeypatch):
+    model = OverlapModel(delay=0.2)
+    reranker = make_reranker(model, budget_ms=100, candidates=3)
+    reranker.warmup()
+    model.delay = 0.0
+    monkeypatch.setattr('reranker.PROBE_INTERVAL', 0.0)
+
+    # A túlbecsült költséget a háttérbeli próbapontozás méri újra
+    reranker.rerank('hol ugat a kutya', docs)
+    reranker._probe_thread.join()
+    assert reranker.stats()['skipped'] == 1
+
+    reranker.rerank('hol alszik a macska', docs)
+    assert reranker.stats()['skipped'] == 1
+    assert model.calls == [1, 3, 3, 3]
+
+
+def test_load_reranker_config(tmp_path):
+    config_file = tmp_path / 'wiki_rag.ini'
+    config_file.write_text('[reranker]\nenabled = true\ncandidates = 2\ntop_k = 5\n',
+                           encoding='utf-8')
+    config = load_reranker_config(config_file)
+    assert config['enabled'] is True
+    assert config['top_k'] == 5 and config['candidates'] == 5
+    assert config['model'] == DEFAULT_RERANKER_CONFIG['model']
+    assert load_reranker_config(tmp_path / 'nincs.ini')['enabled'] is False
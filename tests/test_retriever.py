@@ -8,6 +8,8 @@ Created on Sun Jun  8 11:55:47 2025
 
 import pytest
 import json
+import time
+import threading
 import os
 from unittest import mock
 from pathlib import Path
@@ -16,6 +18,14 @@ import configparser
 import retriever
 
 
+@pytest.fixture(autouse=True)
+def download_dir(tmp_path, monkeypatch):
+    """A részleges letöltések a teszt saját könyvtárába kerülnek."""
+    directory = tmp_path / 'downloads'
+    monkeypatch.setattr(retriever, 'DOWNLOAD_DIR', directory)
+    return directory
+
+
 def test_save_pages(tmp_path):
     """Teszteli a save_pages függvényt."""
     pages = [{'title': 'Test', 'text': 'Some content'}]
@@ -113,13 +123,32 @@ def test_connect_with_login(mock_site):
     mock_instance.login.assert_called_once_with('user', 'pass')
 
 
+def api_page(title, text, pageid=1, categories=()):
+    """Oldal a MediaWiki API (formatversion=2) válaszának formátumában."""
+    return {
+        'pageid': pageid, 'ns': 0, 'title': title,
+        'revisions': [{'revid': pageid * 10, 'slots': {'main': {'content': text}}}],
+        'categories': [{'ns': 14, 'title': f'Kategória:{category}'} for category in categories],
+    }
+
+
+def titles_api(pages):
+    """Cím szerinti lekérdezést kiszolgáló site.api mock (kötegenként egy válasz)."""
+    def api(action, **params):
+        titles = params['titles'].split('|')
+        return {'query': {'pages': [pages.get(title, {'ns': 0, 'title': title, 'missing': True})
+                                    for title in titles]}}
+    return api
+
+
 @mock.patch('retriever.connect')
 def test_fetch_wiki_pages(mock_connect, tmp_path):
-    """Teszteli a fetch_wiki_pages függvényt."""
-    mock_page = mock.Mock()
-    mock_page.name = 'Test'
-    mock_page.text.return_value = 'Content'
-    mock_connect.return_value.allpages.return_value = [mock_page] * 2
+    """Teszteli a fetch_wiki_pages függvényt (címlistázás, majd kötegelt letöltés)."""
+    mock_connect.return_value.api.side_effect = [
+        {'query': {'allpages': [{'title': 'Test A'}, {'title': 'Test B'}]},
+         'continue': {'apcontinue': 'Test C', 'continue': '-||'}},
+        {'query': {'pages': [api_page('Test B', 'Content B', 2), api_page('Test A', 'Content A', 1)]}},
+    ]
 
     out_file = tmp_path / 'output.json'
     retriever.fetch_wiki_pages('example.org', limit=2, output_path=out_file)
@@ -128,51 +157,163 @@ def test_fetch_wiki_pages(mock_connect, tmp_path):
     with open(out_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
     assert len(data) == 2
-    assert data[0]['title'] == 'Test'
-    assert data[0]['text'] == 'Content'
+    assert data[0]['title'] == 'Test A'
+    assert data[0]['text'] == 'Content A'
+    assert data[0]['pageid'] == 1
+    # A limit az első listában elérve, további listázás nem indul
+    assert mock_connect.return_value.api.call_count == 2
+    assert mock_connect.return_value.api.call_args.kwargs['titles'] == 'Test A|Test B'
+
+
+@mock.patch('retriever.connect')
+def test_fetch_wiki_pages_resume(mock_connect, tmp_path, download_dir):
+    """Teszteli, hogy megszakadt letöltés az utolsó apcontinue pozíciótól folytatódik."""
+    mock_connect.return_value.api.side_effect = [
+        {'query': {'allpages': [{'title': 'Test A'}, {'title': 'Test B'}]},
+         'continue': {'apcontinue': 'Test C', 'continue': '-||'}},
+        {'query': {'pages': [api_page('Test A', 'Content A', 1), api_page('Test B', 'Content B', 2)]}},
+        ConnectionError('megszakadt'),
+    ]
+    out_file = tmp_path / 'output.json'
+    with pytest.raises(ConnectionError):
+        retriever.fetch_wiki_pages('example.org', limit=4, output_path=out_file)
+
+    # A kész oldalak már a JSONL fájlban vannak, a végleges fájl még nem létezik
+    assert not out_file.exists()
+    assert len((download_dir / 'output.jsonl').read_text(encoding='utf-8').splitlines()) == 2
+
+    mock_connect.return_value.api.side_effect = [
+        {'query': {'allpages': [{'title': 'Test C'}, {'title': 'Test D'}]}},
+        {'query': {'pages': [api_page('Test C', 'Content C', 3), api_page('Test D', 'Content D', 4)]}},
+    ]
+    mock_connect.return_value.api.reset_mock()
+    retriever.fetch_wiki_pages('example.org', limit=4, output_path=out_file)
+
+    first_call = mock_connect.return_value.api.call_args_list[0]
+    assert first_call.kwargs['apcontinue'] == 'Test C'
+    assert first_call.kwargs['aplimit'] == 2
+    with open(out_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert [page['title'] for page in data] == ['Test A', 'Test B', 'Test C', 'Test D']
+    assert list(download_dir.iterdir()) == []
+
+
+@mock.patch('retriever.connect')
+def test_fetch_wiki_pages_failed_batch_is_resumed(mock_connect, tmp_path, download_dir):
+    """Teszteli, hogy sikertelen köteg után az ellenőrzőpont megmarad, és az újraindítás pótolja."""
+    mock_connect.return_value.api.side_effect = [
+        {'query': {'allpages': [{'title': 'Test A'}, {'title': 'Test B'}]}},
+        ConnectionError('hálózati hiba'),
+    ]
+    out_file = tmp_path / 'output.json'
+    with pytest.raises(retriever.DownloadIncompleteError):
+        retriever.fetch_wiki_pages('example.org', limit=2, output_path=out_file)
+
+    assert not out_file.exists()
+    with open(download_dir / 'output.checkpoint.json', 'r', encoding='utf-8') as f:
+        assert json.load(f)['failed'] == ['Test A', 'Test B']
+
+    mock_connect.return_value.api.side_effect = [
+        {'query': {'pages': [api_page('Test A', 'Content A', 1), api_page('Test B', 'Content B', 2)]}},
+    ]
+    retriever.fetch_wiki_pages('example.org', limit=2, output_path=out_file)
+    with open(out_file, 'r', encoding='utf-8') as f:
+        assert [page['title'] for page in json.load(f)] == ['Test A', 'Test B']
+    assert list(download_dir.iterdir()) == []
+
+
+def test_page_writer_recovery(tmp_path, download_dir):
+    """Teszteli a félbemaradt sor levágását és a terv szerinti folytatást."""
+    output = tmp_path / 'wiki_pages.json'
+    plan = {'site': 'example.org', 'titles': 'abc'}
+    writer = retriever.PageWriter(output, plan)
+    writer.write([{'title': 'A', 'text': 'a'}], skipped=['Nincs'])
+    with open(writer.path, 'a', encoding='utf-8') as f:
+        f.write('{"title": "B", "te')
+
+    resumed = retriever.PageWriter(output, plan)
+    assert resumed.completed == {'A'} and resumed.skipped == {'Nincs'}
+    assert resumed.pending(['A', 'Nincs', 'B']) == ['B']
+    resumed.write([{'title': 'B', 'text': 'b'}])
+    assert resumed.finish(output) == 2
+    with open(output, 'r', encoding='utf-8') as f:
+        assert json.load(f) == [{'title': 'A', 'text': 'a'}, {'title': 'B', 'text': 'b'}]
+
+    # Eltérő terv esetén a letöltés elölről indul
+    retriever.PageWriter(output, plan).write([{'title': 'A', 'text': 'a'}])
+    assert retriever.PageWriter(output, {'site': 'example.org', 'titles': 'xyz'}).count == 0
 
 
 @mock.patch('retriever.mwclient.Site')
 def test_fetch_selected_pages_return(mock_site_class):
     """Teszteli a fetch_selected_pages_return függvényt."""
     mock_site = mock_site_class.return_value
-    page_mock = mock.Mock()
-    page_mock.exists = True
-    page_mock.text.return_value = "Sample Text"
-    mock_site.pages = {'TestPage': page_mock}
+    mock_site.api.side_effect = titles_api(
+        {'TestPage': api_page('TestPage', 'Sample Text', categories=['Teszt'])})
 
     pages = retriever.fetch_selected_pages_return('example.org', ['TestPage'])
     assert len(pages) == 1
     assert pages[0]['title'] == 'TestPage'
     assert pages[0]['text'] == 'Sample Text'
+    assert pages[0]['namespace'] == 0
+    assert pages[0]['categories'] == ['Teszt']
+    assert pages[0]['source'] == 'example.org'
+    assert pages[0]['revid'] == 10
 
 
 @mock.patch('retriever.mwclient.Site')
 def test_fetch_selected_pages_return_nonexistent_page(mock_site_class):
     """Teszteli nem létező oldallal."""
     mock_site = mock_site_class.return_value
-    page_mock = mock.Mock()
-    page_mock.exists = False
-    mock_site.pages = {'NonExistent': page_mock}
+    mock_site.api.side_effect = titles_api({})
 
     pages = retriever.fetch_selected_pages_return('example.org', ['NonExistent'])
     assert len(pages) == 0
 
 
+@mock.patch('retriever.mwclient.Site')
+def test_fetch_selected_pages_return_batches(mock_site_class):
+    """Teszteli, hogy API_BATCH_SIZE címenként egy kérés indul, a kért sorrendben."""
+    mock_site = mock_site_class.return_value
+    titles = [f'Oldal {i}' for i in range(120)]
+    mock_site.api.side_effect = titles_api(
+        {title: api_page(title, f'Szöveg {i}', i + 1) for i, title in enumerate(titles)})
+
+    pages = retriever.fetch_selected_pages_return('example.org', titles)
+    assert [page['title'] for page in pages] == titles
+    assert mock_site.api.call_count == 3
+
+
+@mock.patch('retriever.mwclient.Site')
+def test_fetch_selected_pages_return_redirect_and_continue(mock_site_class):
+    """Teszteli az átirányítást és a lapozott (clcontinue) kategóriákat."""
+    mock_site = mock_site_class.return_value
+    first = api_page('Madrid', 'Madrid Spanyolország fővárosa.', categories=['Főváros'])
+    rest = {'pageid': 1, 'ns': 0, 'title': 'Madrid',
+            'categories': [{'ns': 14, 'title': 'Kategória:Spanyolország'}]}
+    mock_site.api.side_effect = [
+        {'query': {'normalized': [{'from': 'madrid (város)', 'to': 'Madrid (város)'}],
+                   'redirects': [{'from': 'Madrid (város)', 'to': 'Madrid'}],
+                   'pages': [first]},
+         'continue': {'clcontinue': '1|Spanyolország', 'continue': '||'}},
+        {'query': {'pages': [rest]}},
+    ]
+
+    pages = retriever.fetch_selected_pages_return('example.org', ['madrid (város)'])
+    assert len(pages) == 1
+    assert pages[0]['title'] == 'madrid (város)'
+    assert pages[0]['categories'] == ['Főváros', 'Spanyolország']
+    assert mock_site.api.call_args.kwargs['clcontinue'] == '1|Spanyolország'
+
+
 @mock.patch('retriever.mwclient.Site')
 def test_fetch_related_pages_return(mock_site_class):
     """Teszteli a fetch_related_pages_return függvényt."""
     mock_site = mock_site_class.return_value
-    mock_site.api.return_value = {
-        'query': {
-            'prefixsearch': [{'title': 'PrefixTest'}]
-        }
-    }
-
-    page_mock = mock.Mock()
-    page_mock.exists = True
-    page_mock.text.return_value = "Prefix Page Text"
-    mock_site.pages = {'PrefixTest': page_mock}
+    mock_site.api.side_effect = [
+        {'query': {'prefixsearch': [{'title': 'PrefixTest'}]}},
+        {'query': {'pages': [api_page('PrefixTest', 'Prefix Page Text')]}},
+    ]
 
     results = retriever.fetch_related_pages_return('example.org', 'Prefix')
     assert len(results) == 1
@@ -193,6 +334,224 @@ def test_fetch_related_pages_return_no_results(mock_site_class):
     assert len(results) == 0
 
 
+def test_load_fetch_config(tmp_path):
+    """Teszteli a [fetch] beállítások betöltését."""
+    config_file = tmp_path / 'test.ini'
+    config_file.write_text("[fetch]\nworkers = 8\nrate_limit = 0\n", encoding='utf-8')
+
+    assert retriever.load_fetch_config(config_file) == {'workers': 8, 'rate_limit': 0.0}
+    assert retriever.load_fetch_config(tmp_path / 'missing.ini') == retriever.DEFAULT_FETCH_CONFIG
+
+    config_file.write_text("[fetch]\nworkers = sok\n", encoding='utf-8')
+    assert retriever.load_fetch_config(config_file) == retriever.DEFAULT_FETCH_CONFIG
+
+
+def test_rate_limiter_spacing():
+    """Teszteli, hogy a kérések a korlát szerinti időközönként indulnak."""
+    limiter = retriever.RateLimiter(50)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.wait()
+    # Az első kérés azonnal indul, utána 5 x 20 ms
+    assert time.monotonic() - start >= 0.09
+
+    unlimited = retriever.RateLimiter(0)
+    start = time.monotonic()
+    for _ in range(100):
+        unlimited.wait()
+    assert time.monotonic() - start < 0.05
+
+
+@mock.patch('retriever.mwclient.Site')
+def test_open_session_logs_in_once(mock_site_class, tmp_path):
+    """Teszteli a közös kapcsolatot: connection pool és egyszeri bejelentkezés."""
+    config_file = tmp_path / 'test.ini'
+    config_file.write_text("[fetch]\nworkers = 3\nrate_limit = 0\n", encoding='utf-8')
+    titles = [f'Oldal {i}' for i in range(150)]
+    mock_site_class.return_value.api.side_effect = titles_api(
+        {title: api_page(title, f'Szöveg {i}', i + 1) for i, title in enumerate(titles)})
+
+    session = retriever.open_session('example.org', '/w/', 'user', 'pass', conf_file=config_file)
+    selected = retriever.fetch_selected_pages_return('example.org', titles[:100], session=session)
+    related = retriever.fetch_selected_pages_return('example.org', titles[100:], session=session)
+
+    assert session.workers == 3
+    assert isinstance(mock_site_class.call_args.kwargs['pool'], retriever.requests.Session)
+    mock_site_class.assert_called_once()
+    mock_site_class.return_value.login.assert_called_once_with('user', 'pass')
+    assert [page['title'] for page in selected + related] == titles
+    assert mock_site_class.return_value.api.call_count == 3
+
+
+def test_session_map_runs_batches_concurrently():
+    """Teszteli, hogy a kötegek párhuzamosan futnak, az eredmény sorrendje megmarad."""
+    session = retriever.WikiSession(mock.Mock(), 'example.org', workers=4, rate_limit=0)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def fetch(item):
+        barrier.wait()  # Csak akkor halad tovább, ha mind a 4 köteg egyszerre fut
+        return item * 2
+
+    assert session.map(fetch, [1, 2, 3, 4]) == [2, 4, 6, 8]
+
+
+def test_recent_changes():
+    """Teszteli a recentchanges feldolgozását (szerkesztés, új oldal, átnevezés, törlés)."""
+    site = mock.Mock()
+    site.api.side_effect = [
+        {'query': {'recentchanges': [
+            {'type': 'edit', 'ns': 0, 'title': 'Madrid'},
+            {'type': 'new', 'ns': 0, 'title': 'Madrid metró'},
+            {'type': 'new', 'ns': 1, 'title': 'Vita:Madrid'},
+        ]}, 'continue': {'rccontinue': '20261017|42', 'continue': '-||'}},
+        {'query': {'recentchanges': [
+            {'type': 'log', 'ns': 0, 'title': 'Sevilla', 'logtype': 'move',
+             'logparams': {'target_ns': 0, 'target_title': 'Sevilla (város)'}},
+            {'type': 'log', 'ns': 0, 'title': 'Toledo', 'logtype': 'delete'},
+            {'type': 'log', 'ns': 0, 'title': 'Bilbao', 'logtype': 'protect'},
+        ]}},
+    ]
+
+    touched, created = retriever.recent_changes(
+        site, retriever.datetime(2026, 10, 17, 8, tzinfo=retriever.timezone.utc))
+
+    assert touched == {'Madrid', 'Madrid metró', 'Vita:Madrid', 'Sevilla', 'Toledo'}
+    assert created == {'Madrid metró', 'Sevilla (város)'}
+    assert site.api.call_args_list[0].kwargs['rcstart'] == '2026-10-17T08:00:00Z'
+    assert site.api.call_args.kwargs['rccontinue'] == '20261017|42'
+
+
+def test_sync_state_roundtrip(tmp_path):
+    """Teszteli a szinkronizációs állapot mentését és betöltését."""
+    path = tmp_path / 'data' / 'sync_state.json'
+    assert retriever.load_sync_state(path) is None
+
+    timestamp = retriever.datetime(2026, 10, 17, 9, 30, tzinfo=retriever.timezone.utc)
+    retriever.save_sync_state('example.org', timestamp, path)
+    assert retriever.load_sync_state(path) == {'site': 'example.org', 'timestamp': timestamp}
+
+    path.write_text('{"site": "example.org"}', encoding='utf-8')
+    assert retriever.load_sync_state(path) is None
+
+
+class TestSyncFromConfig:
+    """Tesztek az inkrementális frissítéshez (sync_from_config)."""
+
+    @pytest.fixture
+    def wiki(self, tmp_path, monkeypatch):
+        """Letöltött oldalak és szinkronizációs állapot egy ideiglenes könyvtárban."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'wiki_rag.ini').write_text(
+            "[wiki]\nurl = example.org\n\n[related]\nroot = Madrid\n", encoding='utf-8')
+        pages = [api_page('Madrid', 'Régi szöveg', 1),
+                 api_page('Madrid metró', 'Metró', 2),
+                 api_page('Madridi Atlético', 'Foci', 3)]
+        retriever._write_pages([retriever.page_from_api(page, 'example.org') for page in pages],
+                               retriever.DEFAULT_OUTPUT)
+        return tmp_path
+
+    def session(self, responses):
+        """WikiSession mock site-tal, sorban visszaadott API válaszokkal."""
+        site = mock.Mock()
+        site.api.side_effect = responses
+        return retriever.WikiSession(site, 'example.org', workers=1, rate_limit=0)
+
+    def test_without_state_needs_full_download(self, wiki):
+        """Teszteli, hogy állapot nélkül teljes letöltés szükséges."""
+        assert retriever.sync_from_config('wiki_rag.ini') is None
+
+    def test_recent_changes_refetch_only_changed_pages(self, wiki):
+        """Teszteli, hogy csak a változott és az új oldalak töltődnek le újra."""
+        retriever.save_sync_state('example.org', retriever.datetime.now(retriever.timezone.utc))
+        session = self.session([
+            {'query': {'recentchanges': [
+                {'type': 'edit', 'ns': 0, 'title': 'Madrid'},
+                {'type': 'edit', 'ns': 0, 'title': 'Madrid metró'},
+                {'type': 'log', 'ns': 0, 'title': 'Madridi Atlético', 'logtype': 'delete'},
+                {'type': 'new', 'ns': 0, 'title': 'Madridi egyetem'},
+                {'type': 'new', 'ns': 0, 'title': 'Barcelona'},
+            ]}},
+            {'query': {'pages': [
+                api_page('Madrid metró', 'Metró', 2),
+                dict(api_page('Madrid', 'Új szöveg', 1), revisions=[
+                    {'revid': 11, 'slots': {'main': {'content': 'Új szöveg'}}}]),
+                api_page('Madridi egyetem', 'Egyetem', 4),
+                {'ns': 0, 'title': 'Madridi Atlético', 'missing': True},
+            ]}},
+        ])
+        with mock.patch('retriever.open_session', return_value=session):
+            changes = retriever.sync_from_config('wiki_rag.ini')
+
+        # A revid-je alapján változatlan 'Madrid metró' kimarad
+        assert [page['title'] for page in changes['updated']] == ['Madrid', 'Madridi egyetem']
+        assert [page['title'] for page in changes['removed']] == ['Madridi Atlético']
+        assert session.site.api.call_count == 2
+        with open(retriever.DEFAULT_OUTPUT, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert [page['title'] for page in data] == ['Madrid', 'Madrid metró', 'Madridi egyetem']
+        assert data[0]['text'] == 'Új szöveg'
+
+    def test_move_with_redirect_updates_new_title_only(self, wiki):
+        """Teszteli, hogy átirányítást hagyó átnevezésnél a pageid csak egyszer, az új címen szerepel."""
+        retriever.save_sync_state('example.org', retriever.datetime.now(retriever.timezone.utc))
+        moved = dict(api_page('Madridi metró', 'Metró', 2), revisions=[
+            {'revid': 21, 'slots': {'main': {'content': 'Metró'}}}])
+        session = self.session([
+            {'query': {'recentchanges': [
+                {'type': 'log', 'ns': 0, 'title': 'Madrid metró', 'logtype': 'move',
+                 'logparams': {'target_ns': 0, 'target_title': 'Madridi metró'}},
+            ]}},
+            {'query': {'redirects': [{'from': 'Madrid metró', 'to': 'Madridi metró'}],
+                       'pages': [moved]}},
+        ])
+        with mock.patch('retriever.open_session', return_value=session):
+            changes = retriever.sync_from_config('wiki_rag.ini')
+
+        assert [page['title'] for page in changes['updated']] == ['Madridi metró']
+        assert changes['removed'] == []
+        with open(retriever.DEFAULT_OUTPUT, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert [page['title'] for page in data] == ['Madrid', 'Madridi Atlético', 'Madridi metró']
+        assert [page['pageid'] for page in data].count(2) == 1
+
+    def test_failed_batch_keeps_sync_state(self, wiki):
+        """Teszteli, hogy sikertelen köteg után a szinkronizációs állapot nem lép előre."""
+        since = (retriever.datetime.now(retriever.timezone.utc)
+                 - retriever.timedelta(hours=1)).replace(microsecond=0)
+        retriever.save_sync_state('example.org', since)
+        session = self.session([
+            {'query': {'recentchanges': [{'type': 'edit', 'ns': 0, 'title': 'Madrid'}]}},
+            ConnectionError('hálózati hiba'),
+        ])
+        with mock.patch('retriever.open_session', return_value=session):
+            changes = retriever.sync_from_config('wiki_rag.ini')
+
+        assert changes == {'updated': [], 'removed': []}
+        assert retriever.load_sync_state()['timestamp'] == since
+
+    def test_old_state_compares_revisions(self, wiki):
+        """Teszteli a revid-összevetést a recentchanges megőrzési idejénél régebbi állapotnál."""
+        retriever.save_sync_state('example.org', retriever.datetime(
+            2020, 1, 1, tzinfo=retriever.timezone.utc))
+        session = self.session([
+            {'query': {'pages': [
+                {'title': 'Madrid', 'lastrevid': 11},
+                {'title': 'Madrid metró', 'lastrevid': 20},
+                {'title': 'Madridi Atlético', 'lastrevid': 30},
+            ]}},
+            {'query': {'pages': [dict(api_page('Madrid', 'Új szöveg', 1), revisions=[
+                {'revid': 11, 'slots': {'main': {'content': 'Új szöveg'}}}])]}},
+        ])
+
+        with mock.patch('retriever.open_session', return_value=session):
+            changes = retriever.sync_from_config('wiki_rag.ini')
+
+        assert [page['revid'] for page in changes['updated']] == [11]
+        assert changes['removed'] == []
+        assert session.site.api.call_args_list[0].kwargs['prop'] == 'info'
+        assert session.site.api.call_args.kwargs['titles'] == 'Madrid'
+
+
 class TestAutoFetchFromConfig:
     """Tesztek az auto_fetch_from_config függvényhez."""
 
@@ -218,10 +577,12 @@ class TestAutoFetchFromConfig:
 
         retriever.auto_fetch_from_config('test.ini')
 
+    @mock.patch('retriever.save_sync_state')
+    @mock.patch('retriever.open_session')
     @mock.patch('retriever.os.path.exists')
     @mock.patch('retriever.configparser.ConfigParser')
     @mock.patch('retriever.fetch_wiki_pages')
-    def test_empty_selected_and_related(self, mock_fetch_wiki, mock_config_parser, mock_exists):
+    def test_empty_selected_and_related(self, mock_fetch_wiki, mock_config_parser, mock_exists, mock_session, mock_state):
         """Teszteli üres selected és related szekciók esetét."""
         mock_exists.return_value = True
         mock_config = mock.Mock()
@@ -245,14 +606,24 @@ class TestAutoFetchFromConfig:
 
         mock_fetch_wiki.assert_called_once()
 
+    @pytest.fixture
+    def output(self, tmp_path, monkeypatch):
+        output = tmp_path / 'wiki_pages.json'
+        monkeypatch.setattr(retriever, 'DEFAULT_OUTPUT', output)
+        return output
+
+    @staticmethod
+    def wiki_session(mock_session, pages):
+        site = mock.Mock()
+        site.api.side_effect = titles_api(pages)
+        mock_session.return_value = retriever.WikiSession(site, 'example.org', workers=2, rate_limit=0)
+        return site
+
+    @mock.patch('retriever.save_sync_state')
+    @mock.patch('retriever.open_session')
     @mock.patch('retriever.os.path.exists')
     @mock.patch('retriever.configparser.ConfigParser')
-    @mock.patch('retriever.fetch_selected_pages_return')
-    @mock.patch('retriever.os.makedirs')
-    @mock.patch('builtins.open', new_callable=mock.mock_open)
-    @mock.patch('json.dump')
-    def test_selected_pages_only(self, mock_json_dump, mock_open, mock_makedirs, 
-                                mock_selected, mock_config_parser, mock_exists):
+    def test_selected_pages_only(self, mock_config_parser, mock_exists, mock_session, mock_state, output):
         """Teszteli csak selected pages esetét."""
         mock_exists.return_value = True
         mock_config = mock.Mock()
@@ -268,13 +639,14 @@ class TestAutoFetchFromConfig:
         }.get((s, k), fallback)
         
         mock_config_parser.return_value = mock_config
-        mock_selected.return_value = [{'title': 'Test', 'text': 'Content'}]
+        self.wiki_session(mock_session, {'TestPage': api_page('TestPage', 'Content')})
 
         with mock.patch('retriever._parse_selected_pages', return_value=['TestPage']):
             retriever.auto_fetch_from_config('test.ini')
 
-        mock_selected.assert_called_once()
-        mock_json_dump.assert_called_once()
+        with open(output, 'r', encoding='utf-8') as f:
+            assert [page['title'] for page in json.load(f)] == ['TestPage']
+        mock_state.assert_called_once()
 
     @mock.patch('retriever.os.path.exists')
     @mock.patch('retriever.configparser.ConfigParser')
@@ -293,15 +665,13 @@ class TestAutoFetchFromConfig:
         
         mock_parse.assert_called_once()
 
+    @mock.patch('retriever.save_sync_state')
+    @mock.patch('retriever.open_session')
     @mock.patch('retriever.os.path.exists')
     @mock.patch('retriever.configparser.ConfigParser')
-    @mock.patch('retriever.fetch_selected_pages_return')
-    @mock.patch('retriever.fetch_related_pages_return')
-    @mock.patch('retriever.os.makedirs')
-    @mock.patch('builtins.open', new_callable=mock.mock_open)
-    @mock.patch('json.dump')
-    def test_selected_and_related_pages(self, mock_json_dump, mock_open, mock_makedirs,
-                                      mock_related, mock_selected, mock_config_parser, mock_exists):
+    @mock.patch('retriever.search_prefix')
+    def test_selected_and_related_pages(self, mock_search, mock_config_parser, mock_exists,
+                                        mock_session, mock_state, output):
         """Teszteli selected és related pages kombinációját."""
         mock_exists.return_value = True
         mock_config = mock.Mock()
@@ -318,24 +688,26 @@ class TestAutoFetchFromConfig:
         }.get((s, k), fallback)
         
         mock_config_parser.return_value = mock_config
-        mock_selected.return_value = [{'title': 'Selected', 'text': 'Content'}]
-        mock_related.return_value = [{'title': 'Related', 'text': 'Content'}]
+        site = self.wiki_session(mock_session, {
+            'Selected': api_page('Selected', 'Content', 1),
+            'Related': api_page('Related', 'Content', 2)})
+        mock_search.return_value = ['Related', 'Selected']
 
-        with mock.patch('retriever._parse_selected_pages', return_value=['SelectedPage']):
+        with mock.patch('retriever._parse_selected_pages', return_value=['Selected']):
             retriever.auto_fetch_from_config('test.ini')
 
-        mock_selected.assert_called_once()
-        mock_related.assert_called_once()
-        mock_json_dump.assert_called_once()
+        # Egyetlen közös kapcsolat, a kétszer talált oldal csak egyszer töltődik le
+        mock_session.assert_called_once()
+        assert mock_search.call_args[0] == (mock_session.return_value, 'Python', 50)
+        assert site.api.call_args.kwargs['titles'] == 'Selected|Related'
+        with open(output, 'r', encoding='utf-8') as f:
+            assert [page['title'] for page in json.load(f)] == ['Selected', 'Related']
 
+    @mock.patch('retriever.save_sync_state')
+    @mock.patch('retriever.open_session')
     @mock.patch('retriever.os.path.exists')
     @mock.patch('retriever.configparser.ConfigParser')
-    @mock.patch('retriever.fetch_selected_pages_return')
-    @mock.patch('retriever.os.makedirs')
-    @mock.patch('builtins.open', new_callable=mock.mock_open)
-    @mock.patch('json.dump')
-    def test_limit_exceeded_selected_pages(self, mock_json_dump, mock_open, mock_makedirs,
-                                         mock_selected, mock_config_parser, mock_exists):
+    def test_limit_exceeded_selected_pages(self, mock_config_parser, mock_exists, mock_session, mock_state, output):
         """Teszteli a limit túllépését selected pages esetén."""
         mock_exists.return_value = True
         mock_config = mock.Mock()
@@ -351,18 +723,38 @@ class TestAutoFetchFromConfig:
         }.get((s, k), fallback)
         
         mock_config_parser.return_value = mock_config
-        mock_selected.return_value = [
-            {'title': 'Page1', 'text': 'Content1'},
-            {'title': 'Page2', 'text': 'Content2'}
-        ]
+        site = self.wiki_session(mock_session, {
+            f'P{i}': api_page(f'P{i}', f'Content{i}', i) for i in range(1, 6)})
 
         # 5 oldal van kiválasztva, de limit csak 2
         with mock.patch('retriever._parse_selected_pages', return_value=['P1', 'P2', 'P3', 'P4', 'P5']):
             retriever.auto_fetch_from_config('test.ini')
 
-        # A mock_selected csak 2 oldallal lett meghívva (limit miatt)
-        call_args = mock_selected.call_args[0]
-        assert len(call_args[1]) == 2  # titles lista csak 2 elemet tartalmaz
+        # Csak az első 2 oldal töltődik le (limit miatt)
+        assert site.api.call_count == 1
+        assert site.api.call_args.kwargs['titles'] == 'P1|P2'
+
+    @mock.patch('retriever.save_sync_state')
+    @mock.patch('retriever.open_session')
+    def test_resume_selected_pages(self, mock_session, mock_state, output, download_dir, tmp_path):
+        """Teszteli, hogy újraindításkor a kész oldalak nem töltődnek le újra."""
+        config_file = tmp_path / 'wiki_rag.ini'
+        config_file.write_text('[wiki]\nurl = example.org\nlimit = 10\n\n'
+                               '[selected]\npages = P1, P2, P3\n', encoding='utf-8')
+        titles = ['P1', 'P2', 'P3']
+        pages = {title: api_page(title, 'Content', i) for i, title in enumerate(titles, 1)}
+        site = self.wiki_session(mock_session, pages)
+        plan = {'site': 'example.org', 'titles': retriever._plan_digest(titles)}
+        retriever.PageWriter(output, plan).write(
+            retriever.fetch_titles(site, ['P1'], 'example.org'))
+        site.api.reset_mock()
+
+        retriever.auto_fetch_from_config(config_file)
+
+        assert site.api.call_args.kwargs['titles'] == 'P2|P3'
+        with open(output, 'r', encoding='utf-8') as f:
+            assert [page['title'] for page in json.load(f)] == titles
+        assert list(download_dir.iterdir()) == []
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:41 2026
+
+@author: zsolt
+"""
+
+import pytest
+from embedder import Embedder
+from index_factory import load_index_config
+from sharded_embedder import ShardedEmbedder, load_shard_config, shard_name
+
+MODEL = 'paraphrase-multilingual-mpnet-base-v2'
+
+
+@pytest.fixture
+def docs():
+    pages = [('huwiki', 'Kutya', 'A kutya ugat a holdra.'),
+             ('huwiki', 'Macska', 'A macska alszik a napon.'),
+             ('enwiki', 'Bird', 'A madarak repülnek az égen.'),
+             ('enwiki', 'Fish', 'A hal úszik a vízben.')]
+    return [{'source': source, 'title': title, 'text': text} for source, title, text in pages]
+
+
+def shard_config(tmp_path, partition='hash', count=3):
+    return {'partition': partition, 'count': count, 'dir': tmp_path / 'shards', 'workers': 0}
+
+
+def test_load_shard_config(tmp_path):
+    assert load_shard_config(tmp_path / 'nincs.ini')['partition'] == 'none'
+
+    path = tmp_path / 'wiki_rag.ini'
+    path.write_text('[shards]\npartition = source\ncount = 8\ndir = /tmp/x\n', encoding='utf-8')
+    config = load_shard_config(path)
+    assert (config['partition'], config['count'], str(config['dir'])) == ('source', 8, '/tmp/x')
+
+
+def test_shard_name():
+    assert shard_name('hu.wikipedia.org/w/') == 'hu.wikipedia.org_w'
+    assert shard_name('') == 'default'
+
+
+def test_matches_single_index(tmp_path, docs):
+    sharded = ShardedEmbedder(MODEL, shard_config=shard_config(tmp_path))
+    sharded.build_index(docs)
+    single = Embedder(MODEL)
+    single.build_index(docs)
+
+    assert len(sharded.documents) == len(docs)
+    for question in ('Mit csinál a kutya?', 'Hol úszik a hal?'):
+        expected = [(result.doc_id, round(result.score, 5))
+                    for result in single.search(question, top_k=3)]
+        found = [(result.doc_id, round(result.score, 5))
+                 for result in sharded.search(question, top_k=3)]
+        assert sorted(found) == sorted(expected)
+    assert [result.rank for result in sharded.search('kutya', top_k=3)] == [1, 2, 3]
+    assert len(sharded.search('kutya', top_k=2, max_per_page=1, mmr_lambda=0.5)) == 2
+
+
+def test_source_shards_independent(tmp_path, docs):
+    config = shard_config(tmp_path, partition='source')
+    sharded = ShardedEmbedder(MODEL, shard_config=config)
+    sharded.build_index(docs)
+    sharded.save()
+    assert sharded.shard_names == ['enwiki', 'huwiki']
+
+    loaded = ShardedEmbedder(MODEL, shard_config=config)
+    loaded.load()
+    assert len(loaded.documents) == len(docs)
+    assert loaded.query('A kutya ugat a holdra.', top_k=1)[0]['title'] == 'Kutya'
+
+    # Egy shard újraépítése a másikat nem érinti
+    other = loaded.shard('enwiki')
+    loaded.build_shard('huwiki', [{'source': 'huwiki', 'title': 'Ló', 'text': 'A ló vágtat.'}])
+    loaded.save_shard('huwiki')
+    assert loaded.shard('enwiki') is other
+    assert loaded.query('A ló vágtat.', top_k=1)[0]['title'] == 'Ló'
+    assert loaded.query('kutya', top_k=4, filters={'source': 'enwiki'})[0]['source'] == 'enwiki'
+
+    loaded.load_shard('huwiki')
+    assert len(loaded.shard('huwiki').documents) == 1
+
+
+def test_upsert_remove_and_rebuild(tmp_path, docs):
+    sharded = ShardedEmbedder(MODEL, shard_config=shard_config(tmp_path, partition='source'))
+    sharded.build_index(docs)
+    sharded.upsert([{'source': 'dewiki', 'title': 'Hund', 'text': 'Der Hund bellt.'}])
+    assert 'dewiki' in sharded.shard_names
+    assert sharded.remove(sharded.ids_for_pages(['Kutya'])) == 1
+    assert len(sharded.documents) == len(docs)
+    sharded.save()
+
+    # Teljes újraépítésnél a dokumentum nélküli shard törlődik
+    sharded.build_index(docs)
+    assert sharded.shard_names == ['enwiki', 'huwiki']
+    assert sharded.saved_shards() == ['enwiki', 'huwiki']
+
+
+def test_update_shards_copy_on_write(tmp_path, docs):
+    config = shard_config(tmp_path, partition='source')
+    index_config = {**load_index_config(tmp_path / 'nincs.ini'), 'rerank': 4}
+    sharded = ShardedEmbedder(MODEL, shard_config=config, index_config=index_config)
+    sharded.build_index(docs)
+    sharded.save()
+    old_huwiki, old_enwiki = sharded.shard('huwiki'), sharded.shard('enwiki')
+
+    changed = sharded.update_shards(
+        [{'source': 'huwiki', 'title': 'Kutya'}, {'source': 'huwiki', 'title': 'Macska'}],
+        [{'source': 'huwiki', 'title': 'Kutya', 'text': 'A kutya a kertben ás.'},
+         {'source': 'dewiki', 'title': 'Hund', 'text': 'Der Hund bellt.'}])
+
+    assert changed == ['dewiki', 'huwiki']
+    # A régi példány változatlan maradt, a frissített shard atomi cserével került a helyére
+    assert sharded.shard('enwiki') is old_enwiki
+    assert sharded.shard('huwiki') is not old_huwiki
+    assert sorted(doc['text'] for doc in old_huwiki.documents) == [
+        'A kutya ugat a holdra.', 'A macska alszik a napon.']
+    assert old_huwiki.query('A kutya ugat a holdra.', top_k=1)[0]['title'] == 'Kutya'
+    assert [doc['text'] for doc in sharded.shard('huwiki').documents] == ['A kutya a kertben ás.']
+    assert sharded.query('Der Hund bellt.', top_k=1)[0]['title'] == 'Hund'
+
+    # A vektortár felváltva a két fájlba kerül, az új állapot mentve van
+    assert sharded.shard('huwiki').vector_store.path.name == 'vectors.next.f32'
+    loaded = ShardedEmbedder(MODEL, shard_config=config, index_config=index_config)
+    loaded.load()
+    assert loaded.shard_names == ['dewiki', 'enwiki', 'huwiki']
+    assert loaded.query('A kutya a kertben ás.', top_k=1)[0]['text'] == 'A kutya a kertben ás.'
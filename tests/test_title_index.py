@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:58:20 2026
+
+@author: zsolt
+"""
+
+import time
+import pytest
+from title_index import TitleIndex, fold
+
+
+@pytest.fixture
+def index():
+    return TitleIndex(['Madrid', 'Madridi Királyi Palota', 'Barcelona', 'Győr',
+                       'Győr-Moson-Sopron vármegye', 'Gyöngyös', 'Szent István'])
+
+
+def test_fold():
+    assert fold('Győr-Moson-Sopron?') == 'gyor moson sopron'
+    assert fold('  Szent_István ') == 'szent istvan'
+    assert fold('ŐSZ') == fold('ősz') == 'osz'
+
+
+def test_match_exact_and_folded(index):
+    assert index.match('Madrid') == 'Madrid'
+    assert index.match('barcelona?') == 'Barcelona'
+    assert index.match('gyor') == 'Győr'
+    assert index.match('Szent Istvan') == 'Szent István'
+
+
+def test_match_fuzzy(index):
+    assert index.match('Barcelóna') == 'Barcelona'
+    assert index.match('Barcelonna') == 'Barcelona'
+    assert index.match('Gyöngyössz') == 'Gyöngyös'
+    assert index.match('Budapest') is None
+
+
+def test_match_rejects_questions(index):
+    assert index.match('Mi Madrid lakossága?') is None
+    assert index.match('') is None
+
+
+def test_suggest(index):
+    assert index.suggest('madr') == ['Madrid', 'Madridi Királyi Palota']
+    assert index.suggest('GYO', limit=2) == ['Gyöngyös', 'Győr']
+    assert index.suggest('győr') == ['Győr', 'Győr-Moson-Sopron vármegye']
+    assert index.suggest('xyz') == []
+
+
+def test_suggest_is_fast():
+    index = TitleIndex(f'Oldal {number}' for number in range(200000))
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.suggest('oldal 1234')
+    assert (time.perf_counter() - start) / 1000 < 0.001
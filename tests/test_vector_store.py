@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 17:58:40 2026
+
+@author: zsolt
+"""
+
+import numpy as np
+import pytest
+from vector_store import VectorStore, ids_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VectorStore(tmp_path / 'vectors.f32', 4, create=True)
+
+
+def test_add_and_get(store):
+    vectors = np.arange(12, dtype='float32').reshape(3, 4)
+    store.add([10, 20, 30], vectors)
+
+    found_vectors, found = store.get([30, 99, 10])
+    assert found.tolist() == [True, False, True]
+    assert np.array_equal(found_vectors[0], vectors[2])
+    assert not found_vectors[1].any()
+    assert np.array_equal(found_vectors[2], vectors[0])
+    assert len(store) == 3 and 20 in store
+
+
+def test_replace_and_remove(store):
+    store.add([1, 2], np.ones((2, 4), dtype='float32'))
+    store.add([1], np.full((1, 4), 5, dtype='float32'))
+    store.remove([2])
+
+    vectors, found = store.get([1, 2])
+    assert found.tolist() == [True, False]
+    assert (vectors[0] == 5).all()
+    assert len(store) == 1
+
+
+def test_flush_and_reopen(store, tmp_path):
+    vectors = np.random.default_rng(0).random((5, 4), dtype='float32')
+    store.add(range(5), vectors)
+    store.remove([3])
+    store.flush()
+    assert ids_path(store.path) == tmp_path / 'vectors.ids.npy'
+
+    reopened = VectorStore(tmp_path / 'vectors.f32', 4)
+    assert len(reopened) == 4 and 3 not in reopened
+    found_vectors, _ = reopened.get([4])
+    assert np.array_equal(found_vectors[0], vectors[4])
+
+
+def test_copy_leaves_original_untouched(store, tmp_path):
+    vectors = np.random.default_rng(0).random((3, 4), dtype='float32')
+    store.add(range(3), vectors)
+    store.flush()
+    original = store.path.read_bytes()
+
+    copy = store.copy(tmp_path / 'uj' / 'vectors.f32')
+    copy.remove([0])
+    copy.add([5], vectors[:1])
+    copy.flush()
+
+    assert store.path.read_bytes() == original
+    assert len(VectorStore(store.path, 4)) == 3
+    reopened = VectorStore(tmp_path / 'uj' / 'vectors.f32', 4)
+    assert 0 not in reopened and 5 in reopened
+    found_vectors, _ = reopened.get([2, 5])
+    assert np.array_equal(found_vectors, vectors[[2, 0]])
+
+
+def test_missing_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        VectorStore(tmp_path / 'nincs.f32', 4)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:26:53 2026
+@author: zsolt
+
+Memóriabeli címindex: oldalnév-felismerés és cím-automatikus kiegészítés.
+
+A címek ékezet- és kisbetű-független kulcsot kapnak (fold: "Győr" -> "gyor"),
+a kulcsok rendezett tömbben tárolódnak. Ez egy tömörített trie: egy előtag
+összes folytatása egyetlen összefüggő szelet, amelyet bináris keresés talál
+meg, így a prefix keresés O(log n) és csúcsonkénti objektumok nélkül is
+milliós címszámnál kis memóriát használ.
+
+A match() a teljes kérdést oldalnévként próbálja értelmezni: pontos
+(fold utáni) egyezés, vagy elgépelés esetén azonos előtagú, hasonló hosszú
+címek közül a legközelebbi (difflib arány >= FUZZY_THRESHOLD).
+"""
+import re
+import bisect
+import difflib
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ennél több szóból álló kérdés nem oldalnév
+MAX_TITLE_WORDS = 8
+FUZZY_THRESHOLD = 0.85
+# Elgépelés-tűrésnél a jelöltek ennyi kezdőkarakterben egyeznek a kérdéssel
+FUZZY_PREFIX = 2
+FUZZY_MIN_LENGTH = 4
+FUZZY_MAX_CANDIDATES = 5000
+
+SEPARATOR_PATTERN = re.compile(r'[\W_]+')
+
+
+def fold(text):
+    """
+    Cím vagy kérdés ékezet- és kisbetű-független kulcsa.
+
+    Az ékezetek (pl. á, ő, ű) elhagyódnak, a kis- és nagybetűk nem
+    különböznek, az írásjelek és aláhúzások szóközzé válnak.
+
+    Args:
+        text (str): A szöveg.
+
+    Returns:
+        str: A kulcs, pl. "Győr-Moson-Sopron?" -> "gyor moson sopron".
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(SEPARATOR_PATTERN.sub(' ', stripped.casefold()).split())
+
+
+class TitleIndex:
+    """
+    Címindex pontos és elgépelés-tűrő oldalnév-felismeréssel és prefix kereséssel.
+
+    Létrehozás után nem módosul; az index frissítésekor újraépítendő.
+    """
+
+    def __init__(self, titles):
+        """
+        Args:
+            titles (iterable): Az oldalcímek.
+        """
+        by_key = {}
+        for title in titles:
+            key = fold(title)
+            if key:
+                by_key.setdefault(key, []).append(title)
+        self._keys = sorted(by_key)
+        self._titles = [sorted(by_key[key]) for key in self._keys]
+        logger.info("Címindex kész: %d cím", len(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _prefix_range(self, prefix):
+        """A prefix-szel kezdődő kulcsok [eleje, vége) tartománya."""
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + '\uffff', lo=start)
+        return start, end
+
+    def match(self, text):
+        """
+        A szöveg által megnevezett oldal címe.
+
+        Args:
+            text (str): A kérdés, pl. "Madrid" vagy "barcelóna?".
+
+        Returns:
+            str: A felismert oldalcím, vagy None, ha a szöveg nem oldalnév.
+        """
+        key = fold(text)
+        if not key or len(key.split()) > MAX_TITLE_WORDS:
+            return None
+
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            titles = self._titles[position]
+            return text.strip() if text.strip() in titles else titles[0]
+
+        if len(key) < FUZZY_MIN_LENGTH:
+            return None
+        start, end = self._prefix_range(key[:FUZZY_PREFIX])
+        matcher = difflib.SequenceMatcher(a=key, autojunk=False)
+        best, best_ratio = None, FUZZY_THRESHOLD
+        for position in range(start, min(end, start + FUZZY_MAX_CANDIDATES)):
+            candidate = self._keys[position]
+            if abs(len(candidate) - len(key)) > 2:
+                continue
+            matcher.set_seq2(candidate)
+            if matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = position, ratio
+        if best is None:
+            return None
+        logger.debug("Közelítő címegyezés: %r -> %r (%.2f)", text, self._titles[best][0], best_ratio)
+        return self._titles[best][0]
+
+    def suggest(self, prefix, limit=10):
+        """
+        Címjavaslatok egy előtaghoz (ékezet- és kisbetű-függetlenül).
+
+        Args:
+            prefix (str): A begépelt előtag.
+            limit (int, optional): A javaslatok legnagyobb száma. Alapértelmezett: 10
+
+        Returns:
+            list: Oldalcímek a kulcsok ábécérendjében.
+        """
+        key = fold(prefix)
+        if not key or limit <= 0:
+            return []
+        start, end = self._prefix_range(key)
+        suggestions = []
+        for position in range(start, end):
+            suggestions.extend(self._titles[position])
+            if len(suggestions) >= limit:
+                break
+        return suggestions[:limit]
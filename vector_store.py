@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 17:32:18 2026
+@author: zsolt
+
+Teljes pontosságú vektorok lemezen, azonosító szerint.
+
+Tömörített (fp16, sq8, pq, binary) index mellett a keresés jelöltjei ezekkel
+a float32 vektorokkal pontozhatók újra pontosan. A vektorok egy memóriába
+leképezett, csak hozzáfűzhető fájlba (.f32) íródnak, mellé egy azonosító-tábla
+(.ids.npy) kerül (id, sor) párokkal. Törléskor és cserénél csak a tábla
+változik; a felszabadult sorok a következő teljes újraépítéskor tűnnek el.
+"""
+import os
+import shutil
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def ids_path(vectors_path):
+    """Az azonosító-tábla útvonala (pl. data/vectors.ids.npy)."""
+    vectors_path = Path(vectors_path)
+    return vectors_path.with_name(vectors_path.stem + '.ids.npy')
+
+
+class VectorStore:
+    """
+    Lemezen tárolt float32 vektorok azonosító szerinti eléréssel.
+
+    Attributes:
+        path (Path): A vektorfájl útvonala.
+        dim (int): A vektorok dimenziója.
+    """
+
+    def __init__(self, path, dim, create=False):
+        """
+        Vektortár megnyitása vagy létrehozása.
+
+        Args:
+            path (Path): A vektorfájl (.f32) útvonala.
+            dim (int): A vektorok dimenziója.
+            create (bool, optional): Igaz esetén üres tár jön létre (a meglévő
+                fájl felülíródik).
+
+        Raises:
+            FileNotFoundError: Ha create=False és a fájlok nem léteznek.
+        """
+        self.path = Path(path)
+        self.dim = dim
+        self._rows = {}
+        self._row_count = 0
+        self._matrix = None
+
+        if create:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(b'')
+            return
+
+        table = np.load(ids_path(self.path))
+        self._rows = {int(id_): int(row) for id_, row in table}
+        self._row_count = self.path.stat().st_size // (4 * dim)
+        logger.info("Vektortár betöltve: %d vektor (%s)", len(self._rows), self.path)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, doc_id):
+        return int(doc_id) in self._rows
+
+    def add(self, ids, vectors):
+        """
+        Vektorok hozzáfűzése; létező azonosító esetén az új vektor érvényes.
+
+        Args:
+            ids (iterable): A vektorok azonosítói.
+            vectors (np.ndarray): (len(ids), dim) méretű mátrix.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        with self.path.open('ab') as file:
+            file.write(vectors.tobytes())
+        for offset, id_ in enumerate(ids):
+            self._rows[int(id_)] = self._row_count + offset
+        self._row_count += len(vectors)
+
+    def remove(self, ids):
+        """
+        Azonosítók törlése a táblából.
+
+        Args:
+            ids (iterable): A törlendő azonosítók.
+        """
+        for id_ in ids:
+            self._rows.pop(int(id_), None)
+
+    def get(self, ids):
+        """
+        Vektorok lekérése azonosító szerint.
+
+        Args:
+            ids (iterable): A kért azonosítók.
+
+        Returns:
+            tuple: (vektorok, megtalált) ahol a vektorok (len(ids), dim) méretű
+                float32 mátrix, a megtalált egy bool tömb; a hiányzó sorok nullák.
+        """
+        ids = list(ids)
+        rows = np.array([self._rows.get(int(id_), -1) for id_ in ids], dtype='int64')
+        found = rows >= 0
+        vectors = np.zeros((len(ids), self.dim), dtype='float32')
+        if found.any():
+            vectors[found] = self._vectors()[rows[found]]
+        return vectors, found
+
+    def _vectors(self):
+        """A vektorfájl memóriába leképezve (csak olvasásra)."""
+        if self._matrix is None or self._matrix.shape[0] < self._row_count:
+            self._matrix = np.memmap(self.path, dtype='float32', mode='r',
+                                     shape=(self._row_count, self.dim))
+        return self._matrix
+
+    def _table(self):
+        """Az (id, sor) párok tömbje."""
+        return np.array(list(self._rows.items()), dtype='int64').reshape(-1, 2)
+
+    def flush(self):
+        """Az azonosító-tábla kiírása."""
+        table = self._table()
+        np.save(ids_path(self.path), table)
+        logger.debug("Vektortár mentve: %d vektor --> %s", len(table), self.path)
+
+    def copy(self, path):
+        """
+        A tár másolata új útvonalon; az eredeti fájlok nem változnak.
+
+        A másolat ideiglenes fájlokon keresztül, cserével kerül a helyére, így
+        egy ugyanezt az útvonalat korábban leképező példány sem sérül.
+
+        Args:
+            path (Path): Az új vektorfájl (.f32) útvonala.
+
+        Returns:
+            VectorStore: A másolat.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + '.tmp')
+        shutil.copyfile(self.path, temp_path)
+        temp_table_path = ids_path(path).with_name(ids_path(path).name + '.tmp')
+        with temp_table_path.open('wb') as file:
+            np.save(file, self._table())
+        os.replace(temp_path, path)
+        os.replace(temp_table_path, ids_path(path))
+        logger.debug("Vektortár másolva: %s --> %s", self.path, path)
+        return VectorStore(path, self.dim)